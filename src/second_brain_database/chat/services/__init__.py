@@ -3,13 +3,17 @@
 from .cache_manager import QueryCacheManager
 from .chat_service import ChatService
 from .history_manager import ConversationHistoryManager
+from .semantic_cache import SemanticCacheIndex
 from .statistics_manager import SessionStatisticsManager
 from .vote_manager import MessageVoteManager
+from .write_behind import ChatWriteBehindBuffer
 
 __all__ = [
     "ChatService",
     "ConversationHistoryManager",
     "QueryCacheManager",
+    "SemanticCacheIndex",
     "SessionStatisticsManager",
     "MessageVoteManager",
+    "ChatWriteBehindBuffer",
 ]
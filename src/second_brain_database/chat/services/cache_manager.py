@@ -1,33 +1,76 @@
 """Query cache manager for chat system."""
 
+from collections import OrderedDict
 import hashlib
 import json
-from typing import Dict, Optional
+from typing import Awaitable, Callable, Dict, List, Optional
 
+import numpy as np
+
+from second_brain_database.chat.services.semantic_cache import (
+    SemanticCacheIndex,
+    get_semantic_cache_index,
+)
+from second_brain_database.config import settings
 from second_brain_database.managers.logging_manager import get_logger
-from second_brain_database.managers.redis_manager import RedisManager
+from second_brain_database.managers.redis_manager import RedisManager, redis_manager as default_redis_manager
 
 logger = get_logger()
 
+EmbedFunction = Callable[[str], Awaitable[Optional[List[float]]]]
+
+
+async def _default_embed(query: str) -> Optional[List[float]]:
+    """
+    Embed a query with the shared sentence-transformer model.
+    
+    Returns None while the model is still loading so cache lookups never
+    block on model warm-up.
+    """
+    from second_brain_database.managers.vector_search_manager import vector_search_manager
+    
+    if not vector_search_manager.is_model_ready():
+        return None
+    
+    embeddings = await vector_search_manager.generate_embeddings([query])
+    return embeddings[0] if embeddings else None
+
 
 class QueryCacheManager:
     """
     Manages query response caching to reduce redundant LLM calls.
     
     This manager caches complete query responses (text + metadata) in Redis
-    to avoid re-processing identical queries within a time window.
+    to avoid re-processing identical queries within a time window. When the
+    semantic cache is enabled, paraphrased queries are matched against the
+    embeddings of previously cached queries for the same knowledge base.
     """
 
-    def __init__(self, redis_manager: RedisManager):
+    def __init__(
+        self,
+        redis_manager: RedisManager,
+        semantic_index: Optional[SemanticCacheIndex] = None,
+        embed_fn: Optional[EmbedFunction] = None,
+    ):
         """
         Initialize the query cache manager.
         
         Args:
             redis_manager: Redis manager instance for caching
+            semantic_index: Optional semantic index override (defaults to the
+                process-wide index when the semantic cache is enabled)
+            embed_fn: Optional async function that embeds a query
         """
         self.redis_manager = redis_manager
         self.cache_ttl = 3600  # 1 hour TTL for cached responses
         self.logger = logger
+        self.semantic_enabled = settings.CHAT_ENABLE_SEMANTIC_CACHE
+        self.semantic_index = semantic_index or (
+            get_semantic_cache_index() if self.semantic_enabled else None
+        )
+        self.embed_fn = embed_fn or _default_embed
+        # Embeddings computed on a miss, reused when the response is cached
+        self._pending_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
 
     def _generate_cache_key(self, query: str, kb_id: Optional[str] = None) -> str:
         """
@@ -39,7 +82,7 @@ class QueryCacheManager:
         Args:
             query: The user query text
             kb_id: Optional knowledge base ID for context-specific caching
-            
+        
         Returns:
             Redis cache key in format "chat:cache:{hash}"
         """
@@ -51,16 +94,67 @@ class QueryCacheManager:
         
         return f"chat:cache:{hash_digest}"
 
+    @staticmethod
+    def _kb_members_key(kb_id: Optional[str]) -> str:
+        """Redis set tracking the cache keys stored for a knowledge base."""
+        return f"chat:cache:kb:{kb_id or 'general'}"
+
+    async def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        """Embed and normalize a query, returning None if embedding is unavailable."""
+        try:
+            embedding = await self.embed_fn(query)
+        except Exception as e:
+            self.logger.warning(f"[QueryCacheManager] Query embedding failed: {e}")
+            return None
+        
+        if embedding is None:
+            return None
+        return SemanticCacheIndex.normalize(embedding)
+
+    async def _get_semantic_match(
+        self, query: str, cache_key: str, kb_id: Optional[str]
+    ) -> Optional[Dict]:
+        """Look up a cached response for a semantically similar query."""
+        vector = await self._embed_query(query)
+        if vector is None:
+            return None
+        
+        # Remember the embedding so cache_response doesn't recompute it
+        self._pending_vectors[cache_key] = vector
+        while len(self._pending_vectors) > 32:
+            self._pending_vectors.popitem(last=False)
+        
+        kb_key = kb_id or "general"
+        match = self.semantic_index.search(kb_key, vector)
+        if match is None:
+            return None
+        
+        matched_key, similarity = match
+        cached = await self.redis_manager.get(matched_key)
+        if not cached:
+            # Response expired or the knowledge base was re-indexed
+            self.semantic_index.remove(kb_key, matched_key)
+            return None
+        
+        self.logger.debug(
+            f"[QueryCacheManager] Semantic cache hit for query hash: "
+            f"{cache_key.split(':')[-1][:16]}... (similarity {similarity:.3f})"
+        )
+        return cached if isinstance(cached, dict) else json.loads(cached)
+
     async def get_cached_response(
         self, query: str, kb_id: Optional[str] = None
     ) -> Optional[Dict]:
         """
         Check if query was recently answered and return cached response.
         
+        Exact matches are checked first; on a miss, the semantic index is
+        consulted for a previously answered paraphrase.
+        
         Args:
             query: The user query text
             kb_id: Optional knowledge base ID for context-specific caching
-            
+        
         Returns:
             Cached response dictionary if found, None otherwise
         """
@@ -77,12 +171,17 @@ class QueryCacheManager:
                 # Handle both JSON string and dict responses
                 return cached if isinstance(cached, dict) else json.loads(cached)
             
+            if self.semantic_index is not None:
+                semantic_hit = await self._get_semantic_match(query, cache_key, kb_id)
+                if semantic_hit:
+                    return semantic_hit
+            
             self.logger.debug(
                 f"[QueryCacheManager] Cache miss for query hash: "
                 f"{cache_key.split(':')[-1][:16]}..."
             )
             return None
-            
+        
         except Exception as e:
             self.logger.warning(
                 f"[QueryCacheManager] Failed to retrieve cached response: {e}. "
@@ -110,9 +209,83 @@ class QueryCacheManager:
                 f"[QueryCacheManager] Cached response for query hash: "
                 f"{cache_key.split(':')[-1][:16]}... with TTL {self.cache_ttl}s"
             )
-            
+        
         except Exception as e:
             self.logger.warning(
                 f"[QueryCacheManager] Failed to cache response: {e}. "
                 "Continuing without cache."
             )
+            return
+        
+        if self.semantic_index is None:
+            return
+        
+        try:
+            # Track membership so re-indexing the knowledge base can drop its answers
+            redis_client = await self.redis_manager.get_redis()
+            members_key = self._kb_members_key(kb_id)
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.sadd(members_key, cache_key)
+            pipe.expire(members_key, self.cache_ttl)
+            await pipe.execute()
+            
+            vector = self._pending_vectors.pop(cache_key, None)
+            if vector is None:
+                vector = await self._embed_query(query)
+            if vector is not None:
+                self.semantic_index.add(kb_id or "general", cache_key, vector)
+        
+        except Exception as e:
+            self.logger.warning(
+                f"[QueryCacheManager] Failed to index response for semantic cache: {e}"
+            )
+
+    async def invalidate_knowledge_base(self, kb_id: Optional[str]) -> int:
+        """
+        Drop all cached responses for a knowledge base.
+        
+        Called when the knowledge base is re-indexed so neither exact nor
+        semantic lookups can return answers built from stale content.
+        
+        Args:
+            kb_id: Knowledge base ID (None for general chat)
+        
+        Returns:
+            Number of cached responses removed
+        """
+        members_key = self._kb_members_key(kb_id)
+        
+        if self.semantic_index is not None:
+            self.semantic_index.invalidate(kb_id or "general")
+        
+        try:
+            redis_client = await self.redis_manager.get_redis()
+            cache_keys = await redis_client.smembers(members_key)
+            await redis_client.delete(members_key, *cache_keys)
+            
+            self.logger.info(
+                f"[QueryCacheManager] Invalidated {len(cache_keys)} cached responses "
+                f"for knowledge base {kb_id or 'general'}"
+            )
+            return len(cache_keys)
+        
+        except Exception as e:
+            self.logger.warning(
+                f"[QueryCacheManager] Failed to invalidate knowledge base cache: {e}"
+            )
+            return 0
+
+
+async def invalidate_knowledge_base_cache(kb_id: Optional[str]) -> int:
+    """
+    Invalidate cached chat responses for a knowledge base.
+    
+    Convenience hook for indexing code paths that don't hold a ChatService.
+    
+    Args:
+        kb_id: Knowledge base (document) ID that was re-indexed
+    
+    Returns:
+        Number of cached responses removed
+    """
+    return await QueryCacheManager(redis_manager=default_redis_manager).invalidate_knowledge_base(kb_id)
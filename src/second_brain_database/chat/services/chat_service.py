@@ -13,6 +13,7 @@ from datetime import datetime
 from typing import Any, AsyncGenerator, Dict, List, Optional
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import InsertOne, UpdateOne
 
 from second_brain_database.chat.graphs.general_response_graph import GeneralResponseGraph
 from second_brain_database.chat.graphs.master_workflow_graph import MasterWorkflowGraph
@@ -31,6 +32,7 @@ from second_brain_database.chat.models.request_models import (
 from second_brain_database.chat.services.cache_manager import QueryCacheManager
 from second_brain_database.chat.services.history_manager import ConversationHistoryManager
 from second_brain_database.chat.services.statistics_manager import SessionStatisticsManager
+from second_brain_database.chat.services.write_behind import get_chat_write_behind
 from second_brain_database.chat.utils.logging_utils import (
     log_conversation_history,
     log_session_operation,
@@ -100,10 +102,13 @@ class ChatService:
         self.ollama_manager = OllamaLLMManager(self.settings)
         self.conversation_manager = ConversationHistoryManager(
             redis_manager=redis_manager,
-            max_history=self.settings.CHAT_MAX_HISTORY_LENGTH
+            max_history=self.settings.CHAT_MAX_HISTORY_LENGTH,
+            token_budget=self.settings.CHAT_HISTORY_TOKEN_BUDGET,
+            token_counter=self.ollama_manager.count_tokens
         )
         self.cache_manager = QueryCacheManager(redis_manager=redis_manager)
         self.statistics_manager = SessionStatisticsManager(db=db)
+        self.write_behind = get_chat_write_behind()
         self.metrics_tracker = get_metrics_tracker(redis_manager=redis_manager, db=db)
         
         # Initialize LLM for graphs (without callbacks - will be added per request)
@@ -171,8 +176,10 @@ class ChatService:
                 is_active=True
             )
             
-            # Insert into MongoDB
-            await self.db.chat_sessions.insert_one(session.model_dump())
+            # Insert into MongoDB with zeroed counters for incremental statistics
+            await self.db.chat_sessions.insert_one(
+                {**session.model_dump(), **self.statistics_manager.initial_statistics()}
+            )
             
             # Log session operation
             log_session_operation(
@@ -357,6 +364,9 @@ class ChatService:
             bool: True if deletion was successful, False otherwise
         """
         try:
+            # Persist buffered writes first so they can't recreate deleted documents
+            await self.write_behind.flush()
+            
             # Delete all messages for the session
             messages_result = await self.db.chat_messages.delete_many(
                 {"session_id": session_id}
@@ -394,7 +404,7 @@ class ChatService:
         Args:
             session_id: ID of the session
             max_messages: Optional override for max history length.
-                         If None, uses settings default (20).
+                         If None, uses the token-budgeted window.
             
         Returns:
             List of message dictionaries with 'role' and 'content' keys,
@@ -446,15 +456,20 @@ class ChatService:
         
         This method orchestrates the complete chat flow:
         1. Save user message to MongoDB with PENDING status
-        2. Load conversation history (last 20 messages)
+        2. Load conversation history (newest messages within the token budget)
         3. Initialize Ollama LLM with token tracking callback
         4. Call MasterWorkflowGraph.astream() with query, history, kb_id
         5. Yield tokens from graph execution
         6. Collect tokens for final assistant message
         7. Save assistant message with COMPLETED status
         8. Track token usage in TokenUsage collection
-        9. Update session statistics
-        10. Invalidate conversation history cache
+        9. Update session statistics (incremental counters)
+        10. Append the reply to the cached conversation history
+        
+        The user message is written directly so history reloads see it. Assistant
+        message writes (placeholder, checkpoints, final), token usage and statistics
+        go through the write-behind buffer and are flushed in batches, so readers of
+        chat_messages may lag by up to CHAT_WRITE_BEHIND_FLUSH_INTERVAL.
         
         Args:
             session_id: ID of the chat session
@@ -472,8 +487,12 @@ class ChatService:
         """
         user_message_id = None
         assistant_message_id = None
+        assistant_message = None
         collected_tokens = []
         stream_start_time = time.time()
+        checkpoint_interval = self.settings.CHAT_STREAM_CHECKPOINT_INTERVAL
+        last_checkpoint = stream_start_time
+        exchange_recorded = False
         
         try:
             # Track message for metrics
@@ -495,12 +514,15 @@ class ChatService:
             )
             
             await self.db.chat_messages.insert_one(user_message.model_dump())
+            await self.conversation_manager.append_message(
+                session_id, MessageRole.USER.value, message.content
+            )
             
             logger.info(
                 f"Saved user message {user_message_id} for session {session_id}"
             )
             
-            # 2. Load conversation history (last 20 messages)
+            # 2. Load conversation history (newest messages within the token budget)
             conversation_history = await self.get_conversation_history(session_id)
             
             logger.debug(
@@ -524,7 +546,9 @@ class ChatService:
                 updated_at=datetime.utcnow()
             )
             
-            await self.db.chat_messages.insert_one(assistant_message.model_dump())
+            await self.write_behind.put_document(
+                self.db.chat_messages, assistant_message.model_dump()
+            )
             
             # Yield message ID at start
             yield {"type": "start", "message_id": assistant_message_id}
@@ -559,6 +583,15 @@ class ChatService:
                 elif isinstance(chunk, dict) and chunk.get("type") == "progress":
                     # Progress indicators don't need to be collected
                     pass
+                
+                # Checkpoint partial content; coalesced with later versions in the buffer
+                if checkpoint_interval > 0 and time.time() - last_checkpoint >= checkpoint_interval:
+                    last_checkpoint = time.time()
+                    assistant_message.content = "".join(collected_tokens)
+                    assistant_message.updated_at = datetime.utcnow()
+                    await self.write_behind.put_document(
+                        self.db.chat_messages, assistant_message.model_dump()
+                    )
             
             # 7. Collect tokens for final assistant message
             final_content = "".join(collected_tokens) if collected_tokens else ""
@@ -570,15 +603,12 @@ class ChatService:
                 )
             
             # 8. Save assistant message with COMPLETED status
-            await self.db.chat_messages.update_one(
-                {"id": assistant_message_id},
-                {
-                    "$set": {
-                        "content": final_content,
-                        "status": MessageStatus.COMPLETED,
-                        "updated_at": datetime.utcnow()
-                    }
-                }
+            completed_at = datetime.utcnow()
+            assistant_message.content = final_content
+            assistant_message.status = MessageStatus.COMPLETED
+            assistant_message.updated_at = completed_at
+            await self.write_behind.put_document(
+                self.db.chat_messages, assistant_message.model_dump()
             )
             
             logger.info(
@@ -609,7 +639,9 @@ class ChatService:
                 created_at=datetime.utcnow()
             )
             
-            await self.db.token_usage.insert_one(token_usage.model_dump())
+            await self.write_behind.put_operation(
+                self.db.token_usage, InsertOne(token_usage.model_dump())
+            )
             
             # Log token usage
             log_token_usage(
@@ -637,11 +669,24 @@ class ChatService:
                 f"(prompt: {prompt_tokens}, completion: {completion_tokens})"
             )
             
-            # 10. Update session statistics
-            await self.statistics_manager.update_session_statistics(session_id)
+            # 10. Update session statistics incrementally
+            await self.write_behind.put_operation(
+                self.db.chat_sessions,
+                UpdateOne(*self.statistics_manager.build_exchange_update(
+                    session_id=session_id,
+                    user_message_at=now,
+                    completed_at=completed_at,
+                    total_tokens=total_tokens,
+                    cost=cost,
+                    response_time=(completed_at - now).total_seconds()
+                ))
+            )
+            exchange_recorded = True
             
-            # 11. Invalidate conversation history cache
-            await self.conversation_manager.invalidate_cache(session_id)
+            # 11. Append the reply to the cached conversation history
+            await self.conversation_manager.append_message(
+                session_id, MessageRole.ASSISTANT.value, final_content
+            )
             
             # Track response time metrics
             response_time = time.time() - stream_start_time
@@ -684,22 +729,37 @@ class ChatService:
             )
             
             # Update assistant message status to FAILED if it was created
-            if assistant_message_id:
+            if assistant_message is not None:
                 try:
-                    await self.db.chat_messages.update_one(
-                        {"id": assistant_message_id},
-                        {
-                            "$set": {
-                                "status": MessageStatus.FAILED,
-                                "content": (
-                                    "I apologize, but an error occurred while "
-                                    "generating the response. Please try again."
-                                ),
-                                "updated_at": datetime.utcnow()
-                            }
-                        }
-                    )
-                    logger.info(f"Updated message {assistant_message_id} to FAILED status")
+                    # A reply that was already completed is kept; only the
+                    # failing follow-up step (e.g. cache append) is reported
+                    if assistant_message.status != MessageStatus.COMPLETED:
+                        # Goes through the buffer so it can't be overtaken by a queued checkpoint
+                        assistant_message.status = MessageStatus.FAILED
+                        assistant_message.content = (
+                            "I apologize, but an error occurred while "
+                            "generating the response. Please try again."
+                        )
+                        assistant_message.updated_at = datetime.utcnow()
+                        await self.write_behind.put_document(
+                            self.db.chat_messages, assistant_message.model_dump()
+                        )
+                        logger.info(f"Updated message {assistant_message_id} to FAILED status")
+                    
+                    # Both messages exist, so count them (once) without a response time
+                    if not exchange_recorded:
+                        await self.write_behind.put_operation(
+                            self.db.chat_sessions,
+                            UpdateOne(*self.statistics_manager.build_exchange_update(
+                                session_id=session_id,
+                                user_message_at=now,
+                                completed_at=assistant_message.updated_at
+                            ))
+                        )
+                        exchange_recorded = True
+                    
+                    # The cached history can't express the failed reply; rebuild it
+                    await self.conversation_manager.invalidate_cache(session_id)
                 except Exception as update_error:
                     logger.error(
                         f"Failed to update message status to FAILED: {update_error}"
@@ -1,7 +1,7 @@
 """Conversation history manager for chat system."""
 
 import json
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
@@ -15,31 +15,89 @@ class ConversationHistoryManager:
     """
     Manages conversation history with sliding window and Redis caching.
     
-    This manager retrieves recent conversation history from MongoDB,
-    caches it in Redis for performance, and formats it for LLM consumption.
+    History is kept in Redis as a capped, append-only list per session
+    (RPUSH + LTRIM), appended to as messages are saved so the next turn
+    never has to reload from MongoDB. If the list is evicted or expires it
+    is lazily rebuilt from MongoDB on the next read. The window handed to
+    the LLM is the newest messages that fit within the token budget.
     """
 
-    def __init__(self, redis_manager: RedisManager, max_history: int = 20):
+    def __init__(
+        self,
+        redis_manager: RedisManager,
+        max_history: int = 20,
+        token_budget: Optional[int] = None,
+        token_counter: Optional[Callable[[str], int]] = None,
+    ):
         """
         Initialize the conversation history manager.
         
         Args:
             redis_manager: Redis manager instance for caching
-            max_history: Maximum number of messages to retrieve (default: 20)
+            max_history: Maximum number of messages kept in the cached list
+                and returned in the window (default: 20)
+            token_budget: Optional token budget for the returned window
+            token_counter: Optional function returning the token count of a
+                message; defaults to a ~4 characters per token estimate
         """
         self.redis_manager = redis_manager
         self.max_history = max_history
+        self.token_budget = token_budget
+        self.token_counter = token_counter or self._estimate_tokens
         self.cache_ttl = 3600  # 1 hour TTL for Redis cache
         self.logger = logger
 
+    @staticmethod
+    def _cache_key(session_id: str) -> str:
+        """Redis list key holding a session's cached history."""
+        return f"chat:history:{session_id}"
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Rough token estimate used when no tokenizer is supplied."""
+        return len(text) // 4 + 1
+
+    def _make_entry(self, role: str, content: str) -> Dict:
+        """Build a cached history entry with its token count."""
+        return {"role": role, "content": content, "tokens": self.token_counter(content)}
+
+    def _apply_window(self, entries: List[Dict]) -> List[Dict[str, str]]:
+        """
+        Select the newest messages that fit within the token budget.
+        
+        The newest message is always included, even if it alone exceeds the
+        budget, so the current question is never dropped.
+        
+        Args:
+            entries: Cached entries ordered from oldest to newest
+            
+        Returns:
+            List of message dictionaries with 'role' and 'content' keys
+        """
+        entries = entries[-self.max_history:]
+        
+        if self.token_budget is not None:
+            used = 0
+            start = len(entries)
+            while start > 0:
+                tokens = entries[start - 1].get("tokens") or self.token_counter(entries[start - 1]["content"])
+                if used + tokens > self.token_budget and start < len(entries):
+                    break
+                used += tokens
+                start -= 1
+            entries = entries[start:]
+        
+        return [{"role": entry["role"], "content": entry["content"]} for entry in entries]
+
     async def get_history(
         self, session_id: str, db: AsyncIOMotorDatabase
     ) -> List[Dict[str, str]]:
         """
         Get conversation history with Redis caching.
         
-        This method first checks Redis cache for the conversation history.
-        If not found, it loads from MongoDB, caches the result, and returns it.
+        This method reads the session's cached history list from Redis. If the
+        list is missing (new session, eviction or expiry), it loads from
+        MongoDB, rebuilds the list, and returns the result.
         
         Args:
             session_id: The chat session ID
@@ -47,16 +105,18 @@ class ConversationHistoryManager:
             
         Returns:
             List of message dictionaries with 'role' and 'content' keys,
-            ordered from oldest to newest (last max_history messages)
+            ordered from oldest to newest (newest messages within the
+            token budget, at most max_history)
         """
-        # 1. Check Redis cache
-        cache_key = f"chat:history:{session_id}"
+        # 1. Check Redis list
+        cache_key = self._cache_key(session_id)
         
         try:
-            cached = await self.redis_manager.get(cache_key)
+            redis_client = await self.redis_manager.get_redis()
+            cached = await redis_client.lrange(cache_key, -self.max_history, -1)
             if cached:
                 self.logger.debug(f"[ConversationHistoryManager] Cache hit for session {session_id}")
-                return cached if isinstance(cached, list) else json.loads(cached)
+                return self._apply_window([json.loads(entry) for entry in cached])
         except Exception as e:
             self.logger.warning(
                 f"[ConversationHistoryManager] Failed to retrieve from cache: {e}. "
@@ -71,30 +131,37 @@ class ConversationHistoryManager:
             ).sort("created_at", -1).limit(self.max_history).to_list(None)
             
             # 3. Format and reverse (oldest first for conversation flow)
-            history = [
-                {"role": msg["role"], "content": msg["content"]}
+            entries = [
+                self._make_entry(msg["role"], msg["content"])
                 for msg in reversed(messages)
             ]
             
             self.logger.debug(
-                f"[ConversationHistoryManager] Loaded {len(history)} messages "
+                f"[ConversationHistoryManager] Loaded {len(entries)} messages "
                 f"from database for session {session_id}"
             )
             
-            # 4. Cache in Redis
-            try:
-                await self.redis_manager.set_json(cache_key, history, expiry=self.cache_ttl)
-                self.logger.debug(
-                    f"[ConversationHistoryManager] Cached history for session {session_id} "
-                    f"with TTL {self.cache_ttl}s"
-                )
-            except Exception as e:
-                self.logger.warning(
-                    f"[ConversationHistoryManager] Failed to cache history: {e}. "
-                    "Continuing without cache."
-                )
+            # 4. Rebuild the Redis list atomically
+            if entries:
+                try:
+                    redis_client = await self.redis_manager.get_redis()
+                    pipe = redis_client.pipeline(transaction=True)
+                    pipe.delete(cache_key)
+                    pipe.rpush(cache_key, *[json.dumps(entry) for entry in entries])
+                    pipe.ltrim(cache_key, -self.max_history, -1)
+                    pipe.expire(cache_key, self.cache_ttl)
+                    await pipe.execute()
+                    self.logger.debug(
+                        f"[ConversationHistoryManager] Rebuilt cached history for session {session_id} "
+                        f"with TTL {self.cache_ttl}s"
+                    )
+                except Exception as e:
+                    self.logger.warning(
+                        f"[ConversationHistoryManager] Failed to cache history: {e}. "
+                        "Continuing without cache."
+                    )
             
-            return history
+            return self._apply_window(entries)
             
         except Exception as e:
             self.logger.error(
@@ -105,17 +172,46 @@ class ConversationHistoryManager:
             # Return empty history on error to allow conversation to continue
             return []
 
+    async def append_message(self, session_id: str, role: str, content: str) -> None:
+        """
+        Append a saved message to the cached history list.
+        
+        Uses RPUSHX so nothing is written when the list does not exist; a
+        partial list would otherwise hide older messages. The next read then
+        rebuilds the full list from MongoDB.
+        
+        Args:
+            session_id: The chat session ID
+            role: Message role
+            content: Message content
+        """
+        cache_key = self._cache_key(session_id)
+        
+        try:
+            redis_client = await self.redis_manager.get_redis()
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.rpushx(cache_key, json.dumps(self._make_entry(role, content)))
+            pipe.ltrim(cache_key, -self.max_history, -1)
+            pipe.expire(cache_key, self.cache_ttl)
+            await pipe.execute()
+        except Exception as e:
+            self.logger.warning(
+                f"[ConversationHistoryManager] Failed to append to cached history "
+                f"for session {session_id}: {e}. Dropping cache."
+            )
+            await self.invalidate_cache(session_id)
+
     async def invalidate_cache(self, session_id: str) -> None:
         """
-        Invalidate cache when new message is added.
+        Drop the cached history list for a session.
         
-        This should be called after adding a new message to ensure
-        the next history retrieval gets fresh data.
+        Used when history changes in ways appends can't express (session
+        deletion, failed generations); the next read rebuilds from MongoDB.
         
         Args:
             session_id: The chat session ID
         """
-        cache_key = f"chat:history:{session_id}"
+        cache_key = self._cache_key(session_id)
         
         try:
             await self.redis_manager.delete(cache_key)
@@ -0,0 +1,164 @@
+"""Semantic (embedding-similarity) index for the chat query cache."""
+
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from second_brain_database.config import settings
+from second_brain_database.managers.logging_manager import get_logger
+
+logger = get_logger()
+
+
+class _KnowledgeBaseIndex:
+    """
+    Small in-process vector index for one knowledge base.
+
+    Entries map a normalized query embedding to the exact-match cache key of
+    the response it produced. The index is capped and evicts least recently
+    used entries; searches are a single matrix-vector product, which beats an
+    approximate graph index at this size.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, cache_key: str, vector: np.ndarray) -> None:
+        self._entries[cache_key] = vector
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._matrix = None
+
+    def remove(self, cache_key: str) -> None:
+        if self._entries.pop(cache_key, None) is not None:
+            self._matrix = None
+
+    def search(self, vector: np.ndarray) -> Optional[Tuple[str, float]]:
+        if not self._entries:
+            return None
+
+        if self._matrix is None:
+            self._keys = list(self._entries.keys())
+            self._matrix = np.vstack([self._entries[key] for key in self._keys])
+
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        cache_key = self._keys[best]
+
+        # Touch for LRU without invalidating the matrix (order is not used for search)
+        self._entries.move_to_end(cache_key)
+        return cache_key, float(scores[best])
+
+
+class SemanticCacheIndex:
+    """
+    Per-knowledge-base semantic lookup for cached chat responses.
+
+    The index only stores embeddings and pointers to exact-match cache keys;
+    the responses themselves stay in Redis with their normal TTL. A pointer
+    whose Redis entry has expired or been invalidated is treated as a miss
+    and pruned by the caller, so workers never serve stale answers even
+    though each keeps its own index.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries_per_kb: int = 500,
+        max_knowledge_bases: int = 100,
+    ):
+        """
+        Initialize the semantic cache index.
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a hit
+            max_entries_per_kb: Maximum embeddings kept per knowledge base
+            max_knowledge_bases: Maximum knowledge base indexes kept in memory
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_kb = max_entries_per_kb
+        self.max_knowledge_bases = max_knowledge_bases
+        self._indexes: "OrderedDict[str, _KnowledgeBaseIndex]" = OrderedDict()
+
+    @staticmethod
+    def normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if vector.ndim != 1 or norm == 0.0:
+            return None
+        return vector / norm
+
+    def search(self, kb_key: str, vector: np.ndarray) -> Optional[Tuple[str, float]]:
+        """
+        Find the closest cached query for a knowledge base.
+
+        Args:
+            kb_key: Knowledge base identifier ("general" for non-KB chats)
+            vector: Normalized query embedding
+
+        Returns:
+            Tuple of (cache_key, similarity) if above threshold, None otherwise
+        """
+        index = self._indexes.get(kb_key)
+        if index is None:
+            return None
+
+        self._indexes.move_to_end(kb_key)
+        match = index.search(vector)
+        if match is None or match[1] < self.similarity_threshold:
+            return None
+        return match
+
+    def add(self, kb_key: str, cache_key: str, vector: np.ndarray) -> None:
+        """Register a cached response's query embedding."""
+        index = self._indexes.get(kb_key)
+        if index is None:
+            index = _KnowledgeBaseIndex(self.max_entries_per_kb)
+            self._indexes[kb_key] = index
+            while len(self._indexes) > self.max_knowledge_bases:
+                self._indexes.popitem(last=False)
+
+        self._indexes.move_to_end(kb_key)
+        index.add(cache_key, vector)
+
+    def remove(self, kb_key: str, cache_key: str) -> None:
+        """Drop a single entry, e.g. after its Redis response expired."""
+        index = self._indexes.get(kb_key)
+        if index is not None:
+            index.remove(cache_key)
+
+    def invalidate(self, kb_key: str) -> None:
+        """Drop the whole index for a knowledge base."""
+        if self._indexes.pop(kb_key, None) is not None:
+            logger.debug(f"[SemanticCacheIndex] Invalidated semantic index for {kb_key}")
+
+
+_semantic_cache_index: Optional[SemanticCacheIndex] = None
+
+
+def get_semantic_cache_index() -> SemanticCacheIndex:
+    """
+    Get the process-wide semantic cache index.
+
+    ChatService (and therefore QueryCacheManager) is built per request, so the
+    index lives at module level to persist across requests in a worker.
+    """
+    global _semantic_cache_index
+
+    if _semantic_cache_index is None:
+        _semantic_cache_index = SemanticCacheIndex(
+            similarity_threshold=settings.CHAT_SEMANTIC_CACHE_THRESHOLD,
+            max_entries_per_kb=settings.CHAT_SEMANTIC_CACHE_MAX_ENTRIES,
+            max_knowledge_bases=settings.CHAT_SEMANTIC_CACHE_MAX_KNOWLEDGE_BASES,
+        )
+
+    return _semantic_cache_index
@@ -1,10 +1,12 @@
 """Session statistics manager for chat system."""
 
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from second_brain_database.chat.models.enums import MessageRole
+
 
 class SessionStatisticsManager:
     """Manager for calculating and updating session statistics."""
@@ -52,6 +54,8 @@ class SessionStatisticsManager:
                 "conversation_duration": 0.0,
                 "user_messages": 0,
                 "assistant_messages": 0,
+                "response_count": 0,
+                "first_message_at": None,
             }
 
         # Get token usage for all messages
@@ -63,13 +67,19 @@ class SessionStatisticsManager:
         total_tokens = sum(t["total_tokens"] for t in token_usage)
         total_cost = sum(t["cost"] for t in token_usage)
 
-        # Calculate response times (time between user and assistant messages)
+        # Roles are stored as MessageRole values ("USER"); older documents
+        # may carry lowercase roles
+        roles = [m["role"].upper() for m in messages]
+        user_role = MessageRole.USER.value
+        assistant_role = MessageRole.ASSISTANT.value
+
+        # Calculate response times (time between a user message and the
+        # completion of the assistant reply, matching build_exchange_update)
         response_times = []
         for i in range(len(messages) - 1):
-            if messages[i]["role"] == "user" and messages[i + 1]["role"] == "assistant":
-                time_diff = (
-                    messages[i + 1]["created_at"] - messages[i]["created_at"]
-                ).total_seconds()
+            if roles[i] == user_role and roles[i + 1] == assistant_role:
+                completed_at = messages[i + 1].get("updated_at") or messages[i + 1]["created_at"]
+                time_diff = (completed_at - messages[i]["created_at"]).total_seconds()
                 response_times.append(time_diff)
 
         avg_response_time = (
@@ -82,8 +92,8 @@ class SessionStatisticsManager:
         conversation_duration = (last_message - first_message).total_seconds()
 
         # Count messages by role
-        user_messages = sum(1 for m in messages if m["role"] == "user")
-        assistant_messages = sum(1 for m in messages if m["role"] == "assistant")
+        user_messages = roles.count(user_role)
+        assistant_messages = roles.count(assistant_role)
 
         return {
             "message_count": len(messages),
@@ -94,10 +104,16 @@ class SessionStatisticsManager:
             "conversation_duration": conversation_duration,
             "user_messages": user_messages,
             "assistant_messages": assistant_messages,
+            "response_count": len(response_times),
+            "first_message_at": first_message,
         }
 
     async def update_session_statistics(self, session_id: str) -> Dict:
-        """Update session with calculated statistics.
+        """Recompute session statistics from scratch and store them.
+
+        This scans every message and token usage record of the session, so it
+        is meant for backfills and repairs. The chat request path keeps the
+        stored counters current with build_exchange_update instead.
 
         Args:
             session_id: ID of the chat session
@@ -115,6 +131,11 @@ class SessionStatisticsManager:
                     "total_tokens": stats["total_tokens"],
                     "total_cost": stats["total_cost"],
                     "last_message_at": stats["last_message_at"],
+                    "first_message_at": stats["first_message_at"],
+                    "user_messages": stats["user_messages"],
+                    "assistant_messages": stats["assistant_messages"],
+                    "response_count": stats["response_count"],
+                    "average_response_time": stats["average_response_time"],
                     "updated_at": datetime.utcnow(),
                 }
             },
@@ -122,6 +143,153 @@ class SessionStatisticsManager:
 
         return stats
 
+    def build_exchange_update(
+        self,
+        session_id: str,
+        user_message_at: datetime,
+        completed_at: datetime,
+        total_tokens: int = 0,
+        cost: float = 0.0,
+        response_time: Optional[float] = None,
+    ) -> Tuple[Dict, List[Dict]]:
+        """Build the update that folds one exchange into the session statistics.
+
+        Counters are applied in a single pipeline-style update so the cost is
+        constant regardless of session length. Message counts and token/cost
+        sums are incremented, the first/last message timestamps are widened
+        with $min/$max, and the average response time is maintained as an
+        online mean over response_count.
+
+        Only sessions that already carry the counters are matched. Sessions
+        created before the counters were maintained incrementally are left
+        alone, so they are still recognised (and recomputed from their
+        messages) by get_session_statistics instead of being seeded with
+        partial counts.
+
+        Args:
+            session_id: ID of the chat session
+            user_message_at: Creation time of the user message
+            completed_at: Time the assistant message was finalized
+            total_tokens: Tokens used by the exchange
+            cost: Cost of the exchange
+            response_time: Seconds between the user message and completion.
+                If None (e.g. failed generation), the mean is left unchanged.
+
+        Returns:
+            Tuple of (filter, update pipeline) for update_one or UpdateOne
+        """
+
+        def _field(name: str, default):
+            return {"$ifNull": [f"${name}", default]}
+
+        counters = {
+            "message_count": {"$add": [_field("message_count", 0), 2]},
+            "user_messages": {"$add": [_field("user_messages", 0), 1]},
+            "assistant_messages": {"$add": [_field("assistant_messages", 0), 1]},
+            "total_tokens": {"$add": [_field("total_tokens", 0), total_tokens]},
+            "total_cost": {"$add": [_field("total_cost", 0.0), cost]},
+            "first_message_at": {"$min": ["$first_message_at", user_message_at]},
+            "last_message_at": {"$max": ["$last_message_at", completed_at]},
+            "updated_at": datetime.utcnow(),
+        }
+        pipeline = [{"$set": counters}]
+
+        if response_time is not None:
+            # Online mean: avg += (x - avg) / n, using the incremented count
+            average = _field("average_response_time", 0.0)
+            counters["response_count"] = {"$add": [_field("response_count", 0), 1]}
+            pipeline.append(
+                {
+                    "$set": {
+                        "average_response_time": {
+                            "$add": [
+                                average,
+                                {
+                                    "$divide": [
+                                        {"$subtract": [response_time, average]},
+                                        "$response_count",
+                                    ]
+                                },
+                            ]
+                        }
+                    }
+                }
+            )
+
+        return {"id": session_id, "user_messages": {"$exists": True}}, pipeline
+
+    @staticmethod
+    def initial_statistics() -> Dict:
+        """Counters to store on a new session so exchanges can be folded in.
+
+        Returns:
+            Dictionary of statistics fields for an empty session
+        """
+        return {
+            "first_message_at": None,
+            "user_messages": 0,
+            "assistant_messages": 0,
+            "response_count": 0,
+            "average_response_time": 0.0,
+        }
+
+    async def get_session_statistics(self, session_id: str) -> Optional[Dict]:
+        """Read the maintained statistics for a session.
+
+        Sessions created before the counters were maintained incrementally
+        have no user_messages field; those are recomputed and stored once, so
+        later reads use the counters.
+
+        Args:
+            session_id: ID of the chat session
+
+        Returns:
+            Statistics dictionary (same shape as calculate_session_statistics),
+            or None if the session does not exist
+        """
+        session = await self.sessions_collection.find_one(
+            {"id": session_id},
+            {
+                "_id": 0,
+                "message_count": 1,
+                "total_tokens": 1,
+                "total_cost": 1,
+                "first_message_at": 1,
+                "last_message_at": 1,
+                "user_messages": 1,
+                "assistant_messages": 1,
+                "response_count": 1,
+                "average_response_time": 1,
+            },
+        )
+
+        if session is None:
+            return None
+
+        if "user_messages" not in session:
+            return await self.update_session_statistics(session_id)
+
+        first_message_at = session.get("first_message_at")
+        last_message_at = session.get("last_message_at")
+        conversation_duration = (
+            (last_message_at - first_message_at).total_seconds()
+            if first_message_at and last_message_at
+            else 0.0
+        )
+
+        return {
+            "message_count": session.get("message_count", 0),
+            "total_tokens": session.get("total_tokens", 0),
+            "total_cost": session.get("total_cost", 0.0),
+            "last_message_at": last_message_at,
+            "average_response_time": session.get("average_response_time", 0.0),
+            "conversation_duration": conversation_duration,
+            "user_messages": session.get("user_messages", 0),
+            "assistant_messages": session.get("assistant_messages", 0),
+            "response_count": session.get("response_count", 0),
+            "first_message_at": first_message_at,
+        }
+
     async def generate_session_title(
         self, session_id: str, first_message: str
     ) -> str:
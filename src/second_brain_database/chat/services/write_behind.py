@@ -0,0 +1,268 @@
+"""Write-behind buffer for chat persistence.
+
+Streaming a chat reply produces several small MongoDB writes (message
+placeholders, the final message, token usage and session statistics). This
+module batches them off the request path into periodic ``bulk_write`` calls.
+
+Message documents are coalesced by ID, so a placeholder, any partial-content
+checkpoints and the final message collapse into a single upsert when they
+land in the same flush window. Other operations are applied in submission
+order per collection. The buffer is flushed when the application shuts
+down; if it is not running (e.g. in scripts or tests), writes go straight
+to MongoDB.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from second_brain_database.config import settings
+from second_brain_database.managers.logging_manager import get_logger
+
+logger = get_logger()
+
+
+class ChatWriteBehindBuffer:
+    """
+    Batches chat persistence writes into periodic bulk writes.
+
+    Attributes:
+        flush_interval: Seconds between background flushes
+        max_batch_size: Pending write count that triggers an early flush
+        max_retries: Flush attempts before a failing batch is dropped
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 0.5,
+        max_batch_size: int = 500,
+        max_retries: int = 3,
+    ):
+        """
+        Initialize the write-behind buffer.
+
+        Args:
+            flush_interval: Seconds between background flushes
+            max_batch_size: Pending write count that triggers an early flush
+            max_retries: Flush attempts before a failing batch is dropped
+        """
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+
+        self._collections: Dict[str, AsyncIOMotorCollection] = {}
+        self._documents: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._operations: Dict[str, List[Any]] = {}
+        self._pending = 0
+        self._failed_attempts: Dict[str, int] = {}
+
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background flusher is active."""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        """Number of writes waiting to be flushed."""
+        return self._pending
+
+    async def start(self) -> None:
+        """Start the background flush loop."""
+        if self.running:
+            return
+
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"[ChatWriteBehind] Started (interval: {self.flush_interval}s, " f"max batch: {self.max_batch_size})"
+        )
+
+    async def stop(self) -> None:
+        """Stop the flush loop and persist everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        flushed = await self.flush()
+        logger.info(f"[ChatWriteBehind] Stopped, flushed {flushed} pending writes")
+
+    async def put_document(self, collection: AsyncIOMotorCollection, document: Dict[str, Any]) -> None:
+        """
+        Upsert a full document keyed by its ``id`` field.
+
+        Later submissions for the same ID replace earlier ones still in the
+        buffer, so only the newest version is written.
+
+        Args:
+            collection: Target collection
+            document: Complete document with an ``id`` field
+        """
+        if not self.running:
+            await collection.replace_one({"id": document["id"]}, document, upsert=True)
+            return
+
+        key = (collection.name, document["id"])
+        self._collections[collection.name] = collection
+        if key not in self._documents:
+            self._pending += 1
+        self._documents[key] = document
+        self._maybe_wake()
+
+    async def put_operation(self, collection: AsyncIOMotorCollection, operation: Any) -> None:
+        """
+        Queue a pymongo write operation (InsertOne, UpdateOne, ...).
+
+        Args:
+            collection: Target collection
+            operation: pymongo bulk write operation
+        """
+        if not self.running:
+            await collection.bulk_write([operation], ordered=True)
+            return
+
+        self._collections[collection.name] = collection
+        self._operations.setdefault(collection.name, []).append(operation)
+        self._pending += 1
+        self._maybe_wake()
+
+    async def flush(self) -> int:
+        """
+        Write all buffered operations to MongoDB.
+
+        Returns:
+            Number of operations written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            documents, self._documents = self._documents, OrderedDict()
+            operations, self._operations = self._operations, {}
+            self._pending = 0
+
+            batches: Dict[str, Tuple[List[Tuple[Tuple[str, str], Dict[str, Any]]], List[Any]]] = {}
+            for key, document in documents.items():
+                batches.setdefault(key[0], ([], []))[0].append((key, document))
+            for collection_name, ops in operations.items():
+                batches.setdefault(collection_name, ([], []))[1].extend(ops)
+
+            written = 0
+            for collection_name, (docs, ops) in batches.items():
+                written += await self._write_batch(collection_name, docs, ops)
+
+            return written
+
+    async def _write_batch(
+        self,
+        collection_name: str,
+        docs: List[Tuple[Tuple[str, str], Dict[str, Any]]],
+        ops: List[Any],
+    ) -> int:
+        """Bulk write one collection's documents then operations, requeueing on failure."""
+        collection = self._collections[collection_name]
+        requests = [ReplaceOne({"id": key[1]}, document, upsert=True) for key, document in docs] + ops
+
+        try:
+            await collection.bulk_write(requests, ordered=True)
+            self._failed_attempts.pop(collection_name, None)
+            return len(requests)
+
+        except BulkWriteError as e:
+            # Ordered bulk writes stop at the first error; skip the bad op
+            write_errors = e.details.get("writeErrors", [])
+            failed_index = write_errors[0]["index"] if write_errors else len(requests) - 1
+            logger.error(
+                f"[ChatWriteBehind] Dropped write to {collection_name} at index "
+                f"{failed_index}: {write_errors[0].get('errmsg') if write_errors else e}"
+            )
+            resume = failed_index + 1
+            self._requeue(collection_name, docs[resume:], ops[max(resume - len(docs), 0) :])
+            return failed_index
+
+        except Exception as e:
+            attempts = self._failed_attempts.get(collection_name, 0) + 1
+            if attempts >= self.max_retries:
+                logger.error(
+                    f"[ChatWriteBehind] Dropping {len(requests)} writes to {collection_name} "
+                    f"after {attempts} failed flushes: {e}",
+                    exc_info=True,
+                )
+                self._failed_attempts.pop(collection_name, None)
+            else:
+                logger.warning(f"[ChatWriteBehind] Flush to {collection_name} failed, will retry: {e}")
+                self._failed_attempts[collection_name] = attempts
+                self._requeue(collection_name, docs, ops)
+            return 0
+
+    def _requeue(
+        self,
+        collection_name: str,
+        docs: List[Tuple[Tuple[str, str], Dict[str, Any]]],
+        ops: List[Any],
+    ) -> None:
+        """
+        Put unwritten writes back in front of newer ones.
+
+        Documents go back into the coalescing buffer unless a newer version
+        was submitted during the failed flush, so a stale version never
+        overwrites it. Flushes still write documents before operations, which
+        keeps requeued operations behind the documents they followed.
+        """
+        stale = [(key, document) for key, document in docs if key not in self._documents]
+        if stale:
+            self._documents = OrderedDict(stale + list(self._documents.items()))
+        if ops:
+            self._operations[collection_name] = ops + self._operations.get(collection_name, [])
+        self._pending += len(stale) + len(ops)
+
+    def _maybe_wake(self) -> None:
+        """Trigger an early flush once the buffer reaches the batch size."""
+        if self._pending >= self.max_batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        """Background loop flushing on interval or when the batch fills."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"[ChatWriteBehind] Unexpected flush error: {e}", exc_info=True)
+
+
+_chat_write_behind: Optional[ChatWriteBehindBuffer] = None
+
+
+def get_chat_write_behind() -> ChatWriteBehindBuffer:
+    """
+    Get the process-wide chat write-behind buffer.
+
+    Returns:
+        ChatWriteBehindBuffer singleton
+    """
+    global _chat_write_behind
+
+    if _chat_write_behind is None:
+        _chat_write_behind = ChatWriteBehindBuffer(
+            flush_interval=settings.CHAT_WRITE_BEHIND_FLUSH_INTERVAL,
+            max_batch_size=settings.CHAT_WRITE_BEHIND_MAX_BATCH,
+        )
+
+    return _chat_write_behind
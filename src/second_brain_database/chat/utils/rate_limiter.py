@@ -5,10 +5,10 @@ Redis-based distributed rate limiting for chat operations using sliding window a
 Prevents abuse and ensures fair resource usage across all server instances.
 """
 
-import time
 from typing import Dict, Optional
 from dataclasses import dataclass
 
+from second_brain_database.managers.rate_limit_manager import RedisRateLimiter
 from second_brain_database.managers.redis_manager import RedisManager
 from second_brain_database.managers.logging_manager import get_logger
 from second_brain_database.config import settings
@@ -47,7 +47,7 @@ class ChatRateLimiter:
     - Member: Unique request ID (timestamp + random)
     - Score: Timestamp in milliseconds
 
-    The sliding window algorithm:
+    The sliding window algorithm runs atomically in one Lua script:
     1. Remove entries older than the window
     2. Count remaining entries
     3. If count < limit, allow and add new entry
@@ -62,6 +62,7 @@ class ChatRateLimiter:
             redis_manager: RedisManager instance for Redis operations
         """
         self.redis = redis_manager
+        self.limiter = RedisRateLimiter(redis_manager)
         self.RATE_LIMIT_PREFIX = "chat:ratelimit:"
 
         # Rate limit configurations from settings
@@ -81,6 +82,7 @@ class ChatRateLimiter:
                 "session_limit": self.SESSION_LIMIT,
                 "session_window": self.SESSION_WINDOW,
                 "enabled": self.enabled,
+                "algorithm": self.limiter.algorithm,
             },
         )
 
@@ -169,60 +171,7 @@ class ChatRateLimiter:
         key = self._get_rate_limit_key(limit_type, user_id)
 
         try:
-            redis_client = await self.redis.get_redis()
-            current_time_ms = int(time.time() * 1000)
-            window_start_ms = current_time_ms - (window_seconds * 1000)
-
-            # Start pipeline for atomic operations
-            pipe = redis_client.pipeline()
-
-            # Remove entries older than the window
-            pipe.zremrangebyscore(key, 0, window_start_ms)
-
-            # Count entries in current window
-            pipe.zcard(key)
-
-            # Execute pipeline
-            results = await pipe.execute()
-            current_count = results[1]
-
-            if current_count >= max_requests:
-                # Rate limit exceeded - calculate retry_after
-                oldest_entries = await redis_client.zrange(key, 0, 0, withscores=True)
-                if oldest_entries:
-                    oldest_timestamp_ms = int(oldest_entries[0][1])
-                    retry_after_ms = (oldest_timestamp_ms + (window_seconds * 1000)) - current_time_ms
-                    retry_after = max(1, int(retry_after_ms / 1000))
-                else:
-                    retry_after = window_seconds
-
-                logger.warning(
-                    f"Rate limit exceeded for {limit_type}",
-                    extra={
-                        "limit_type": limit_type,
-                        "user_id": user_id,
-                        "current": current_count,
-                        "max": max_requests,
-                        "retry_after": retry_after,
-                    },
-                )
-
-                raise RateLimitExceeded(
-                    limit_type=limit_type, retry_after=retry_after, current=current_count, max_allowed=max_requests
-                )
-
-            if increment:
-                # Add current request to the set
-                request_id = f"{current_time_ms}:{id(object())}"
-                await redis_client.zadd(key, {request_id: current_time_ms})
-
-                # Set expiration to window size + buffer
-                await redis_client.expire(key, window_seconds + 60)
-
-            return True
-
-        except RateLimitExceeded:
-            raise
+            result = await self.limiter.hit(key, max_requests, window_seconds, increment=increment)
         except Exception as e:
             logger.error(
                 f"Rate limit check failed: {e}",
@@ -231,6 +180,24 @@ class ChatRateLimiter:
             # On Redis errors, fail open (allow request) to maintain availability
             return True
 
+        if not result.allowed:
+            logger.warning(
+                f"Rate limit exceeded for {limit_type}",
+                extra={
+                    "limit_type": limit_type,
+                    "user_id": user_id,
+                    "current": result.used,
+                    "max": max_requests,
+                    "retry_after": result.retry_after,
+                },
+            )
+
+            raise RateLimitExceeded(
+                limit_type=limit_type, retry_after=result.retry_after, current=result.used, max_allowed=max_requests
+            )
+
+        return True
+
     async def get_remaining_quota(self, limit_type: str, user_id: str) -> RateLimitQuota:
         """
         Get remaining quota for a user.
@@ -260,30 +227,13 @@ class ChatRateLimiter:
         key = self._get_rate_limit_key(limit_type, user_id)
 
         try:
-            redis_client = await self.redis.get_redis()
-            current_time_ms = int(time.time() * 1000)
-            window_start_ms = current_time_ms - (window_seconds * 1000)
-
-            # Remove stale entries and count
-            await redis_client.zremrangebyscore(key, 0, window_start_ms)
-            current_count = await redis_client.zcard(key)
-
-            remaining = max(0, max_requests - current_count)
+            result = await self.limiter.peek(key, max_requests, window_seconds)
 
             # Calculate reset time
-            if current_count > 0:
-                oldest_entries = await redis_client.zrange(key, 0, 0, withscores=True)
-                if oldest_entries:
-                    oldest_timestamp_ms = int(oldest_entries[0][1])
-                    reset_timestamp_ms = oldest_timestamp_ms + (window_seconds * 1000)
-                    reset_in_seconds = max(0, int((reset_timestamp_ms - current_time_ms) / 1000))
-                else:
-                    reset_in_seconds = window_seconds
-            else:
-                reset_in_seconds = 0
+            reset_in_seconds = int(result.reset_after_ms / 1000) if result.used > 0 else 0
 
             return RateLimitQuota(
-                limit=max_requests, used=current_count, remaining=remaining, reset_in_seconds=reset_in_seconds
+                limit=max_requests, used=result.used, remaining=result.remaining, reset_in_seconds=reset_in_seconds
             )
 
         except Exception as e:
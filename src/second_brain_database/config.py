@@ -159,10 +159,30 @@ class Settings(BaseSettings):
     PERMANENT_TOKEN_SUSPICIOUS_IP_THRESHOLD: int = 5  # Max IPs per token before alert
     PERMANENT_TOKEN_RAPID_CREATION_THRESHOLD: int = 10  # Max tokens in 5 min before alert
     PERMANENT_TOKEN_FAILED_VALIDATION_THRESHOLD: int = 20  # Max failures in 10 min before alert
+    PERMANENT_TOKEN_LAST_USED_FLUSH_INTERVAL: int = 60  # Seconds between batched last_used_at writes
+
+    # Authenticated principal cache (get_current_user_dep)
+    PRINCIPAL_CACHE_TTL: int = 30  # Seconds a resolved principal is reused (0 disables the cache)
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000  # Cached principals per process
+
+    # Per-worker token blacklist filter (only filter hits are confirmed in Redis)
+    TOKEN_BLACKLIST_FILTER_ENABLED: bool = True
+    TOKEN_BLACKLIST_FILTER_EXACT_MAX: int = 50000  # Entries kept in an exact set before switching to a Bloom filter
+    TOKEN_BLACKLIST_FILTER_ERROR_RATE: float = 0.001  # Bloom filter false-positive rate
+    TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL: int = 3600  # Seconds between rebuilds from Redis (drops expired entries)
+
+    # Periodic background jobs (one runner per job across all workers)
+    SCHEDULER_LEADER_ELECTION_ENABLED: bool = True  # Disable to run every job on every worker
+    SCHEDULER_LEASE_TTL: int = 30  # Seconds a job lease survives without renewal
+    SCHEDULER_ACQUIRE_INTERVAL: int = 15  # Seconds between attempts to take over a job held elsewhere
+    SCHEDULER_START_JITTER: int = 10  # Max random delay before a worker first tries each job
 
     # Rate limiting configuration
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_PERIOD_SECONDS: int = 60
+    RATE_LIMIT_ALGORITHM: str = "sliding_window"  # sliding_window (exact log) or gcra (O(1) memory per key)
+    RATE_LIMIT_LOCAL_LEASE_RATIO: float = 0.25  # Share of remaining quota admitted locally without Redis (0 disables)
+    RATE_LIMIT_LOCAL_LEASE_TTL: float = 1.0  # Seconds a local lease stays valid
 
     # Family-specific rate limiting configuration
     FAMILY_CREATE_RATE_LIMIT: int = 2  # Max families created per hour per user
@@ -209,6 +229,12 @@ class Settings(BaseSettings):
     DEFAULT_BUFFER_FILE: str = "loki_buffer.log"
     LOKI_VERSION: str = "1"
     LOKI_COMPRESS: bool = True
+    LOKI_BATCH_SIZE: int = 500  # Records per Loki push
+    LOKI_BATCH_INTERVAL: float = 2.0  # Max seconds a record waits for its Loki batch
+    LOKI_RETRY_INTERVAL: int = 30  # Seconds to spool to the buffer file after a failed Loki push
+    LOG_QUEUE_MAX_SIZE: int = 10000  # Records queued for the log writer thread before new ones are dropped
+    LOG_SAMPLE_RATES: Optional[str] = None  # Comma-separated name=fraction pairs for INFO/DEBUG, e.g. "ipam_manager=0.1"
+    LOG_RATE_LIMITS: Optional[str] = None  # Comma-separated name=records_per_second pairs for INFO/DEBUG
 
     # Redis/Abuse sync intervals
     REDIS_FLAG_SYNC_INTERVAL: int = 60  # Interval for syncing password reset flags to Redis (seconds)
@@ -245,6 +271,9 @@ class Settings(BaseSettings):
     DEFAULT_TENANT_ID: str = "tenant_default"  # Default tenant for backward compatibility
     TENANT_ISOLATION_MODE: str = "strict"  # strict, permissive
     ALLOW_CROSS_TENANT_QUERIES: bool = False  # For admin operations only
+    TENANT_DOMAIN_CACHE_TTL: int = 300  # Seconds a custom domain -> tenant mapping is cached
+    TENANT_DOMAIN_NEGATIVE_CACHE_TTL: int = 60  # Seconds a domain without a tenant is cached
+    TENANT_DOMAIN_CACHE_MAX_ENTRIES: int = 10000  # Cached domains per process
 
     # Tenant plan limits
     FREE_PLAN_MAX_USERS: int = 5  # Maximum users for free plan
@@ -446,6 +475,15 @@ class Settings(BaseSettings):
     # Room and presence configuration
     WEBRTC_ROOM_PRESENCE_TTL: int = 30  # Heartbeat timeout in seconds
     WEBRTC_MAX_PARTICIPANTS_PER_ROOM: int = 50  # Maximum participants per room
+    WEBRTC_METRICS_RECONCILE_INTERVAL: int = 300  # Seconds between rebuilds of the room/participant counters
+    WEBRTC_PRESENCE_SWEEP_INTERVAL: int = 30  # Seconds between removals of participants with expired heartbeats
+    WEBRTC_REDIS_WIRE_FORMAT: str = "json"  # json or msgpack (requires the optional msgpack package)
+    WEBRTC_PERSIST_FLUSH_INTERVAL: float = 1.0  # Seconds between batched chat/analytics inserts
+    WEBRTC_PERSIST_MAX_BATCH: int = 500  # Queued documents per collection that trigger an early flush
+    WEBRTC_PERSIST_MAX_PENDING: int = 10000  # Queued documents before WebSocket loops wait for a flush
+    WEBRTC_E2EE_CRYPTO_WORKERS: int = 4  # Threads for E2EE key generation, ECDH, signatures and large AEAD calls
+    WEBRTC_E2EE_CACHE_SIZE: int = 10000  # E2EE public keys, key pairs and shared secrets cached per process
+    WEBRTC_E2EE_CACHE_TTL: int = 30  # Seconds a cached E2EE key is trusted (bounds staleness after rotation)
 
     # --- IPAM Configuration ---
     # IPAM rate limiting configuration
@@ -491,7 +529,8 @@ class Settings(BaseSettings):
     CHAT_ENABLED: bool = True  # Enable/disable chat system
 
     # Conversation history configuration
-    CHAT_MAX_HISTORY_LENGTH: int = 20  # Maximum messages to include in conversation context
+    CHAT_MAX_HISTORY_LENGTH: int = 100  # Maximum messages kept in the cached history window
+    CHAT_HISTORY_TOKEN_BUDGET: int = 3000  # Token budget for conversation context (newest messages first)
     CHAT_HISTORY_CACHE_TTL: int = 3600  # History cache TTL in seconds (1 hour)
 
     # Vector search configuration
@@ -499,6 +538,12 @@ class Settings(BaseSettings):
 
     # Streaming configuration
     CHAT_STREAM_TIMEOUT: int = 300  # Streaming timeout in seconds (5 minutes)
+    CHAT_STREAM_CHECKPOINT_INTERVAL: float = 5.0  # Seconds between partial-content checkpoints (0 disables)
+
+    # Write-behind persistence configuration
+    CHAT_WRITE_BEHIND_ENABLED: bool = True  # Buffer assistant message/usage/statistics writes
+    CHAT_WRITE_BEHIND_FLUSH_INTERVAL: float = 0.5  # Seconds between bulk flushes
+    CHAT_WRITE_BEHIND_MAX_BATCH: int = 500  # Pending writes that trigger an early flush
 
     # Rate limiting configuration
     CHAT_ENABLE_RATE_LIMITING: bool = True  # Enable rate limiting for chat operations
@@ -508,6 +553,10 @@ class Settings(BaseSettings):
     # Query caching configuration
     CHAT_ENABLE_QUERY_CACHE: bool = True  # Enable query response caching
     CHAT_CACHE_TTL: int = 3600  # Query cache TTL in seconds (1 hour)
+    CHAT_ENABLE_SEMANTIC_CACHE: bool = True  # Serve cached answers for paraphrased queries
+    CHAT_SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Minimum cosine similarity for a semantic hit
+    CHAT_SEMANTIC_CACHE_MAX_ENTRIES: int = 500  # Max cached query embeddings per knowledge base
+    CHAT_SEMANTIC_CACHE_MAX_KNOWLEDGE_BASES: int = 100  # Max knowledge base indexes kept per worker
 
     # Input validation configuration
     CHAT_TOKEN_ENCODING: str = "cl100k_base"  # Token encoding for tiktoken (GPT-4 tokenizer)
@@ -311,6 +311,20 @@ class DatabaseManager:
             await self._create_index_if_not_exists(users_collection, "temporary_user_agent_access_tokens", {})
             await self._create_index_if_not_exists(users_collection, "temporary_ip_bypasses", {})
 
+            # Expiry indexes for the periodic cleanups, which only touch users holding an expired entry
+            for expiry_field in (
+                "sessions.expires_at",
+                "admin_sessions.expires_at",
+                "trusted_ip_lockdown_codes.expires_at",
+                "trusted_user_agent_lockdown_codes.expires_at",
+                "temporary_ip_access_tokens.expires_at",
+                "temporary_user_agent_access_tokens.expires_at",
+                "temporary_ip_bypasses.expires_at",
+                "avatars_rented.valid_till",
+                "banners_rented.valid_till",
+            ):
+                await self._create_index_if_not_exists(users_collection, expiry_field, {})
+
             # Family management indexes
             await self._create_index_if_not_exists(users_collection, "family_limits.max_families_allowed", {})
             await self._create_index_if_not_exists(users_collection, "family_memberships.family_id", {})
@@ -12,6 +12,7 @@ from fastapi import HTTPException, Request, Response, status
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
+from starlette.types import Receive, Scope, Send
 
 from second_brain_database.config import settings
 from second_brain_database.managers.logging_manager import get_logger
@@ -50,6 +51,14 @@ class DocumentationSecurityMiddleware(BaseHTTPMiddleware):
         self.rate_limit_requests = settings.DOCS_RATE_LIMIT_REQUESTS
         self.rate_limit_period = settings.DOCS_RATE_LIMIT_PERIOD
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Hand non-documentation requests straight to the app, without BaseHTTPMiddleware wrapping."""
+        if scope["type"] != "http" or not scope["path"].startswith(tuple(self.docs_paths)):
+            await self.app(scope, receive, send)
+            return
+
+        await super().__call__(scope, receive, send)
+
     async def dispatch(self, request: Request, call_next):
         """
         Process documentation requests with security checks.
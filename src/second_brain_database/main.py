@@ -11,15 +11,17 @@ from datetime import datetime, timezone
 import time
 
 from fastapi import FastAPI, HTTPException
-from prometheus_fastapi_instrumentator import Instrumentator
+from prometheus_fastapi_instrumentator import Instrumentator, metrics
 from pymongo import ASCENDING, DESCENDING
 import uvicorn
 
+from second_brain_database.chat.services.write_behind import get_chat_write_behind
 from second_brain_database.config import settings
 from second_brain_database.database import db_manager
 from second_brain_database.docs.config import docs_config
 from second_brain_database.docs.middleware import configure_documentation_middleware
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.periodic_job_manager import periodic_job_manager
 from second_brain_database.routes import auth_router, main_router
 from second_brain_database.routes.auth.periodics.cleanup import (
     periodic_2fa_cleanup,
@@ -47,6 +49,9 @@ from second_brain_database.routers.club_webrtc_router import router as club_webr
 from second_brain_database.routes.documents import router as documents_router
 from second_brain_database.routes.rag import router as rag_router
 from second_brain_database.routes.family.routes import router as family_router
+from second_brain_database.middleware.tenant_middleware import tenant_domain_cache
+from second_brain_database.routes.auth.services.permanent_tokens.usage_tracker import last_used_tracker
+from second_brain_database.routes.auth.services.security.blacklist_filter import token_blacklist_filter
 from second_brain_database.routes.profile.routes import router as profile_router
 from second_brain_database.routes.sbd_tokens.routes import router as sbd_tokens_router
 from second_brain_database.routes.shop.routes import router as shop_router
@@ -61,11 +66,18 @@ from second_brain_database.routes.dashboard import router as dashboard_router
 from second_brain_database.routes.anki import router as anki_router
 from second_brain_database.routes.tenants import router as tenants_router
 from second_brain_database.webrtc import router as webrtc_router
+from second_brain_database.webrtc.periodics import (
+    periodic_webrtc_metrics_reconcile,
+    periodic_webrtc_presence_sweep,
+)
+from second_brain_database.webrtc.room_hub import room_hub
+from second_brain_database.webrtc.write_buffer import webrtc_write_buffer
 from second_brain_database.utils.logging_utils import (
     RequestLoggingMiddleware,
     log_application_lifecycle,
     log_error_with_context,
     log_performance,
+    response_first_byte,
 )
 
 logger = get_logger()
@@ -348,26 +360,30 @@ async def lifespan(_app: FastAPI):
     try:
         logger.info("Starting background cleanup tasks...")
 
-        background_tasks.update(
-            {
-                "2fa_cleanup": asyncio.create_task(periodic_2fa_cleanup()),
-                "blocklist_reconcile": asyncio.create_task(periodic_blocklist_whitelist_reconcile()),
-                "avatar_cleanup": asyncio.create_task(periodic_avatar_rental_cleanup()),
-                "banner_cleanup": asyncio.create_task(periodic_banner_rental_cleanup()),
-                "email_verification_cleanup": asyncio.create_task(periodic_email_verification_token_cleanup()),
-                "session_cleanup": asyncio.create_task(periodic_session_cleanup()),
-                "temporary_access_cleanup": asyncio.create_task(periodic_temporary_access_tokens_cleanup()),
-                "trusted_ip_cleanup": asyncio.create_task(periodic_trusted_ip_lockdown_code_cleanup()),
-                "trusted_user_agent_cleanup": asyncio.create_task(periodic_trusted_user_agent_lockdown_code_cleanup()),
-                "admin_session_cleanup": asyncio.create_task(periodic_admin_session_token_cleanup()),
-                "ipam_capacity_monitoring": asyncio.create_task(periodic_ipam_capacity_monitoring()),
-                "ipam_notification_cleanup": asyncio.create_task(periodic_ipam_notification_cleanup()),
-                "ipam_reservation_cleanup": asyncio.create_task(periodic_ipam_reservation_cleanup()),
-                "ipam_reservation_expiration": asyncio.create_task(periodic_ipam_reservation_expiration()),
-                "ipam_share_expiration": asyncio.create_task(periodic_ipam_share_expiration()),
-                "ipam_webhook_delivery": asyncio.create_task(periodic_ipam_webhook_delivery()),
-            }
-        )
+        # Each job runs on one worker cluster-wide; the rest stand by to take over its lease
+        for job_name, job in (
+            ("2fa_cleanup", periodic_2fa_cleanup),
+            ("blocklist_reconcile", periodic_blocklist_whitelist_reconcile),
+            ("avatar_cleanup", periodic_avatar_rental_cleanup),
+            ("banner_cleanup", periodic_banner_rental_cleanup),
+            ("email_verification_cleanup", periodic_email_verification_token_cleanup),
+            ("session_cleanup", periodic_session_cleanup),
+            ("temporary_access_cleanup", periodic_temporary_access_tokens_cleanup),
+            ("trusted_ip_cleanup", periodic_trusted_ip_lockdown_code_cleanup),
+            ("trusted_user_agent_cleanup", periodic_trusted_user_agent_lockdown_code_cleanup),
+            ("admin_session_cleanup", periodic_admin_session_token_cleanup),
+            ("ipam_capacity_monitoring", periodic_ipam_capacity_monitoring),
+            ("ipam_notification_cleanup", periodic_ipam_notification_cleanup),
+            ("ipam_reservation_cleanup", periodic_ipam_reservation_cleanup),
+            ("ipam_reservation_expiration", periodic_ipam_reservation_expiration),
+            ("ipam_share_expiration", periodic_ipam_share_expiration),
+            ("ipam_webhook_delivery", periodic_ipam_webhook_delivery),
+            ("webrtc_metrics_reconcile", periodic_webrtc_metrics_reconcile),
+            ("webrtc_presence_sweep", periodic_webrtc_presence_sweep),
+        ):
+            periodic_job_manager.register(job_name, job)
+
+        background_tasks.update(await periodic_job_manager.start())
 
         tasks_duration = time.time() - task_start_time
         log_application_lifecycle(
@@ -386,6 +402,20 @@ async def lifespan(_app: FastAPI):
         # Continue startup even if some background tasks fail
         logger.warning("Some background tasks failed to start, continuing with application startup")
 
+    # Start chat write-behind buffer (writes go straight to MongoDB when disabled)
+    if settings.CHAT_ENABLED and settings.CHAT_WRITE_BEHIND_ENABLED:
+        await get_chat_write_behind().start()
+
+    # Start WebRTC chat/analytics insert batching
+    await webrtc_write_buffer.start()
+
+    # Coalesce permanent token last_used_at writes into periodic bulk writes
+    await last_used_tracker.start()
+
+    # Keep a local blacklist filter so token checks skip Redis unless it reports a hit
+    if settings.TOKEN_BLACKLIST_FILTER_ENABLED:
+        await token_blacklist_filter.start()
+
     # Log successful startup completion
     total_startup_duration = time.time() - startup_start_time
     log_application_lifecycle(
@@ -452,6 +482,38 @@ async def lifespan(_app: FastAPI):
 
     # AI orchestration system cleanup (removed)
 
+    try:
+        await last_used_tracker.stop()
+    except Exception as e:
+        log_error_with_context(e, {"operation": "permanent_token_last_used_flush"})
+
+    try:
+        await token_blacklist_filter.stop()
+    except Exception as e:
+        log_error_with_context(e, {"operation": "token_blacklist_filter_shutdown"})
+
+    try:
+        await tenant_domain_cache.close()
+    except Exception as e:
+        log_error_with_context(e, {"operation": "tenant_domain_cache_shutdown"})
+
+    # Drop the shared WebRTC room subscription
+    try:
+        await room_hub.close()
+    except Exception as e:
+        log_error_with_context(e, {"operation": "webrtc_room_hub_shutdown"})
+
+    # Flush buffered chat writes before the database goes away
+    try:
+        await get_chat_write_behind().stop()
+    except Exception as e:
+        log_error_with_context(e, {"operation": "chat_write_behind_flush"})
+
+    try:
+        await webrtc_write_buffer.stop()
+    except Exception as e:
+        log_error_with_context(e, {"operation": "webrtc_write_buffer_flush"})
+
     # Database disconnection with logging
     db_disconnect_start = time.time()
     try:
@@ -1262,7 +1324,9 @@ try:
     )
 
     # Add and instrument the app
-    instrumentator.add().instrument(app).expose(app, include_in_schema=False, endpoint="/metrics")
+    instrumentator.add(metrics.default(), response_first_byte()).instrument(app).expose(
+        app, include_in_schema=False, endpoint="/metrics"
+    )
 
     log_application_lifecycle(
         "prometheus_configured",
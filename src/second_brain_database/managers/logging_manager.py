@@ -4,45 +4,63 @@ Centralized logging manager for the application.
 This module provides a robust,
 production-ready logging setup with Loki integration and file-based buffering for downtime.
 
+Non-Blocking Pipeline:
+---------------------
+- Loggers returned by get_logger() only carry a QueueHandler. Records are formatted
+  and put on one bounded in-process queue; the emitting thread never touches stdout,
+  disk or the network.
+- A single writer thread (QueueListener) owns the real handlers: console, the
+  per-worker log file and Loki.
+- If the queue is full, records are dropped rather than blocking the caller, and
+  the writer thread logs how many were lost.
+- Records below WARNING can be sampled (LOG_SAMPLE_RATES) or capped per second
+  (LOG_RATE_LIMITS) per logger or module name, for hot paths such as request logging.
+
 Loki Downtime Handling:
 ----------------------
 - If Loki is unavailable at import or handler setup,
-  logs are sent to the console (stdout) via StreamHandler.
-- If Loki becomes unavailable at runtime (e.g., network outage),
-  logs sent to the Loki handler may be lost or dropped,
-  depending on the handler's internal retry/buffering logic.
-- By default, logs generated during Loki downtime are NOT automatically resent to Loki
-  when it comes back up.
-- To guarantee delivery of all logs to Loki,
-  you would need to implement a persistent queue or file-based buffer that stores logs locally and
-  flushes them to Loki when it is available again. This is not implemented in this codebase.
+  logs are sent to the console (stdout) and the buffer file.
+- Records are pushed to Loki in batches (LOKI_BATCH_SIZE records or every
+  LOKI_BATCH_INTERVAL seconds). If a push fails, the batch is written to the buffer
+  file and further batches go there for LOKI_RETRY_INTERVAL seconds.
+- The buffer file is replayed to Loki by the periodic health check once Loki
+  answers again.
 - For critical audit/compliance use cases,
-  consider using a log shipper (e.g., Promtail, Fluentd)
-  or a custom handler with persistent buffering.
+  consider using a log shipper (e.g., Promtail, Fluentd).
 
 Usage:
 - Use get_logger() to obtain a logger instance.
 Logs will go to Loki if available, otherwise to console or buffer file.
 """
 
+import atexit
 from datetime import datetime, timezone
+import gzip
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import os
+import queue
+import random
 import sys
 import threading
+import time
+from typing import Optional
+
+import requests
 
 from second_brain_database.config import settings
 
 try:
-    from loki_logger_handler.loki_logger_handler import LokiLoggerHandler
+    from loki_logger_handler.formatters.logger_formatter import LoggerFormatter
+    from loki_logger_handler.stream import Stream
+    from loki_logger_handler.streams import Streams
 
     _loki_available: bool = True
 except ImportError as e:
-    LokiLoggerHandler = None  # type: ignore
     _loki_available = False
     logging.basicConfig(level=logging.INFO)
     logging.getLogger("Second_Brain_Database").warning(
-        "[LoggingManager] LokiLoggerHandler import failed: %s. Falling back to console logging.", e
+        "[LoggingManager] loki_logger_handler import failed: %s. Falling back to console logging.", e
     )
 
 LOKI_URL: str = os.getenv("LOKI_URL", getattr(settings, "LOKI_URL", "http://localhost:3100/loki/api/v1/push"))
@@ -54,37 +72,396 @@ LOG_LEVEL: str = os.getenv("LOG_LEVEL", getattr(settings, "LOG_LEVEL", "INFO")).
 BUFFER_FILE: str = os.getenv("LOKI_BUFFER_FILE", getattr(settings, "LOKI_BUFFER_FILE", "loki_buffer.log"))
 LOKI_VERSION: str = getattr(settings, "LOKI_VERSION", "1")
 LOKI_COMPRESS: bool = getattr(settings, "LOKI_COMPRESS", True)
+LOKI_BATCH_SIZE: int = getattr(settings, "LOKI_BATCH_SIZE", 500)
+LOKI_BATCH_INTERVAL: float = getattr(settings, "LOKI_BATCH_INTERVAL", 2.0)
+LOKI_RETRY_INTERVAL: float = getattr(settings, "LOKI_RETRY_INTERVAL", 30)
+LOG_QUEUE_MAX_SIZE: int = getattr(settings, "LOG_QUEUE_MAX_SIZE", 10000)
+LOKI_PUSH_TIMEOUT = (2, 5)  # (connect_timeout, read_timeout)
 BUFFER_LOCK = threading.Lock()
 
 
-def _ensure_console_handler(logger: logging.Logger, formatter: logging.Formatter) -> bool:
+def _parse_log_rules(value: Optional[str]) -> dict[str, float]:
     """
-    Ensure logger has a StreamHandler for console output.
+    Parse a comma-separated list of ``name=number`` pairs.
 
     Args:
-        logger: The logger instance to check and modify
-        formatter: The formatter to apply to the StreamHandler
+        value: Setting value, e.g. "Second_Brain_Database_Requests=0.1,ipam_manager=0.5"
 
     Returns:
-        bool: True if a new StreamHandler was added, False if one already existed
+        dict: Logger or module name to number; malformed pairs are skipped
     """
-    # Check if StreamHandler already exists for stdout
-    for handler in logger.handlers:
-        if isinstance(handler, logging.StreamHandler) and handler.stream is sys.stdout:
-            return False  # Already has console handler
+    rules: dict[str, float] = {}
+    for item in (value or "").split(","):
+        name, sep, number = item.partition("=")
+        if not sep:
+            continue
+        try:
+            rules[name.strip()] = float(number)
+        except ValueError:
+            logging.getLogger("Second_Brain_Database").warning("[LoggingManager] Ignoring log rule %r", item)
+    return rules
 
-    # Add StreamHandler for console output
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    console_handler.setLevel(logger.level)
-    logger.addHandler(console_handler)
-    return True
 
+class _SamplingFilter(logging.Filter):
+    """
+    Sample and rate-limit records below WARNING.
 
-import threading
-import time
+    Rules are keyed by logger name or, since most modules share the default
+    logger, by module name (e.g. ``ipam_manager``).
+    """
 
-import requests
+    def __init__(self, sample_rates: dict[str, float], rate_limits: dict[str, float]):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate_limits = rate_limits
+        # key -> [second, records passed in that second]
+        self._windows: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not (self.sample_rates or self.rate_limits):
+            return True
+
+        rate = self.sample_rates.get(record.name, self.sample_rates.get(record.module))
+        if rate is not None and random.random() >= rate:
+            return False
+
+        key = record.name if record.name in self.rate_limits else record.module
+        limit = self.rate_limits.get(key)
+        if limit is None:
+            return True
+
+        second = int(record.created)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window[0] != second:
+                self._windows[key] = [second, 1]
+                return True
+            if window[1] >= limit:
+                return False
+            window[1] += 1
+            return True
+
+
+class _LogQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue, add_loki: bool = True):
+        super().__init__(log_queue)
+        self.add_loki = add_loki
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        if not self.add_loki:
+            record._skip_loki = True
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        global _dropped_records
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with _dropped_lock:
+                _dropped_records += 1
+
+
+class _LogQueueListener(QueueListener):
+    """
+    Writer thread for the log queue.
+
+    While the queue is idle, handlers are flushed every LOKI_BATCH_INTERVAL
+    seconds so partial Loki batches do not wait for more traffic. A handler
+    whose flush fails is reported once to the other handlers until it
+    recovers.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._failed_flushes: set[int] = set()
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        while True:
+            self._report_dropped()
+            try:
+                return self.queue.get(timeout=LOKI_BATCH_INTERVAL)
+            except queue.Empty:
+                for handler in self.handlers:
+                    try:
+                        handler.flush()
+                        self._failed_flushes.discard(id(handler))
+                    except Exception as e:
+                        # Never kill the writer over a broken sink
+                        self._report_flush_failure(handler, e)
+
+    def _report_flush_failure(self, failed: logging.Handler, error: Exception) -> None:
+        if id(failed) in self._failed_flushes:
+            return
+        self._failed_flushes.add(id(failed))
+        record = logging.LogRecord(
+            "Second_Brain_Database",
+            logging.WARNING,
+            __file__,
+            0,
+            "[LoggingManager] Idle flush of %r failed: %s",
+            (failed, error),
+            None,
+        )
+        # The queue could fail the same way, so hand the record to the remaining
+        # handlers directly; with no other sink it is dropped
+        for handler in self.handlers:
+            if handler is failed or record.levelno < handler.level:
+                continue
+            try:
+                handler.handle(record)
+            except Exception:
+                pass
+
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than failing when stopped under load
+        self.queue.put(self._sentinel)
+
+    def _report_dropped(self) -> None:
+        global _dropped_records
+        if not _dropped_records:
+            return
+        with _dropped_lock:
+            count, _dropped_records = _dropped_records, 0
+        self.handle(
+            logging.LogRecord(
+                "Second_Brain_Database",
+                logging.WARNING,
+                __file__,
+                0,
+                "[LoggingManager] Log queue full, dropped %d records",
+                (count,),
+                None,
+            )
+        )
+
+
+class _LokiBatchHandler(logging.Handler):
+    """
+    Push records to Loki in batches from the log writer thread.
+
+    Batches that cannot be delivered are written to the buffer file, and
+    later batches go straight there until LOKI_RETRY_INTERVAL has passed.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        labels: dict[str, str],
+        compressed: bool = True,
+        batch_size: int = LOKI_BATCH_SIZE,
+        batch_interval: float = LOKI_BATCH_INTERVAL,
+        retry_interval: float = LOKI_RETRY_INTERVAL,
+    ):
+        super().__init__()
+        self.url = url
+        self.labels = labels
+        self.compressed = compressed
+        self.session = requests.Session()
+        self.loki_formatter = LoggerFormatter()
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.retry_interval = retry_interval
+        self._batch: list[logging.LogRecord] = []
+        self._batch_started = 0.0
+        self._down_until = 0.0
+        self.addFilter(lambda record: not getattr(record, "_skip_loki", False))
+
+    @property
+    def available(self) -> bool:
+        """Whether the last push succeeded (or the retry interval has passed)."""
+        return time.monotonic() >= self._down_until
+
+    def reset_backoff(self) -> None:
+        """Push the next batch to Loki even if the retry interval has not passed."""
+        self._down_until = 0.0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not self._batch:
+            self._batch_started = time.monotonic()
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_size or time.monotonic() - self._batch_started >= self.batch_interval:
+            self._push()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self._batch:
+                self._push()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+    def _push(self) -> None:
+        batch, self._batch = self._batch, []
+        if not self.available:
+            _append_to_buffer([_buffer_line(record) for record in batch])
+            return
+
+        stream = Stream(self.labels)
+        for record in batch:
+            value, _ = self.loki_formatter.format(record)
+            try:
+                stream.append_value(value)
+            except (TypeError, ValueError):
+                stream.append_value({key: str(item) for key, item in value.items()})
+
+        try:
+            self._send(Streams([stream]).serialize())
+        except Exception as e:
+            self._down_until = time.monotonic() + self.retry_interval
+            _append_to_buffer([_buffer_line(record) for record in batch])
+            logging.getLogger("Second_Brain_Database").warning(
+                "[LoggingManager] Loki push of %d records failed, buffering to file for %ss: %s",
+                len(batch),
+                self.retry_interval,
+                e,
+            )
+
+    def _send(self, payload: str) -> None:
+        headers = {"Content-Type": "application/json"}
+        data = payload.encode("utf-8")
+        if self.compressed:
+            headers["Content-Encoding"] = "gzip"
+            data = gzip.compress(data)
+        response = self.session.post(self.url, data=data, headers=headers, timeout=LOKI_PUSH_TIMEOUT)
+        try:
+            response.raise_for_status()
+        finally:
+            response.close()
+
+
+class _BufferHandler(logging.Handler):
+    """Write records to the Loki buffer file (used when Loki is not installed or cannot be set up)."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        _write_to_buffer(record)
+
+
+_log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_MAX_SIZE)
+_log_listener: Optional[_LogQueueListener] = None
+_loki_handler: Optional[_LokiBatchHandler] = None
+_queue_handlers: list[_LogQueueHandler] = []
+_sampling_filter = _SamplingFilter(
+    _parse_log_rules(getattr(settings, "LOG_SAMPLE_RATES", None)),
+    _parse_log_rules(getattr(settings, "LOG_RATE_LIMITS", None)),
+)
+_pipeline_lock = threading.Lock()
+_dropped_lock = threading.Lock()
+_dropped_records = 0
+
+
+def _register_worker(log_filename: str) -> None:
+    """Record this worker and its log file in the worker registry."""
+    import json
+
+    reg_file = get_worker_registry_filename()
+    worker_info = {
+        "pid": os.getpid(),
+        "log_file": log_filename,
+        "start_time": datetime.now(timezone.utc).isoformat(),
+        "hostname": os.getenv("HOSTNAME", os.uname().nodename),
+    }
+    try:
+        if os.path.exists(reg_file):
+            with open(reg_file, "r", encoding="utf-8") as f:
+                reg = json.load(f)
+        else:
+            reg = {}
+        reg[str(os.getpid())] = worker_info
+        with open(reg_file, "w", encoding="utf-8") as f:
+            json.dump(reg, f, indent=2)
+    except Exception as e:
+        logging.getLogger("Second_Brain_Database").warning("[LoggingManager] Could not update worker registry: %s", e)
+
+
+def _start_log_pipeline() -> None:
+    """Create the console, file and Loki handlers and start the writer thread (once per process)."""
+    global _log_listener, _loki_handler, BUFFER_FILE
+
+    with _pipeline_lock:
+        if _log_listener is not None:
+            return
+
+        # Create standard formatter for all handlers
+        formatter = logging.Formatter("[%(asctime)s] %(levelname)s in %(name)s: %(message)s")
+
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        console_handler.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+        handlers: list[logging.Handler] = [console_handler]
+
+        # Per-worker log file in logs/
+        log_filename = get_worker_log_filename()
+        os.makedirs(os.path.dirname(log_filename), exist_ok=True)
+        file_handler = logging.FileHandler(log_filename)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+        _register_worker(log_filename)
+
+        # Shared Loki buffer file in logs/
+        BUFFER_FILE = os.path.join("logs", "loki_buffer.log")
+
+        _loki_handler = None
+        if _loki_available:
+            try:
+                _loki_handler = _LokiBatchHandler(url=LOKI_URL, labels=LOKI_TAGS, compressed=LOKI_COMPRESS)
+                handlers.append(_loki_handler)
+            except (ImportError, OSError) as e:
+                logging.getLogger("Second_Brain_Database").error(
+                    "[LoggingManager] Failed to create Loki handler: %s. Falling back to file buffer.",
+                    e,
+                    exc_info=True,
+                )
+        if _loki_handler is None:
+            handlers.append(_BufferHandler())
+
+        _log_listener = _LogQueueListener(_log_queue, *handlers, respect_handler_level=True)
+        _log_listener.start()
+
+
+def _reset_log_pipeline_after_fork() -> None:
+    """Give a forked worker its own queue, writer thread and log file."""
+    global _log_queue, _log_listener, _loki_handler, _pipeline_lock, _dropped_lock, _dropped_records
+
+    # The parent's writer thread does not exist in the child, and its locks may be held
+    _pipeline_lock = threading.Lock()
+    _dropped_lock = threading.Lock()
+    _dropped_records = 0
+    _log_queue = queue.Queue(maxsize=LOG_QUEUE_MAX_SIZE)
+    _log_listener = None
+    _loki_handler = None
+    for handler in _queue_handlers:
+        handler.queue = _log_queue
+    if _queue_handlers:
+        _start_log_pipeline()
+
+
+def shutdown_logging() -> None:
+    """Write out every queued record and pending Loki batch, then stop the writer thread."""
+    global _log_listener
+
+    with _pipeline_lock:
+        listener, _log_listener = _log_listener, None
+    if listener is None:
+        return
+
+    listener.stop()
+    for handler in listener.handlers:
+        try:
+            handler.flush()
+        except Exception:
+            pass
+
+
+atexit.register(shutdown_logging)
+os.register_at_fork(after_in_child=_reset_log_pipeline_after_fork)
 
 LOKI_HEALTH_URL = os.getenv("LOKI_HEALTH_URL", LOKI_URL.replace("/loki/api/v1/push", "/ready"))
 LOKI_PING_INTERVAL_SECONDS = 24 * 60 * 60  # Once per day
@@ -113,19 +490,8 @@ def ping_loki_and_flush_if_available():
         if resp.status_code == 200:
             logger.info("[LoggingManager] Loki is available. Flushing buffer and switching to Loki logging.")
             if LOKI_BUFFER_FLUSH_ENABLED:
-                # Attach Loki handler if not present
-                if _loki_available and LokiLoggerHandler:
-                    handler_types = [type(h) for h in logger.handlers]
-                    if LokiLoggerHandler not in handler_types:
-                        loki_handler = LokiLoggerHandler(
-                            url=LOKI_URL,
-                            labels=LOKI_TAGS,
-                            auth=None,
-                            compressed=LOKI_COMPRESS,
-                        )
-                        logger.addHandler(loki_handler)
-                    else:
-                        loki_handler = [h for h in logger.handlers if isinstance(h, LokiLoggerHandler)][0]
+                loki_handler = _loki_handler
+                if loki_handler is not None:
                     _flush_buffer_to_loki(loki_handler, logger)
                     archive_worker_logs(logger)
             else:
@@ -162,14 +528,8 @@ except Exception as e:
     )
 
 
-def _write_to_buffer(record: logging.LogRecord) -> None:
-    """
-    Write a log record to the buffer file in a thread-safe and robust way, with file-level deduplication and rich JSON lines for Loki/enterprise compatibility.
-    Args:
-        record: The log record to write.
-    Side-effects:
-        Appends to BUFFER_FILE only if the line is not identical to the last line.
-    """
+def _buffer_line(record: logging.LogRecord) -> str:
+    """Serialize a log record as one rich JSON line for the buffer file."""
     import json
     import socket
     import traceback
@@ -199,7 +559,18 @@ def _write_to_buffer(record: logging.LogRecord) -> None:
     }
     if record.exc_info:
         log_dict["exception"] = "".join(traceback.format_exception(*record.exc_info))
-    log_line = json.dumps(log_dict, ensure_ascii=False) + "\n"
+    return json.dumps(log_dict, ensure_ascii=False, default=str) + "\n"
+
+
+def _append_to_buffer(log_lines: list[str]) -> None:
+    """
+    Append lines to the buffer file in a thread-safe way, skipping lines identical to the one before them.
+
+    Args:
+        log_lines: Newline-terminated lines to append.
+    """
+    if not log_lines:
+        return
     try:
         with BUFFER_LOCK:
             last_line = None
@@ -212,24 +583,89 @@ def _write_to_buffer(record: logging.LogRecord) -> None:
                     lines = f.readlines()
                     if lines:
                         last_line = lines[-1].decode("utf-8", errors="ignore").rstrip("\n")
-            if last_line == log_line.rstrip("\n"):
-                return  # Skip writing duplicate
             with open(BUFFER_FILE, "a", encoding="utf-8") as f:
-                f.write(log_line)
+                for log_line in log_lines:
+                    if last_line == log_line.rstrip("\n"):
+                        continue  # Skip writing duplicate
+                    f.write(log_line)
+                    last_line = log_line.rstrip("\n")
     except OSError as e:
         logging.getLogger("Second_Brain_Database").error(
             "[LoggingManager] Failed to write log to buffer file '%s': %s", BUFFER_FILE, e, exc_info=True
         )
 
 
-def _flush_buffer_to_loki(loki_handler: logging.Handler, logger: logging.Logger) -> None:
+def _write_to_buffer(record: logging.LogRecord) -> None:
     """
-    Push buffered logs to Loki and delete the buffer file if successful.
+    Write a log record to the buffer file in a thread-safe and robust way, with file-level deduplication and rich JSON lines for Loki/enterprise compatibility.
     Args:
-        loki_handler: The Loki handler to emit logs to.
+        record: The log record to write.
+    Side-effects:
+        Appends to BUFFER_FILE only if the line is not identical to the last line.
+    """
+    _append_to_buffer([_buffer_line(record)])
+
+
+def _record_from_buffer_line(line: str) -> logging.LogRecord:
+    """
+    Rebuild a log record from a buffer file line.
+
+    Accepts the JSON lines written by _buffer_line and the older
+    ``created|level|name|msg`` format.
+
+    Raises:
+        ValueError: If the line is in neither format.
+    """
+    import json
+
+    line = line.strip()
+    if line.startswith("{"):
+        data = json.loads(line)
+        msg = data.get("msg", "")
+        if data.get("exception"):
+            msg = f"{msg}\n{data['exception']}"
+        record = logging.LogRecord(
+            name=data.get("logger", "Second_Brain_Database"),
+            level=getattr(logging, data.get("level", "INFO"), logging.INFO),
+            pathname=data.get("pathname") or "(buffered)",
+            lineno=data.get("lineno") or 0,
+            msg=msg,
+            args=None,
+            exc_info=None,
+        )
+        if isinstance(data.get("ts"), (int, float)):
+            record.created = data["ts"]
+        return record
+
+    parts = line.split("|", 3)
+    if len(parts) != 4:
+        raise ValueError(f"Malformed log line: {line!r}")
+    created, level, name, msg = parts
+    record = logging.LogRecord(
+        name=name,
+        level=getattr(logging, level, logging.INFO),
+        pathname="(buffered)",
+        lineno=0,
+        msg=msg,
+        args=None,
+        exc_info=None,
+    )
+    try:
+        record.created = float(created)
+    except ValueError:
+        pass
+    return record
+
+
+def _flush_buffer_to_loki(loki_handler: _LokiBatchHandler, logger: logging.Logger) -> None:
+    """
+    Push buffered logs to Loki and delete the buffer file.
+    Args:
+        loki_handler: The Loki batch handler to send logs through.
         logger: Logger for error reporting.
     Side-effects:
-        Reads and deletes BUFFER_FILE if present.
+        Reads and deletes BUFFER_FILE if present. Records Loki rejects are
+        buffered again by the handler; unparseable lines are kept.
     """
     if not os.path.exists(BUFFER_FILE):
         return
@@ -238,55 +674,35 @@ def _flush_buffer_to_loki(loki_handler: logging.Handler, logger: logging.Logger)
         try:
             with open(BUFFER_FILE, "r", encoding="utf-8") as f:
                 lines = f.readlines()
-
-            failed_lines = []
-            for idx, line in enumerate(lines):
-                try:
-                    parts = line.strip().split("|", 3)
-                    if len(parts) != 4:
-                        raise ValueError(f"Malformed log line at index {idx}: {line!r}")
-                    created, level, name, msg = parts
-                    try:
-                        created_float = float(created)
-                    except ValueError:
-                        created_float = None
-                    record = logging.LogRecord(
-                        name=name,
-                        level=getattr(logging, level, logging.INFO),
-                        pathname="(buffered)",
-                        lineno=0,
-                        msg=msg,
-                        args=None,
-                        exc_info=None,
-                    )
-                    if created_float is not None:
-                        record.created = created_float
-                    loki_handler.emit(record)
-                except (ValueError, OSError) as e:
-                    logger.error(
-                        "[LoggingManager] Failed to parse or send buffered log (line %d): %s",
-                        idx,
-                        e,
-                        exc_info=True,
-                    )
-                    failed_lines.append(line)
-
-            if failed_lines:
-                with open(BUFFER_FILE, "w", encoding="utf-8") as f:
-                    f.writelines(failed_lines)
-                logger.warning(
-                    "[LoggingManager] Some buffered logs (%d/%d) could not be resent "
-                    "to Loki and were kept in the buffer file.",
-                    len(failed_lines),
-                    len(lines),
-                )
-            else:
-                os.remove(BUFFER_FILE)
-                logger.info("[LoggingManager] Flushed all buffered logs to Loki and deleted buffer file.")
-                archive_worker_logs(logger)
-
-        except (OSError, ValueError) as flush_exc:
-            logger.error("[LoggingManager] Failed to flush buffer to Loki: %s", flush_exc, exc_info=True)
+            os.remove(BUFFER_FILE)
+        except OSError as flush_exc:
+            logger.error("[LoggingManager] Failed to read buffer file: %s", flush_exc, exc_info=True)
+            return
+
+    failed_lines = []
+    loki_handler.reset_backoff()
+    for idx, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            loki_handler.handle(_record_from_buffer_line(line))
+        except ValueError as e:
+            logger.error("[LoggingManager] Failed to parse buffered log (line %d): %s", idx, e)
+            failed_lines.append(line)
+    loki_handler.flush()
+
+    if failed_lines:
+        _append_to_buffer(failed_lines)
+        logger.warning(
+            "[LoggingManager] Some buffered logs (%d/%d) could not be parsed and were kept in the buffer file.",
+            len(failed_lines),
+            len(lines),
+        )
+    elif not loki_handler.available:
+        logger.warning("[LoggingManager] Loki rejected buffered logs; they were kept in the buffer file.")
+    else:
+        logger.info("[LoggingManager] Flushed all buffered logs to Loki and deleted buffer file.")
+        archive_worker_logs(logger)
 
 
 def archive_worker_logs(logger: logging.Logger = None):
@@ -323,52 +739,18 @@ def get_worker_registry_filename():
 
 
 def get_logger(name: str = "Second_Brain_Database", add_loki: bool = True, prefix: str = "") -> logging.Logger:
-    import json
-
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
 
-    # Create standard formatter for all handlers
-    formatter = logging.Formatter("[%(asctime)s] %(levelname)s in %(name)s: %(message)s")
-
-    # Always ensure console handler is present first (early in setup process)
-    console_added = _ensure_console_handler(logger, formatter)
-    if console_added:
-        logger.info("[LoggingManager] Console StreamHandler attached to logger '%s'", name)
-
-    # Per-worker log file in logs/
-    log_filename = get_worker_log_filename()
-    os.makedirs(os.path.dirname(log_filename), exist_ok=True)
-    if not any(
-        isinstance(h, logging.FileHandler) and getattr(h, "baseFilename", None) == os.path.abspath(log_filename)
-        for h in logger.handlers
-    ):
-        file_handler = logging.FileHandler(log_filename)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-        # Register worker in registry
-        reg_file = get_worker_registry_filename()
-        worker_info = {
-            "pid": os.getpid(),
-            "log_file": log_filename,
-            "start_time": datetime.now(timezone.utc).isoformat(),
-            "hostname": os.getenv("HOSTNAME", os.uname().nodename),
-        }
-        try:
-            if os.path.exists(reg_file):
-                with open(reg_file, "r", encoding="utf-8") as f:
-                    reg = json.load(f)
-            else:
-                reg = {}
-            reg[str(os.getpid())] = worker_info
-            with open(reg_file, "w", encoding="utf-8") as f:
-                json.dump(reg, f, indent=2)
-        except Exception as e:
-            logger.warning("[LoggingManager] Could not update worker registry: %s", e)
+    # Console, file and Loki handlers live on the shared writer thread
+    _start_log_pipeline()
 
-    # Shared Loki buffer file in logs/
-    global BUFFER_FILE
-    BUFFER_FILE = os.path.join("logs", "loki_buffer.log")
+    if not any(isinstance(h, _LogQueueHandler) for h in logger.handlers):
+        queue_handler = _LogQueueHandler(_log_queue, add_loki=add_loki)
+        queue_handler.addFilter(_sampling_filter)
+        logger.addHandler(queue_handler)
+        _queue_handlers.append(queue_handler)
+        logger.info("[LoggingManager] Queue handler attached to logger '%s'", name)
 
     class PrefixFilter(logging.Filter):
         def filter(self, record: logging.LogRecord) -> bool:
@@ -380,42 +762,4 @@ def get_logger(name: str = "Second_Brain_Database", add_loki: bool = True, prefi
     if prefix and not any(isinstance(f, PrefixFilter) for f in logger.filters):
         logger.addFilter(PrefixFilter())
 
-    handler_types = [type(h) for h in logger.handlers]
-    if add_loki and _loki_available and LokiLoggerHandler not in handler_types:
-        try:
-            loki_handler = LokiLoggerHandler(
-                url=LOKI_URL,
-                labels=LOKI_TAGS,
-                auth=None,
-                compressed=LOKI_COMPRESS,
-            )
-            logger.addHandler(loki_handler)
-            logger.info(
-                "[LoggingManager] LokiLoggerHandler attached to logger '%s' (url=%s, labels=%s)",
-                name,
-                LOKI_URL,
-                LOKI_TAGS,
-            )
-            _flush_buffer_to_loki(loki_handler, logger)
-        except (ImportError, OSError) as e:
-            logger.error(
-                "[LoggingManager] Failed to attach LokiLoggerHandler: %s. Falling back to file buffer.",
-                e,
-                exc_info=True,
-            )
-
-            class BufferHandler(logging.Handler):
-                def emit(self, record: logging.LogRecord) -> None:
-                    _write_to_buffer(record)
-
-            if not any(isinstance(h, BufferHandler) for h in logger.handlers):
-                logger.addHandler(BufferHandler())
-    elif not _loki_available:
-
-        class BufferHandler(logging.Handler):
-            def emit(self, record: logging.LogRecord) -> None:
-                _write_to_buffer(record)
-
-        if not any(isinstance(h, BufferHandler) for h in logger.handlers):
-            logger.addHandler(BufferHandler())
     return logger
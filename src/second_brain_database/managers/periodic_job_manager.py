@@ -0,0 +1,250 @@
+"""
+Cluster-wide scheduling of periodic background jobs.
+
+Every worker process used to start every periodic loop (``periodic_2fa_cleanup``,
+the IPAM loops, ...), so with N workers on M pods each job ran N×M times and
+raced itself on the ``system`` collection timestamps. Jobs are now registered
+here instead: each job has a Redis lease (``scheduler:lease:<job>``) and only
+the worker holding it runs the job's loop. Leases are renewed while the loop
+runs and released on shutdown; if the holder dies, the lease expires and
+another worker takes the job over within ``SCHEDULER_LEASE_TTL`` plus one
+acquire interval.
+
+Leases are per job rather than one leader for everything, so jobs spread
+across workers, and a random start-up delay keeps the cluster from running
+every job at the same moment after a deploy. While Redis is unreachable no
+new leases are taken and running jobs stop once their lease would have
+expired, so a job never runs on two workers at once.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import os
+import random
+import secrets
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from second_brain_database.config import settings
+from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.redis_manager import redis_manager
+
+logger = get_logger(prefix="[Periodic Jobs]")
+
+LEASE_KEY_PREFIX = "scheduler:lease:"
+
+# Extend the lease only if this worker still owns it
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Delete the lease only if this worker still owns it
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class _JobState:
+    """A registered job and its run statistics on this worker."""
+
+    name: str
+    factory: Callable[[], Awaitable[Any]]
+    running: bool = False
+    leader_since: Optional[float] = None
+    acquisitions: int = 0
+    lease_losses: int = 0
+    restarts: int = 0
+    last_error: Optional[str] = None
+    supervisor: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class PeriodicJobManager:
+    """
+    Runs each registered periodic job on exactly one worker in the cluster.
+
+    With leader election disabled every job runs on every worker, as before.
+    """
+
+    def __init__(
+        self,
+        redis_manager,
+        lease_ttl: Optional[float] = None,
+        acquire_interval: Optional[float] = None,
+        start_jitter: Optional[float] = None,
+        leader_election: Optional[bool] = None,
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            redis_manager: RedisManager instance for Redis operations
+            lease_ttl: Seconds a job lease lives without renewal
+            acquire_interval: Seconds between attempts to take a job someone else holds
+            start_jitter: Maximum random delay before a worker first tries a job
+            leader_election: Whether to coordinate jobs through Redis leases
+        """
+        self.redis = redis_manager
+        self.lease_ttl = settings.SCHEDULER_LEASE_TTL if lease_ttl is None else lease_ttl
+        self.acquire_interval = settings.SCHEDULER_ACQUIRE_INTERVAL if acquire_interval is None else acquire_interval
+        self.start_jitter = settings.SCHEDULER_START_JITTER if start_jitter is None else start_jitter
+        self.leader_election = (
+            settings.SCHEDULER_LEADER_ELECTION_ENABLED if leader_election is None else leader_election
+        )
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self._jobs: Dict[str, _JobState] = {}
+
+    def register(self, name: str, factory: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Register a periodic job.
+
+        Args:
+            name: Unique job name (also the lease key suffix)
+            factory: Zero-argument coroutine function running the job's loop
+        """
+        self._jobs[name] = _JobState(name=name, factory=factory)
+
+    @property
+    def tasks(self) -> Dict[str, asyncio.Task]:
+        """Supervisor task per started job."""
+        return {name: job.supervisor for name, job in self._jobs.items() if job.supervisor is not None}
+
+    async def start(self) -> Dict[str, asyncio.Task]:
+        """
+        Start supervising every registered job.
+
+        Returns:
+            Dict[str, asyncio.Task]: Supervisor task per job; cancelling one stops its job and releases the lease
+        """
+        for job in self._jobs.values():
+            if job.supervisor is None or job.supervisor.done():
+                if self.leader_election:
+                    job.supervisor = asyncio.create_task(self._supervise(job))
+                else:
+                    job.supervisor = asyncio.create_task(self._run_unsupervised(job))
+
+        logger.info(
+            "Started %d periodic jobs (leader election: %s, owner: %s)",
+            len(self._jobs),
+            "on" if self.leader_election else "off",
+            self.owner,
+        )
+        return self.tasks
+
+    async def stop(self) -> None:
+        """Stop every job on this worker and release its leases."""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-job run statistics for this worker."""
+        now = time.monotonic()
+        return {
+            name: {
+                "running_here": job.running,
+                "leader_for_seconds": round(now - job.leader_since, 1) if job.leader_since is not None else None,
+                "acquisitions": job.acquisitions,
+                "lease_losses": job.lease_losses,
+                "restarts": job.restarts,
+                "last_error": job.last_error,
+            }
+            for name, job in self._jobs.items()
+        }
+
+    async def _run_unsupervised(self, job: _JobState) -> None:
+        """Run a job without coordination."""
+        job.running = True
+        try:
+            await job.factory()
+        finally:
+            job.running = False
+
+    async def _try_acquire(self, job: _JobState) -> bool:
+        redis_client = await self.redis.get_redis()
+        acquired = await redis_client.set(
+            LEASE_KEY_PREFIX + job.name, self.owner, nx=True, px=int(self.lease_ttl * 1000)
+        )
+        return bool(acquired)
+
+    async def _renew(self, job: _JobState) -> bool:
+        renewed = await self.redis.run_script(
+            RENEW_LEASE_SCRIPT, (LEASE_KEY_PREFIX + job.name,), (self.owner, int(self.lease_ttl * 1000))
+        )
+        return bool(renewed)
+
+    async def _release(self, job: _JobState) -> None:
+        try:
+            await self.redis.run_script(RELEASE_LEASE_SCRIPT, (LEASE_KEY_PREFIX + job.name,), (self.owner,))
+        except Exception as e:
+            logger.warning("Failed to release lease for job %s: %s", job.name, e)
+
+    async def _supervise(self, job: _JobState) -> None:
+        """Acquire the job's lease, run the job while it is held, and retry forever."""
+        await asyncio.sleep(random.uniform(0, self.start_jitter))
+
+        while True:
+            try:
+                acquired = await self._try_acquire(job)
+            except Exception as e:
+                job.last_error = str(e)
+                logger.warning("Could not acquire lease for job %s: %s", job.name, e)
+                acquired = False
+
+            if acquired:
+                job.acquisitions += 1
+                logger.info("Acquired lease for job %s; running it on this worker", job.name)
+                await self._run_with_lease(job)
+
+            await asyncio.sleep(self.acquire_interval * random.uniform(0.8, 1.2))
+
+    async def _run_with_lease(self, job: _JobState) -> None:
+        """Run the job, renewing its lease, until the job ends or the lease is lost."""
+        job.running = True
+        job.leader_since = last_renewed = time.monotonic()
+        job_task = asyncio.create_task(job.factory())
+        renew_every = self.lease_ttl / 3
+
+        try:
+            while True:
+                done, _ = await asyncio.wait({job_task}, timeout=renew_every)
+                if done:
+                    job.restarts += 1
+                    error = job_task.exception()
+                    job.last_error = str(error) if error else "job returned"
+                    logger.error("Job %s stopped unexpectedly: %s", job.name, job.last_error)
+                    return
+
+                try:
+                    if not await self._renew(job):
+                        job.lease_losses += 1
+                        logger.warning("Lost lease for job %s; stopping it on this worker", job.name)
+                        return
+                    last_renewed = time.monotonic()
+                except Exception as e:
+                    job.last_error = str(e)
+                    if time.monotonic() - last_renewed >= self.lease_ttl - renew_every:
+                        job.lease_losses += 1
+                        logger.warning("Could not renew lease for job %s, stopping it: %s", job.name, e)
+                        return
+                    logger.warning("Lease renewal for job %s failed, retrying: %s", job.name, e)
+
+        finally:
+            job.running = False
+            job.leader_since = None
+            if not job_task.done():
+                job_task.cancel()
+                await asyncio.gather(job_task, return_exceptions=True)
+            await self._release(job)
+
+
+# Global periodic job manager instance
+periodic_job_manager = PeriodicJobManager(redis_manager)
@@ -0,0 +1,228 @@
+"""
+Authenticated principal cache.
+
+Every protected request resolves its bearer token through
+``get_current_user_dep``: a blacklist lookup, a JWT decode, a ``users``
+lookup, the tenant claims and the user's workspaces. The resolved principal
+(user document, tenant claims and workspaces) is cached per process for a
+short TTL, keyed by the SHA-256 of the token and the tenant in context.
+
+Each entry records the user's principal version (``principal:version:<username>``
+in Redis) read before the user was loaded. A cache hit costs a single MGET
+that re-checks the token blacklist and compares that version, so writers
+that change what the principal contains (token_version bumps, blacklisting,
+2FA/lockdown/profile updates, workspace membership) only need to call
+``invalidate`` or ``invalidate_matching`` for the next request to reload it.
+"""
+
+import copy
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from bson import ObjectId
+
+from second_brain_database.config import settings
+from second_brain_database.database import db_manager
+from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.redis_manager import redis_manager
+
+logger = get_logger(prefix="[PrincipalCache]")
+
+PRINCIPAL_VERSION_PREFIX = "principal:version:"
+# Versions outlive any cache entry; they only need to survive the entry TTL
+PRINCIPAL_VERSION_TTL = 60 * 60 * 24
+
+
+@dataclass
+class _PrincipalEntry:
+    """One cached principal."""
+
+    username: str
+    version: str
+    user: Dict[str, Any]
+    expires_at: float
+
+
+class PrincipalCache:
+    """
+    Per-process LRU of authenticated principals validated against Redis versions.
+
+    Redis failures never fail a request: lookups fall back to the full
+    authentication path and entries are simply not cached.
+    """
+
+    def __init__(self, redis_manager, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            redis_manager: RedisManager instance for Redis operations
+            ttl: Seconds an entry may be served (0 disables the cache)
+            max_entries: Maximum cached principals before the oldest are evicted
+        """
+        self.redis = redis_manager
+        self.ttl = settings.PRINCIPAL_CACHE_TTL if ttl is None else ttl
+        self.max_entries = settings.PRINCIPAL_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._entries: "OrderedDict[str, _PrincipalEntry]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether principals are cached at all."""
+        return self.ttl > 0 and self.max_entries > 0
+
+    @staticmethod
+    def _cache_key(token: str, tenant_id: Optional[str]) -> str:
+        """Key an entry by token hash and the tenant the workspaces were loaded for."""
+        return f"{hashlib.sha256(token.encode()).hexdigest()}:{tenant_id or ''}"
+
+    @staticmethod
+    def _version_key(username: str) -> str:
+        return f"{PRINCIPAL_VERSION_PREFIX}{username}"
+
+    async def get(self, token: str, tenant_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of the cached principal if it is still current.
+
+        Args:
+            token: Bearer token as presented by the client
+            tenant_id: Tenant already in context for this request, if any
+
+        Returns:
+            The cached user dict, or None on a miss, expiry, blacklisting or version change
+        """
+        if not self.enabled:
+            return None
+
+        key = self._cache_key(token, tenant_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if time.time() >= entry.expires_at:
+            self._entries.pop(key, None)
+            return None
+
+        try:
+            redis_client = await self.redis.get_redis()
+            blacklisted, version = await redis_client.mget(
+                f"blacklist:token:{token}", self._version_key(entry.username)
+            )
+        except Exception as e:
+            logger.warning(f"Principal cache check failed, authenticating without cache: {e}")
+            return None
+
+        if blacklisted or (version or "0") != entry.version:
+            self._entries.pop(key, None)
+            return None
+
+        self._entries.move_to_end(key)
+        return copy.deepcopy(entry.user)
+
+    async def get_version(self, username: Optional[str]) -> Optional[str]:
+        """
+        Read a user's principal version before loading the principal.
+
+        Returns:
+            The version to pass to ``set``, or None if it could not be read
+        """
+        if not self.enabled or not username:
+            return None
+
+        try:
+            redis_client = await self.redis.get_redis()
+            return await redis_client.get(self._version_key(username)) or "0"
+        except Exception as e:
+            logger.warning(f"Failed to read principal version for {username}: {e}")
+            return None
+
+    def set(
+        self,
+        token: str,
+        tenant_id: Optional[str],
+        username: str,
+        version: Optional[str],
+        user: Dict[str, Any],
+        token_expires_at: Optional[float] = None,
+    ) -> None:
+        """
+        Cache a freshly resolved principal.
+
+        Args:
+            token: Bearer token as presented by the client
+            tenant_id: Tenant that was in context when the principal was resolved
+            username: The principal's username (version key)
+            version: Version returned by ``get_version`` before the user was loaded
+            user: Resolved user dict (copied, later mutations are not cached)
+            token_expires_at: JWT ``exp``; entries never outlive the token
+        """
+        if not self.enabled or version is None:
+            return
+
+        expires_at = time.time() + self.ttl
+        if token_expires_at:
+            expires_at = min(expires_at, float(token_expires_at))
+
+        key = self._cache_key(token, tenant_id)
+        self._entries[key] = _PrincipalEntry(username, version, copy.deepcopy(user), expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard_token(self, token: str) -> None:
+        """Drop every local entry for one token."""
+        prefix = hashlib.sha256(token.encode()).hexdigest() + ":"
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+
+    async def invalidate(self, *usernames: str) -> None:
+        """
+        Invalidate cached principals for users on every worker.
+
+        Call this after changing anything a principal carries (user fields,
+        token_version, workspace membership).
+        """
+        usernames = [username for username in usernames if username]
+        if not usernames:
+            return
+
+        stale = set(usernames)
+        for key in [k for k, entry in self._entries.items() if entry.username in stale]:
+            del self._entries[key]
+
+        try:
+            redis_client = await self.redis.get_redis()
+            pipe = redis_client.pipeline(transaction=False)
+            for username in stale:
+                pipe.incr(self._version_key(username))
+                pipe.expire(self._version_key(username), PRINCIPAL_VERSION_TTL)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to invalidate principals for {sorted(stale)}: {e}")
+
+    async def invalidate_matching(self, query: Dict[str, Any]) -> None:
+        """Invalidate cached principals for every user matching a ``users`` query."""
+        try:
+            cursor = db_manager.get_collection("users").find(query, {"username": 1})
+            users = await cursor.to_list(length=None)
+        except Exception as e:
+            logger.error(f"Failed to resolve users for principal invalidation: {e}")
+            return
+
+        await self.invalidate(*(user.get("username") for user in users))
+
+    async def invalidate_user_ids(self, user_ids: Iterable[str]) -> None:
+        """Invalidate cached principals for users identified by ``_id`` strings."""
+        object_ids = [ObjectId(user_id) for user_id in set(user_ids) if ObjectId.is_valid(user_id)]
+        if object_ids:
+            await self.invalidate_matching({"_id": {"$in": object_ids}})
+
+    def clear(self) -> None:
+        """Drop every local entry."""
+        self._entries.clear()
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache(redis_manager)
@@ -0,0 +1,313 @@
+"""
+Shared Redis rate limiter.
+
+Each check is a single atomic Lua script call, so pruning, counting,
+recording and retry-after calculation happen in one round trip and cannot
+race with other workers. Two algorithms are available:
+
+- ``sliding_window``: exact sliding log in a sorted set (one member per request)
+- ``gcra``: generic cell rate algorithm, O(1) memory per key (one timestamp)
+
+A small per-process cache sits in front of Redis. Callers that Redis just
+rejected are rejected locally until their retry-after elapses, and callers
+that are clearly under their limit may be granted a short local lease of a
+few requests that are recorded in Redis on their next round trip.
+"""
+
+import math
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from second_brain_database.config import settings
+from second_brain_database.managers.logging_manager import get_logger
+
+logger = get_logger(prefix="[RateLimitManager]")
+
+# KEYS[1] = limit key
+# ARGV = now_ms, window_ms, limit, increment (0/1), pending, member
+# Returns {allowed, used, retry_after_ms, reset_after_ms}
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local increment = tonumber(ARGV[4])
+local pending = tonumber(ARGV[5])
+local member = ARGV[6]
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+local used = redis.call('ZCARD', key)
+
+-- Requests already admitted from a local lease are always recorded
+for i = 1, pending do
+    redis.call('ZADD', key, now, member .. ':' .. i)
+end
+used = used + pending
+
+local allowed = 0
+if used < limit then
+    allowed = 1
+    if increment == 1 then
+        redis.call('ZADD', key, now, member)
+        used = used + 1
+    end
+end
+
+if pending > 0 or (allowed == 1 and increment == 1) then
+    redis.call('PEXPIRE', key, window + 60000)
+end
+
+local reset_after = 0
+if used > 0 then
+    local oldest = redis.call('ZRANGE', key, 0, 0)
+    if oldest[1] then
+        local oldest_score = tonumber(redis.call('ZSCORE', key, oldest[1]))
+        reset_after = math.max(0, oldest_score + window - now)
+    end
+end
+
+local retry_after = 0
+if allowed == 0 then
+    retry_after = reset_after
+end
+
+return {allowed, used, retry_after, reset_after}
+"""
+
+# KEYS[1] = limit key
+# ARGV = now_ms, window_ms, limit, increment (0/1), pending
+# Returns {allowed, used, retry_after_ms, reset_after_ms}
+GCRA_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local increment = tonumber(ARGV[4])
+local pending = tonumber(ARGV[5])
+local interval = window / limit
+
+local tat = tonumber(redis.call('GET', key)) or now
+if tat < now then
+    tat = now
+end
+tat = tat + pending * interval
+
+local allowed = 0
+local retry_after = 0
+local next_tat = tat + interval
+if next_tat - now <= window then
+    allowed = 1
+    if increment == 1 then
+        tat = next_tat
+    end
+else
+    retry_after = math.ceil(next_tat - window - now)
+end
+
+if tat > now and (pending > 0 or (allowed == 1 and increment == 1)) then
+    redis.call('SET', key, tostring(tat), 'PX', math.ceil(tat - now))
+end
+
+local used = math.min(limit, math.ceil((tat - now) / interval))
+return {allowed, used, retry_after, math.ceil(tat - now)}
+"""
+
+ALGORITHMS = ("sliding_window", "gcra")
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a single rate limit check."""
+
+    allowed: bool
+    used: int
+    limit: int
+    retry_after_ms: int
+    reset_after_ms: int
+
+    @property
+    def remaining(self) -> int:
+        """Requests still available in the current window."""
+        return max(0, self.limit - self.used)
+
+    @property
+    def retry_after(self) -> int:
+        """Whole seconds until the next request can be admitted (at least 1)."""
+        return max(1, math.ceil(self.retry_after_ms / 1000))
+
+
+@dataclass
+class _LocalEntry:
+    """Per-process view of one limit key."""
+
+    expires_at: float
+    allowance: int = 0
+    pending: int = 0
+    used: int = 0
+    limit: int = 0
+    denied: bool = False
+
+
+class RedisRateLimiter:
+    """
+    Atomic single-round-trip rate limiter backed by Redis Lua scripts.
+
+    Callers own their key naming and error handling; this class raises on
+    Redis failures so each caller can keep its own fail-open policy.
+
+    Local leases trade exactness for fewer round trips. A lease is only
+    granted while at most LOCAL_LEASE_MAX_USAGE of the limit is used and is
+    capped at LOCAL_LEASE_MAX_SHARE of the limit, so with W workers leasing
+    at once the admitted total can reach ``limit * (0.5 + 0.1 * W)``: it
+    stays within the limit up to five workers and exceeds it by at most
+    ``0.1 * limit`` per additional worker. Set local_lease_ratio to 0 where
+    the limit must be exact.
+    """
+
+    # Only lease locally while at most this share of the limit is used
+    LOCAL_LEASE_MAX_USAGE = 0.5
+    # Largest share of the limit a single worker may admit from one lease
+    LOCAL_LEASE_MAX_SHARE = 0.1
+    # Upper bound on tracked local keys before expired entries are swept
+    LOCAL_CACHE_MAX_KEYS = 10000
+
+    def __init__(
+        self,
+        redis_manager,
+        algorithm: Optional[str] = None,
+        local_lease_ratio: Optional[float] = None,
+        local_lease_ttl: Optional[float] = None,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            redis_manager: RedisManager instance for Redis operations
+            algorithm: "sliding_window" or "gcra" (defaults to RATE_LIMIT_ALGORITHM)
+            local_lease_ratio: Share of the remaining quota that may be admitted
+                locally without Redis (0 disables leasing)
+            local_lease_ttl: Seconds a local lease stays valid
+        """
+        algorithm = algorithm or settings.RATE_LIMIT_ALGORITHM
+        if algorithm not in ALGORITHMS:
+            logger.warning(f"Unknown rate limit algorithm {algorithm!r}, using sliding_window")
+            algorithm = "sliding_window"
+
+        self.redis = redis_manager
+        self.algorithm = algorithm
+        self.local_lease_ratio = (
+            settings.RATE_LIMIT_LOCAL_LEASE_RATIO if local_lease_ratio is None else local_lease_ratio
+        )
+        self.local_lease_ttl = settings.RATE_LIMIT_LOCAL_LEASE_TTL if local_lease_ttl is None else local_lease_ttl
+        self._local: Dict[str, _LocalEntry] = {}
+
+    async def hit(self, key: str, max_requests: int, window_seconds: int, increment: bool = True) -> RateLimitResult:
+        """
+        Check a limit and, if allowed and ``increment`` is set, record one request.
+
+        Args:
+            key: Redis key for this limit
+            max_requests: Maximum requests allowed in the window
+            window_seconds: Window size in seconds
+            increment: Whether to record the request when allowed
+
+        Returns:
+            RateLimitResult describing the decision
+
+        Raises:
+            Exception: Any Redis error, left to the caller's fail-open policy
+        """
+        now = time.monotonic()
+        entry = self._local.get(key)
+        if entry is not None and now >= entry.expires_at and not entry.pending:
+            del self._local[key]
+            entry = None
+
+        if entry is not None and now < entry.expires_at:
+            if entry.denied:
+                remaining_ms = max(0, int((entry.expires_at - now) * 1000))
+                return RateLimitResult(False, entry.used, entry.limit, remaining_ms, remaining_ms)
+            if increment and entry.allowance > 0 and entry.limit == max_requests:
+                entry.allowance -= 1
+                entry.pending += 1
+                return RateLimitResult(True, entry.used + entry.pending, max_requests, 0, window_seconds * 1000)
+
+        pending = entry.pending if entry is not None else 0
+        result = await self._eval(key, max_requests, window_seconds, increment, pending)
+        self._remember(key, result, increment)
+        return result
+
+    async def peek(self, key: str, max_requests: int, window_seconds: int) -> RateLimitResult:
+        """Return the current state of a limit without recording a request."""
+        return await self.hit(key, max_requests, window_seconds, increment=False)
+
+    async def reset(self, key: str) -> None:
+        """Delete a limit key and forget any local state for it."""
+        self._local.pop(key, None)
+        redis_client = await self.redis.get_redis()
+        await redis_client.delete(key)
+
+    async def _eval(
+        self, key: str, max_requests: int, window_seconds: int, increment: bool, pending: int
+    ) -> RateLimitResult:
+        """Run the configured Lua script for one key."""
+        now_ms = int(time.time() * 1000)
+        window_ms = window_seconds * 1000
+
+        if self.algorithm == "gcra":
+            reply = await self.redis.run_script(
+                GCRA_SCRIPT, (key,), (now_ms, window_ms, max_requests, int(increment), pending)
+            )
+        else:
+            member = f"{now_ms}:{uuid.uuid4().hex}"
+            reply = await self.redis.run_script(
+                SLIDING_WINDOW_SCRIPT, (key,), (now_ms, window_ms, max_requests, int(increment), pending, member)
+            )
+
+        allowed, used, retry_after_ms, reset_after_ms = (int(value) for value in reply)
+        return RateLimitResult(bool(allowed), used, max_requests, retry_after_ms, reset_after_ms)
+
+    def _remember(self, key: str, result: RateLimitResult, increment: bool) -> None:
+        """Update the local cache from an authoritative Redis result."""
+        now = time.monotonic()
+
+        if not result.allowed and result.retry_after_ms > 0:
+            self._store(
+                key,
+                _LocalEntry(
+                    expires_at=now + result.retry_after_ms / 1000,
+                    used=result.used,
+                    limit=result.limit,
+                    denied=True,
+                ),
+            )
+            return
+
+        allowance = 0
+        if increment and self.local_lease_ratio > 0 and result.used <= result.limit * self.LOCAL_LEASE_MAX_USAGE:
+            allowance = min(
+                int(result.remaining * self.local_lease_ratio),
+                int(result.limit * self.LOCAL_LEASE_MAX_SHARE),
+            )
+
+        if allowance > 0:
+            self._store(
+                key,
+                _LocalEntry(
+                    expires_at=now + self.local_lease_ttl, allowance=allowance, used=result.used, limit=result.limit
+                ),
+            )
+        else:
+            self._local.pop(key, None)
+
+    def _store(self, key: str, entry: _LocalEntry) -> None:
+        """Insert a local entry, sweeping expired ones when the cache grows large."""
+        if len(self._local) >= self.LOCAL_CACHE_MAX_KEYS and key not in self._local:
+            now = time.monotonic()
+            for stale_key in [k for k, v in self._local.items() if v.expires_at <= now and not v.pending]:
+                del self._local[stale_key]
+            if len(self._local) >= self.LOCAL_CACHE_MAX_KEYS:
+                return
+        self._local[key] = entry
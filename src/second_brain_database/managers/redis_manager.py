@@ -11,13 +11,15 @@ Logging:
     - All exceptions are logged with full traceback.
 """
 
+import hashlib
 import os
 import sys
-from typing import Any, Optional
+from typing import Any, Dict, Optional, Sequence
 
 from fastapi import HTTPException, status
 import redis as redis_sync
 import redis.asyncio as redis_async
+from redis.exceptions import NoScriptError
 
 from second_brain_database.config import settings
 from second_brain_database.managers.logging_manager import get_logger
@@ -34,6 +36,8 @@ class RedisManager:
     Attributes:
         redis_url: The Redis connection URL.
         _redis: The cached Redis connection instance.
+        _binary_redis: The cached Redis connection instance that returns raw bytes.
+        _script_shas: SHA1 digests of the Lua scripts run through run_script, keyed by source.
         logger: The logger instance for this manager.
     """
 
@@ -47,6 +51,7 @@ class RedisManager:
         - If both attempts fail, exit the process (fail-fast).
         """
         self.logger = logger
+        self._script_shas: Dict[str, str] = {}
 
         # Build a local redis url from environment or sensible defaults
         redis_host = os.environ.get("REDIS_HOST", "127.0.0.1")
@@ -61,6 +66,7 @@ class RedisManager:
             sync_client.ping()
             self.redis_url = local_url
             self._redis: Optional[redis_async.Redis] = None
+            self._binary_redis: Optional[redis_async.Redis] = None
             self.logger.info("[RedisManager] Local Redis healthy at %s", local_url)
             return
         except Exception as e:
@@ -90,6 +96,7 @@ class RedisManager:
             sync_client.ping()
             self.redis_url = redis_url_config
             self._redis: Optional[redis_async.Redis] = None
+            self._binary_redis: Optional[redis_async.Redis] = None
             self.logger.info("[RedisManager] Connected to configured Redis URL %s", redis_url_config)
             return
         except Exception as e:
@@ -123,6 +130,59 @@ class RedisManager:
                 ) from conn_exc
         return self._redis
 
+    async def get_binary_redis(self) -> redis_async.Redis:
+        """
+        Get or create a Redis connection that does not decode responses.
+
+        Used for binary payloads (e.g. MessagePack pub/sub frames) that are
+        not valid UTF-8.
+
+        Returns:
+            An active redis.Redis connection returning bytes.
+
+        Raises:
+            HTTPException: If Redis is unavailable.
+        """
+        if self._binary_redis is None:
+            try:
+                self._binary_redis = await redis_async.from_url(self.redis_url, decode_responses=False)
+                self.logger.info("[RedisManager] Successfully connected (async, binary) to Redis at %s", self.redis_url)
+            except Exception as conn_exc:
+                self.logger.error(
+                    "[RedisManager] Failed to create binary Redis connection: %s", conn_exc, exc_info=True
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=REDIS_UNAVAILABLE_MSG,
+                ) from conn_exc
+        return self._binary_redis
+
+    async def run_script(self, script: str, keys: Sequence[str], args: Sequence[Any] = ()) -> Any:
+        """
+        Run a Lua script by its SHA1 digest with EVALSHA, so the source is only sent to Redis once.
+
+        The script is (re)loaded on NOSCRIPT, e.g. on first use or after Redis restarts or flushes its script cache.
+
+        Args:
+            script: The Lua source
+            keys: Keys passed as KEYS
+            args: Arguments passed as ARGV
+
+        Returns:
+            The script's reply
+        """
+        sha = self._script_shas.get(script)
+        if sha is None:
+            sha = self._script_shas[script] = hashlib.sha1(script.encode("utf-8")).hexdigest()
+
+        redis_client = await self.get_redis()
+        try:
+            return await redis_client.evalsha(sha, len(keys), *keys, *args)
+        except NoScriptError:
+            self.logger.debug("[RedisManager] Loading Lua script %s", sha)
+            await redis_client.script_load(script)
+            return await redis_client.evalsha(sha, len(keys), *keys, *args)
+
     async def set_with_expiry(self, key: str, value: Any, expiry: int) -> None:
         """
         Set a key-value pair with expiration time.
@@ -21,6 +21,38 @@ logger = get_logger(prefix="[SecurityManager]")
 BLACKLISTED_MSG: str = "Your IP has been temporarily blacklisted due to excessive abuse."
 RATE_LIMITED_MSG: str = "Too many requests. Please try again later."
 
+# Blacklist check, rate limit and abuse tracking in one round trip.
+# KEYS: rate key, abuse key, blacklist key
+# ARGV: requests allowed, period, blacklist threshold, blacklist duration
+RATE_LIMIT_SCRIPT = """
+local rate_key = KEYS[1]
+local abuse_key = KEYS[2]
+local blacklist_key = KEYS[3]
+local requests_allowed = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local blacklist_threshold = tonumber(ARGV[3])
+local blacklist_duration = tonumber(ARGV[4])
+if redis.call('EXISTS', blacklist_key) == 1 then
+    return {0, 0, 'BLOCKED'}
+end
+local count = redis.call('INCR', rate_key)
+if count == 1 then
+    redis.call('EXPIRE', rate_key, period)
+end
+if count > requests_allowed then
+    local abuse_count = redis.call('INCR', abuse_key)
+    if abuse_count == 1 then
+        redis.call('EXPIRE', abuse_key, blacklist_duration)
+    end
+    if abuse_count >= blacklist_threshold then
+        redis.call('SET', blacklist_key, 1, 'EX', blacklist_duration)
+        return {count, abuse_count, 'BLACKLISTED'}
+    end
+    return {count, abuse_count, 'RATE_LIMITED'}
+end
+return {count, 0, 'OK'}
+"""
+
 
 class SecurityManager:
     """
@@ -294,43 +326,10 @@ class SecurityManager:
         Side-effects:
             Logs all rate limit, blacklist, and abuse events.
         """
-        lua_script = """
-        local rate_key = KEYS[1]
-        local abuse_key = KEYS[2]
-        local blacklist_key = KEYS[3]
-        local requests_allowed = tonumber(ARGV[1])
-        local period = tonumber(ARGV[2])
-        local blacklist_threshold = tonumber(ARGV[3])
-        local blacklist_duration = tonumber(ARGV[4])
-        local count = redis.call('INCR', rate_key)
-        if count == 1 then
-            redis.call('EXPIRE', rate_key, period)
-        end
-        if count > requests_allowed then
-            local abuse_count = redis.call('INCR', abuse_key)
-            if abuse_count == 1 then
-                redis.call('EXPIRE', abuse_key, blacklist_duration)
-            end
-            if abuse_count >= blacklist_threshold then
-                redis.call('SET', blacklist_key, 1, 'EX', blacklist_duration)
-                return {count, abuse_count, 'BLACKLISTED'}
-            end
-            return {count, abuse_count, 'RATE_LIMITED'}
-        end
-        return {count, 0, 'OK'}
-        """
-        redis_conn = await self.get_redis()
         ip = self.get_client_ip(request)
         if self.is_trusted_ip(ip):
             self.logger.debug("Trusted IP %s bypassed rate limiting.", ip)
             return
-        if await self.is_blacklisted(ip):
-            user_agent = self.get_client_user_agent(request)
-            endpoint = f"{request.method} {request.url.path}"
-            self.logger.warning(
-                "Blocked request from blacklisted IP: %s, endpoint: %s, user_agent: %s", ip, endpoint, user_agent
-            )
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=BLACKLISTED_MSG)
         key = f"{self.env_prefix}:ratelimit:{action}:{ip}"
         abuse_key = f"{self.env_prefix}:abuse:{ip}"
         blacklist_key = f"{self.env_prefix}:blacklist:{ip}"
@@ -339,37 +338,42 @@ class SecurityManager:
         blacklist_threshold = settings.BLACKLIST_THRESHOLD
         blacklist_duration = settings.BLACKLIST_DURATION
         try:
-            result = await redis_conn.eval(
-                lua_script,
-                3,
-                key,
-                abuse_key,
-                blacklist_key,
-                requests_allowed,
-                period,
-                blacklist_threshold,
-                blacklist_duration,
+            result = await redis_manager.run_script(
+                RATE_LIMIT_SCRIPT,
+                (key, abuse_key, blacklist_key),
+                (requests_allowed, period, blacklist_threshold, blacklist_duration),
             )
             count, abuse_count, status_flag = result
         except RuntimeError as lua_exc:
             self.logger.error(
                 "Lua script failed for rate limiting: %s. Falling back to Python logic.", lua_exc, exc_info=True
             )
-            count = await redis_conn.incr(key)
-            if count == 1:
-                await redis_conn.expire(key, period)
-            if count > requests_allowed:
-                abuse_count = await redis_conn.incr(abuse_key)
-                if abuse_count == 1:
-                    await redis_conn.expire(abuse_key, blacklist_duration)
-                if abuse_count >= blacklist_threshold:
-                    await redis_conn.set(blacklist_key, 1, ex=blacklist_duration)
-                    status_flag = "BLACKLISTED"
-                else:
-                    status_flag = "RATE_LIMITED"
+            redis_conn = await self.get_redis()
+            if await redis_conn.exists(blacklist_key):
+                count, abuse_count, status_flag = 0, 0, "BLOCKED"
             else:
-                abuse_count = 0
-                status_flag = "OK"
+                count = await redis_conn.incr(key)
+                if count == 1:
+                    await redis_conn.expire(key, period)
+                if count > requests_allowed:
+                    abuse_count = await redis_conn.incr(abuse_key)
+                    if abuse_count == 1:
+                        await redis_conn.expire(abuse_key, blacklist_duration)
+                    if abuse_count >= blacklist_threshold:
+                        await redis_conn.set(blacklist_key, 1, ex=blacklist_duration)
+                        status_flag = "BLACKLISTED"
+                    else:
+                        status_flag = "RATE_LIMITED"
+                else:
+                    abuse_count = 0
+                    status_flag = "OK"
+        if status_flag == "BLOCKED":
+            user_agent = self.get_client_user_agent(request)
+            endpoint = f"{request.method} {request.url.path}"
+            self.logger.warning(
+                "Blocked request from blacklisted IP: %s, endpoint: %s, user_agent: %s", ip, endpoint, user_agent
+            )
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=BLACKLISTED_MSG)
         if status_flag == "BLACKLISTED":
             user_agent = self.get_client_user_agent(request)
             endpoint = f"{request.method} {request.url.path}"
@@ -16,6 +16,7 @@ from pymongo.errors import DuplicateKeyError, PyMongoError
 from second_brain_database.config import settings
 from second_brain_database.database import db_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.redis_manager import redis_manager
 from second_brain_database.models.tenant_models import (
     CreateTenantRequest,
     InviteUserToTenantRequest,
@@ -27,6 +28,9 @@ from second_brain_database.models.tenant_models import (
 
 logger = get_logger(prefix="[Tenant Manager]")
 
+# Published with a tenant_id whenever a tenant's domain-relevant data changes
+TENANT_EVENTS_CHANNEL = "tenants:events"
+
 
 class TenantManager:
     """Manager for tenant operations and multi-tenancy."""
@@ -112,6 +116,8 @@ class TenantManager:
             # Update user's primary tenant if not set
             await self._set_user_primary_tenant_if_needed(owner_user_id, tenant_id)
 
+            await self.notify_tenant_changed(tenant_id)
+
             logger.info("Successfully created tenant: %s (ID: %s)", request.name, tenant_id)
             return tenant_doc
 
@@ -400,6 +406,19 @@ class TenantManager:
         except Exception as e:
             logger.warning("Failed to set primary tenant for user: %s", e)
 
+    async def notify_tenant_changed(self, tenant_id: str) -> None:
+        """
+        Tell every worker that a tenant changed so cached domain lookups are refreshed.
+
+        Args:
+            tenant_id: The tenant that was created or updated
+        """
+        try:
+            redis_client = await redis_manager.get_redis()
+            await redis_client.publish(TENANT_EVENTS_CHANNEL, tenant_id)
+        except Exception as e:
+            logger.warning("Failed to publish tenant change for %s: %s", tenant_id, e)
+
     def _generate_slug(self, name: str) -> str:
         """Generate a URL-friendly slug from name."""
         slug = name.lower().strip()
@@ -315,6 +315,7 @@ class VectorSearchManager:
                     )
 
             logger.info(f"Indexed {len(chunks)} chunks for document {document_id}")
+            await self._invalidate_chat_cache(document_id)
             return chunk_docs
 
         except Exception as e:
@@ -439,12 +440,22 @@ class VectorSearchManager:
             )
 
             logger.info(f"Deleted vector embeddings for document {document_id}")
+            await self._invalidate_chat_cache(document_id)
             return True
 
         except Exception as e:
             logger.error(f"Failed to delete document vectors: {e}")
             return False
 
+    async def _invalidate_chat_cache(self, document_id: str) -> None:
+        """Drop cached chat answers for a document whose vectors changed."""
+        try:
+            from ..chat.services.cache_manager import invalidate_knowledge_base_cache
+
+            await invalidate_knowledge_base_cache(document_id)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate chat cache for document {document_id}: {e}")
+
     async def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector collections.
 
@@ -12,6 +12,7 @@ import uuid
 
 from second_brain_database.database import db_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.principal_cache_manager import principal_cache
 from second_brain_database.models.workspace_models import WorkspaceDocument, WorkspaceMember
 
 # Protocols for dependency injection (can be expanded later)
@@ -115,6 +116,8 @@ class WorkspaceManager:
         if not result.inserted_id:
             raise WorkspaceError("Failed to create workspace in database")
 
+        await principal_cache.invalidate_user_ids([user_id])
+
         self.logger.info(f"Successfully created workspace {workspace_doc.workspace_id} for user {user_id}")
         return workspace_doc.model_dump()
 
@@ -146,6 +149,7 @@ class WorkspaceManager:
             raise WorkspaceError("Failed to add member to workspace.")
 
         workspace["members"].append(new_member.model_dump())
+        await self._invalidate_member_principals(workspace)
         return workspace
 
     async def remove_member(self, workspace_id: str, admin_user_id: str, user_id_to_remove: str) -> Dict[str, Any]:
@@ -162,6 +166,7 @@ class WorkspaceManager:
         if result.modified_count == 0:
             raise UserNotMember()
 
+        await self._invalidate_member_principals(workspace)
         workspace["members"] = [m for m in workspace["members"] if m["user_id"] != user_id_to_remove]
         return workspace
 
@@ -194,6 +199,8 @@ class WorkspaceManager:
         if result.modified_count == 0:
             raise WorkspaceError("Failed to update member role.")
 
+        await self._invalidate_member_principals(workspace)
+
         # Return updated workspace
         updated_workspace = await self.workspaces_collection.find_one({"workspace_id": workspace_id})
         return updated_workspace
@@ -227,6 +234,8 @@ class WorkspaceManager:
         if result.modified_count == 0:
             raise WorkspaceError("Failed to update workspace.")
 
+        await self._invalidate_member_principals(workspace)
+
         # Return updated workspace
         updated_workspace = await self.workspaces_collection.find_one({"workspace_id": workspace_id})
         return updated_workspace
@@ -241,6 +250,8 @@ class WorkspaceManager:
             raise InsufficientPermissions("Only the workspace owner can delete the workspace.")
 
         result = await self.workspaces_collection.delete_one({"workspace_id": workspace_id})
+        if result.deleted_count > 0:
+            await self._invalidate_member_principals(workspace)
         return result.deleted_count > 0
 
     # --- Private Helper & Security Methods ---
@@ -270,6 +281,10 @@ class WorkspaceManager:
 
         return workspace
 
+    async def _invalidate_member_principals(self, workspace: Dict[str, Any]) -> None:
+        """Invalidates cached principals of every member, since each carries the workspace."""
+        await principal_cache.invalidate_user_ids(member["user_id"] for member in workspace.get("members", []))
+
     def get_user_role(self, user_id: str, workspace: Dict[str, Any]) -> Optional[str]:
         """Gets a user's role within a specific workspace document."""
         for member in workspace.get("members", []):
@@ -3,112 +3,254 @@ Tenant middleware for automatic tenant context injection.
 
 This middleware extracts tenant information from requests and sets the
 tenant context for the duration of the request.
+
+It is a plain ASGI middleware (no per-request task or body stream wrapping),
+and custom domain lookups are served from an in-memory domain -> tenant map.
+Domains without a tenant are cached too, for a shorter time. Cached entries
+are dropped when ``tenant_manager`` publishes a tenant change.
 """
 
-from typing import Optional
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from second_brain_database.config import settings
 from second_brain_database.database import db_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.redis_manager import redis_manager
+from second_brain_database.managers.tenant_manager import TENANT_EVENTS_CHANNEL
 from second_brain_database.middleware.tenant_context import clear_tenant_context, set_tenant_context
 
 logger = get_logger(prefix="[Tenant Middleware]")
 
 
-class TenantMiddleware(BaseHTTPMiddleware):
+class TenantDomainCache:
     """
-    Middleware to extract and set tenant context for each request.
+    Per-process cache of custom domain lookups.
 
-    Tenant identification strategies (in order of precedence):
-    1. Custom domain (e.g., acme.secondbrain.com -> tenant via DB lookup)
-    2. Subdomain (e.g., acme.app.com -> tenant_acme)
-    3. X-Tenant-ID header (for API clients)
-    4. User's primary tenant (from request.state.user if authenticated)
-    5. Default tenant (for backward compatibility)
+    Concurrent misses for the same domain share one database query. A Redis
+    subscription to tenant change events evicts every entry for the changed
+    tenant plus all negative entries (the tenant may have gained a domain);
+    TTLs bound staleness while the subscription is down.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        """Process request and inject tenant context."""
-        tenant_id = None
+    # Seconds to wait before re-subscribing after a Redis failure
+    RECONNECT_DELAY = 1.0
 
-        try:
-            # Strategy 1: Custom domain lookup
-            host = request.headers.get("host", "").split(":")[0]  # Remove port
-            if host and not host.startswith("localhost") and not host.startswith("127.0.0.1"):
-                tenant_id = await self._lookup_tenant_by_domain(host)
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """
+        Initialize the cache.
 
-            # Strategy 2: Subdomain extraction
-            if not tenant_id:
-                tenant_id = self._extract_tenant_from_subdomain(host)
+        Args:
+            ttl: Seconds a domain -> tenant mapping is served
+            negative_ttl: Seconds a domain without a tenant is served
+            max_entries: Maximum cached domains before the cache is reset
+        """
+        self.ttl = settings.TENANT_DOMAIN_CACHE_TTL if ttl is None else ttl
+        self.negative_ttl = settings.TENANT_DOMAIN_NEGATIVE_CACHE_TTL if negative_ttl is None else negative_ttl
+        self.max_entries = settings.TENANT_DOMAIN_CACHE_MAX_ENTRIES if max_entries is None else max_entries
 
-            # Strategy 3: Header-based (for API clients)
-            if not tenant_id:
-                tenant_id = request.headers.get("X-Tenant-ID")
+        # domain -> (tenant_id or None, expires_at)
+        self._entries: Dict[str, Tuple[Optional[str], float]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._listener: Optional[asyncio.Task] = None
 
-            # Strategy 4: User's primary tenant (from authenticated user)
-            if not tenant_id and hasattr(request.state, "user"):
-                user = request.state.user
-                if isinstance(user, dict):
-                    tenant_id = user.get("primary_tenant_id")
+    async def get(self, domain: str) -> Optional[str]:
+        """
+        Resolve a custom domain to a tenant ID.
 
-            # Strategy 5: Default tenant for backward compatibility
-            if not tenant_id:
-                tenant_id = settings.DEFAULT_TENANT_ID
+        Args:
+            domain: The request host without port
+
+        Returns:
+            Optional[str]: Tenant ID if a tenant owns the domain, None otherwise
+        """
+        self._ensure_listener()
 
-            # Set tenant context
-            set_tenant_context(tenant_id)
+        entry = self._entries.get(domain)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
 
-            # Add tenant_id to request state for easy access
-            request.state.tenant_id = tenant_id
+        inflight = self._inflight.get(domain)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
 
-            logger.debug(
-                "Tenant context set for request: %s %s -> tenant_id=%s",
-                request.method,
-                request.url.path,
-                tenant_id,
-            )
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[domain] = future
+        try:
+            tenant_id, found = await self._lookup(domain)
+            if found:
+                self._store(domain, tenant_id)
+            future.set_result(tenant_id)
+            return tenant_id
+        finally:
+            if not future.done():
+                future.set_result(None)
+            del self._inflight[domain]
 
-            response = await call_next(request)
-            return response
+    def invalidate_tenant(self, tenant_id: str) -> None:
+        """Drop entries for a tenant and every negative entry."""
+        for domain in [d for d, (cached, _) in self._entries.items() if cached is None or cached == tenant_id]:
+            del self._entries[domain]
 
-        except Exception as e:
-            logger.error("Error in tenant middleware: %s", e, exc_info=True)
-            # Continue with default tenant on error
-            if not tenant_id:
-                tenant_id = settings.DEFAULT_TENANT_ID
-                set_tenant_context(tenant_id)
-            response = await call_next(request)
-            return response
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
 
-        finally:
-            # Always clear tenant context after request
-            clear_tenant_context()
+    async def close(self) -> None:
+        """Stop the change listener."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
 
-    async def _lookup_tenant_by_domain(self, domain: str) -> Optional[str]:
+    async def _lookup(self, domain: str) -> Tuple[Optional[str], bool]:
         """
         Look up tenant by custom domain.
 
-        Args:
-            domain: The domain to look up
-
         Returns:
-            Optional[str]: Tenant ID if found, None otherwise
+            Tuple of the tenant ID (or None) and whether the lookup succeeded
         """
         try:
             tenants_collection = db_manager.get_collection("tenants")
-            tenant = await tenants_collection.find_one({"settings.custom_domain": domain})
+            tenant = await tenants_collection.find_one({"settings.custom_domain": domain}, {"tenant_id": 1})
 
             if tenant:
                 logger.debug("Found tenant by custom domain: %s -> %s", domain, tenant["tenant_id"])
-                return tenant["tenant_id"]
+                return tenant["tenant_id"], True
+            return None, True
 
         except Exception as e:
             logger.warning("Failed to lookup tenant by domain %s: %s", domain, e)
+            return None, False
 
-        return None
+    def _store(self, domain: str, tenant_id: Optional[str]) -> None:
+        if len(self._entries) >= self.max_entries and domain not in self._entries:
+            self._entries.clear()
+        ttl = self.ttl if tenant_id else self.negative_ttl
+        self._entries[domain] = (tenant_id, time.monotonic() + ttl)
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """Evict cached domains when a tenant change is published."""
+        while True:
+            pubsub = None
+            try:
+                redis_client = await redis_manager.get_redis()
+                pubsub = redis_client.pubsub()
+                await pubsub.subscribe(TENANT_EVENTS_CHANNEL)
+
+                # Changes may have been missed while unsubscribed
+                self.clear()
+
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.invalidate_tenant(message["data"])
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.warning(f"Tenant change subscription failed, retrying in {self.RECONNECT_DELAY}s: {e}")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.unsubscribe(TENANT_EVENTS_CHANNEL)
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+
+# Global domain cache instance
+tenant_domain_cache = TenantDomainCache()
+
+
+class TenantMiddleware:
+    """
+    Middleware to extract and set tenant context for each request.
+
+    Tenant identification strategies (in order of precedence):
+    1. Custom domain (e.g., acme.secondbrain.com -> tenant via cached DB lookup)
+    2. Subdomain (e.g., acme.app.com -> tenant_acme)
+    3. X-Tenant-ID header (for API clients)
+    4. User's primary tenant (from request.state.user if authenticated)
+    5. Default tenant (for backward compatibility)
+    """
+
+    def __init__(self, app: ASGIApp, domain_cache: Optional[TenantDomainCache] = None):
+        self.app = app
+        self.domain_cache = domain_cache or tenant_domain_cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Process request and inject tenant context."""
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            tenant_id = await self._resolve_tenant(scope)
+        except Exception as e:
+            logger.error("Error in tenant middleware: %s", e, exc_info=True)
+            # Continue with default tenant on error
+            tenant_id = settings.DEFAULT_TENANT_ID
+
+        # Set tenant context and expose it as request.state.tenant_id
+        set_tenant_context(tenant_id)
+        scope.setdefault("state", {})["tenant_id"] = tenant_id
+
+        logger.debug("Tenant context set for request: %s -> tenant_id=%s", scope.get("path"), tenant_id)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Always clear tenant context after request
+            clear_tenant_context()
+
+    async def _resolve_tenant(self, scope: Scope) -> str:
+        """Apply the identification strategies to one request scope."""
+        headers = {}
+        for name, value in scope.get("headers", ()):
+            if name in (b"host", b"x-tenant-id"):
+                headers[name] = value.decode("latin-1")
+
+        tenant_id = None
+
+        # Strategy 1: Custom domain lookup
+        host = headers.get(b"host", "").split(":")[0]  # Remove port
+        if host and not host.startswith("localhost") and not host.startswith("127.0.0.1"):
+            tenant_id = await self.domain_cache.get(host)
+
+        # Strategy 2: Subdomain extraction
+        if not tenant_id:
+            tenant_id = self._extract_tenant_from_subdomain(host)
+
+        # Strategy 3: Header-based (for API clients)
+        if not tenant_id:
+            tenant_id = headers.get(b"x-tenant-id")
+
+        # Strategy 4: User's primary tenant (from authenticated user)
+        if not tenant_id:
+            user = scope.get("state", {}).get("user")
+            if isinstance(user, dict):
+                tenant_id = user.get("primary_tenant_id")
+
+        # Strategy 5: Default tenant for backward compatibility
+        return tenant_id or settings.DEFAULT_TENANT_ID
 
     def _extract_tenant_from_subdomain(self, host: str) -> Optional[str]:
         """
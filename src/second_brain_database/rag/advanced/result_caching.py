@@ -13,7 +13,7 @@ from enum import Enum
 import hashlib
 import json
 import pickle
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 import zlib
 
 from second_brain_database.managers.logging_manager import get_logger
@@ -83,7 +83,8 @@ class IntelligentCacheManager:
         default_ttl_seconds: int = 3600,  # 1 hour
         max_cache_size_mb: int = 500,     # 500 MB
         compression_enabled: bool = True,
-        warm_cache_enabled: bool = True
+        warm_cache_enabled: bool = True,
+        eviction_strategy: CacheStrategy = CacheStrategy.LRU
     ):
         """
         Initialize intelligent cache manager.
@@ -93,11 +94,17 @@ class IntelligentCacheManager:
             max_cache_size_mb: Maximum cache size in MB
             compression_enabled: Whether to compress cached data
             warm_cache_enabled: Whether to enable cache warming
+            eviction_strategy: Index used to pick eviction victims (LRU or LFU)
         """
         self.default_ttl = default_ttl_seconds
         self.max_cache_size = max_cache_size_mb * 1024 * 1024  # Convert to bytes
         self.compression_enabled = compression_enabled
         self.warm_cache_enabled = warm_cache_enabled
+        self.eviction_strategy = (
+            eviction_strategy
+            if eviction_strategy in (CacheStrategy.LRU, CacheStrategy.LFU)
+            else CacheStrategy.LRU
+        )
         
         # Cache prefixes for different levels
         self.cache_prefixes = {
@@ -117,6 +124,15 @@ class IntelligentCacheManager:
             CacheLevel.USER_CONTEXT: 3600       # 1 hour
         }
         
+        # Per-level access indexes. Each level keeps two sorted sets (last
+        # access timestamp for LRU, access count for LFU) plus a hash of entry
+        # sizes, so eviction never has to scan the keyspace or read metadata.
+        # A third sorted set holds expiry timestamps so members of entries that
+        # Redis already expired can be pruned without scanning.
+        self.index_prefix = "rag:index:"
+        self.eviction_batch_size = 100
+        self.scan_batch_size = 500
+        
         # Statistics tracking
         self.stats = {
             "hits": 0,
@@ -228,20 +244,18 @@ class IntelligentCacheManager:
             if not await self._check_cache_limits(len(serialized_data)):
                 await self._evict_cache_entries()
             
-            # Store in Redis with TTL
-            await redis_manager.set(
-                full_key,
-                serialized_data,
-                ex=ttl
-            )
-            
-            # Store metadata
-            await redis_manager.set(
-                f"{full_key}:meta",
-                json.dumps(entry_metadata),
-                ex=ttl
-            )
-            
+            # Store data, metadata and access index entries in one round trip
+            redis_client = await redis_manager.get_redis()
+            lru_key, lfu_key, size_key = self._index_keys(cache_level)
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.set(full_key, serialized_data, ex=ttl)
+            pipe.set(f"{full_key}:meta", json.dumps(entry_metadata), ex=ttl)
+            pipe.zadd(lru_key, {full_key: datetime.utcnow().timestamp()})
+            pipe.zadd(lfu_key, {full_key: 0})
+            pipe.hset(size_key, full_key, len(serialized_data))
+            pipe.zadd(self._expiry_key(cache_level), {full_key: datetime.utcnow().timestamp() + ttl})
+            await pipe.execute()
+
             # Update tags index for invalidation
             if tags:
                 await self._update_tags_index(full_key, tags, ttl)
@@ -287,7 +301,7 @@ class IntelligentCacheManager:
             if key and cache_level:
                 # Invalidate specific key
                 full_key = self._generate_cache_key(key, cache_level, user_id)
-                await redis_manager.delete(full_key, f"{full_key}:meta")
+                await self._delete_entries([full_key])
                 invalidated_count = 1
                 
             elif tags:
@@ -390,16 +404,27 @@ class IntelligentCacheManager:
                 if self.stats["access_times"] else 0.0
             )
             
-            # Get cache level statistics
+            # Get cache level statistics from the access indexes, without
+            # counting entries that expired since they were indexed
+            levels = list(CacheLevel)
+            for level in levels:
+                await self._prune_expired_entries(level)
+
+            redis_client = await redis_manager.get_redis()
+            pipe = redis_client.pipeline(transaction=False)
+            for level in levels:
+                lru_key, lfu_key, _ = self._index_keys(level)
+                pipe.zcard(lru_key)
+                pipe.zrevrange(lfu_key, 0, 9, withscores=True)
+            results = await pipe.execute()
+
             cache_level_stats = {}
-            for level in CacheLevel:
-                prefix = self.cache_prefixes[level]
-                keys = await redis_manager.keys(f"{prefix}*")
-                cache_level_stats[level.value] = len([k for k in keys if not k.endswith(":meta")])
-            
-            # Get top accessed keys (simplified - in production, maintain proper counters)
             top_accessed = []
-            
+            for i, level in enumerate(levels):
+                cache_level_stats[level.value] = results[2 * i]
+                top_accessed.extend((key, int(score)) for key, score in results[2 * i + 1])
+            top_accessed = sorted(top_accessed, key=lambda x: x[1], reverse=True)[:10]
+
             return CacheStats(
                 total_entries=sum(cache_level_stats.values()),
                 total_size_bytes=self.stats["cache_size"],
@@ -485,7 +510,28 @@ class IntelligentCacheManager:
     def _hash_key(self, key: str) -> str:
         """Generate hash for cache key."""
         return hashlib.sha256(key.encode()).hexdigest()[:16]
-    
+
+    def _index_keys(self, cache_level: CacheLevel) -> Tuple[str, str, str]:
+        """Get the LRU index, LFU index and size hash keys for a cache level."""
+        level = cache_level.value if isinstance(cache_level, CacheLevel) else str(cache_level)
+        return (
+            f"{self.index_prefix}lru:{level}",
+            f"{self.index_prefix}lfu:{level}",
+            f"{self.index_prefix}size:{level}",
+        )
+
+    def _expiry_key(self, cache_level: CacheLevel) -> str:
+        """Get the expiry index key for a cache level."""
+        level = cache_level.value if isinstance(cache_level, CacheLevel) else str(cache_level)
+        return f"{self.index_prefix}expiry:{level}"
+
+    def _level_for_key(self, cache_key: str) -> Optional[CacheLevel]:
+        """Resolve the cache level a full cache key belongs to."""
+        for level, prefix in self.cache_prefixes.items():
+            if cache_key.startswith(prefix):
+                return level
+        return None
+
     async def _serialize_data(self, data: Any) -> bytes:
         """Serialize data for caching."""
         try:
@@ -519,19 +565,19 @@ class IntelligentCacheManager:
     async def _update_access_metadata(self, cache_key: str):
         """Update access metadata for a cache entry."""
         try:
-            meta_key = f"{cache_key}:meta"
-            metadata_str = await redis_manager.get(meta_key)
-            
-            if metadata_str:
-                metadata = json.loads(metadata_str)
-                metadata["last_accessed"] = datetime.utcnow().isoformat()
-                metadata["access_count"] = metadata.get("access_count", 0) + 1
-                
-                # Update metadata with same TTL as original
-                ttl = await redis_manager.ttl(cache_key)
-                if ttl > 0:
-                    await redis_manager.set(meta_key, json.dumps(metadata), ex=ttl)
-                    
+            cache_level = self._level_for_key(cache_key)
+            if cache_level is None:
+                return
+
+            # Access recency and frequency live in the per-level sorted sets,
+            # so a hit is a single pipelined write with no read-modify-write.
+            redis_client = await redis_manager.get_redis()
+            lru_key, lfu_key, _ = self._index_keys(cache_level)
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.zadd(lru_key, {cache_key: datetime.utcnow().timestamp()})
+            pipe.zincrby(lfu_key, 1, cache_key)
+            await pipe.execute()
+
         except Exception as e:
             logger.warning(f"Failed to update access metadata: {e}")
     
@@ -549,48 +595,145 @@ class IntelligentCacheManager:
         try:
             target_size = target_size or (self.max_cache_size * 0.8)  # 80% of max size
             
-            # Get all cache keys with metadata
-            all_keys = []
+            # Expired entries free their space without evicting anything
             for level in CacheLevel:
-                prefix = self.cache_prefixes[level]
-                keys = await redis_manager.keys(f"{prefix}*")
-                cache_keys = [k for k in keys if not k.endswith(":meta")]
-                
-                for key in cache_keys:
-                    meta_key = f"{key}:meta"
-                    metadata_str = await redis_manager.get(meta_key)
-                    if metadata_str:
-                        metadata = json.loads(metadata_str)
-                        all_keys.append((key, metadata))
-            
-            # Sort by access patterns (LRU strategy)
-            all_keys.sort(key=lambda x: (
-                x[1].get("access_count", 0),
-                x[1].get("last_accessed", "1970-01-01")
-            ))
-            
-            # Evict entries until target size is reached
+                await self._prune_expired_entries(level)
+            
+            redis_client = await redis_manager.get_redis()
+            use_lfu = self.eviction_strategy == CacheStrategy.LFU
+            
             evicted_count = 0
             current_size = self.stats["cache_size"]
             
-            for key, metadata in all_keys:
-                if current_size <= target_size:
+            while current_size > target_size:
+                # Take the lowest-scored candidates from every level's index
+                pipe = redis_client.pipeline(transaction=False)
+                for level in CacheLevel:
+                    lru_key, lfu_key, _ = self._index_keys(level)
+                    pipe.zrange(
+                        lfu_key if use_lfu else lru_key,
+                        0,
+                        self.eviction_batch_size - 1,
+                        withscores=True
+                    )
+                results = await pipe.execute()
+                
+                candidates = [
+                    (score, key)
+                    for members in results
+                    for key, score in members
+                ]
+                if not candidates:
                     break
                 
-                entry_size = metadata.get("size_bytes", 0)
-                await redis_manager.delete(key, f"{key}:meta")
+                candidates.sort()
+                victims = [key for _, key in candidates[:self.eviction_batch_size]]
+                
+                # Entries that already expired only leave index members behind;
+                # prune those without counting them as freed space
+                live = await self._get_existing_keys(victims)
+                stale = [key for key in victims if key not in live]
+                sizes = await self._get_entry_sizes([key for key in victims if key in live])
                 
-                current_size -= entry_size
-                evicted_count += 1
-                self.stats["evictions"] += 1
+                evicted = []
+                for key in victims:
+                    if key not in live:
+                        continue
+                    if current_size <= target_size:
+                        break
+                    evicted.append(key)
+                    current_size -= sizes.get(key, 0)
+                
+                await self._delete_entries(stale + evicted)
+                evicted_count += len(evicted)
+                self.stats["evictions"] += len(evicted)
             
-            self.stats["cache_size"] = current_size
+            self.stats["cache_size"] = max(current_size, 0)
             
             if evicted_count > 0:
                 logger.info(f"Evicted {evicted_count} cache entries")
                 
         except Exception as e:
             logger.error(f"Cache eviction failed: {e}")
+
+    async def _get_existing_keys(self, cache_keys: List[str]) -> Set[str]:
+        """Return the cache keys that still exist in Redis."""
+        if not cache_keys:
+            return set()
+        
+        redis_client = await redis_manager.get_redis()
+        pipe = redis_client.pipeline(transaction=False)
+        for key in cache_keys:
+            pipe.exists(key)
+        results = await pipe.execute()
+        
+        return {key for key, exists in zip(cache_keys, results) if exists}
+
+    async def _get_entry_sizes(self, cache_keys: List[str]) -> Dict[str, int]:
+        """Look up recorded entry sizes from the per-level size hashes."""
+        if not cache_keys:
+            return {}
+        
+        redis_client = await redis_manager.get_redis()
+        pipe = redis_client.pipeline(transaction=False)
+        resolved = []
+        for key in cache_keys:
+            cache_level = self._level_for_key(key)
+            if cache_level is None:
+                continue
+            pipe.hget(self._index_keys(cache_level)[2], key)
+            resolved.append(key)
+        values = await pipe.execute()
+        
+        return {key: int(value or 0) for key, value in zip(resolved, values)}
+
+    async def _delete_entries(self, cache_keys: List[str]) -> None:
+        """Delete cache entries, their metadata and index entries in one pipeline."""
+        if not cache_keys:
+            return
+        
+        redis_client = await redis_manager.get_redis()
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.delete(*cache_keys, *[f"{key}:meta" for key in cache_keys])
+        for key in cache_keys:
+            cache_level = self._level_for_key(key)
+            if cache_level is None:
+                continue
+            lru_key, lfu_key, size_key = self._index_keys(cache_level)
+            pipe.zrem(lru_key, key)
+            pipe.zrem(lfu_key, key)
+            pipe.zrem(self._expiry_key(cache_level), key)
+            pipe.hdel(size_key, key)
+        await pipe.execute()
+
+    async def _prune_expired_entries(self, cache_level: CacheLevel) -> int:
+        """Remove index members of a level whose entries Redis has expired."""
+        redis_client = await redis_manager.get_redis()
+        expiry_key = self._expiry_key(cache_level)
+        now = datetime.utcnow().timestamp()
+        pruned = 0
+        offset = 0
+
+        while True:
+            members = await redis_client.zrangebyscore(
+                expiry_key, "-inf", now, start=offset, num=self.eviction_batch_size
+            )
+            if not members:
+                break
+
+            # An entry re-set after its expiry was read may still be live
+            live = await self._get_existing_keys(members)
+            stale = [key for key in members if key not in live]
+            sizes = await self._get_entry_sizes(stale)
+            await self._delete_entries(stale)
+
+            pruned += len(stale)
+            self.stats["cache_size"] = max(self.stats["cache_size"] - sum(sizes.values()), 0)
+            offset += len(live)
+            if len(members) < self.eviction_batch_size:
+                break
+
+        return pruned
     
     async def _update_tags_index(self, cache_key: str, tags: List[str], ttl: int):
         """Update tags index for cache invalidation."""
@@ -613,12 +756,8 @@ class IntelligentCacheManager:
                 cache_keys = await redis_manager.smembers(tag_key)
                 
                 if cache_keys:
-                    # Delete cache entries and their metadata
-                    keys_to_delete = []
-                    for cache_key in cache_keys:
-                        keys_to_delete.extend([cache_key, f"{cache_key}:meta"])
-                    
-                    await redis_manager.delete(*keys_to_delete)
+                    # Delete cache entries, their metadata and index entries
+                    await self._delete_entries(list(cache_keys))
                     invalidated_count += len(cache_keys)
                 
                 # Remove tag index
@@ -633,19 +772,26 @@ class IntelligentCacheManager:
     async def _invalidate_by_pattern(self, pattern: str) -> int:
         """Invalidate cache entries by pattern."""
         try:
-            keys = await redis_manager.keys(pattern)
+            redis_client = await redis_manager.get_redis()
+            invalidated_count = 0
+            batch = []
             
-            if keys:
-                # Include metadata keys
-                all_keys = []
-                for key in keys:
-                    all_keys.extend([key, f"{key}:meta"])
-                
-                await redis_manager.delete(*all_keys)
-                return len(keys)
+            # SCAN incrementally instead of KEYS so Redis is never blocked
+            async for key in redis_client.scan_iter(match=pattern, count=self.scan_batch_size):
+                if key.endswith(":meta"):
+                    continue
+                batch.append(key)
+                if len(batch) >= self.scan_batch_size:
+                    await self._delete_entries(batch)
+                    invalidated_count += len(batch)
+                    batch = []
             
-            return 0
+            if batch:
+                await self._delete_entries(batch)
+                invalidated_count += len(batch)
+            
+            return invalidated_count
             
         except Exception as e:
             logger.error(f"Pattern-based invalidation failed: {e}")
-            return 0
\ No newline at end of file
+            return 0
@@ -11,6 +11,7 @@ from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.principal_cache_manager import principal_cache
 from second_brain_database.managers.security_manager import security_manager
 from second_brain_database.managers.workspace_manager import workspace_manager
 from second_brain_database.routes.auth.services.auth.password import send_blocked_ip_notification
@@ -27,33 +28,47 @@ async def get_current_user_dep(token: str = Depends(oauth2_scheme)):
     their workspace memberships, roles, and tenant context.
     
     This function also sets the tenant context for automatic tenant filtering in database operations.
+    Resolved principals are served from the principal cache while their version is current.
     """
     from second_brain_database.routes.auth.services.auth.login import get_current_user
     from second_brain_database.middleware.tenant_context import set_tenant_context, get_current_tenant_id
     from jose import jwt
     from second_brain_database.config import settings
 
+    context_tenant_id = get_current_tenant_id()
+
+    # 0. Serve a cached principal (one Redis round trip re-checks blacklist and version)
+    user = await principal_cache.get(token, context_tenant_id)
+    if user is not None:
+        if not context_tenant_id:
+            set_tenant_context(user["current_tenant_id"])
+        return user
+
+    # The signature is verified once by get_current_user; the claims of the same token
+    # are read here without a second verification.
+    try:
+        payload = jwt.get_unverified_claims(token)
+    except Exception:
+        payload = {}
+    username = payload.get("sub") or payload.get("username")
+    version = await principal_cache.get_version(username)
+
     # 1. Get the core user object
     user = await get_current_user(token)
 
     if user:
-        # 2. Extract tenant information from JWT token
+        # 2. Extract tenant information from JWT claims
         try:
-            secret_key = getattr(settings, "SECRET_KEY", None)
-            if hasattr(secret_key, "get_secret_value"):
-                secret_key = secret_key.get_secret_value()
-            
-            payload = jwt.decode(token, secret_key, algorithms=[settings.ALGORITHM])
             primary_tenant_id = payload.get("primary_tenant_id", settings.DEFAULT_TENANT_ID)
             tenant_memberships = payload.get("tenant_memberships", [])
             
             # Add tenant information to user object
             user["primary_tenant_id"] = primary_tenant_id
             user["tenant_memberships"] = tenant_memberships
-            user["current_tenant_id"] = get_current_tenant_id() or primary_tenant_id
+            user["current_tenant_id"] = context_tenant_id or primary_tenant_id
             
             # Set tenant context if not already set (e.g., by middleware)
-            if not get_current_tenant_id():
+            if not context_tenant_id:
                 set_tenant_context(primary_tenant_id)
                 logger.debug(f"Set tenant context to primary tenant: {primary_tenant_id}")
             
@@ -76,6 +91,10 @@ async def get_current_user_dep(token: str = Depends(oauth2_scheme)):
             # Decide if this should be a hard fail or not. For now, we'll allow login
             # but the user won't have workspace context.
             user["workspaces"] = []
+            version = None  # Don't cache a principal with missing workspaces
+
+        if user.get("username") == username:
+            principal_cache.set(token, context_tenant_id, username, version, user, payload.get("exp"))
 
     return user
 
@@ -82,6 +82,75 @@ async def set_last_cleanup_time(dt: datetime) -> None:
         raise
 
 
+async def pull_expired_entries(collection, field: str, now: str, expiry_key: str = "expires_at") -> int:
+    """
+    Remove entries whose expiry is at or before `now` from an embedded array, entirely server-side.
+    Only documents with an expired entry are touched (found via the multikey `<field>.<expiry_key>` index).
+    Returns the number of documents modified.
+    """
+    result = await collection.update_many(
+        {f"{field}.{expiry_key}": {"$lte": now}},
+        {"$pull": {field: {expiry_key: {"$lte": now}}}},
+    )
+    return result.modified_count
+
+
+async def clear_expired_rentals(
+    collection, rented_field: str, current_field: str, id_key: str, now: str, owned_field: Optional[str] = None
+) -> int:
+    """
+    Remove expired rentals from `rented_field` and unset them wherever they are selected in `current_field`
+    (a mapping of app key to item id), with a single pipeline update per pass.
+    Items also present in `owned_field` stay selected. Returns the number of documents modified.
+    """
+    expired = {"$lte": ["$$this.valid_till", now]}
+    expired_ids = {
+        "$map": {
+            "input": {"$filter": {"input": f"${rented_field}", "cond": expired}},
+            "in": f"$$this.{id_key}",
+        }
+    }
+    keep_ids = (
+        {"$map": {"input": {"$ifNull": [f"${owned_field}", []]}, "in": f"$$this.{id_key}"}} if owned_field else []
+    )
+    result = await collection.update_many(
+        {f"{rented_field}.valid_till": {"$lte": now}},
+        [
+            {"$set": {"_expired_rental_ids": {"$setDifference": [expired_ids, keep_ids]}}},
+            {
+                "$set": {
+                    rented_field: {"$filter": {"input": f"${rented_field}", "cond": {"$not": [expired]}}},
+                    current_field: {
+                        "$cond": [
+                            {"$eq": [{"$type": f"${current_field}"}, "object"]},
+                            {
+                                "$arrayToObject": {
+                                    "$map": {
+                                        "input": {"$objectToArray": f"${current_field}"},
+                                        "in": {
+                                            "k": "$$this.k",
+                                            "v": {
+                                                "$cond": [
+                                                    {"$in": ["$$this.v", "$_expired_rental_ids"]},
+                                                    None,
+                                                    "$$this.v",
+                                                ]
+                                            },
+                                        },
+                                    }
+                                }
+                            },
+                            f"${current_field}",
+                        ]
+                    },
+                }
+            },
+            {"$unset": "_expired_rental_ids"},
+        ],
+    )
+    return result.modified_count
+
+
 async def periodic_2fa_cleanup() -> None:
     """
     Periodically scan for users with expired 2FA pending states and clean them up.
@@ -227,38 +296,9 @@ async def periodic_avatar_rental_cleanup() -> None:
             now = datetime.now(timezone.utc)
             last_cleanup = await get_last_avatar_rental_cleanup_time()
             if not last_cleanup or (now - last_cleanup).total_seconds() >= interval:
-                cleanup_count = 0
-                async for user in users.find({"avatars_rented": {"$exists": True, "$ne": []}}):
-                    updated_rented = []
-                    expired_avatar_ids = set()
-                    for avatar in user["avatars_rented"]:
-                        try:
-                            if datetime.fromisoformat(avatar["valid_till"]) > now:
-                                updated_rented.append(avatar)
-                            else:
-                                expired_avatar_ids.add(avatar["avatar_id"])
-                        except Exception:
-                            expired_avatar_ids.add(avatar.get("avatar_id"))
-                    update_fields = {"avatars_rented": updated_rented}
-                    # Only clear current avatar if not owned permanently
-                    avatars = user.get("avatars", {})
-                    avatars_owned = {a.get("avatar_id") for a in user.get("avatars_owned", [])}
-                    avatars_changed = False
-                    for app_key, avatar_id in list(avatars.items()):
-                        if avatar_id in expired_avatar_ids and avatar_id not in avatars_owned:
-                            avatars[app_key] = None
-                            avatars_changed = True
-                    if avatars_changed:
-                        update_fields["avatars"] = avatars
-                    if expired_avatar_ids or avatars_changed:
-                        await users.update_one({"_id": user["_id"]}, {"$set": update_fields})
-                        cleanup_count += 1
-                        logger.info(
-                            "Avatar rental cleanup: removed expired avatars %s for user '%s' (_id=%s)",
-                            list(expired_avatar_ids),
-                            user.get("username", "unknown"),
-                            user.get("_id"),
-                        )
+                cleanup_count = await clear_expired_rentals(
+                    users, "avatars_rented", "avatars", "avatar_id", now.isoformat(), owned_field="avatars_owned"
+                )
                 if cleanup_count > 0:
                     logger.info("Avatar rental cleanup completed: cleaned up %d users", cleanup_count)
                 else:
@@ -323,38 +363,9 @@ async def periodic_banner_rental_cleanup() -> None:
             now = datetime.now(timezone.utc)
             last_cleanup = await get_last_banner_rental_cleanup_time()
             if not last_cleanup or (now - last_cleanup).total_seconds() >= interval:
-                cleanup_count = 0
-                async for user in users.find({"banners_rented": {"$exists": True, "$ne": []}}):
-                    updated_rented = []
-                    expired_banner_ids = set()
-                    for banner in user["banners_rented"]:
-                        try:
-                            if datetime.fromisoformat(banner["valid_till"]) > now:
-                                updated_rented.append(banner)
-                            else:
-                                expired_banner_ids.add(banner["banner_id"])
-                        except Exception:
-                            expired_banner_ids.add(banner.get("banner_id"))
-                    # Remove expired rentals from banners_rented
-                    update_fields = {"banners_rented": updated_rented}
-                    # Remove expired rentals from current banners
-                    banners = user.get("banners", {})
-                    banners_changed = False
-                    for app_key, banner_id in list(banners.items()):
-                        if banner_id in expired_banner_ids:
-                            banners[app_key] = None
-                            banners_changed = True
-                    if banners_changed:
-                        update_fields["banners"] = banners
-                    if expired_banner_ids or banners_changed:
-                        await users.update_one({"_id": user["_id"]}, {"$set": update_fields})
-                        cleanup_count += 1
-                        logger.info(
-                            "Banner rental cleanup: removed expired banners %s for user '%s' (_id=%s)",
-                            list(expired_banner_ids),
-                            user.get("username", "unknown"),
-                            user.get("_id"),
-                        )
+                cleanup_count = await clear_expired_rentals(
+                    users, "banners_rented", "banners", "banner_id", now.isoformat()
+                )
                 if cleanup_count > 0:
                     logger.info("Banner rental cleanup completed: cleaned up %d users", cleanup_count)
                 else:
@@ -481,18 +492,7 @@ async def periodic_session_cleanup() -> None:
             now = now_dt.isoformat()
             last_cleanup = await get_last_session_cleanup_time()
             if not last_cleanup or (now_dt - last_cleanup).total_seconds() >= interval:
-                cleanup_count = 0
-                async for user in users.find({"sessions": {"$exists": True, "$ne": []}}):
-                    sessions = user.get("sessions", [])
-                    filtered = [s for s in sessions if s.get("expires_at", now) > now]
-                    if len(filtered) != len(sessions):
-                        await users.update_one({"_id": user["_id"]}, {"$set": {"sessions": filtered}})
-                        cleanup_count += 1
-                        logger.info(
-                            "Session cleanup: removed expired sessions for user '%s' (_id=%s)",
-                            user.get("username", "unknown"),
-                            user.get("_id"),
-                        )
+                cleanup_count = await pull_expired_entries(users, "sessions", now)
                 if cleanup_count > 0:
                     logger.info("Session cleanup completed: cleaned up %d users", cleanup_count)
                 else:
@@ -555,18 +555,7 @@ async def periodic_trusted_ip_lockdown_code_cleanup() -> None:
             now = now_dt.isoformat()
             last_cleanup = await get_last_trusted_ip_lockdown_code_cleanup_time()
             if not last_cleanup or (now_dt - last_cleanup).total_seconds() >= interval:
-                cleanup_count = 0
-                async for user in users.find({"trusted_ip_lockdown_codes": {"$exists": True, "$ne": []}}):
-                    codes = user.get("trusted_ip_lockdown_codes", [])
-                    filtered = [c for c in codes if c.get("expires_at", now) > now]
-                    if len(filtered) != len(codes):
-                        await users.update_one({"_id": user["_id"]}, {"$set": {"trusted_ip_lockdown_codes": filtered}})
-                        cleanup_count += 1
-                        logger.info(
-                            "Trusted IP lockdown code cleanup: removed expired codes for user '%s' (_id=%s)",
-                            user.get("username", "unknown"),
-                            user.get("_id"),
-                        )
+                cleanup_count = await pull_expired_entries(users, "trusted_ip_lockdown_codes", now)
                 if cleanup_count > 0:
                     logger.info("Trusted IP lockdown code cleanup completed: cleaned up %d users", cleanup_count)
                 else:
@@ -629,18 +618,7 @@ async def periodic_admin_session_token_cleanup() -> None:
             now = now_dt.isoformat()
             last_cleanup = await get_last_admin_session_token_cleanup_time()
             if not last_cleanup or (now_dt - last_cleanup).total_seconds() >= interval:
-                cleanup_count = 0
-                async for user in users.find({"admin_sessions": {"$exists": True, "$ne": []}}):
-                    sessions = user.get("admin_sessions", [])
-                    filtered = [s for s in sessions if s.get("expires_at", now) > now]
-                    if len(filtered) != len(sessions):
-                        await users.update_one({"_id": user["_id"]}, {"$set": {"admin_sessions": filtered}})
-                        cleanup_count += 1
-                        logger.info(
-                            "Admin session token cleanup: removed expired tokens for user '%s' (_id=%s)",
-                            user.get("username", "unknown"),
-                            user.get("_id"),
-                        )
+                cleanup_count = await pull_expired_entries(users, "admin_sessions", now)
                 if cleanup_count > 0:
                     logger.info("Admin session token cleanup completed: cleaned up %d users", cleanup_count)
                 else:
@@ -703,20 +681,7 @@ async def periodic_trusted_user_agent_lockdown_code_cleanup() -> None:
             now = now_dt.isoformat()
             last_cleanup = await get_last_trusted_user_agent_lockdown_code_cleanup_time()
             if not last_cleanup or (now_dt - last_cleanup).total_seconds() >= interval:
-                cleanup_count = 0
-                async for user in users.find({"trusted_user_agent_lockdown_codes": {"$exists": True, "$ne": []}}):
-                    codes = user.get("trusted_user_agent_lockdown_codes", [])
-                    filtered = [c for c in codes if c.get("expires_at", now) > now]
-                    if len(filtered) != len(codes):
-                        await users.update_one(
-                            {"_id": user["_id"]}, {"$set": {"trusted_user_agent_lockdown_codes": filtered}}
-                        )
-                        cleanup_count += 1
-                        logger.info(
-                            "Trusted User Agent lockdown code cleanup: removed expired codes for user '%s' (_id=%s)",
-                            user.get("username", "unknown"),
-                            user.get("_id"),
-                        )
+                cleanup_count = await pull_expired_entries(users, "trusted_user_agent_lockdown_codes", now)
                 if cleanup_count > 0:
                     logger.info(
                         "Trusted User Agent lockdown code cleanup completed: cleaned up %d users", cleanup_count
@@ -784,53 +749,12 @@ async def periodic_temporary_access_tokens_cleanup() -> None:
 
             if not last_cleanup or (now_dt - last_cleanup).total_seconds() >= interval:
                 cleanup_count = 0
-
-                # Find users with temporary access tokens or bypasses
-                query = {
-                    "$or": [
-                        {"temporary_ip_access_tokens": {"$exists": True, "$ne": []}},
-                        {"temporary_user_agent_access_tokens": {"$exists": True, "$ne": []}},
-                        {"temporary_ip_bypasses": {"$exists": True, "$ne": []}},
-                    ]
-                }
-
-                async for user in users.find(query):
-                    user_updated = False
-                    update_fields = {}
-
-                    # Clean up expired IP access tokens
-                    ip_tokens = user.get("temporary_ip_access_tokens", [])
-                    if ip_tokens:
-                        filtered_ip_tokens = [t for t in ip_tokens if t.get("expires_at", now) > now]
-                        if len(filtered_ip_tokens) != len(ip_tokens):
-                            update_fields["temporary_ip_access_tokens"] = filtered_ip_tokens
-                            user_updated = True
-
-                    # Clean up expired User Agent access tokens
-                    ua_tokens = user.get("temporary_user_agent_access_tokens", [])
-                    if ua_tokens:
-                        filtered_ua_tokens = [t for t in ua_tokens if t.get("expires_at", now) > now]
-                        if len(filtered_ua_tokens) != len(ua_tokens):
-                            update_fields["temporary_user_agent_access_tokens"] = filtered_ua_tokens
-                            user_updated = True
-
-                    # Clean up expired IP bypasses
-                    ip_bypasses = user.get("temporary_ip_bypasses", [])
-                    if ip_bypasses:
-                        filtered_ip_bypasses = [b for b in ip_bypasses if b.get("expires_at", now) > now]
-                        if len(filtered_ip_bypasses) != len(ip_bypasses):
-                            update_fields["temporary_ip_bypasses"] = filtered_ip_bypasses
-                            user_updated = True
-
-                    # Update user document if any tokens were expired
-                    if user_updated:
-                        await users.update_one({"_id": user["_id"]}, {"$set": update_fields})
-                        cleanup_count += 1
-                        logger.info(
-                            "Temporary access tokens cleanup: removed expired tokens for user '%s' (_id=%s)",
-                            user.get("username", "unknown"),
-                            user.get("_id"),
-                        )
+                for field in (
+                    "temporary_ip_access_tokens",
+                    "temporary_user_agent_access_tokens",
+                    "temporary_ip_bypasses",
+                ):
+                    cleanup_count += await pull_expired_entries(users, field, now)
 
                 if cleanup_count > 0:
                     logger.info("Temporary access tokens cleanup completed: cleaned up %d users", cleanup_count)
@@ -39,6 +39,7 @@ from second_brain_database.docs.models import (
     create_standard_responses,
 )
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.principal_cache_manager import principal_cache
 from second_brain_database.managers.security_manager import security_manager
 from second_brain_database.routes.auth.dependencies import enforce_all_lockdowns, get_current_user_dep
 from second_brain_database.routes.auth.logging_utils import (
@@ -1422,6 +1423,7 @@ async def regenerate_backup_codes(current_user: dict = Depends(enforce_all_lockd
         {"username": current_user["username"]},
         {"$set": {"backup_codes": hashed_backup_codes, "backup_codes_used": []}},  # Reset used codes
     )
+    await principal_cache.invalidate(current_user["username"])
 
     logger.info("Backup codes regenerated for user %s", current_user["username"])
 
@@ -1778,6 +1780,7 @@ async def trusted_ips_lockdown_confirm(
             },
         },
     )
+    await principal_cache.invalidate(current_user["username"])
 
     # Log lockdown configuration change security event
     log_security_event(
@@ -2030,6 +2033,7 @@ async def trusted_user_agents_lockdown_confirm(
             },
         },
     )
+    await principal_cache.invalidate(current_user["username"])
 
     # Log lockdown configuration change security event
     log_security_event(
@@ -17,6 +17,7 @@ from second_brain_database.config import settings
 from second_brain_database.database import db_manager
 from second_brain_database.managers.email import email_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.principal_cache_manager import principal_cache
 from second_brain_database.managers.redis_manager import redis_manager
 from second_brain_database.routes.auth.models import PasswordChangeRequest, validate_password_strength
 from second_brain_database.routes.auth.services.abuse.events import log_reset_abuse_event
@@ -71,6 +72,7 @@ async def change_user_password(current_user: Dict[str, Any], password_request: P
     result = await db_manager.get_collection("users").update_one(
         {"username": current_user["username"]}, {"$set": {"hashed_password": new_hashed_pw}}
     )
+    await principal_cache.invalidate(current_user["username"])
     if not result.modified_count:
         logger.error("Failed to update password for user %s", current_user.get("username"))
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update password")
@@ -179,6 +181,7 @@ async def send_password_reset_email(
                             }
                         },
                     )
+                    await principal_cache.invalidate_matching({"email": email})
                     abuse_message = "<b>Notice:</b> Your account has been suspended due to repeated abuse of the password reset system. Please contact support."
                     await redis_conn.sadd("abuse:reset:abuse_ips", ip)
                     await log_reset_abuse_event(
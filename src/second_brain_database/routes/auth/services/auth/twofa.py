@@ -20,6 +20,7 @@ import qrcode
 from second_brain_database.config import settings
 from second_brain_database.database import db_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.principal_cache_manager import principal_cache
 from second_brain_database.routes.auth.models import (
     TwoFASetupRequest,
     TwoFASetupResponse,
@@ -201,6 +202,7 @@ async def setup_2fa(current_user: Dict[str, Any], request: TwoFASetupRequest) ->
             "$unset": {"email_otp_obj": "", "passkeys": ""},
         },
     )
+    await principal_cache.invalidate(current_user["username"])
 
     log_database_operation(
         operation="update_user_2fa_pending",
@@ -363,6 +365,7 @@ async def verify_2fa(current_user: Dict[str, Any], request: TwoFAVerifyRequest)
                 "$unset": {"two_fa_pending": "", "two_fa_pending_since": ""},
             },
         )
+        await principal_cache.invalidate(current_user["username"])
 
         log_database_operation(
             operation="activate_2fa_after_verification",
@@ -445,6 +448,7 @@ async def disable_2fa(current_user: Dict[str, Any]) -> TwoFAStatus:
             },
         },
     )
+    await principal_cache.invalidate(current_user["username"])
     user = await users.find_one({"username": current_user["username"]})
     logger.info("2FA disabled for user %s", current_user.get("username"))
     return TwoFAStatus(enabled=user.get("two_fa_enabled", False), methods=user.get("two_fa_methods", []), pending=False)
@@ -491,6 +495,7 @@ async def reset_2fa(current_user: Dict[str, Any], request: TwoFASetupRequest) ->
             }
         },
     )
+    await principal_cache.invalidate(current_user["username"])
     user = await users.find_one({"username": current_user["username"]})
     username = user.get("username", "user")
     account_name = f"{username}@{QR_DOMAIN}"
@@ -551,6 +556,7 @@ async def clear_2fa_pending_if_expired(user: Dict[str, Any]) -> bool:
                     }
                 },
             )
+            await principal_cache.invalidate(user.get("username"))
             try:
                 await delete_backup_codes_temp(user["username"])
             except RuntimeError as e:
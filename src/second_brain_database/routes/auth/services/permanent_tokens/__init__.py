@@ -77,6 +77,7 @@ from .validator import (
     is_permanent_token,
     validate_permanent_token,
 )
+from .usage_tracker import LastUsedTracker, last_used_tracker
 
 __all__ = [
     # Generator functions
@@ -140,4 +141,7 @@ __all__ = [
     "start_periodic_maintenance",
     "MaintenanceStats",
     "DatabaseHealth",
+    # Usage tracking
+    "last_used_tracker",
+    "LastUsedTracker",
 ]
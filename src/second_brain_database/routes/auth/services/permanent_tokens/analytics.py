@@ -18,6 +18,7 @@ from typing import Any, Dict, List, Optional, Tuple
 from second_brain_database.database import db_manager
 from second_brain_database.managers.logging_manager import get_logger
 from second_brain_database.routes.auth.services.permanent_tokens.audit_logger import AUDIT_COLLECTION
+from second_brain_database.routes.auth.services.permanent_tokens.usage_tracker import last_used_tracker
 from second_brain_database.utils.logging_utils import (
     DatabaseLogger,
     SecurityLogger,
@@ -110,18 +111,8 @@ class PermanentTokenAnalytics:
         try:
             now = datetime.utcnow()
 
-            # Update last_used_at in permanent_tokens collection
-            tokens_collection = db_manager.get_collection("permanent_tokens")
-            token_update_result = await tokens_collection.update_one(
-                {"token_hash": token_hash, "is_revoked": False}, {"$set": {"last_used_at": now}}
-            )
-
-            log_database_operation(
-                operation="update_token_last_used",
-                collection="permanent_tokens",
-                query={"token_hash": token_hash[:8] + "...", "is_revoked": False},
-                result={"modified_count": token_update_result.modified_count, "timestamp": now.isoformat()},
-            )
+            # Record last_used_at (coalesced into periodic bulk writes)
+            await last_used_tracker.record(token_hash)
 
             # Update usage analytics
             analytics_collection = db_manager.get_collection(USAGE_ANALYTICS_COLLECTION)
@@ -138,16 +129,11 @@ class PermanentTokenAnalytics:
 
             analytics_result = await analytics_collection.insert_one(usage_record)
 
-            log_database_operation(
-                operation="insert_token_usage_analytics",
-                collection=USAGE_ANALYTICS_COLLECTION,
-                query={},
-                result={
-                    "inserted_id": str(analytics_result.inserted_id),
-                    "user_id": user_id,
-                    "ip_address": ip_address,
-                    "date": usage_record["date"],
-                },
+            logger.debug(
+                "Inserted usage analytics record %s into %s for user: %s",
+                analytics_result.inserted_id,
+                USAGE_ANALYTICS_COLLECTION,
+                user_id,
             )
 
             # Log security event for token usage tracking
@@ -160,7 +146,6 @@ class PermanentTokenAnalytics:
                     "token_hash_prefix": token_hash[:8],
                     "user_agent": user_agent,
                     "analytics_recorded": bool(analytics_result.inserted_id),
-                    "last_used_updated": token_update_result.modified_count > 0,
                 },
             )
 
@@ -261,7 +246,7 @@ class PermanentTokenAnalytics:
             # Calculate time-based metrics
             now = datetime.utcnow()
             created_at = token_doc["created_at"]
-            last_used_at = token_doc.get("last_used_at")
+            last_used_at = last_used_tracker.merge_last_used(token_doc.get("token_hash"), token_doc.get("last_used_at"))
 
             days_since_creation = (now - created_at).days
             days_since_last_use = (now - last_used_at).days if last_used_at else None
@@ -12,8 +12,10 @@ from bson import ObjectId
 
 from second_brain_database.database import db_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.principal_cache_manager import principal_cache
 from second_brain_database.routes.auth.models import PermanentTokenInfo, TokenRevocationResponse
 from second_brain_database.routes.auth.services.permanent_tokens.generator import hash_token
+from second_brain_database.routes.auth.services.permanent_tokens.usage_tracker import last_used_tracker
 from second_brain_database.routes.auth.services.permanent_tokens.validator import get_cache_key, invalidate_token_cache
 
 logger = get_logger(prefix="[Permanent Token Revocation]")
@@ -54,6 +56,7 @@ async def revoke_token_by_id(user_id: str, token_id: str) -> Optional[TokenRevoc
         # Invalidate Redis cache
         token_hash = token_doc["token_hash"]
         await invalidate_token_cache(token_hash)
+        await principal_cache.invalidate_user_ids([user_id])
 
         logger.info("Permanent token revoked: token_id=%s, user_id=%s", token_id, user_id)
 
@@ -88,6 +91,9 @@ async def revoke_token_by_hash(token_hash: str) -> bool:
         if result.modified_count > 0:
             # Invalidate Redis cache
             await invalidate_token_cache(token_hash)
+            token_doc = await collection.find_one({"token_hash": token_hash}, {"user_id": 1})
+            if token_doc:
+                await principal_cache.invalidate_user_ids([token_doc["user_id"]])
             logger.info("Permanent token revoked by hash: %s", token_hash[:16] + "...")
             return True
 
@@ -126,6 +132,7 @@ async def revoke_all_user_tokens(user_id: str) -> int:
         # Invalidate all caches
         for token_doc in active_tokens:
             await invalidate_token_cache(token_doc["token_hash"])
+        await principal_cache.invalidate_user_ids([user_id])
 
         revoked_count = result.modified_count
         logger.info("Revoked %d permanent tokens for user %s", revoked_count, user_id)
@@ -166,7 +173,9 @@ async def get_user_tokens(user_id: str, include_revoked: bool = False) -> List[P
                 token_id=token_doc.get("token_id", ""),
                 description=token_doc.get("description"),
                 created_at=token_doc["created_at"],
-                last_used_at=token_doc.get("last_used_at"),
+                last_used_at=last_used_tracker.merge_last_used(
+                    token_doc.get("token_hash"), token_doc.get("last_used_at")
+                ),
                 is_revoked=token_doc.get("is_revoked", False),
                 revoked_at=token_doc.get("revoked_at"),
             )
@@ -0,0 +1,160 @@
+"""
+Write-coalesced last-used tracking for permanent tokens.
+
+API-token clients can validate the same token hundreds of times a second,
+and each validation used to issue its own ``update_one`` on
+``permanent_tokens``. Validations now only record the timestamp in memory;
+the latest timestamp per token is written in one ``bulk_write`` every
+``PERMANENT_TOKEN_LAST_USED_FLUSH_INTERVAL`` seconds. Updates use ``$max``,
+so workers flushing out of order never move ``last_used_at`` backwards.
+
+Readers that show ``last_used_at`` (token listings, analytics) merge in the
+timestamps still pending on this worker with ``merge_last_used``.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+
+from second_brain_database.config import settings
+from second_brain_database.database import db_manager
+from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.routes.auth.services.permanent_tokens.generator import update_last_used
+
+logger = get_logger(prefix="[Permanent Token Usage Tracker]")
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """Normalize to naive UTC, the form MongoDB returns dates in."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class LastUsedTracker:
+    """
+    Accumulates last-used timestamps per token hash and flushes them in batches.
+
+    When the tracker is not running (scripts, tests), ``record`` writes
+    through with ``update_last_used``.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        """
+        Initialize the tracker.
+
+        Args:
+            flush_interval: Seconds between flushes (defaults to PERMANENT_TOKEN_LAST_USED_FLUSH_INTERVAL)
+        """
+        self.flush_interval = (
+            settings.PERMANENT_TOKEN_LAST_USED_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        )
+        self._pending: Dict[str, datetime] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background flusher is active."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the background flush loop."""
+        if self.running:
+            return
+
+        self._task = asyncio.create_task(self._run())
+        logger.info("Last-used tracker started (interval: %ss)", self.flush_interval)
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write everything still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        flushed = await self.flush()
+        logger.info("Last-used tracker stopped, flushed %d pending tokens", flushed)
+
+    async def record(self, token_hash: str) -> None:
+        """
+        Record that a token was just used.
+
+        Args:
+            token_hash: SHA-256 hash of the token
+        """
+        if not self.running:
+            await update_last_used(token_hash)
+            return
+
+        self._pending[token_hash] = datetime.utcnow()
+
+    def pending_last_used(self, token_hash: str) -> Optional[datetime]:
+        """Timestamp recorded on this worker but not yet flushed, if any."""
+        return self._pending.get(token_hash)
+
+    def merge_last_used(self, token_hash: Optional[str], stored: Optional[datetime]) -> Optional[datetime]:
+        """
+        Combine a stored ``last_used_at`` with any pending timestamp.
+
+        Args:
+            token_hash: SHA-256 hash of the token (None if unknown)
+            stored: ``last_used_at`` as read from MongoDB
+
+        Returns:
+            The most recent of the two (naive UTC), or None if neither exists
+        """
+        pending = self._pending.get(token_hash)
+        if stored is None:
+            return pending
+        stored = _utc_naive(stored)
+        return max(stored, pending) if pending is not None else stored
+
+    async def flush(self) -> int:
+        """
+        Write all pending timestamps with one ``bulk_write``.
+
+        Returns:
+            Number of tokens flushed
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            operations = [
+                UpdateOne({"token_hash": token_hash, "is_revoked": False}, {"$max": {"last_used_at": last_used}})
+                for token_hash, last_used in batch.items()
+            ]
+
+            try:
+                await db_manager.get_collection("permanent_tokens").bulk_write(operations, ordered=False)
+            except Exception as e:
+                logger.error("Failed to flush last-used timestamps for %d tokens: %s", len(batch), e)
+                # Keep the newest timestamp per token for the next attempt
+                for token_hash, last_used in batch.items():
+                    pending = self._pending.get(token_hash)
+                    if pending is None or pending < last_used:
+                        self._pending[token_hash] = last_used
+                return 0
+
+            logger.debug("Flushed last-used timestamps for %d tokens", len(batch))
+            return len(batch)
+
+    async def _run(self) -> None:
+        """Background loop flushing on a fixed interval."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Unexpected last-used flush error: %s", e, exc_info=True)
+
+
+# Global last-used tracker instance
+last_used_tracker = LastUsedTracker()
@@ -17,7 +17,8 @@ from second_brain_database.database import db_manager
 from second_brain_database.managers.logging_manager import get_logger
 from second_brain_database.managers.redis_manager import redis_manager
 from second_brain_database.routes.auth.models import PermanentTokenCacheData
-from second_brain_database.routes.auth.services.permanent_tokens.generator import hash_token, update_last_used
+from second_brain_database.routes.auth.services.permanent_tokens.generator import hash_token
+from second_brain_database.routes.auth.services.permanent_tokens.usage_tracker import last_used_tracker
 from second_brain_database.utils.logging_utils import (
     DatabaseLogger,
     SecurityLogger,
@@ -225,7 +226,7 @@ async def validate_permanent_token(token: str) -> Optional[Dict[str, Any]]:
     1. Decodes and validates the JWT structure
     2. Checks Redis cache for user data
     3. Falls back to database if cache miss
-    4. Updates last_used timestamp
+    4. Records the last_used timestamp (write-coalesced)
     5. Caches user data for future requests
 
     Args:
@@ -271,8 +272,8 @@ async def validate_permanent_token(token: str) -> Optional[Dict[str, Any]]:
         # Try Redis cache first
         cached_data = await get_cached_token_data(token_hash)
         if cached_data:
-            # Update last used timestamp asynchronously
-            await update_last_used(token_hash)
+            # Record last used timestamp (flushed in batches)
+            await last_used_tracker.record(token_hash)
 
             # Return user data from cache
             return {
@@ -309,8 +310,8 @@ async def validate_permanent_token(token: str) -> Optional[Dict[str, Any]]:
             logger.warning("User account is inactive for permanent token")
             return None
 
-        # Update last used timestamp
-        await update_last_used(token_hash)
+        # Record last used timestamp (flushed in batches)
+        await last_used_tracker.record(token_hash)
 
         # Cache user data for future requests
         cache_data = PermanentTokenCacheData(
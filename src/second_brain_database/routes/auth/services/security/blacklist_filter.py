@@ -0,0 +1,224 @@
+"""
+Local token blacklist filter.
+
+Blacklisted tokens are rare, yet ``is_token_blacklisted`` used to hit Redis on
+every authenticated request. Each worker now keeps an in-memory filter of
+blacklisted token hashes and user IDs: an exact set while it is small, and a
+Bloom filter once it grows past ``TOKEN_BLACKLIST_FILTER_EXACT_MAX`` members.
+A filter miss means "not blacklisted" without a network hop; only filter hits
+are confirmed against Redis.
+
+The filter is bootstrapped by scanning the ``blacklist:*`` keys after
+subscribing to ``blacklist:events`` (so nothing published during the scan is
+lost), kept current from that channel, and rebuilt periodically so expired
+entries and Bloom false positives do not accumulate. While it is not
+bootstrapped, or its subscription is down, callers fall back to Redis.
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+from typing import Iterable, Optional, Set
+
+from second_brain_database.config import settings
+from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.redis_manager import redis_manager
+
+logger = get_logger(prefix="[Token Blacklist Filter]")
+
+BLACKLIST_EVENTS_CHANNEL = "blacklist:events"
+BLACKLIST_TOKEN_PREFIX = "blacklist:token:"
+BLACKLIST_USER_PREFIX = "blacklist:user:"
+
+
+def token_member(token: str) -> str:
+    """Filter member for a token (tokens are only ever held as hashes)."""
+    return "token:" + hashlib.sha256(token.encode()).hexdigest()
+
+
+def user_member(user_id: str) -> str:
+    """Filter member for a user-wide blacklist."""
+    return f"user:{user_id}"
+
+
+class _BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one SHA-256 digest."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, member: str) -> Iterable[int]:
+        digest = hashlib.sha256(member.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, member: str) -> None:
+        for position in self._positions(member):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, member: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(member))
+
+
+class TokenBlacklistFilter:
+    """
+    Per-process membership filter for blacklisted tokens and users.
+
+    ``might_contain`` returns None while the filter cannot be trusted, in
+    which case the caller must ask Redis.
+    """
+
+    # Seconds to wait before re-subscribing after a Redis failure
+    RECONNECT_DELAY = 1.0
+    SCAN_COUNT = 1000
+
+    def __init__(
+        self,
+        redis_manager,
+        exact_max: Optional[int] = None,
+        error_rate: Optional[float] = None,
+        rebuild_interval: Optional[float] = None,
+    ):
+        """
+        Initialize the filter.
+
+        Args:
+            redis_manager: RedisManager instance for Redis operations
+            exact_max: Members kept in an exact set before switching to a Bloom filter
+            error_rate: Target Bloom false-positive rate
+            rebuild_interval: Seconds between rebuilds from Redis
+        """
+        self.redis = redis_manager
+        self.exact_max = settings.TOKEN_BLACKLIST_FILTER_EXACT_MAX if exact_max is None else exact_max
+        self.error_rate = settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE if error_rate is None else error_rate
+        self.rebuild_interval = (
+            settings.TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL if rebuild_interval is None else rebuild_interval
+        )
+
+        self._members: Set[str] = set()
+        self._bloom: Optional[_BloomFilter] = None
+        self._ready = False
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the filter is bootstrapped and its subscription is live."""
+        return self._ready
+
+    async def start(self) -> None:
+        """Start the subscription task (the filter becomes ready once bootstrapped)."""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop the subscription task; callers fall back to Redis."""
+        self._ready = False
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def might_contain(self, *members: str) -> Optional[bool]:
+        """
+        Check members against the filter.
+
+        Returns:
+            False if none of the members is blacklisted, True if one may be
+            (confirm in Redis), None if the filter is not ready
+        """
+        if not self._ready:
+            return None
+
+        if self._bloom is not None:
+            return any(member in self._bloom for member in members)
+        return any(member in self._members for member in members)
+
+    def add(self, member: str) -> None:
+        """Add one member, switching to a Bloom filter when the set grows too large."""
+        if self._bloom is not None:
+            self._bloom.add(member)
+            return
+
+        self._members.add(member)
+        if len(self._members) > self.exact_max:
+            self._members, self._bloom = set(), self._build_bloom(self._members)
+            logger.info(f"Blacklist filter switched to Bloom filter (size: {self._bloom.size} bits)")
+
+    async def publish(self, member: str) -> None:
+        """Add a member locally and tell every other worker about it."""
+        self.add(member)
+        redis_client = await self.redis.get_redis()
+        await redis_client.publish(BLACKLIST_EVENTS_CHANNEL, member)
+
+    def _build_bloom(self, members: Set[str]) -> _BloomFilter:
+        bloom = _BloomFilter(max(len(members) * 2, self.exact_max * 2), self.error_rate)
+        for member in members:
+            bloom.add(member)
+        return bloom
+
+    async def _bootstrap(self, redis_client) -> None:
+        """Replace the filter contents with the blacklist keys currently in Redis."""
+        members: Set[str] = set()
+        async for key in redis_client.scan_iter(match=f"{BLACKLIST_TOKEN_PREFIX}*", count=self.SCAN_COUNT):
+            members.add(token_member(key[len(BLACKLIST_TOKEN_PREFIX) :]))
+        async for key in redis_client.scan_iter(match=f"{BLACKLIST_USER_PREFIX}*", count=self.SCAN_COUNT):
+            members.add(user_member(key[len(BLACKLIST_USER_PREFIX) :]))
+
+        if len(members) > self.exact_max:
+            self._members, self._bloom = set(), self._build_bloom(members)
+        else:
+            self._members, self._bloom = members, None
+
+        logger.info(
+            f"Blacklist filter loaded {len(members)} entries " f"({'bloom' if self._bloom is not None else 'exact'})"
+        )
+
+    async def _listen(self) -> None:
+        """Subscribe, bootstrap, then apply published events until cancelled."""
+        while True:
+            pubsub = None
+            try:
+                redis_client = await self.redis.get_redis()
+                pubsub = redis_client.pubsub()
+                await pubsub.subscribe(BLACKLIST_EVENTS_CHANNEL)
+
+                await self._bootstrap(redis_client)
+                self._ready = True
+                rebuild_at = time.monotonic() + self.rebuild_interval
+
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None and message["type"] == "message":
+                        self.add(message["data"])
+
+                    if time.monotonic() >= rebuild_at:
+                        await self._bootstrap(redis_client)
+                        rebuild_at = time.monotonic() + self.rebuild_interval
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                self._ready = False
+                logger.error(f"Blacklist filter subscription failed, retrying in {self.RECONNECT_DELAY}s: {e}")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.unsubscribe(BLACKLIST_EVENTS_CHANNEL)
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+
+# Global blacklist filter instance
+token_blacklist_filter = TokenBlacklistFilter(redis_manager)
@@ -3,12 +3,19 @@ Token blacklisting utilities for authentication security.
 
 This module provides async functions to blacklist tokens and check if a token or user is blacklisted.
 It uses Redis for persistence and is instrumented with production-grade logging and error handling.
+Lookups are screened by the per-worker blacklist filter, so only possible hits reach Redis.
 """
 
 from typing import Optional
 
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.principal_cache_manager import principal_cache
 from second_brain_database.managers.redis_manager import redis_manager
+from second_brain_database.routes.auth.services.security.blacklist_filter import (
+    token_blacklist_filter,
+    token_member,
+    user_member,
+)
 from second_brain_database.utils.logging_utils import (
     SecurityLogger,
     log_error_with_context,
@@ -48,6 +55,8 @@ async def blacklist_token(user_id: Optional[str] = None, token: Optional[str] =
         if user_id is not None:
             key = f"blacklist:user:{user_id}"
             await redis_conn.set(key, "1", ex=BLACKLIST_USER_EXPIRY)
+            await token_blacklist_filter.publish(user_member(user_id))
+            await principal_cache.invalidate_user_ids([user_id])
 
             logger.info(
                 "Successfully blacklisted all tokens for user_id=%s (expires in %d seconds)",
@@ -71,6 +80,8 @@ async def blacklist_token(user_id: Optional[str] = None, token: Optional[str] =
             token_preview = token[:8] + "..." if len(token) > 8 else token
             key = f"blacklist:token:{token}"
             await redis_conn.set(key, "1", ex=BLACKLIST_TOKEN_EXPIRY)
+            await token_blacklist_filter.publish(token_member(token))
+            principal_cache.discard_token(token)
 
             logger.info(
                 "Successfully blacklisted specific token: %s (expires in %d seconds)",
@@ -127,6 +138,9 @@ async def is_token_blacklisted(token: str, user_id: Optional[str] = None) -> boo
     """
     Check if a token or user is blacklisted.
 
+    Redis is only consulted when the local blacklist filter reports a possible
+    hit or is not ready.
+
     Args:
         token (str): The token to check.
         user_id (Optional[str]): The user ID to check.
@@ -137,6 +151,12 @@ async def is_token_blacklisted(token: str, user_id: Optional[str] = None) -> boo
     Side Effects:
         Reads from Redis. Logs errors.
     """
+    members = [token_member(token)]
+    if user_id:
+        members.append(user_member(user_id))
+    if token_blacklist_filter.might_contain(*members) is False:
+        return False
+
     try:
         redis_conn = await redis_manager.get_redis()
         if user_id:
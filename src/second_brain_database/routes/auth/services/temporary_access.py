@@ -14,6 +14,7 @@ from typing import Any, Dict, Optional
 
 from second_brain_database.database import db_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.principal_cache_manager import principal_cache
 from second_brain_database.managers.redis_manager import redis_manager
 from second_brain_database.utils.logging_utils import log_performance, log_security_event
 
@@ -217,6 +218,7 @@ async def execute_allow_once_ip_access(token_data: Dict[str, Any]) -> bool:
     result = await users_collection.update_one(
         {"email": user_email}, {"$push": {"temporary_ip_bypasses": bypass_entry}}
     )
+    await principal_cache.invalidate_matching({"email": user_email})
 
     if result.modified_count == 0:
         logger.error("Failed to create temporary IP bypass for user %s", user_email)
@@ -269,6 +271,7 @@ async def execute_add_to_trusted_ip_list(token_data: Dict[str, Any]) -> bool:
 
     # Add IP to trusted list
     result = await users_collection.update_one({"email": user_email}, {"$addToSet": {"trusted_ips": ip_address}})
+    await principal_cache.invalidate(user.get("username"))
 
     if result.modified_count == 0:
         logger.error("Failed to add IP to trusted list for user %s", user_email)
@@ -436,6 +439,7 @@ async def execute_allow_once_user_agent_access(token_data: Dict[str, Any]) -> bo
     result = await users_collection.update_one(
         {"email": user_email}, {"$push": {"temporary_user_agent_bypasses": bypass_entry}}
     )
+    await principal_cache.invalidate_matching({"email": user_email})
 
     if result.modified_count == 0:
         logger.error("Failed to create temporary User Agent bypass for user %s", user_email)
@@ -497,6 +501,7 @@ async def execute_add_to_trusted_user_agent_list(token_data: Dict[str, Any]) ->
     result = await users_collection.update_one(
         {"email": user_email}, {"$addToSet": {"trusted_user_agents": user_agent}}
     )
+    await principal_cache.invalidate(user.get("username"))
 
     if result.modified_count == 0:
         logger.error("Failed to add User Agent to trusted list for user %s", user_email)
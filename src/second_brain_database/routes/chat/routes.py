@@ -51,9 +51,15 @@ async def get_chat_service() -> ChatService:
     return ChatService(db=db, redis_client=redis_client)
 
 
+_rate_limiter: Optional[ChatRateLimiter] = None
+
+
 async def get_rate_limiter() -> ChatRateLimiter:
-    """Get ChatRateLimiter instance with Redis connection."""
-    return ChatRateLimiter(redis_manager=redis_manager)
+    """Get the shared ChatRateLimiter instance (keeps its local pre-check cache across requests)."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = ChatRateLimiter(redis_manager=redis_manager)
+    return _rate_limiter
 
 
 async def get_statistics_manager() -> SessionStatisticsManager:
@@ -516,10 +522,10 @@ async def get_chat_session(
         session_id: Session UUID
         current_user: Authenticated user from JWT
         chat_service: ChatService instance
-        statistics_manager: Statistics manager instance
+        statistics_manager: SessionStatisticsManager instance
 
     Returns:
-        ChatSessionResponse: Session with updated statistics
+        ChatSessionResponse: Session with current statistics
 
     Raises:
         HTTPException 400: Invalid session ID format
@@ -568,11 +574,17 @@ async def get_chat_session(
                 detail="Not authorized to access this session",
             )
 
-        # Update statistics
-        await statistics_manager.update_session_statistics(session_id)
-
-        # Reload session with updated stats
-        session = await chat_service.get_session(session_id=session_id)
+        # Statistics are maintained incrementally; older sessions are backfilled once
+        stats = await statistics_manager.get_session_statistics(session_id)
+        if stats:
+            session = session.model_copy(
+                update={
+                    "message_count": stats["message_count"],
+                    "total_tokens": stats["total_tokens"],
+                    "total_cost": stats["total_cost"],
+                    "last_message_at": stats["last_message_at"],
+                }
+            )
 
         logger.info(
             "[%s] Retrieved chat session %s for user: %s",
@@ -6,6 +6,7 @@ for club event rooms with membership validation and role-based permissions.
 """
 
 import asyncio
+import uuid
 from datetime import datetime, timezone
 from typing import Optional, Dict
 
@@ -17,10 +18,11 @@ from second_brain_database.managers.logging_manager import get_logger
 from second_brain_database.webrtc.schemas import WebRtcMessage, MessageType
 from second_brain_database.webrtc.dependencies import get_current_user_ws, validate_room_id
 from second_brain_database.webrtc.connection_manager import webrtc_manager
+from second_brain_database.webrtc.codec import MSGPACK_SUBPROTOCOL, negotiate_subprotocol, receive_client_frame
 from second_brain_database.routes.auth.dependencies import get_current_user_dep as get_current_user
 from second_brain_database.webrtc.monitoring import webrtc_monitoring
 from second_brain_database.webrtc.rate_limiter import rate_limiter, RateLimitExceeded
-from second_brain_database.webrtc.persistence import webrtc_persistence
+from second_brain_database.webrtc.persistence import webrtc_persistence, ChatMessage
 from second_brain_database.webrtc.reconnection import reconnection_manager
 from second_brain_database.webrtc.file_transfer import file_transfer_manager
 from second_brain_database.webrtc.recording import recording_manager, RecordingFormat, RecordingQuality
@@ -121,8 +123,11 @@ async def club_event_websocket_endpoint(
         await websocket.close(code=1008, reason="Club membership required")
         return
 
-    # Accept the WebSocket connection
-    await websocket.accept()
+    # Accept the WebSocket connection, negotiating binary (MessagePack) room frames if offered
+    subprotocol = negotiate_subprotocol(websocket)
+    binary_frames = subprotocol == MSGPACK_SUBPROTOCOL
+    await websocket.accept(subprotocol=subprotocol)
+    webrtc_monitoring.record_connection_opened()
 
     logger.info(
         f"Club event WebSocket connected: user {username} (role: {member.role}) joined club {club_id} event {event_id}",
@@ -135,8 +140,8 @@ async def club_event_websocket_endpoint(
 
     try:
         # Check room capacity before adding participant
-        current_participants = await webrtc_manager.get_participants(room_id)
-        if len(current_participants) >= settings.WEBRTC_MAX_PARTICIPANTS_PER_ROOM:
+        current_participant_count = await webrtc_manager.get_participant_count(room_id)
+        if current_participant_count >= settings.WEBRTC_MAX_PARTICIPANTS_PER_ROOM:
             error_message = WebRtcMessage.create_error(
                 code="ROOM_FULL",
                 message=f"Event room has reached maximum capacity of {settings.WEBRTC_MAX_PARTICIPANTS_PER_ROOM} participants"
@@ -148,24 +153,28 @@ async def club_event_websocket_endpoint(
         # Add user to room participants
         participant_count = await webrtc_manager.add_participant(room_id, username)
 
-        # Get current participants
-        participants = await webrtc_manager.get_participants(room_id)
-
         # Create or update room session in MongoDB
-        try:
-            session_id = await webrtc_persistence.create_room_session(
-                room_id=room_id,
-                creator=username,
-                participants=[username],
-                metadata={
-                    "club_id": club_id,
-                    "event_id": event_id,
-                    "initial_participant_count": participant_count
-                }
-            )
-            logger.debug(f"Club event room session created/updated: {session_id}", extra={"club_id": club_id, "event_id": event_id, "room_id": room_id})
-        except Exception as persist_error:
-            logger.error(f"Failed to persist club event room session: {persist_error}", exc_info=True)
+        async def persist_room_session():
+            try:
+                session_id = await webrtc_persistence.create_room_session(
+                    room_id=room_id,
+                    creator=username,
+                    participants=[username],
+                    metadata={
+                        "club_id": club_id,
+                        "event_id": event_id,
+                        "initial_participant_count": participant_count
+                    }
+                )
+                logger.debug(f"Club event room session created/updated: {session_id}", extra={"club_id": club_id, "event_id": event_id, "room_id": room_id})
+            except Exception as persist_error:
+                logger.error(f"Failed to persist club event room session: {persist_error}", exc_info=True)
+
+        # Read the versioned room state snapshot while the session is persisted
+        snapshot, _ = await asyncio.gather(
+            webrtc_manager.get_room_snapshot(room_id),
+            persist_room_session()
+        )
 
         # Handle reconnection and state recovery
         try:
@@ -192,24 +201,19 @@ async def club_event_websocket_endpoint(
                 await websocket.send_json(reconnect_msg.model_dump())
 
                 # Replay missed messages
-                for missed_msg in reconnect_info.get("missed_messages", []):
-                    try:
-                        await websocket.send_json(missed_msg["message"])
-                        await asyncio.sleep(0.01)
-                    except Exception as replay_error:
-                        logger.warning(f"Failed to replay message: {replay_error}")
+                await reconnection_manager.replay_missed_messages(
+                    websocket, reconnect_info.get("missed_messages", [])
+                )
         except Exception as reconnect_error:
             logger.error(f"Reconnection handling failed: {reconnect_error}", exc_info=True)
 
-        # Send room state to the newly connected user
+        # Send the full room state snapshot to the newly connected user
         room_state_message = WebRtcMessage(
             type=MessageType.ROOM_STATE,
             payload={
-                "room_id": room_id,
+                **snapshot,
                 "club_id": club_id,
                 "event_id": event_id,
-                "participants": participants,
-                "participant_count": participant_count,
                 "user_role": member.role
             },
             room_id=room_id,
@@ -217,19 +221,16 @@ async def club_event_websocket_endpoint(
         )
         await websocket.send_json(room_state_message.model_dump())
 
-        # Small delay to ensure room state is processed
-        await asyncio.sleep(0.1)
-
-        # Send updated room state to all existing participants
-        updated_participants = await webrtc_manager.get_participants(room_id)
+        # Send updated participants to all existing participants
         updated_room_state_message = WebRtcMessage(
             type=MessageType.ROOM_STATE,
             payload={
                 "room_id": room_id,
                 "club_id": club_id,
                 "event_id": event_id,
-                "participants": updated_participants,
-                "participant_count": len(updated_participants)
+                "participants": snapshot["participants"],
+                "participant_count": snapshot["participant_count"],
+                "version": snapshot["version"]
             },
             room_id=room_id,
             timestamp=datetime.now(timezone.utc).isoformat()
@@ -250,7 +251,7 @@ async def club_event_websocket_endpoint(
             """Receive messages from client and publish to Redis."""
             try:
                 while True:
-                    data = await websocket.receive_json()
+                    data = await receive_client_frame(websocket)
                     message = WebRtcMessage.model_validate(data)
 
                     # Add sender info and room
@@ -259,11 +260,12 @@ async def club_event_websocket_endpoint(
 
                     # Apply rate limiting
                     try:
-                        if message.type == MessageType.CHAT:
+                        if message.type == MessageType.CHAT_MESSAGE:
                             await rate_limiter.check_rate_limit("chat_message", username)
                         else:
                             await rate_limiter.check_rate_limit("websocket_message", username)
                     except RateLimitExceeded as rle:
+                        webrtc_monitoring.record_error("rate_limit_exceeded")
                         error_msg = WebRtcMessage.create_error(
                             code="RATE_LIMIT_EXCEEDED",
                             message=f"Rate limit exceeded for {message.type}. Retry after {rle.retry_after}s"
@@ -273,7 +275,7 @@ async def club_event_websocket_endpoint(
 
                     # Content security validation
                     try:
-                        if message.type == MessageType.CHAT and message.payload:
+                        if message.type == MessageType.CHAT_MESSAGE and message.payload:
                             chat_text = message.payload.get("text", "")
                             if chat_text:
                                 sanitized_text = sanitize_html(chat_text)
@@ -286,22 +288,22 @@ async def club_event_websocket_endpoint(
                                     continue
                                 message.payload["text"] = sanitized_text
                     except Exception as security_error:
+                        webrtc_monitoring.record_error("content_security")
                         logger.warning(f"Content security validation failed: {security_error}")
                         continue
 
                     # Persist chat messages
-                    if message.type == MessageType.CHAT:
+                    if message.type == MessageType.CHAT_MESSAGE:
                         try:
                             await webrtc_persistence.save_chat_message(
-                                room_id=room_id,
-                                sender=username,
-                                message=message.payload.get("text", ""),
-                                metadata={
-                                    "club_id": club_id,
-                                    "event_id": event_id,
-                                    "message_id": message.payload.get("id"),
-                                    "timestamp": message.timestamp or datetime.now(timezone.utc).isoformat()
-                                }
+                                ChatMessage(
+                                    message_id=str(message.payload.get("id") or uuid.uuid4()),
+                                    room_id=room_id,
+                                    sender_username=username,
+                                    sender_name=username,
+                                    message=message.payload.get("text", ""),
+                                    timestamp=datetime.now(timezone.utc)
+                                )
                             )
                         except Exception as persist_error:
                             logger.error(f"Failed to persist chat message: {persist_error}", exc_info=True)
@@ -319,6 +321,7 @@ async def club_event_websocket_endpoint(
 
                     # Publish to Redis
                     await webrtc_manager.publish_to_room(room_id, message)
+                    webrtc_monitoring.record_message(message.type.value)
 
                     # Update user presence
                     await webrtc_manager.update_presence(room_id, username)
@@ -326,6 +329,7 @@ async def club_event_websocket_endpoint(
             except WebSocketDisconnect:
                 logger.info(f"Client {username} disconnected from club event {club_id}/{event_id}")
             except Exception as e:
+                webrtc_monitoring.record_error(type(e).__name__)
                 logger.error(
                     f"Error receiving from client {username}: {e}",
                     extra={"club_id": club_id, "event_id": event_id, "username": username, "error": str(e)},
@@ -335,14 +339,11 @@ async def club_event_websocket_endpoint(
         async def receive_from_redis():
             """Subscribe to Redis and forward messages to client."""
             try:
-                async for message in webrtc_manager.subscribe_to_room(room_id):
-                    if message.sender_id != username:
-                        await websocket.send_json(message.model_dump())
-
-                        logger.debug(
-                            f"Forwarded {message.type} to user {username} in club event {club_id}/{event_id}",
-                            extra={"club_id": club_id, "event_id": event_id, "username": username, "message_type": message.type}
-                        )
+                async for frame in webrtc_manager.stream_room(room_id, username, binary=binary_frames):
+                    if isinstance(frame, bytes):
+                        await websocket.send_bytes(frame)
+                    else:
+                        await websocket.send_text(frame)
 
             except Exception as e:
                 logger.error(
@@ -375,6 +376,7 @@ async def club_event_websocket_endpoint(
         )
 
     except Exception as e:
+        webrtc_monitoring.record_error(type(e).__name__)
         logger.error(
             f"WebSocket error for user {username} in club event {club_id}/{event_id}: {e}",
             extra={"club_id": club_id, "event_id": event_id, "username": username, "error": str(e)},
@@ -391,6 +393,8 @@ async def club_event_websocket_endpoint(
             pass
 
     finally:
+        webrtc_monitoring.record_connection_closed()
+
         # Track disconnection for reconnection support
         try:
             await reconnection_manager.track_user_state(
@@ -424,15 +428,16 @@ async def club_event_websocket_endpoint(
                 logger.error(f"Failed to end room session: {persist_error}", exc_info=True)
 
             # Send updated room state to remaining participants
-            remaining_participants = await webrtc_manager.get_participants(room_id)
+            snapshot = await webrtc_manager.get_room_snapshot(room_id)
             updated_room_state_message = WebRtcMessage(
                 type=MessageType.ROOM_STATE,
                 payload={
                     "room_id": room_id,
                     "club_id": club_id,
                     "event_id": event_id,
-                    "participants": remaining_participants,
-                    "participant_count": len(remaining_participants)
+                    "participants": snapshot["participants"],
+                    "participant_count": snapshot["participant_count"],
+                    "version": snapshot["version"]
                 },
                 room_id=room_id,
                 timestamp=datetime.now(timezone.utc).isoformat()
@@ -7,12 +7,11 @@ and sends notifications when capacity limits are approached or exceeded.
 
 import asyncio
 from datetime import datetime, timezone
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 from second_brain_database.config import settings
 from second_brain_database.database import db_manager
 from second_brain_database.managers.email import email_manager
-from second_brain_database.managers.ipam_manager import ipam_manager
 from second_brain_database.managers.logging_manager import get_logger
 from second_brain_database.routes.ipam.monitoring.metrics_middleware import track_capacity_warning_event
 
@@ -28,8 +27,7 @@ async def periodic_ipam_capacity_monitoring():
     Periodic background task to monitor IPAM capacity thresholds.
 
     Runs every 15 minutes (configurable) to:
-    - Query users with active allocations
-    - Calculate country and region utilization
+    - Compute country and region utilization for all users in one batch
     - Send notifications at configurable thresholds (default: 80% warning, 100% critical)
     - Send region notifications at configurable threshold (default: 90%)
     - Support per-country and per-region threshold overrides
@@ -63,41 +61,14 @@ async def periodic_ipam_capacity_monitoring():
             logger.debug("Running IPAM capacity monitoring check...")
             start_time = datetime.now(timezone.utc)
 
-            # Get all users with active allocations
-            users_with_allocations = await _get_users_with_allocations()
-            logger.info(f"Monitoring capacity for {len(users_with_allocations)} users")
-
-            # Track notifications sent in this run
-            notifications_sent = 0
-            warnings_logged = 0
-
-            for user_id in users_with_allocations:
-                try:
-                    # Check country utilization for this user
-                    country_notifications = await _check_country_utilization(
-                        user_id, warning_threshold, critical_threshold, country_thresholds
-                    )
-                    notifications_sent += country_notifications
-
-                    # Check region utilization for this user
-                    region_notifications = await _check_region_utilization(
-                        user_id, region_threshold, region_thresholds
-                    )
-                    notifications_sent += region_notifications
-
-                except Exception as user_error:
-                    logger.error(
-                        f"Error monitoring capacity for user {user_id}: {user_error}",
-                        exc_info=True,
-                        extra={"user_id": user_id, "error": str(user_error)},
-                    )
-                    warnings_logged += 1
+            notifications_sent = await run_capacity_check(
+                warning_threshold, critical_threshold, country_thresholds, region_threshold, region_thresholds
+            )
 
             # Log summary
             duration = (datetime.now(timezone.utc) - start_time).total_seconds()
             logger.info(
-                f"IPAM capacity monitoring completed in {duration:.2f}s: "
-                f"{notifications_sent} notifications sent, {warnings_logged} errors"
+                f"IPAM capacity monitoring completed in {duration:.2f}s: {notifications_sent} notifications sent"
             )
 
             # Sleep for configured interval
@@ -112,202 +83,319 @@ async def periodic_ipam_capacity_monitoring():
             await asyncio.sleep(60)
 
 
-async def _get_users_with_allocations() -> List[str]:
+async def run_capacity_check(
+    warning_threshold: int,
+    critical_threshold: int,
+    country_thresholds: Dict,
+    region_threshold: int,
+    region_thresholds: Dict,
+) -> int:
+    """
+    Run one capacity monitoring pass over all users.
+
+    Utilization is computed with a fixed number of queries regardless of how many users,
+    countries and regions exist; thresholds are then evaluated in memory and the resulting
+    capacity events are written with a single insert.
+
+    Returns:
+        Number of notifications sent
+    """
+    country_stats = await _get_country_utilization()
+    region_stats = await _get_region_utilization()
+    logger.info(
+        f"Monitoring capacity for {len({stats['user_id'] for stats in country_stats})} users: "
+        f"{len(country_stats)} countries, {len(region_stats)} regions"
+    )
+
+    country_alerts = _evaluate_country_thresholds(
+        country_stats, warning_threshold, critical_threshold, country_thresholds
+    )
+    region_alerts = _evaluate_region_thresholds(region_stats, region_threshold, region_thresholds)
+
+    users = await _get_users({alert["user_id"] for alert in country_alerts + region_alerts})
+    notifications_sent = 0
+    events = []
+
+    for alert in country_alerts:
+        user_id, country, stats = alert["user_id"], alert["country"], alert["stats"]
+        success = await _send_country_capacity_notification(
+            user_id, country, stats, alert["threshold_type"], user=users.get(user_id)
+        )
+        if success:
+            _notified_countries.add(alert["notification_key"])
+            notifications_sent += 1
+            logger.info(f"Sent {alert['threshold_type']} notification for country {country} to user {user_id}")
+
+        events.append(
+            _capacity_event(
+                user_id, "country", country, stats["utilization_percentage"], alert["threshold_type"], stats
+            )
+        )
+        await track_capacity_warning_event(
+            resource_type="country",
+            resource_id=country,
+            utilization=stats["utilization_percentage"],
+            threshold=alert["threshold"],
+        )
+
+    for alert in region_alerts:
+        user_id, region, stats = alert["user_id"], alert["region"], alert["stats"]
+        region_id = stats["region_id"]
+        success = await _send_region_capacity_notification(user_id, region, stats, user=users.get(user_id))
+        if success:
+            _notified_regions.add(alert["notification_key"])
+            notifications_sent += 1
+            logger.info(f"Sent region capacity notification for region {region_id} to user {user_id}")
+
+        events.append(_capacity_event(user_id, "region", region_id, stats["utilization_percentage"], "critical", stats))
+        await track_capacity_warning_event(
+            resource_type="region",
+            resource_id=region_id,
+            utilization=stats["utilization_percentage"],
+            threshold=alert["threshold"],
+        )
+
+    await _log_capacity_events(events)
+    return notifications_sent
+
+
+async def _get_country_utilization() -> List[Dict]:
     """
-    Get list of unique user IDs with active IPAM allocations.
+    Compute allocated regions per user and country with one aggregation.
+
+    Mirrors ipam_manager.calculate_country_utilization (all of the user's regions in the country
+    count towards capacity) for every country where the user has at least one active region.
 
     Returns:
-        List of user IDs
+        List of utilization statistics, one per (user, country)
     """
     try:
         regions_collection = db_manager.get_collection("ipam_regions")
+        groups = await regions_collection.aggregate(
+            [
+                {
+                    "$group": {
+                        "_id": {"user_id": "$user_id", "country": "$country"},
+                        "allocated": {"$sum": 1},
+                        "active": {"$sum": {"$cond": [{"$eq": ["$status", "Active"]}, 1, 0]}},
+                    }
+                },
+                {"$match": {"active": {"$gt": 0}}},
+            ]
+        ).to_list(length=None)
+
+        countries = {group["_id"]["country"] for group in groups}
+        mappings_collection = db_manager.get_collection("continent_country_mapping")
+        mappings = {
+            mapping["country"]: mapping
+            async for mapping in mappings_collection.find(
+                {"country": {"$in": list(countries)}}, {"country": 1, "continent": 1, "x_start": 1, "x_end": 1}
+            )
+        }
 
-        # Get distinct user IDs from regions collection
-        user_ids = await regions_collection.distinct("user_id", {"status": "Active"})
+        results = []
+        for group in groups:
+            user_id, country = group["_id"]["user_id"], group["_id"]["country"]
+            mapping = mappings.get(country)
+            if not mapping:
+                logger.warning(f"No country mapping for {country}; skipping capacity check for user {user_id}")
+                continue
+
+            total_capacity = (mapping["x_end"] - mapping["x_start"] + 1) * 256
+            allocated = group["allocated"]
+            utilization = (allocated / total_capacity * 100) if total_capacity > 0 else 0
+            results.append(
+                {
+                    "user_id": user_id,
+                    "country": country,
+                    "continent": mapping.get("continent"),
+                    "total_capacity": total_capacity,
+                    "allocated_regions": allocated,
+                    "available": total_capacity - allocated,
+                    "utilization_percentage": round(utilization, 2),
+                }
+            )
 
-        return user_ids
+        return results
 
     except Exception as e:
-        logger.error(f"Error getting users with allocations: {e}", exc_info=True)
+        logger.error(f"Error computing country utilization: {e}", exc_info=True)
         return []
 
 
-async def _check_country_utilization(
-    user_id: str, warning_threshold: int, critical_threshold: int, country_thresholds: Dict
-) -> int:
+async def _get_region_utilization() -> List[Tuple[Dict, Dict]]:
+    """
+    Compute allocated hosts for every active region with one aggregation.
+
+    Returns:
+        List of (region document, utilization statistics) pairs
     """
-    Check country utilization for a user and send notifications if thresholds exceeded.
+    try:
+        regions_collection = db_manager.get_collection("ipam_regions")
+        regions = await regions_collection.find(
+            {"status": "Active"}, {"user_id": 1, "region_name": 1, "country": 1, "cidr": 1}
+        ).to_list(length=None)
+        if not regions:
+            return []
+
+        hosts_collection = db_manager.get_collection("ipam_hosts")
+        host_counts = {
+            group["_id"]: group["allocated"]
+            async for group in hosts_collection.aggregate(
+                [
+                    {"$match": {"region_id": {"$in": [region["_id"] for region in regions]}}},
+                    {"$group": {"_id": "$region_id", "allocated": {"$sum": 1}}},
+                ]
+            )
+        }
+
+        max_hosts = 254  # Z octets 1-254
+        results = []
+        for region in regions:
+            allocated = host_counts.get(region["_id"], 0)
+            results.append(
+                (
+                    region,
+                    {
+                        "region_id": str(region["_id"]),
+                        "region_name": region.get("region_name"),
+                        "country": region.get("country"),
+                        "cidr": region.get("cidr"),
+                        "total_capacity": max_hosts,
+                        "allocated_hosts": allocated,
+                        "available": max_hosts - allocated,
+                        "utilization_percentage": round(allocated / max_hosts * 100, 2),
+                    },
+                )
+            )
+
+        return results
+
+    except Exception as e:
+        logger.error(f"Error computing region utilization: {e}", exc_info=True)
+        return []
+
+
+def _evaluate_country_thresholds(
+    country_stats: List[Dict], warning_threshold: int, critical_threshold: int, country_thresholds: Dict
+) -> List[Dict]:
+    """
+    Decide which countries need a notification.
 
     Args:
-        user_id: User ID to check
+        country_stats: Output of _get_country_utilization
         warning_threshold: Default warning threshold percentage
         critical_threshold: Default critical threshold percentage
         country_thresholds: Per-country threshold overrides
 
     Returns:
-        Number of notifications sent
+        Alerts for countries over a threshold that have not been notified yet
     """
-    notifications_sent = 0
-
-    try:
-        # Get all countries this user has allocations in
-        regions_collection = db_manager.get_collection("ipam_regions")
-        countries = await regions_collection.distinct("country", {"user_id": user_id, "status": "Active"})
-
-        for country in countries:
-            try:
-                # Calculate utilization for this country
-                utilization_stats = await ipam_manager.calculate_country_utilization(user_id, country)
-
-                utilization_pct = utilization_stats.get("utilization_percentage", 0)
-
-                # Get country-specific thresholds if configured
-                country_config = country_thresholds.get(country, {})
-                country_warning = country_config.get("warning", warning_threshold)
-                country_critical = country_config.get("critical", critical_threshold)
-
-                # Determine if notification needed
-                threshold_reached = None
-                if utilization_pct >= country_critical:
-                    threshold_reached = "critical"
-                elif utilization_pct >= country_warning:
-                    threshold_reached = "warning"
-
-                if threshold_reached:
-                    # Check if already notified
-                    notification_key = f"{user_id}:{country}:{threshold_reached}"
-                    if notification_key not in _notified_countries:
-                        # Send notification
-                        success = await _send_country_capacity_notification(
-                            user_id, country, utilization_stats, threshold_reached
-                        )
-
-                        if success:
-                            _notified_countries.add(notification_key)
-                            notifications_sent += 1
-                            logger.info(
-                                f"Sent {threshold_reached} notification for country {country} to user {user_id}"
-                            )
-
-                        # Log capacity event
-                        await _log_capacity_event(
-                            user_id=user_id,
-                            resource_type="country",
-                            resource_identifier=country,
-                            utilization_percentage=utilization_pct,
-                            threshold_type=threshold_reached,
-                            capacity_stats=utilization_stats,
-                        )
-                        
-                        # Track capacity warning in metrics
-                        await track_capacity_warning_event(
-                            resource_type="country",
-                            resource_id=country,
-                            utilization=utilization_pct,
-                            threshold=country_critical if threshold_reached == "critical" else country_warning
-                        )
-                else:
-                    # Remove from notified set if utilization dropped below warning
-                    _notified_countries.discard(f"{user_id}:{country}:warning")
-                    _notified_countries.discard(f"{user_id}:{country}:critical")
-
-            except Exception as country_error:
-                logger.error(
-                    f"Error checking country {country} for user {user_id}: {country_error}",
-                    exc_info=True,
-                    extra={"user_id": user_id, "country": country},
+    alerts = []
+
+    for stats in country_stats:
+        user_id, country = stats["user_id"], stats["country"]
+        utilization_pct = stats["utilization_percentage"]
+
+        # Get country-specific thresholds if configured
+        country_config = country_thresholds.get(country, {})
+        country_warning = country_config.get("warning", warning_threshold)
+        country_critical = country_config.get("critical", critical_threshold)
+
+        # Determine if notification needed
+        threshold_reached = None
+        if utilization_pct >= country_critical:
+            threshold_reached = "critical"
+        elif utilization_pct >= country_warning:
+            threshold_reached = "warning"
+
+        if threshold_reached:
+            notification_key = f"{user_id}:{country}:{threshold_reached}"
+            if notification_key not in _notified_countries:
+                alerts.append(
+                    {
+                        "user_id": user_id,
+                        "country": country,
+                        "stats": stats,
+                        "threshold_type": threshold_reached,
+                        "threshold": country_critical if threshold_reached == "critical" else country_warning,
+                        "notification_key": notification_key,
+                    }
                 )
+        else:
+            # Remove from notified set if utilization dropped below warning
+            _notified_countries.discard(f"{user_id}:{country}:warning")
+            _notified_countries.discard(f"{user_id}:{country}:critical")
 
-    except Exception as e:
-        logger.error(f"Error checking country utilization for user {user_id}: {e}", exc_info=True)
-
-    return notifications_sent
+    return alerts
 
 
-async def _check_region_utilization(user_id: str, region_threshold: int, region_thresholds: Dict) -> int:
+def _evaluate_region_thresholds(
+    region_stats: List[Tuple[Dict, Dict]], region_threshold: int, region_thresholds: Dict
+) -> List[Dict]:
     """
-    Check region utilization for a user and send notifications if threshold exceeded.
+    Decide which regions need a notification.
 
     Args:
-        user_id: User ID to check
+        region_stats: Output of _get_region_utilization
         region_threshold: Default region threshold percentage
         region_thresholds: Per-region threshold overrides
 
     Returns:
-        Number of notifications sent
+        Alerts for regions over their threshold that have not been notified yet
     """
-    notifications_sent = 0
+    alerts = []
+
+    for region, stats in region_stats:
+        user_id, region_id = region.get("user_id"), stats["region_id"]
+
+        # Get region-specific threshold if configured
+        region_specific_threshold = region_thresholds.get(region_id, region_threshold)
+        notification_key = f"{user_id}:{region_id}"
+
+        if stats["utilization_percentage"] >= region_specific_threshold:
+            if notification_key not in _notified_regions:
+                alerts.append(
+                    {
+                        "user_id": user_id,
+                        "region": region,
+                        "stats": stats,
+                        "threshold": region_specific_threshold,
+                        "notification_key": notification_key,
+                    }
+                )
+        else:
+            # Remove from notified set if utilization dropped
+            _notified_regions.discard(notification_key)
 
-    try:
-        # Get all active regions for this user
-        regions_collection = db_manager.get_collection("ipam_regions")
-        regions = await regions_collection.find({"user_id": user_id, "status": "Active"}).to_list(length=None)
+    return alerts
 
-        for region in regions:
-            try:
-                region_id = str(region["_id"])
-
-                # Calculate utilization for this region
-                utilization_stats = await ipam_manager.calculate_region_utilization(user_id, region_id)
-
-                utilization_pct = utilization_stats.get("utilization_percentage", 0)
-
-                # Get region-specific threshold if configured
-                region_specific_threshold = region_thresholds.get(region_id, region_threshold)
-
-                # Check if threshold exceeded
-                if utilization_pct >= region_specific_threshold:
-                    # Check if already notified
-                    notification_key = f"{user_id}:{region_id}"
-                    if notification_key not in _notified_regions:
-                        # Send notification
-                        success = await _send_region_capacity_notification(
-                            user_id, region, utilization_stats
-                        )
-
-                        if success:
-                            _notified_regions.add(notification_key)
-                            notifications_sent += 1
-                            logger.info(
-                                f"Sent region capacity notification for region {region_id} to user {user_id}"
-                            )
-
-                        # Log capacity event
-                        await _log_capacity_event(
-                            user_id=user_id,
-                            resource_type="region",
-                            resource_identifier=region_id,
-                            utilization_percentage=utilization_pct,
-                            threshold_type="critical",
-                            capacity_stats=utilization_stats,
-                        )
-                        
-                        # Track capacity warning in metrics
-                        await track_capacity_warning_event(
-                            resource_type="region",
-                            resource_id=region_id,
-                            utilization=utilization_pct,
-                            threshold=region_specific_threshold
-                        )
-                else:
-                    # Remove from notified set if utilization dropped
-                    _notified_regions.discard(f"{user_id}:{region_id}")
-
-            except Exception as region_error:
-                logger.error(
-                    f"Error checking region {region.get('_id')} for user {user_id}: {region_error}",
-                    exc_info=True,
-                    extra={"user_id": user_id, "region_id": str(region.get("_id"))},
-                )
 
-    except Exception as e:
-        logger.error(f"Error checking region utilization for user {user_id}: {e}", exc_info=True)
+async def _get_users(user_ids: Set[str]) -> Dict[str, Dict]:
+    """
+    Fetch the contact details of the users about to be notified with one query.
 
-    return notifications_sent
+    Returns:
+        Mapping of user ID to user document (email and username only)
+    """
+    if not user_ids:
+        return {}
+
+    try:
+        users_collection = db_manager.get_collection("users")
+        return {
+            user["user_id"]: user
+            async for user in users_collection.find(
+                {"user_id": {"$in": list(user_ids)}}, {"user_id": 1, "email": 1, "username": 1}
+            )
+        }
+    except Exception as e:
+        logger.error(f"Error loading users for capacity notifications: {e}", exc_info=True)
+        return {}
 
 
 async def _send_country_capacity_notification(
-    user_id: str, country: str, utilization_stats: Dict, threshold_type: str
+    user_id: str, country: str, utilization_stats: Dict, threshold_type: str, user: Optional[Dict] = None
 ) -> bool:
     """
     Send email notification for country capacity threshold.
@@ -317,14 +405,15 @@ async def _send_country_capacity_notification(
         country: Country name
         utilization_stats: Utilization statistics
         threshold_type: "warning" or "critical"
+        user: Preloaded user document (looked up by user_id if not given)
 
     Returns:
         True if email sent successfully
     """
     try:
-        # Get user email (would need to query users collection)
-        users_collection = db_manager.get_collection("users")
-        user = await users_collection.find_one({"user_id": user_id})
+        if user is None:
+            users_collection = db_manager.get_collection("users")
+            user = await users_collection.find_one({"user_id": user_id})
 
         if not user or "email" not in user:
             logger.warning(f"No email found for user {user_id}")
@@ -375,7 +464,7 @@ async def _send_country_capacity_notification(
 
 
 async def _send_region_capacity_notification(
-    user_id: str, region: Dict, utilization_stats: Dict
+    user_id: str, region: Dict, utilization_stats: Dict, user: Optional[Dict] = None
 ) -> bool:
     """
     Send email notification for region capacity threshold.
@@ -384,14 +473,15 @@ async def _send_region_capacity_notification(
         user_id: User ID
         region: Region document
         utilization_stats: Utilization statistics
+        user: Preloaded user document (looked up by user_id if not given)
 
     Returns:
         True if email sent successfully
     """
     try:
-        # Get user email
-        users_collection = db_manager.get_collection("users")
-        user = await users_collection.find_one({"user_id": user_id})
+        if user is None:
+            users_collection = db_manager.get_collection("users")
+            user = await users_collection.find_one({"user_id": user_id})
 
         if not user or "email" not in user:
             logger.warning(f"No email found for user {user_id}")
@@ -435,16 +525,16 @@ async def _send_region_capacity_notification(
         return False
 
 
-async def _log_capacity_event(
+def _capacity_event(
     user_id: str,
     resource_type: str,
     resource_identifier: str,
     utilization_percentage: float,
     threshold_type: str,
     capacity_stats: Dict,
-) -> None:
+) -> Dict:
     """
-    Log capacity event to database for audit trail.
+    Build a capacity event document for the audit trail.
 
     Args:
         user_id: User ID
@@ -454,24 +544,32 @@ async def _log_capacity_event(
         threshold_type: "warning" or "critical"
         capacity_stats: Full capacity statistics
     """
-    try:
-        capacity_events_collection = db_manager.get_collection("ipam_capacity_events")
+    return {
+        "user_id": user_id,
+        "resource_type": resource_type,
+        "resource_identifier": resource_identifier,
+        "utilization_percentage": utilization_percentage,
+        "threshold_type": threshold_type,
+        "capacity_stats": capacity_stats,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+async def _log_capacity_events(events: List[Dict]) -> None:
+    """
+    Write the capacity events of one monitoring pass to the database in a single insert.
 
-        event = {
-            "user_id": user_id,
-            "resource_type": resource_type,
-            "resource_identifier": resource_identifier,
-            "utilization_percentage": utilization_percentage,
-            "threshold_type": threshold_type,
-            "capacity_stats": capacity_stats,
-            "timestamp": datetime.now(timezone.utc),
-        }
+    Args:
+        events: Event documents built by _capacity_event
+    """
+    if not events:
+        return
 
-        await capacity_events_collection.insert_one(event)
+    try:
+        capacity_events_collection = db_manager.get_collection("ipam_capacity_events")
+        await capacity_events_collection.insert_many(events, ordered=False)
 
-        logger.debug(
-            f"Logged capacity event: {resource_type} {resource_identifier} at {utilization_percentage:.1f}%"
-        )
+        logger.debug(f"Logged {len(events)} capacity events")
 
     except Exception as e:
-        logger.error(f"Error logging capacity event: {e}", exc_info=True)
+        logger.error(f"Error logging capacity events: {e}", exc_info=True)
@@ -6,6 +6,7 @@ from fastapi.responses import JSONResponse
 
 from second_brain_database.database import db_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.principal_cache_manager import principal_cache
 from second_brain_database.managers.security_manager import security_manager
 from second_brain_database.routes.auth import enforce_all_lockdowns
 from second_brain_database.utils.logging_utils import (
@@ -87,6 +88,7 @@ async def update_profile(request: Request, data: dict = Body(...), current_user:
     users_collection = db_manager.get_collection("users")
     try:
         result = await users_collection.update_one({"username": username}, {"$set": updates})
+        await principal_cache.invalidate(username)
         logger.info("[%s] Profile updated for user: %s, Fields: %s", request_id, username, list(updates.keys()))
         return {"status": "success", "updated_fields": updates}
     except Exception as e:
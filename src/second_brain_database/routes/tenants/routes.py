@@ -11,6 +11,7 @@ from bson import ObjectId
 from second_brain_database.config import settings
 from second_brain_database.database import db_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.tenant_manager import tenant_manager
 from second_brain_database.routes.auth.dependencies import get_current_user_dep
 from second_brain_database.routes.auth.services.auth.login import create_access_token
 from second_brain_database.routes.tenants.models import (
@@ -93,6 +94,7 @@ async def create_tenant(
         
         await tenants_collection.insert_one(tenant_doc)
         logger.info(f"Created tenant: {tenant_id} by user {current_user['username']}")
+        await tenant_manager.notify_tenant_changed(tenant_id)
         
         # Add tenant membership to user
         await users_collection.update_one(
@@ -339,6 +341,7 @@ async def update_tenant(
             )
         
         logger.info(f"Updated tenant {tenant_id} by user {current_user['username']}")
+        await tenant_manager.notify_tenant_changed(tenant_id)
         
         # Get updated tenant
         tenant = await tenants_collection.find_one({"tenant_id": tenant_id})
@@ -11,14 +11,15 @@ from contextvars import ContextVar
 from dataclasses import dataclass
 from datetime import datetime, timezone
 import functools
+import secrets
 import time
 import traceback
 from typing import Any, Callable, Dict, Optional
 import uuid
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from prometheus_client import REGISTRY, CollectorRegistry, Histogram
+from prometheus_fastapi_instrumentator.metrics import Info
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from second_brain_database.managers.logging_manager import get_logger
 
@@ -166,121 +167,189 @@ def log_auth_failure(
     security_logger.log_event(context)
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+class RequestLoggingMiddleware:
     """
-    Comprehensive request/response logging middleware for FastAPI.
-
-    Logs all incoming requests and outgoing responses with timing,
-    status codes, and relevant context information.
+    Request/response logging middleware for FastAPI.
+
+    A plain ASGI middleware: streaming responses pass through untouched, and
+    each request produces a single log record once the response has been
+    sent, with request ID, status, duration, response size and client IP
+    attached as record fields for the log pipeline. The request ID is taken
+    from X-Request-ID when the client sends one, returned in the response
+    headers and available to handlers as ``request.state.request_id`` and
+    through ``request_id_context``.
+
+    Metrics are left to the Prometheus instrumentator's middleware; see
+    ``response_first_byte`` for the streaming-aware latency it records.
     """
 
+    # Seconds until response headers after which a request is logged as slow
+    SLOW_REQUEST_THRESHOLD = 1.0
+
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
         self.logger = get_logger(name="Second_Brain_Database_Requests", prefix="[REQUEST]")
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Process request and response with comprehensive logging (structured JSON)."""
-        from datetime import datetime, timezone
-        import os
-        import traceback
-
-        # Generate unique request ID for tracing
-        request_id = str(uuid.uuid4())[:8]
-        start_time = time.time()
-
-        # Extract request information
-        client_ip = self._get_client_ip(request)
-        user_agent = request.headers.get("user-agent", "unknown")
-        method = request.method
-        path = str(request.url.path)
-        query_params = str(request.url.query) if request.url.query else None
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        request_id = None
+        forwarded_for = real_ip = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+            elif name == b"x-forwarded-for":
+                forwarded_for = value
+            elif name == b"x-real-ip":
+                real_ip = value
+        if not request_id:
+            request_id = secrets.token_hex(4)
+
+        status_code = 500
+        response_size = 0
+        first_byte = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size, first_byte
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                first_byte = time.perf_counter() - start_time
+                message["headers"] = [*message.get("headers", ()), (b"x-request-id", request_id.encode("latin-1"))]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_context.set(request_id)
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            request_id_context.reset(token)
+            self._log_request(
+                scope,
+                request_id,
+                status_code,
+                time.perf_counter() - start_time,
+                first_byte,
+                response_size,
+                self._get_client_ip(scope, forwarded_for, real_ip),
+                error,
+            )
 
-        # Log incoming request (structured JSON)
-        log_data = {
-            "event": "request_received",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+    def _log_request(
+        self,
+        scope: Scope,
+        request_id: str,
+        status_code: int,
+        duration: float,
+        first_byte: Optional[float],
+        response_size: int,
+        client_ip: str,
+        error: Optional[Exception],
+    ) -> None:
+        """Emit the request record and observe time to first byte."""
+        method = scope["method"]
+        path = scope["path"]
+        extra = {
             "request_id": request_id,
             "method": method,
             "path": path,
-            "query_params": query_params,
+            "status_code": status_code,
+            "duration": duration,
+            "response_size": response_size,
             "client_ip": client_ip,
-            "user_agent": user_agent,
-            "process": os.getpid(),
-            "thread": None,  # Optionally add threading.get_ident() if needed
-            "host": os.getenv("HOSTNAME", "unknown"),
-            "app": os.getenv("APP_NAME", "Second_Brain_Database-app"),
-            "env": os.getenv("ENV", "dev"),
         }
-        self.logger.info(log_data)
 
-        # Process request and capture response
-        try:
-            response = await call_next(request)
-            duration = time.time() - start_time
-
-            # Log successful response (structured JSON)
-            response_log = {
-                "event": "response_sent",
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "request_id": request_id,
-                "method": method,
-                "path": path,
-                "status_code": response.status_code,
-                "duration": duration,
-                "response_size": len(getattr(response, "body", b"")),
-                "client_ip": client_ip,
-                "user_agent": user_agent,
-                "process": os.getpid(),
-                "thread": None,
-                "host": os.getenv("HOSTNAME", "unknown"),
-                "app": os.getenv("APP_NAME", "Second_Brain_Database-app"),
-                "env": os.getenv("ENV", "dev"),
-            }
-            self.logger.info(response_log)
-
-            # Log slow requests
-            if duration > 1.0:
-                slow_log = response_log.copy()
-                slow_log["event"] = "slow_request"
-                self.logger.warning(slow_log)
-
-            return response
+        if error is not None:
+            self.logger.error(
+                "%s %s %s failed after %.3fs: %s",
+                request_id,
+                method,
+                path,
+                duration,
+                error,
+                exc_info=error,
+                extra=extra,
+            )
+            return
+
+        self.logger.info(
+            "%s %s %s %d %.3fs %dB %s",
+            request_id,
+            method,
+            path,
+            status_code,
+            duration,
+            response_size,
+            client_ip,
+            extra=extra,
+        )
 
-        except Exception as e:
-            duration = time.time() - start_time
-            error_log = {
-                "event": "request_error",
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "request_id": request_id,
-                "method": method,
-                "path": path,
-                "duration": duration,
-                "exception": str(e),
-                "stack_trace": traceback.format_exc(),
-                "client_ip": client_ip,
-                "user_agent": user_agent,
-                "process": os.getpid(),
-                "thread": None,
-                "host": os.getenv("HOSTNAME", "unknown"),
-                "app": os.getenv("APP_NAME", "Second_Brain_Database-app"),
-                "env": os.getenv("ENV", "dev"),
-            }
-            self.logger.error(error_log)
-            raise
+        if first_byte is not None and first_byte > self.SLOW_REQUEST_THRESHOLD:
+            self.logger.warning(
+                "%s SLOW REQUEST: %s %s took %.3fs to respond", request_id, method, path, first_byte, extra=extra
+            )
 
-    def _get_client_ip(self, request: Request) -> str:
+    @staticmethod
+    def _get_client_ip(scope: Scope, forwarded_for: Optional[bytes], real_ip: Optional[bytes]) -> str:
         """Extract client IP address from request headers."""
         # Check for forwarded headers first (for reverse proxy setups)
-        forwarded_for = request.headers.get("x-forwarded-for")
         if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
+            return forwarded_for.decode("latin-1").split(",")[0].strip()
 
-        real_ip = request.headers.get("x-real-ip")
         if real_ip:
-            return real_ip
+            return real_ip.decode("latin-1")
 
         # Fallback to direct client IP
-        return getattr(request.client, "host", "unknown")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+
+def response_first_byte(
+    metric_name: str = "http_response_first_byte_seconds",
+    buckets: tuple = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    registry: CollectorRegistry = REGISTRY,
+) -> Optional[Callable[[Info], None]]:
+    """
+    Instrumentator metric for time until response headers are sent.
+
+    Total request duration is dominated by stream length for chat and RAG SSE
+    responses; time to first byte is what clients wait on.
+
+    Args:
+        metric_name: Histogram name
+        buckets: Histogram buckets in seconds
+        registry: Prometheus registry the histogram is registered with
+
+    Returns:
+        Instrumentation function for ``Instrumentator.add``, or None if the
+        metric is already registered
+    """
+    try:
+        histogram = Histogram(
+            metric_name,
+            "Time from request receipt until response headers are sent.",
+            ("handler", "method"),
+            buckets=buckets,
+            registry=registry,
+        )
+    except ValueError as e:
+        if "Duplicated time" not in str(e):
+            raise
+        return None
+
+    def instrumentation(info: Info) -> None:
+        if info.modified_duration_without_streaming:
+            histogram.labels(info.modified_handler, info.method).observe(info.modified_duration_without_streaming)
+
+    return instrumentation
 
 
 def log_performance(operation_name: str, log_args: bool = False):
@@ -0,0 +1,181 @@
+"""
+WebRTC Signaling Codec
+
+Wire formats for signaling messages on the Redis leg and on client sockets.
+
+Room traffic is published to Redis either as JSON text (default) or, when
+``WEBRTC_REDIS_WIRE_FORMAT="msgpack"`` and the optional ``msgpack`` package is
+installed, as compact MessagePack frames. Frames are self-describing (a JSON
+object always starts with ``{``, a MessagePack map never does), so workers on
+either setting can read each other's traffic during a rollout.
+
+Messages on Redis were validated when they entered the system, so subscribers
+decode them with the trusted fast path (``decode_frame``) instead of running
+pydantic validation again. Client sockets that offer the ``webrtc.msgpack``
+subprotocol receive room traffic as binary MessagePack frames; everyone else
+keeps receiving JSON text.
+"""
+
+import json
+from typing import Any, Dict, Optional, Union
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from second_brain_database.config import settings
+from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.webrtc.schemas import WebRtcMessage
+
+logger = get_logger(prefix="[WebRTC-Codec]")
+
+try:
+    import msgpack
+
+    _msgpack_available: bool = True
+except ImportError:
+    msgpack = None
+    _msgpack_available = False
+
+WIRE_JSON = "json"
+WIRE_MSGPACK = "msgpack"
+
+# WebSocket subprotocols clients may offer (Sec-WebSocket-Protocol)
+JSON_SUBPROTOCOL = "webrtc.json"
+MSGPACK_SUBPROTOCOL = "webrtc.msgpack"
+
+Frame = Union[str, bytes]
+
+_wire_format_warned = False
+
+
+def msgpack_available() -> bool:
+    """Whether the optional msgpack package is installed."""
+    return _msgpack_available
+
+
+def get_wire_format() -> str:
+    """
+    Get the configured Redis wire format.
+
+    Falls back to JSON (with a one-time warning) when msgpack is configured
+    but not installed.
+
+    Returns:
+        WIRE_JSON or WIRE_MSGPACK
+    """
+    global _wire_format_warned
+
+    wire_format = settings.WEBRTC_REDIS_WIRE_FORMAT
+    if wire_format == WIRE_MSGPACK and not _msgpack_available:
+        if not _wire_format_warned:
+            logger.warning("WEBRTC_REDIS_WIRE_FORMAT=msgpack but msgpack is not installed, using JSON")
+            _wire_format_warned = True
+        return WIRE_JSON
+
+    return WIRE_MSGPACK if wire_format == WIRE_MSGPACK else WIRE_JSON
+
+
+def encode_message(message: WebRtcMessage, wire_format: Optional[str] = None) -> Frame:
+    """
+    Serialize a message for publishing to Redis.
+
+    Args:
+        message: The message to serialize
+        wire_format: WIRE_JSON or WIRE_MSGPACK (defaults to the configured format)
+
+    Returns:
+        JSON text or MessagePack bytes
+    """
+    if (wire_format or get_wire_format()) == WIRE_MSGPACK:
+        return msgpack.packb(message.model_dump(mode="json"), use_bin_type=True)
+
+    return message.model_dump_json()
+
+
+def decode_frame(data: Frame) -> Dict[str, Any]:
+    """
+    Decode a trusted frame into a plain dict without pydantic validation.
+
+    Only use this for traffic produced by this server (e.g. Redis room
+    channels); client input must still go through ``WebRtcMessage`` validation.
+
+    Args:
+        data: JSON text/bytes or MessagePack bytes
+
+    Returns:
+        Decoded message fields
+    """
+    if isinstance(data, str) or data[:1] == b"{":
+        return json.loads(data)
+
+    if not _msgpack_available:
+        raise ValueError("Received a MessagePack frame but msgpack is not installed")
+
+    return msgpack.unpackb(data, raw=False)
+
+
+def encode_frame(fields: Dict[str, Any], binary: bool) -> Frame:
+    """
+    Serialize decoded message fields for a client socket.
+
+    Args:
+        fields: Message fields as returned by ``decode_frame``
+        binary: Whether the socket negotiated MessagePack
+
+    Returns:
+        MessagePack bytes for binary sockets, JSON text otherwise
+    """
+    if binary:
+        return msgpack.packb(fields, use_bin_type=True)
+
+    return json.dumps(fields)
+
+
+def is_binary_frame(data: Frame) -> bool:
+    """Whether a Redis frame is MessagePack (as opposed to JSON)."""
+    return isinstance(data, bytes) and data[:1] != b"{"
+
+
+def negotiate_subprotocol(websocket: WebSocket) -> Optional[str]:
+    """
+    Pick the subprotocol to accept from the client's offered list.
+
+    Args:
+        websocket: The connecting WebSocket (before ``accept``)
+
+    Returns:
+        MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL, or None if neither was offered
+    """
+    offered = websocket.scope.get("subprotocols") or []
+
+    if MSGPACK_SUBPROTOCOL in offered and _msgpack_available:
+        return MSGPACK_SUBPROTOCOL
+    if JSON_SUBPROTOCOL in offered:
+        return JSON_SUBPROTOCOL
+
+    return None
+
+
+async def receive_client_frame(websocket: WebSocket) -> Dict[str, Any]:
+    """
+    Receive one client message from a text (JSON) or binary (MessagePack) frame.
+
+    The result is untrusted and must be validated with ``WebRtcMessage``.
+
+    Args:
+        websocket: The accepted WebSocket
+
+    Returns:
+        Decoded message fields
+
+    Raises:
+        WebSocketDisconnect: If the client disconnected
+    """
+    message = await websocket.receive()
+
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+
+    if message.get("text") is not None:
+        return json.loads(message["text"])
+
+    return decode_frame(message["bytes"])
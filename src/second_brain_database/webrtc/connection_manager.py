@@ -12,10 +12,130 @@ from typing import AsyncIterator, Dict, Optional, Set, Any
 
 from second_brain_database.managers.redis_manager import redis_manager
 from second_brain_database.managers.logging_manager import get_logger
-from second_brain_database.webrtc.schemas import WebRtcMessage, MessageType
+from second_brain_database.webrtc.monitoring import ACTIVE_ROOMS_KEY, PARTICIPANTS_KEY, ROOM_SIZES_KEY
+from second_brain_database.webrtc.codec import Frame, decode_frame, encode_message
+from second_brain_database.webrtc.room_hub import room_hub
+from second_brain_database.webrtc.schemas import MessageType, RoomPermissions, RoomSettings, WebRtcMessage
 
 logger = get_logger(prefix="[WebRTC-Manager]")
 
+# KEYS: participants hash, presence zset, room state hash,
+#       participants counter, active rooms counter, room sizes zset
+# ARGV: username, participant JSON, heartbeat time, room state TTL, room ID
+# Returns {participant count, 1 if host role was assigned}
+ADD_PARTICIPANT_SCRIPT = """
+local is_new = redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+local count = redis.call('HLEN', KEYS[1])
+local assigned_host = 0
+if is_new == 1 then
+    redis.call('INCR', KEYS[4])
+    if count == 1 then
+        redis.call('INCR', KEYS[5])
+        redis.call('HSET', KEYS[3], 'role:' .. ARGV[1], 'host')
+        assigned_host = 1
+    end
+    redis.call('ZADD', KEYS[6], count, ARGV[5])
+    redis.call('HINCRBY', KEYS[3], 'version', 1)
+    redis.call('EXPIRE', KEYS[3], ARGV[4])
+end
+return {count, assigned_host}
+"""
+
+# KEYS: participants hash, presence zset, room state hash,
+#       participants counter, active rooms counter, room sizes zset
+# ARGV: username, room ID
+# Returns remaining participant count; an emptied room loses its registry and state
+REMOVE_PARTICIPANT_SCRIPT = """
+local removed = redis.call('HDEL', KEYS[1], ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+local count = redis.call('HLEN', KEYS[1])
+if removed == 1 then
+    redis.call('DECR', KEYS[4])
+    if count == 0 then
+        redis.call('DECR', KEYS[5])
+        redis.call('ZREM', KEYS[6], ARGV[2])
+    else
+        redis.call('HINCRBY', KEYS[3], 'version', 1)
+        redis.call('ZADD', KEYS[6], count, ARGV[2])
+    end
+end
+if count == 0 then
+    redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+end
+return count
+"""
+
+# KEYS: room sizes zset, participants hashes...
+# ARGV: room ID of each participants hash
+# Sets each room's size from its participants hash, dropping empty rooms
+RECONCILE_ROOM_SIZES_SCRIPT = """
+for i = 2, #KEYS do
+    local count = redis.call('HLEN', KEYS[i])
+    if count > 0 then
+        redis.call('ZADD', KEYS[1], count, ARGV[i - 1])
+    else
+        redis.call('ZREM', KEYS[1], ARGV[i - 1])
+    end
+end
+return #KEYS - 1
+"""
+
+# KEYS: participants counter, active rooms counter, room sizes zset
+# Returns {active rooms, participants}
+RECONCILE_METRICS_SCRIPT = """
+local participants = 0
+for _, room in ipairs(redis.call('ZRANGE', KEYS[3], 0, -1)) do
+    participants = participants + tonumber(redis.call('ZSCORE', KEYS[3], room))
+end
+local rooms = redis.call('ZCARD', KEYS[3])
+redis.call('SET', KEYS[1], participants)
+redis.call('SET', KEYS[2], rooms)
+return {rooms, participants}
+"""
+
+# KEYS: room state hash
+# ARGV: room state TTL, number of fields to set, field/value pairs, fields to delete
+# Returns {state version, 1 if anything changed}
+UPDATE_ROOM_STATE_SCRIPT = """
+local set_count = tonumber(ARGV[2])
+local changed = set_count > 0
+local i = 3
+for _ = 1, set_count do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    i = i + 2
+end
+while i <= #ARGV do
+    if redis.call('HDEL', KEYS[1], ARGV[i]) == 1 then
+        changed = true
+    end
+    i = i + 1
+end
+if not changed then
+    return {tonumber(redis.call('HGET', KEYS[1], 'version') or 0), 0}
+end
+local version = redis.call('HINCRBY', KEYS[1], 'version', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return {version, 1}
+"""
+
+# Room state hash field prefixes ("role:alice") and the snapshot section each fills
+ROOM_STATE_SECTIONS = {
+    "role": "roles",
+    "permissions": "permissions",
+    "setting": "settings",
+    "hand": "hand_raise_queue",
+    "waiting": "waiting_room",
+}
+
+
+def _timestamp_score(timestamp: Optional[str]) -> float:
+    """Sort key for ISO 8601 timestamps (unparseable ones sort first)."""
+    try:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return 0.0
+
 
 class WebRtcManager:
     """
@@ -25,7 +145,11 @@ class WebRtcManager:
     by the router instances. It provides methods for:
     - Publishing messages to Redis channels (rooms)
     - Subscribing to Redis channels for a room
-    - Managing room state (participants) in Redis Sets
+    - Managing room state (participants) in Redis hashes keyed by username,
+      with heartbeats in a per-room sorted set
+    - Keeping roles, permissions, settings, the hand raise queue and the
+      waiting room in one versioned hash per room, served whole on join
+      and broadcast as versioned deltas on change
     """
     
     def __init__(self):
@@ -36,20 +160,14 @@ class WebRtcManager:
         self.ROOM_CHANNEL_PREFIX = "webrtc:room:"
         self.ROOM_PARTICIPANTS_PREFIX = "webrtc:participants:"
         self.USER_PRESENCE_PREFIX = "webrtc:presence:"
-        self.ROOM_ROLES_PREFIX = "webrtc:roles:"
-        self.ROOM_PERMISSIONS_PREFIX = "webrtc:permissions:"
+        self.ROOM_STATE_PREFIX = "webrtc:room-state:"
         self.ROOM_ANALYTICS_PREFIX = "webrtc:analytics:"
         self.ROOM_RECORDINGS_PREFIX = "webrtc:recordings:"
         self.FILE_TRANSFERS_PREFIX = "webrtc:transfers:"
         
         # Immediate Features
-        self.ROOM_SETTINGS_PREFIX = "webrtc:settings:"
-        self.HAND_RAISE_QUEUE_PREFIX = "webrtc:hand-raise:"
         self.PARTICIPANT_INFO_PREFIX = "webrtc:participant-info:"
         
-        # Short Term Features
-        self.WAITING_ROOM_PREFIX = "webrtc:waiting-room:"
-        
         # Medium Term Features
         self.BREAKOUT_ROOMS_PREFIX = "webrtc:breakout-rooms:"
         self.LIVE_STREAMS_PREFIX = "webrtc:live-streams:"
@@ -57,9 +175,15 @@ class WebRtcManager:
         # Long Term Features
         self.E2EE_KEYS_PREFIX = "webrtc:e2ee-keys:"
         
-        # TTL for presence keys (heartbeat timeout)
+        # Heartbeat age after which a participant is considered gone
         self.PRESENCE_TTL = 30  # seconds
         
+        # TTL for the room state hash, refreshed on every change
+        self.ROOM_STATE_TTL = 86400  # seconds
+        
+        # Rooms reconciled per script call by reconcile_metrics
+        self.RECONCILE_BATCH_SIZE = 500
+        
         logger.info("WebRTC manager initialized with Redis Pub/Sub")
     
     def _get_room_channel(self, room_id: str) -> str:
@@ -67,12 +191,27 @@ class WebRtcManager:
         return f"{self.ROOM_CHANNEL_PREFIX}{room_id}"
     
     def _get_participants_key(self, room_id: str) -> str:
-        """Get Redis key for room participants set."""
+        """Get Redis key for room participants hash (username -> participant JSON)."""
         return f"{self.ROOM_PARTICIPANTS_PREFIX}{room_id}"
     
-    def _get_presence_key(self, room_id: str, username: str) -> str:
-        """Get Redis key for user presence in a room."""
-        return f"{self.USER_PRESENCE_PREFIX}{room_id}:{username}"
+    def _get_presence_key(self, room_id: str) -> str:
+        """Get Redis key for room presence sorted set (username -> last heartbeat)."""
+        return f"{self.USER_PRESENCE_PREFIX}{room_id}"
+    
+    def _get_room_state_key(self, room_id: str) -> str:
+        """Get Redis key for the versioned room state hash ("role:alice" -> "host", ...)."""
+        return f"{self.ROOM_STATE_PREFIX}{room_id}"
+    
+    def _get_participant_script_keys(self, room_id: str) -> tuple:
+        """Get the KEYS for the add/remove participant scripts."""
+        return (
+            self._get_participants_key(room_id),
+            self._get_presence_key(room_id),
+            self._get_room_state_key(room_id),
+            PARTICIPANTS_KEY,
+            ACTIVE_ROOMS_KEY,
+            ROOM_SIZES_KEY,
+        )
     
     async def publish_to_room(self, room_id: str, message: WebRtcMessage) -> int:
         """
@@ -93,11 +232,11 @@ class WebRtcManager:
             if not message.timestamp:
                 message.timestamp = datetime.now(timezone.utc).isoformat()
             
-            # Serialize message to JSON
-            message_json = message.model_dump_json()
+            # Serialize message in the configured wire format (JSON or MessagePack)
+            frame = encode_message(message)
             
             # Publish to Redis channel using Redis PUBLISH
-            subscribers = await redis_client.publish(channel, message_json)
+            subscribers = await redis_client.publish(channel, frame)
             
             logger.debug(
                 f"Published {message.type} to room {room_id}",
@@ -119,17 +258,39 @@ class WebRtcManager:
             )
             raise
     
+    def stream_room(self, room_id: str, username: str, binary: bool = False) -> AsyncIterator[Frame]:
+        """
+        Stream a room's messages to a local connection.
+        
+        Uses the worker-wide room hub, so every WebSocket on this process shares
+        one Redis subscription and each message is decoded once. Messages sent by
+        ``username`` are filtered out.
+        
+        Args:
+            room_id: The room identifier
+            username: Username of the receiving connection
+            binary: Yield MessagePack bytes instead of JSON text
+            
+        Returns:
+            Async iterator of serialized messages (JSON str or MessagePack bytes)
+        """
+        return room_hub.subscribe(room_id, username, binary=binary)
+    
     async def subscribe_to_room(self, room_id: str) -> AsyncIterator[WebRtcMessage]:
         """
         Subscribe to a room's Redis channel and yield messages.
         
+        Opens a dedicated pubsub connection; WebSocket handlers should use
+        stream_room instead.
+        
         Args:
             room_id: The room identifier
             
         Yields:
             WebRtcMessage objects from the channel
         """
-        redis_client = await self.redis.get_redis()
+        # Frames may be JSON or MessagePack regardless of this worker's format
+        redis_client = await self.redis.get_binary_redis()
         channel = self._get_room_channel(room_id)
         pubsub = None
         
@@ -147,13 +308,8 @@ class WebRtcManager:
             async for raw_message in pubsub.listen():
                 if raw_message["type"] == "message":
                     try:
-                        # Decode message
-                        message_data = raw_message["data"]
-                        if isinstance(message_data, bytes):
-                            message_data = message_data.decode("utf-8")
-                        
-                        # Parse WebRTC message
-                        message = WebRtcMessage.model_validate_json(message_data)
+                        # Decode message (JSON or MessagePack)
+                        message = WebRtcMessage.model_validate(decode_frame(raw_message["data"]))
                         
                         logger.debug(
                             f"Received {message.type} in room {room_id}",
@@ -194,6 +350,10 @@ class WebRtcManager:
         """
         Add a participant to a room.
         
+        Registration, the presence heartbeat, the count, first-participant
+        host assignment, the room state version and the monitoring counters
+        are updated atomically in a single script call.
+        
         Args:
             room_id: The room identifier
             username: The username (used as identifier throughout the system)
@@ -202,28 +362,21 @@ class WebRtcManager:
             Number of participants in the room after adding
         """
         try:
-            redis_client = await self.redis.get_redis()
-            participants_key = self._get_participants_key(room_id)
-            presence_key = self._get_presence_key(room_id, username)
+            now = datetime.now(timezone.utc)
             
             # Store participant info as JSON
             participant_data = json.dumps({
                 "username": username,
-                "joined_at": datetime.now(timezone.utc).isoformat()
+                "joined_at": now.isoformat()
             })
             
-            # Add to participants set using Redis SADD
-            await redis_client.sadd(participants_key, participant_data)
-            
-            # Set presence with TTL using Redis SETEX
-            await redis_client.setex(presence_key, self.PRESENCE_TTL, "1")
-            
-            # Get participant count using Redis SCARD
-            count = await redis_client.scard(participants_key)
+            count, assigned_host = await self.redis.run_script(
+                ADD_PARTICIPANT_SCRIPT,
+                self._get_participant_script_keys(room_id),
+                (username, participant_data, now.timestamp(), self.ROOM_STATE_TTL, room_id)
+            )
             
-            # Auto-assign host role to first participant
-            if count == 1:
-                await self.set_user_role(room_id, username, "host")
+            if assigned_host:
                 logger.info(
                     f"Auto-assigned host role to first participant {username} in room {room_id}",
                     extra={"room_id": room_id, "username": username}
@@ -252,6 +405,12 @@ class WebRtcManager:
         """
         Remove a participant from a room.
         
+        The participant and its heartbeat are removed and the remaining count
+        read in a single script call. When the last participant leaves, the
+        room's registry and state hash (roles, permissions, settings, hand
+        raise queue and waiting room) are deleted, so a later room with the
+        same ID starts fresh.
+        
         Args:
             room_id: The room identifier
             username: The username (used as identifier throughout the system)
@@ -260,33 +419,11 @@ class WebRtcManager:
             Number of participants remaining in the room
         """
         try:
-            redis_client = await self.redis.get_redis()
-            participants_key = self._get_participants_key(room_id)
-            presence_key = self._get_presence_key(room_id, username)
-            
-            # Get all participants to find the matching one using Redis SMEMBERS
-            participants = await redis_client.smembers(participants_key)
-            
-            # Find and remove the participant
-            for participant_json in participants:
-                try:
-                    participant = json.loads(participant_json)
-                    if participant.get("username") == username:
-                        # Remove from set using Redis SREM
-                        await redis_client.srem(participants_key, participant_json)
-                        break
-                except json.JSONDecodeError:
-                    continue
-            
-            # Remove presence key using Redis DEL
-            await redis_client.delete(presence_key)
-            
-            # Get remaining participant count using Redis SCARD
-            count = await redis_client.scard(participants_key)
-            
-            # Clean up empty room
-            if count == 0:
-                await redis_client.delete(participants_key)
+            count = await self.redis.run_script(
+                REMOVE_PARTICIPANT_SCRIPT,
+                self._get_participant_script_keys(room_id),
+                (username, room_id)
+            )
             
             logger.info(
                 f"Removed participant {username} from room {room_id}",
@@ -319,9 +456,7 @@ class WebRtcManager:
         """
         try:
             redis_client = await self.redis.get_redis()
-            participants_key = self._get_participants_key(room_id)
-            # Get all participants using Redis SMEMBERS
-            participants_json = await redis_client.smembers(participants_key)
+            participants_json = await redis_client.hvals(self._get_participants_key(room_id))
             
             participants = []
             for participant_json in participants_json:
@@ -341,6 +476,26 @@ class WebRtcManager:
             )
             return []
     
+    async def get_participant_count(self, room_id: str) -> int:
+        """
+        Get the number of participants in a room.
+        
+        Args:
+            room_id: The room identifier
+            
+        Returns:
+            Participant count (0 on error)
+        """
+        try:
+            redis_client = await self.redis.get_redis()
+            return await redis_client.hlen(self._get_participants_key(room_id))
+        except Exception as e:
+            logger.error(
+                f"Failed to count participants for room {room_id}: {e}",
+                extra={"room_id": room_id, "error": str(e)}
+            )
+            return 0
+    
     async def update_presence(self, room_id: str, username: str) -> None:
         """
         Update user presence (heartbeat) in a room.
@@ -351,15 +506,284 @@ class WebRtcManager:
         """
         try:
             redis_client = await self.redis.get_redis()
-            presence_key = self._get_presence_key(room_id, username)
-            # Update presence using Redis SETEX
-            await redis_client.setex(presence_key, self.PRESENCE_TTL, "1")
+            await redis_client.zadd(
+                self._get_presence_key(room_id),
+                {username: datetime.now(timezone.utc).timestamp()},
+                xx=True
+            )
         except Exception as e:
             logger.warning(
                 f"Failed to update presence for user {username} in room {room_id}: {e}",
                 extra={"room_id": room_id, "username": username, "error": str(e)}
             )
     
+    async def get_stale_participants(self, room_id: str, max_age: Optional[int] = None) -> list[str]:
+        """
+        Get participants whose last heartbeat is older than the presence TTL.
+        
+        Args:
+            room_id: The room identifier
+            max_age: Heartbeat age in seconds (defaults to PRESENCE_TTL)
+            
+        Returns:
+            List of usernames with stale presence
+        """
+        try:
+            redis_client = await self.redis.get_redis()
+            cutoff = datetime.now(timezone.utc).timestamp() - (max_age or self.PRESENCE_TTL)
+            return await redis_client.zrangebyscore(self._get_presence_key(room_id), "-inf", cutoff)
+        except Exception as e:
+            logger.warning(
+                f"Failed to get stale participants for room {room_id}: {e}",
+                extra={"room_id": room_id, "error": str(e)}
+            )
+            return []
+    
+    async def sweep_stale_participants(self, max_age: Optional[int] = None) -> int:
+        """
+        Remove participants whose presence heartbeat has expired from every room.
+        
+        Open sockets are kept present by their worker's room hub, so a stale
+        heartbeat means the participant's worker went away without running
+        its leave cleanup. Each removal is announced to the rest of the room.
+        
+        Args:
+            max_age: Heartbeat age in seconds (defaults to PRESENCE_TTL)
+            
+        Returns:
+            Number of participants removed
+        """
+        redis_client = await self.redis.get_redis()
+        
+        room_ids = {
+            key[len(self.USER_PRESENCE_PREFIX):]
+            async for key in redis_client.scan_iter(match=f"{self.USER_PRESENCE_PREFIX}*", count=500)
+        }
+        
+        removed = 0
+        for room_id in room_ids:
+            for username in await self.get_stale_participants(room_id, max_age):
+                try:
+                    remaining = await self.remove_participant(room_id, username)
+                    await self.publish_to_room(
+                        room_id,
+                        WebRtcMessage.create_user_left(
+                            user_id=username,
+                            username=username,
+                            room_id=room_id,
+                            timestamp=datetime.now(timezone.utc).isoformat()
+                        )
+                    )
+                    removed += 1
+                    
+                    logger.info(
+                        f"Removed stale participant {username} from room {room_id}",
+                        extra={"room_id": room_id, "username": username, "remaining_participants": remaining}
+                    )
+                    
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to remove stale participant {username} from room {room_id}: {e}",
+                        extra={"room_id": room_id, "username": username, "error": str(e)}
+                    )
+        
+        return removed
+    
+    async def _reconcile_room_sizes(self, room_ids: list[str]) -> None:
+        """Set the room sizes entries of a batch of rooms from their participant hashes."""
+        await self.redis.run_script(
+            RECONCILE_ROOM_SIZES_SCRIPT,
+            (ROOM_SIZES_KEY, *(self._get_participants_key(room_id) for room_id in room_ids)),
+            room_ids
+        )
+    
+    async def reconcile_metrics(self) -> Dict[str, int]:
+        """
+        Rebuild the monitoring room and participant counters from the participant hashes.
+        
+        The registry scripts keep the counters exact while every join is
+        matched by a leave, but a crashed worker leaves its participants
+        counted. Rooms are found with SCAN (participant hashes) and ZSCAN
+        (room sizes entries whose hash is gone) and fixed in batches of
+        RECONCILE_BATCH_SIZE; each room's size is read and written in the
+        same script call, so concurrent joins and leaves are never lost. The
+        counters are then derived from the room sizes in one final call.
+        
+        Returns:
+            Dict with the reconciled active_rooms and participants counts
+        """
+        redis_client = await self.redis.get_redis()
+        
+        batch: list[str] = []
+        # SCAN may return a key more than once; reconciling a room twice is harmless
+        async for key in redis_client.scan_iter(
+            match=f"{self.ROOM_PARTICIPANTS_PREFIX}*", count=self.RECONCILE_BATCH_SIZE
+        ):
+            batch.append(key[len(self.ROOM_PARTICIPANTS_PREFIX):])
+            if len(batch) >= self.RECONCILE_BATCH_SIZE:
+                await self._reconcile_room_sizes(batch)
+                batch = []
+        async for room_id, _ in redis_client.zscan_iter(ROOM_SIZES_KEY, count=self.RECONCILE_BATCH_SIZE):
+            batch.append(room_id)
+            if len(batch) >= self.RECONCILE_BATCH_SIZE:
+                await self._reconcile_room_sizes(batch)
+                batch = []
+        if batch:
+            await self._reconcile_room_sizes(batch)
+        
+        active_rooms, participants = await self.redis.run_script(
+            RECONCILE_METRICS_SCRIPT,
+            (PARTICIPANTS_KEY, ACTIVE_ROOMS_KEY, ROOM_SIZES_KEY)
+        )
+        
+        logger.info(
+            f"Reconciled WebRTC metrics: {active_rooms} rooms, {participants} participants",
+            extra={"active_rooms": active_rooms, "participants": participants}
+        )
+        
+        return {"active_rooms": active_rooms, "participants": participants}
+    
+    # ========================================================================
+    # Room State Snapshot
+    # ========================================================================
+    
+    def _decode_room_state(self, fields: Dict[str, str]) -> Dict[str, Any]:
+        """Decode a room state hash into snapshot sections."""
+        state: Dict[str, Any] = {section: {} for section in ROOM_STATE_SECTIONS.values()}
+        version = 0
+        
+        for field, raw in fields.items():
+            if field == "version":
+                version = int(raw)
+                continue
+            
+            prefix, _, key = field.partition(":")
+            section = ROOM_STATE_SECTIONS.get(prefix)
+            if section is None or not key:
+                continue
+            
+            if section == "roles":
+                state[section][key] = raw
+                continue
+            
+            try:
+                state[section][key] = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+        
+        state["version"] = version
+        state["settings"] = {**RoomSettings().model_dump(), **state["settings"]}
+        
+        # Oldest raised hand first, numbered from 1
+        hands = sorted(state["hand_raise_queue"].values(), key=lambda entry: _timestamp_score(entry.get("raised_at")))
+        state["hand_raise_queue"] = [{**entry, "position": i + 1} for i, entry in enumerate(hands)]
+        
+        state["waiting_room"] = sorted(
+            state["waiting_room"].values(), key=lambda entry: _timestamp_score(entry.get("joined_at"))
+        )
+        
+        return state
+    
+    async def _get_room_state(self, room_id: str) -> Dict[str, Any]:
+        """Read and decode the whole room state hash."""
+        redis_client = await self.redis.get_redis()
+        fields = await redis_client.hgetall(self._get_room_state_key(room_id))
+        return self._decode_room_state(fields)
+    
+    async def _update_room_state(
+        self,
+        room_id: str,
+        section: str,
+        key: Optional[str],
+        value: Any,
+        set_fields: Optional[Dict[str, str]] = None,
+        delete_fields: Optional[list[str]] = None
+    ) -> int:
+        """
+        Apply a change to the room state hash and broadcast it as a delta.
+        
+        The fields are written, the version bumped and the TTL refreshed in a
+        single script call. Clients apply deltas newer than their snapshot.
+        
+        Args:
+            room_id: The room identifier
+            section: Snapshot section the change belongs to
+            key: Username or setting the change applies to (None for several)
+            value: New value for the delta message (None for removals)
+            set_fields: Hash fields to write
+            delete_fields: Hash fields to remove
+        
+        Returns:
+            Room state version after the change
+        """
+        set_fields = set_fields or {}
+        
+        args: list[Any] = [self.ROOM_STATE_TTL, len(set_fields)]
+        for field, field_value in set_fields.items():
+            args.extend((field, field_value))
+        args.extend(delete_fields or [])
+        
+        version, changed = await self.redis.run_script(
+            UPDATE_ROOM_STATE_SCRIPT, (self._get_room_state_key(room_id),), args
+        )
+        
+        if changed:
+            await self.publish_to_room(
+                room_id,
+                WebRtcMessage.create_room_state_delta(
+                    room_id=room_id, version=version, section=section, key=key, value=value
+                )
+            )
+        
+        return version
+    
+    async def get_room_snapshot(self, room_id: str) -> Dict[str, Any]:
+        """
+        Get the full room state in one round trip.
+        
+        Participants and the versioned room state hash are read in a single
+        MULTI/EXEC, so the snapshot is consistent with its version. Clients
+        discard any delta whose version is not newer than the snapshot.
+        
+        Args:
+            room_id: The room identifier
+        
+        Returns:
+            Snapshot with room_id, version, participants, participant_count,
+            roles, permissions, settings, hand_raise_queue and waiting_room
+        """
+        try:
+            redis_client = await self.redis.get_redis()
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.hvals(self._get_participants_key(room_id))
+            pipe.hgetall(self._get_room_state_key(room_id))
+            participants_json, fields = await pipe.execute()
+            
+            state = self._decode_room_state(fields)
+        
+        except Exception as e:
+            logger.error(
+                f"Failed to get room snapshot for room {room_id}: {e}",
+                extra={"room_id": room_id, "error": str(e)},
+                exc_info=True
+            )
+            participants_json = []
+            state = self._decode_room_state({})
+        
+        participants = []
+        for participant_json in participants_json:
+            try:
+                participants.append(json.loads(participant_json))
+            except json.JSONDecodeError:
+                continue
+        
+        return {
+            "room_id": room_id,
+            "participants": participants,
+            "participant_count": len(participants),
+            **state
+        }
+    
     # ========================================================================
     # Phase 1: Room Permissions & Roles
     # ========================================================================
@@ -367,12 +791,12 @@ class WebRtcManager:
     async def set_user_role(self, room_id: str, username: str, role: str) -> None:
         """Set a user's role in a room."""
         try:
-            redis_client = await self.redis.get_redis()
-            role_key = f"{self.ROOM_ROLES_PREFIX}{room_id}:{username}"
-            await redis_client.setex(role_key, 3600, role)  # 1 hour TTL
+            await self._update_room_state(
+                room_id, "roles", username, role, set_fields={f"role:{username}": role}
+            )
             
             logger.info(
-                f"SET_ROLE: room={room_id}, username={username}, role_key={role_key}, role={role}",
+                f"Set role {role} for user {username} in room {room_id}",
                 extra={"room_id": room_id, "username": username, "role": role}
             )
         except Exception as e:
@@ -386,22 +810,8 @@ class WebRtcManager:
         """Get a user's role in a room."""
         try:
             redis_client = await self.redis.get_redis()
-            role_key = f"{self.ROOM_ROLES_PREFIX}{room_id}:{username}"
-            role = await redis_client.get(role_key)
-            
-            # Handle both bytes and string returns from Redis
-            if role:
-                result = role if isinstance(role, str) else role.decode("utf-8")
-            else:
-                result = "participant"
-            
-            # Temporary debug logging
-            logger.info(
-                f"GET_ROLE: room={room_id}, username={username}, role_key={role_key}, result={result}",
-                extra={"room_id": room_id, "username": username, "role": result}
-            )
-            
-            return result
+            role = await redis_client.hget(self._get_room_state_key(room_id), f"role:{username}")
+            return role or "participant"
         except Exception as e:
             logger.error(
                 f"Failed to get role: {e}",
@@ -412,10 +822,13 @@ class WebRtcManager:
     async def set_user_permissions(self, room_id: str, username: str, permissions: Dict[str, bool]) -> None:
         """Set a user's permissions in a room."""
         try:
-            redis_client = await self.redis.get_redis()
-            perm_key = f"{self.ROOM_PERMISSIONS_PREFIX}{room_id}:{username}"
-            await redis_client.hset(perm_key, mapping=permissions)
-            await redis_client.expire(perm_key, 3600)  # 1 hour TTL
+            await self._update_room_state(
+                room_id,
+                "permissions",
+                username,
+                permissions,
+                set_fields={f"permissions:{username}": json.dumps(permissions)}
+            )
             
             logger.info(
                 f"Set permissions for user {username} in room {room_id}",
@@ -432,23 +845,13 @@ class WebRtcManager:
         """Get a user's permissions in a room."""
         try:
             redis_client = await self.redis.get_redis()
-            perm_key = f"{self.ROOM_PERMISSIONS_PREFIX}{room_id}:{username}"
-            permissions = await redis_client.hgetall(perm_key)
+            permissions = await redis_client.hget(self._get_room_state_key(room_id), f"permissions:{username}")
             
             if not permissions:
                 # Return default permissions
-                return {
-                    "can_speak": True,
-                    "can_share_video": True,
-                    "can_share_screen": True,
-                    "can_send_chat": True,
-                    "can_share_files": True,
-                    "can_manage_participants": False,
-                    "can_record": False
-                }
+                return RoomPermissions().model_dump()
             
-            # Convert bytes to bool
-            return {k.decode("utf-8"): v.decode("utf-8") == "True" for k, v in permissions.items()}
+            return json.loads(permissions)
         except Exception as e:
             logger.error(
                 f"Failed to get permissions: {e}",
@@ -664,13 +1067,15 @@ class WebRtcManager:
     # ========================================================================
     
     async def set_room_settings(self, room_id: str, settings: Dict[str, Any]) -> None:
-        """Set room settings."""
+        """Set room settings (merged into the existing settings)."""
         try:
-            redis_client = await self.redis.get_redis()
-            settings_key = f"{self.ROOM_SETTINGS_PREFIX}{room_id}"
-            
-            await redis_client.hset(settings_key, mapping={k: str(v) for k, v in settings.items()})
-            await redis_client.expire(settings_key, 86400)  # 24 hour TTL
+            await self._update_room_state(
+                room_id,
+                "settings",
+                None,
+                settings,
+                set_fields={f"setting:{k}": json.dumps(v) for k, v in settings.items()}
+            )
             
             logger.info(
                 f"Updated room settings",
@@ -684,50 +1089,10 @@ class WebRtcManager:
             )
     
     async def get_room_settings(self, room_id: str) -> Dict[str, Any]:
-        """Get room settings."""
+        """Get room settings, with defaults for anything not set."""
         try:
-            redis_client = await self.redis.get_redis()
-            settings_key = f"{self.ROOM_SETTINGS_PREFIX}{room_id}"
-            
-            settings = await redis_client.hgetall(settings_key)
-            if not settings:
-                # Return default settings
-                return {
-                    "lock_room": False,
-                    "enable_waiting_room": False,
-                    "mute_on_entry": False,
-                    "disable_video_on_entry": False,
-                    "enable_chat": True,
-                    "enable_screen_share": True,
-                    "enable_reactions": True,
-                    "enable_file_sharing": True,
-                    "enable_recording": True,
-                    "max_participants": None,
-                    "require_host_to_start": False,
-                    "allow_participants_rename": True,
-                    "allow_participants_unmute": True
-                }
-            
-            # Convert bytes/strings to appropriate types
-            result = {}
-            for k, v in settings.items():
-                # Handle both bytes and string keys/values
-                key = k if isinstance(k, str) else k.decode("utf-8")
-                value = v if isinstance(v, str) else v.decode("utf-8")
-                
-                # Convert boolean strings
-                if value in ("True", "False"):
-                    result[key] = value == "True"
-                # Convert None string
-                elif value == "None":
-                    result[key] = None
-                # Convert numbers
-                elif value.isdigit():
-                    result[key] = int(value)
-                else:
-                    result[key] = value
-            
-            return result
+            state = await self._get_room_state(room_id)
+            return state["settings"]
         except Exception as e:
             logger.error(
                 f"Failed to get room settings: {e}",
@@ -743,28 +1108,21 @@ class WebRtcManager:
     async def add_to_hand_raise_queue(self, room_id: str, username: str, timestamp: str) -> int:
         """Add user to hand raise queue."""
         try:
-            redis_client = await self.redis.get_redis()
-            queue_key = f"{self.HAND_RAISE_QUEUE_PREFIX}{room_id}"
-            
-            entry = json.dumps({
-                "username": username,
-                "raised_at": timestamp
-            })
-            
-            # Add to sorted set with timestamp as score
-            score = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
-            await redis_client.zadd(queue_key, {entry: score})
-            await redis_client.expire(queue_key, 3600)  # 1 hour TTL
+            entry = {"username": username, "raised_at": timestamp}
+            await self._update_room_state(
+                room_id, "hand_raise_queue", username, entry, set_fields={f"hand:{username}": json.dumps(entry)}
+            )
             
             # Get position in queue
-            position = await redis_client.zrank(queue_key, entry)
+            queue = await self.get_hand_raise_queue(room_id)
+            position = next((item["position"] for item in queue if item["username"] == username), 1)
             
             logger.info(
                 f"Added {username} to hand raise queue",
                 extra={"room_id": room_id, "username": username, "position": position}
             )
             
-            return position + 1 if position is not None else 1
+            return position
         except Exception as e:
             logger.error(
                 f"Failed to add to hand raise queue: {e}",
@@ -772,25 +1130,17 @@ class WebRtcManager:
                 exc_info=True
             )
             raise
-            return 0
     
     async def remove_from_hand_raise_queue(self, room_id: str, username: str) -> None:
         """Remove user from hand raise queue."""
         try:
-            redis_client = await self.redis.get_redis()
-            queue_key = f"{self.HAND_RAISE_QUEUE_PREFIX}{room_id}"
-            
-            # Get all entries and find the one with matching username
-            entries = await redis_client.zrange(queue_key, 0, -1)
-            for entry in entries:
-                data = json.loads(entry)
-                if data.get("username") == username:
-                    await redis_client.zrem(queue_key, entry)
-                    logger.info(
-                        f"Removed {username} from hand raise queue",
-                        extra={"room_id": room_id, "username": username}
-                    )
-                    break
+            await self._update_room_state(
+                room_id, "hand_raise_queue", username, None, delete_fields=[f"hand:{username}"]
+            )
+            logger.info(
+                f"Removed {username} from hand raise queue",
+                extra={"room_id": room_id, "username": username}
+            )
         except Exception as e:
             logger.error(
                 f"Failed to remove from hand raise queue: {e}",
@@ -800,18 +1150,8 @@ class WebRtcManager:
     async def get_hand_raise_queue(self, room_id: str) -> list[Dict[str, Any]]:
         """Get hand raise queue."""
         try:
-            redis_client = await self.redis.get_redis()
-            queue_key = f"{self.HAND_RAISE_QUEUE_PREFIX}{room_id}"
-            
-            entries = await redis_client.zrange(queue_key, 0, -1)
-            
-            queue = []
-            for i, entry in enumerate(entries):
-                data = json.loads(entry)
-                data["position"] = i + 1
-                queue.append(data)
-            
-            return queue
+            state = await self._get_room_state(room_id)
+            return state["hand_raise_queue"]
         except Exception as e:
             logger.error(
                 f"Failed to get hand raise queue: {e}",
@@ -826,16 +1166,10 @@ class WebRtcManager:
     async def add_to_waiting_room(self, room_id: str, username: str, timestamp: str) -> None:
         """Add user to waiting room."""
         try:
-            redis_client = await self.redis.get_redis()
-            waiting_key = f"{self.WAITING_ROOM_PREFIX}{room_id}"
-            
-            participant = json.dumps({
-                "username": username,
-                "joined_at": timestamp
-            })
-            
-            await redis_client.sadd(waiting_key, participant)
-            await redis_client.expire(waiting_key, 3600)  # 1 hour TTL
+            participant = {"username": username, "joined_at": timestamp}
+            await self._update_room_state(
+                room_id, "waiting_room", username, participant, set_fields={f"waiting:{username}": json.dumps(participant)}
+            )
             
             logger.info(
                 f"Added {username} to waiting room",
@@ -851,20 +1185,13 @@ class WebRtcManager:
     async def remove_from_waiting_room(self, room_id: str, username: str) -> None:
         """Remove user from waiting room."""
         try:
-            redis_client = await self.redis.get_redis()
-            waiting_key = f"{self.WAITING_ROOM_PREFIX}{room_id}"
-            
-            # Get all participants and find the one with matching username
-            participants = await redis_client.smembers(waiting_key)
-            for participant_json in participants:
-                participant = json.loads(participant_json)
-                if participant.get("username") == username:
-                    await redis_client.srem(waiting_key, participant_json)
-                    logger.info(
-                        f"Removed {username} from waiting room",
-                        extra={"room_id": room_id, "username": username}
-                    )
-                    break
+            await self._update_room_state(
+                room_id, "waiting_room", username, None, delete_fields=[f"waiting:{username}"]
+            )
+            logger.info(
+                f"Removed {username} from waiting room",
+                extra={"room_id": room_id, "username": username}
+            )
         except Exception as e:
             logger.error(
                 f"Failed to remove from waiting room: {e}",
@@ -874,20 +1201,8 @@ class WebRtcManager:
     async def get_waiting_room_participants(self, room_id: str) -> list[Dict[str, Any]]:
         """Get waiting room participants."""
         try:
-            redis_client = await self.redis.get_redis()
-            waiting_key = f"{self.WAITING_ROOM_PREFIX}{room_id}"
-            
-            participants_json = await redis_client.smembers(waiting_key)
-            
-            participants = []
-            for participant_json in participants_json:
-                try:
-                    participant = json.loads(participant_json)
-                    participants.append(participant)
-                except json.JSONDecodeError:
-                    continue
-            
-            return participants
+            state = await self._get_room_state(room_id)
+            return state["waiting_room"]
         except Exception as e:
             logger.error(
                 f"Failed to get waiting room participants: {e}",
@@ -10,16 +10,28 @@ Features:
 - Replay attack prevention (nonce tracking)
 - Key rotation support
 - Forward secrecy with ephemeral keys
+
+Asymmetric operations (key generation, ECDH + HKDF, signing, verification)
+and large AEAD payloads run on a bounded thread pool so key exchange during
+room joins never blocks the event loop. Public keys, key pairs and derived
+shared secrets are kept in a small per-process LRU with a short TTL, and the
+replay check reserves the nonce in the same pipelined round trip that loads
+the shared secret.
 """
 
+import asyncio
 import base64
+import functools
 import json
 import secrets
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 from enum import Enum
 
+from cryptography.exceptions import InvalidSignature, InvalidTag
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
@@ -27,11 +39,15 @@ from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.backends import default_backend
 
+from second_brain_database.config import settings
 from second_brain_database.managers.logging_manager import get_logger
 from second_brain_database.managers.redis_manager import redis_manager
 
 logger = get_logger(prefix="[WebRTC-E2EE]")
 
+# AEAD payloads up to this size are cheaper to process inline than to hand off to a thread
+INLINE_AEAD_MAX_BYTES = 16 * 1024
+
 
 class KeyType(str, Enum):
     """Key types for E2EE."""
@@ -40,6 +56,119 @@ class KeyType(str, Enum):
     SIGNATURE = "signature"   # Signature verification key
 
 
+class _KeyCache:
+    """Small LRU with per-entry expiry for E2EE key material."""
+    
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+    
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+    
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+
+# ============================================================================
+# Blocking crypto primitives (run on the crypto thread pool)
+# ============================================================================
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def _generate_key_material(with_signature_key: bool) -> Dict[str, str]:
+    """Generate an X25519 key pair and, optionally, an Ed25519 signing key pair."""
+    private_key = X25519PrivateKey.generate()
+    material = {
+        "private_key": _b64(private_key.private_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PrivateFormat.Raw,
+            encryption_algorithm=serialization.NoEncryption()
+        )),
+        "public_key": _b64(private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )),
+    }
+    
+    if with_signature_key:
+        signing_key = Ed25519PrivateKey.generate()
+        material["signature_private_key"] = _b64(signing_key.private_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PrivateFormat.Raw,
+            encryption_algorithm=serialization.NoEncryption()
+        ))
+        material["signature_public_key"] = _b64(signing_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        ))
+    
+    return material
+
+
+def _derive_secret(private_key_b64: str, their_public_key_b64: str, info: bytes) -> bytes:
+    """ECDH followed by HKDF-SHA256 to a 32-byte ChaCha20-Poly1305 key."""
+    private_key = X25519PrivateKey.from_private_bytes(base64.b64decode(private_key_b64))
+    public_key = X25519PublicKey.from_public_bytes(base64.b64decode(their_public_key_b64))
+    
+    hkdf = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=info,
+        backend=default_backend()
+    )
+    return hkdf.derive(private_key.exchange(public_key))
+
+
+def _signing_bytes(message: Dict) -> bytes:
+    """Canonical bytes of a message without its signature field."""
+    return json.dumps({k: v for k, v in message.items() if k != "signature"}, sort_keys=True).encode()
+
+
+def _sign(signature_private_key_b64: str, message: Dict) -> str:
+    signing_key = Ed25519PrivateKey.from_private_bytes(base64.b64decode(signature_private_key_b64))
+    return _b64(signing_key.sign(_signing_bytes(message)))
+
+
+def _verify(signature_public_key_b64: str, message: Dict) -> bool:
+    verify_key = Ed25519PublicKey.from_public_bytes(base64.b64decode(signature_public_key_b64))
+    try:
+        verify_key.verify(base64.b64decode(message["signature"]), _signing_bytes(message))
+        return True
+    except InvalidSignature:
+        return False
+
+
+def _seal(secret: bytes, nonce: bytes, plaintext: bytes) -> bytes:
+    return ChaCha20Poly1305(secret).encrypt(nonce, plaintext, None)
+
+
+def _open(secret: bytes, nonce: bytes, ciphertext: bytes) -> bytes:
+    return ChaCha20Poly1305(secret).decrypt(nonce, ciphertext, None)
+
+
 class E2EEManager:
     """
     Manages end-to-end encryption for WebRTC communications.
@@ -63,7 +192,10 @@ class E2EEManager:
         self,
         nonce_ttl: int = 300,  # 5 minutes
         max_key_age: int = 86400,  # 24 hours
-        enable_signatures: bool = True
+        enable_signatures: bool = True,
+        crypto_workers: Optional[int] = None,
+        cache_size: Optional[int] = None,
+        cache_ttl: Optional[int] = None
     ):
         """
         Initialize E2EE manager.
@@ -72,10 +204,26 @@ class E2EEManager:
             nonce_ttl: Nonce time-to-live in seconds
             max_key_age: Maximum key age before rotation
             enable_signatures: Enable message signing
+            crypto_workers: Crypto thread pool size (defaults to WEBRTC_E2EE_CRYPTO_WORKERS)
+            cache_size: Entries per in-process key cache (defaults to WEBRTC_E2EE_CACHE_SIZE)
+            cache_ttl: Seconds a cached key is trusted (defaults to WEBRTC_E2EE_CACHE_TTL)
         """
         self.nonce_ttl = nonce_ttl
         self.max_key_age = max_key_age
         self.enable_signatures = enable_signatures
+        self.crypto_workers = crypto_workers or settings.WEBRTC_E2EE_CRYPTO_WORKERS
+        
+        cache_size = cache_size or settings.WEBRTC_E2EE_CACHE_SIZE
+        cache_ttl = cache_ttl or settings.WEBRTC_E2EE_CACHE_TTL
+        
+        # (user_id, room_id) -> latest public key metadata
+        self._public_keys = _KeyCache(cache_size, cache_ttl)
+        # key_id -> full key pair (immutable once generated)
+        self._key_pairs = _KeyCache(cache_size, cache_ttl)
+        # (user_a, user_b, room_id) with users sorted -> shared secret
+        self._shared_secrets = _KeyCache(cache_size, cache_ttl)
+        
+        self._executor: Optional[ThreadPoolExecutor] = None
         
         # Redis key prefixes
         self.KEY_PAIR_PREFIX = "webrtc:e2ee:keypair:"
@@ -87,9 +235,20 @@ class E2EEManager:
         logger.info(
             f"E2EE manager initialized "
             f"(nonce_ttl={nonce_ttl}s, max_key_age={max_key_age}s, "
-            f"signatures={enable_signatures})"
+            f"signatures={enable_signatures}, crypto_workers={self.crypto_workers})"
         )
     
+    async def _run_crypto(self, func: Callable, *args: Any) -> Any:
+        """Run a blocking crypto primitive on the bounded crypto thread pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.crypto_workers,
+                thread_name_prefix="webrtc-e2ee"
+            )
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+    
     async def generate_key_pair(
         self,
         user_id: str,
@@ -108,29 +267,8 @@ class E2EEManager:
             Key pair metadata (public key only)
         """
         try:
-            # Generate X25519 key pair for ECDH
-            private_key = X25519PrivateKey.generate()
-            public_key = private_key.public_key()
-            
-            # Serialize keys
-            private_bytes = private_key.private_bytes(
-                encoding=serialization.Encoding.Raw,
-                format=serialization.PrivateFormat.Raw,
-                encryption_algorithm=serialization.NoEncryption()
-            )
-            
-            public_bytes = public_key.public_bytes(
-                encoding=serialization.Encoding.Raw,
-                format=serialization.PublicFormat.Raw
-            )
-            
-            # Generate signature key if enabled
-            signature_private_key = None
-            signature_public_key = None
-            
-            if self.enable_signatures:
-                signature_private_key = Ed25519PrivateKey.generate()
-                signature_public_key = signature_private_key.public_key()
+            # Generate X25519 key pair for ECDH (plus Ed25519 signature keys if enabled)
+            material = await self._run_crypto(_generate_key_material, self.enable_signatures)
             
             # Create key pair object
             key_id = f"{user_id}:{room_id}:{key_type}:{int(time.time() * 1000)}"  # Use milliseconds
@@ -140,36 +278,19 @@ class E2EEManager:
                 "user_id": user_id,
                 "room_id": room_id,
                 "key_type": key_type,
-                "public_key": base64.b64encode(public_bytes).decode(),
-                "private_key": base64.b64encode(private_bytes).decode(),
+                "public_key": material["public_key"],
+                "private_key": material["private_key"],
                 "created_at": datetime.now(timezone.utc).isoformat(),
                 "expires_at": (datetime.now(timezone.utc) + timedelta(seconds=self.max_key_age)).isoformat()
             }
             
             # Add signature keys if enabled
-            if self.enable_signatures and signature_private_key and signature_public_key:
-                sig_private_bytes = signature_private_key.private_bytes(
-                    encoding=serialization.Encoding.Raw,
-                    format=serialization.PrivateFormat.Raw,
-                    encryption_algorithm=serialization.NoEncryption()
-                )
-                
-                sig_public_bytes = signature_public_key.public_bytes(
-                    encoding=serialization.Encoding.Raw,
-                    format=serialization.PublicFormat.Raw
-                )
-                
-                key_pair["signature_public_key"] = base64.b64encode(sig_public_bytes).decode()
-                key_pair["signature_private_key"] = base64.b64encode(sig_private_bytes).decode()
-            
-            # Store in Redis
-            await self._store_key_pair(key_id, key_pair)
+            if "signature_public_key" in material:
+                key_pair["signature_public_key"] = material["signature_public_key"]
+                key_pair["signature_private_key"] = material["signature_private_key"]
             
-            # Store public key separately for easy access
-            await self._store_public_key(user_id, room_id, key_id, key_pair)
-            
-            # Add to user's key list
-            await self._add_user_key(user_id, room_id, key_id)
+            # Store the key pair, the public key and the user's key list in one round trip
+            public_key_data = await self._store_new_key(user_id, room_id, key_id, key_pair)
             
             logger.info(
                 f"Generated {key_type} key pair for user {user_id} in room {room_id}",
@@ -177,16 +298,7 @@ class E2EEManager:
             )
             
             # Return public key information only
-            return {
-                "key_id": key_id,
-                "user_id": user_id,
-                "room_id": room_id,
-                "key_type": key_type,
-                "public_key": key_pair["public_key"],
-                "signature_public_key": key_pair.get("signature_public_key"),
-                "created_at": key_pair["created_at"],
-                "expires_at": key_pair["expires_at"]
-            }
+            return public_key_data
             
         except Exception as e:
             logger.error(f"Failed to generate key pair: {e}", exc_info=True)
@@ -201,6 +313,9 @@ class E2EEManager:
         """
         Perform key exchange between two users.
         
+        Both sides read the same stored secret, so it is derived once (from
+        user B's private key and user A's public key).
+        
         Args:
             user_a_id: First user ID
             user_b_id: Second user ID
@@ -211,22 +326,16 @@ class E2EEManager:
         """
         try:
             # Get latest keys for both users
-            key_a = await self._get_latest_user_key(user_a_id, room_id)
-            key_b = await self._get_latest_user_key(user_b_id, room_id)
+            key_a, key_b = await asyncio.gather(
+                self._get_latest_user_key(user_a_id, room_id),
+                self._get_latest_user_key(user_b_id, room_id)
+            )
             
             if not key_a or not key_b:
                 raise ValueError("One or both users don't have keys")
             
-            # Derive shared secrets
-            shared_a_b = await self._derive_shared_secret(
-                key_a["key_id"],
-                key_b["public_key"],
-                user_a_id,
-                user_b_id,
-                room_id
-            )
-            
-            shared_b_a = await self._derive_shared_secret(
+            # Derive shared secret
+            await self._derive_shared_secret(
                 key_b["key_id"],
                 key_a["public_key"],
                 user_b_id,
@@ -282,8 +391,7 @@ class E2EEManager:
             nonce = secrets.token_bytes(12)
             
             # Encrypt with ChaCha20-Poly1305
-            cipher = ChaCha20Poly1305(shared_secret)
-            ciphertext = cipher.encrypt(nonce, plaintext, None)
+            ciphertext = await self._aead(_seal, shared_secret, nonce, plaintext)
             
             # Create encrypted envelope
             encrypted = {
@@ -291,8 +399,8 @@ class E2EEManager:
                 "sender_id": sender_id,
                 "recipient_id": recipient_id,
                 "room_id": room_id,
-                "nonce": base64.b64encode(nonce).decode(),
-                "ciphertext": base64.b64encode(ciphertext).decode(),
+                "nonce": _b64(nonce),
+                "ciphertext": _b64(ciphertext),
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
             
@@ -324,6 +432,10 @@ class E2EEManager:
         """
         Decrypt an encrypted message.
         
+        The nonce is reserved before decryption and released again if the
+        message fails to decrypt, so concurrent replays cannot both succeed
+        and a forged copy cannot burn the nonce of the real message.
+        
         Args:
             encrypted: Encrypted message envelope
             recipient_id: Recipient user ID (for verification)
@@ -349,33 +461,35 @@ class E2EEManager:
                 if not valid:
                     raise ValueError("Invalid message signature")
             
-            # Check nonce for replay attacks
-            nonce_b64 = encrypted["nonce"]
-            nonce = base64.b64decode(nonce_b64)
-            
-            if await self._check_nonce_used(nonce, sender_id, room_id):
-                raise ValueError("Replay attack detected: nonce already used")
-            
-            # Get shared secret
-            shared_secret = await self._get_shared_secret(
-                recipient_id,
-                sender_id,
-                room_id
-            )
-            
-            if not shared_secret:
-                raise ValueError(f"No shared secret with {sender_id}")
+            # Check nonce for replay attacks (and load the shared secret in the same round trip)
+            nonce = base64.b64decode(encrypted["nonce"])
             
-            # Decrypt with ChaCha20-Poly1305
-            ciphertext = base64.b64decode(encrypted["ciphertext"])
-            cipher = ChaCha20Poly1305(shared_secret)
-            plaintext = cipher.decrypt(nonce, ciphertext, None)
+            reserved, shared_secret = await self._reserve_nonce(nonce, sender_id, recipient_id, room_id)
             
-            # Deserialize message
-            message = json.loads(plaintext.decode('utf-8'))
+            if not reserved:
+                raise ValueError("Replay attack detected: nonce already used")
             
-            # Store nonce to prevent future replay
-            await self._store_nonce(nonce, sender_id, room_id)
+            try:
+                if not shared_secret:
+                    raise ValueError(f"No shared secret with {sender_id}")
+                
+                # Decrypt with ChaCha20-Poly1305
+                ciphertext = base64.b64decode(encrypted["ciphertext"])
+                try:
+                    plaintext = await self._aead(_open, shared_secret, nonce, ciphertext)
+                except InvalidTag:
+                    # The cached secret may predate a key exchange on another worker
+                    fresh_secret = await self._get_shared_secret(recipient_id, sender_id, room_id, use_cache=False)
+                    if not fresh_secret or fresh_secret == shared_secret:
+                        raise
+                    plaintext = await self._aead(_open, fresh_secret, nonce, ciphertext)
+                
+                # Deserialize message
+                message = json.loads(plaintext.decode('utf-8'))
+                
+            except Exception:
+                await self._release_nonce(nonce, sender_id, room_id)
+                raise
             
             logger.debug(
                 f"Decrypted message from {sender_id} to {recipient_id}",
@@ -442,17 +556,21 @@ class E2EEManager:
         try:
             redis_client = await redis_manager.get_redis()
             
+            pipe = redis_client.pipeline(transaction=True)
+            
             # Delete key pair
-            key_pair_key = f"{self.KEY_PAIR_PREFIX}{key_id}"
-            await redis_client.delete(key_pair_key)
+            pipe.delete(f"{self.KEY_PAIR_PREFIX}{key_id}")
             
             # Delete public key
-            public_key_key = f"{self.PUBLIC_KEY_PREFIX}{user_id}:{room_id}:{key_id}"
-            await redis_client.delete(public_key_key)
+            pipe.delete(f"{self.PUBLIC_KEY_PREFIX}{user_id}:{room_id}:{key_id}")
             
             # Remove from user's key list
-            user_keys_key = f"{self.USER_KEYS_PREFIX}{user_id}:{room_id}"
-            await redis_client.srem(user_keys_key, key_id)
+            pipe.srem(f"{self.USER_KEYS_PREFIX}{user_id}:{room_id}", key_id)
+            
+            await pipe.execute()
+            
+            self._key_pairs.pop(key_id)
+            self._public_keys.pop((user_id, room_id))
             
             logger.info(
                 f"Revoked key {key_id} for user {user_id}",
@@ -517,6 +635,11 @@ class E2EEManager:
             # Delete user's key list
             await redis_client.delete(user_keys_key)
             
+            # Forget cached secrets shared with this user in the room
+            self._shared_secrets.discard_where(
+                lambda key: key[2] == room_id and user_id in key[:2]
+            )
+            
             logger.info(
                 f"Cleaned up {count} keys for user {user_id} in room {room_id}"
             )
@@ -529,33 +652,32 @@ class E2EEManager:
     
     # Private helper methods
     
-    async def _store_key_pair(self, key_id: str, key_pair: Dict) -> None:
-        """Store key pair in Redis."""
-        try:
-            redis_client = await redis_manager.get_redis()
-            key = f"{self.KEY_PAIR_PREFIX}{key_id}"
-            
-            await redis_client.setex(
-                key,
-                self.max_key_age,
-                json.dumps(key_pair)
-            )
-            
-        except Exception as e:
-            logger.error(f"Failed to store key pair: {e}", exc_info=True)
-            raise
+    async def _aead(self, func: Callable, secret: bytes, nonce: bytes, data: bytes) -> bytes:
+        """Run ChaCha20-Poly1305, off the event loop for large payloads."""
+        if len(data) <= INLINE_AEAD_MAX_BYTES:
+            return func(secret, nonce, data)
+        return await self._run_crypto(func, secret, nonce, data)
+    
+    def _shared_secret_key(self, user_a_id: str, user_b_id: str, room_id: str) -> Tuple[str, str, str]:
+        """Cache key for a shared secret (users in consistent order)."""
+        users = sorted([user_a_id, user_b_id])
+        return users[0], users[1], room_id
+    
+    def _shared_secret_redis_key(self, user_a_id: str, user_b_id: str, room_id: str) -> str:
+        """Redis key for a shared secret (users in consistent order)."""
+        users = sorted([user_a_id, user_b_id])
+        return f"{self.SHARED_SECRET_PREFIX}{users[0]}:{users[1]}:{room_id}"
     
-    async def _store_public_key(
+    async def _store_new_key(
         self,
         user_id: str,
         room_id: str,
         key_id: str,
         key_pair: Dict
-    ) -> None:
-        """Store public key separately."""
+    ) -> Dict:
+        """Store a key pair, its public key and the user's key list entry."""
         try:
             redis_client = await redis_manager.get_redis()
-            key = f"{self.PUBLIC_KEY_PREFIX}{user_id}:{room_id}:{key_id}"
             
             public_key_data = {
                 "key_id": key_id,
@@ -568,34 +690,44 @@ class E2EEManager:
                 "expires_at": key_pair["expires_at"]
             }
             
-            await redis_client.setex(
-                key,
+            user_keys_key = f"{self.USER_KEYS_PREFIX}{user_id}:{room_id}"
+            
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.setex(f"{self.KEY_PAIR_PREFIX}{key_id}", self.max_key_age, json.dumps(key_pair))
+            pipe.setex(
+                f"{self.PUBLIC_KEY_PREFIX}{user_id}:{room_id}:{key_id}",
                 self.max_key_age,
                 json.dumps(public_key_data)
             )
+            pipe.sadd(user_keys_key, key_id)
+            pipe.expire(user_keys_key, self.max_key_age)
+            await pipe.execute()
             
-        except Exception as e:
-            logger.error(f"Failed to store public key: {e}", exc_info=True)
-            raise
-    
-    async def _add_user_key(
-        self,
-        user_id: str,
-        room_id: str,
-        key_id: str
-    ) -> None:
-        """Add key to user's key list."""
-        try:
-            redis_client = await redis_manager.get_redis()
-            key = f"{self.USER_KEYS_PREFIX}{user_id}:{room_id}"
+            self._key_pairs.set(key_id, key_pair)
+            self._public_keys.set((user_id, room_id), public_key_data)
             
-            await redis_client.sadd(key, key_id)
-            await redis_client.expire(key, self.max_key_age)
+            return public_key_data
             
         except Exception as e:
-            logger.error(f"Failed to add user key: {e}", exc_info=True)
+            logger.error(f"Failed to store key pair: {e}", exc_info=True)
             raise
     
+    async def _get_key_pair(self, key_id: str) -> Optional[Dict]:
+        """Get a full key pair (including private keys) by ID."""
+        key_pair = self._key_pairs.get(key_id)
+        if key_pair is not None:
+            return key_pair
+        
+        redis_client = await redis_manager.get_redis()
+        key_pair_json = await redis_client.get(f"{self.KEY_PAIR_PREFIX}{key_id}")
+        
+        if not key_pair_json:
+            return None
+        
+        key_pair = json.loads(key_pair_json)
+        self._key_pairs.set(key_id, key_pair)
+        return key_pair
+    
     async def _get_latest_user_key(
         self,
         user_id: str,
@@ -603,6 +735,10 @@ class E2EEManager:
     ) -> Optional[Dict]:
         """Get user's latest key."""
         try:
+            cached = self._public_keys.get((user_id, room_id))
+            if cached is not None:
+                return cached
+            
             redis_client = await redis_manager.get_redis()
             user_keys_key = f"{self.USER_KEYS_PREFIX}{user_id}:{room_id}"
             
@@ -611,14 +747,15 @@ class E2EEManager:
             if not key_ids:
                 return None
             
-            # Get all keys and find latest
+            # Get all keys in one round trip and find latest
+            key_jsons = await redis_client.mget(
+                [f"{self.PUBLIC_KEY_PREFIX}{user_id}:{room_id}:{key_id}" for key_id in key_ids]
+            )
+            
             latest_key = None
             latest_time = None
             
-            for key_id in key_ids:
-                public_key_key = f"{self.PUBLIC_KEY_PREFIX}{user_id}:{room_id}:{key_id}"
-                key_json = await redis_client.get(public_key_key)
-                
+            for key_json in key_jsons:
                 if key_json:
                     key_data = json.loads(key_json)
                     created_at = datetime.fromisoformat(key_data["created_at"].replace('Z', '+00:00'))
@@ -627,6 +764,9 @@ class E2EEManager:
                         latest_time = created_at
                         latest_key = key_data
             
+            if latest_key is not None:
+                self._public_keys.set((user_id, room_id), latest_key)
+            
             return latest_key
             
         except Exception as e:
@@ -644,35 +784,19 @@ class E2EEManager:
         """Derive shared secret using ECDH."""
         try:
             # Get our private key
-            redis_client = await redis_manager.get_redis()
-            key_pair_key = f"{self.KEY_PAIR_PREFIX}{our_key_id}"
-            key_pair_json = await redis_client.get(key_pair_key)
+            key_pair = await self._get_key_pair(our_key_id)
             
-            if not key_pair_json:
+            if not key_pair:
                 raise ValueError("Private key not found")
             
-            key_pair = json.loads(key_pair_json)
-            private_bytes = base64.b64decode(key_pair["private_key"])
-            
-            # Load keys
-            private_key = X25519PrivateKey.from_private_bytes(private_bytes)
-            public_bytes = base64.b64decode(their_public_key_b64)
-            public_key = X25519PublicKey.from_public_bytes(public_bytes)
-            
-            # Perform ECDH
-            shared_key = private_key.exchange(public_key)
-            
-            # Derive final key using HKDF
-            hkdf = HKDF(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=None,
-                info=f"{room_id}:{our_user_id}:{their_user_id}".encode(),
-                backend=default_backend()
+            # Perform ECDH and derive final key using HKDF
+            shared_secret = await self._run_crypto(
+                _derive_secret,
+                key_pair["private_key"],
+                their_public_key_b64,
+                f"{room_id}:{our_user_id}:{their_user_id}".encode()
             )
             
-            shared_secret = hkdf.derive(shared_key)
-            
             # Store shared secret
             await self._store_shared_secret(
                 our_user_id,
@@ -698,16 +822,14 @@ class E2EEManager:
         try:
             redis_client = await redis_manager.get_redis()
             
-            # Use consistent ordering for key
-            users = sorted([user_a_id, user_b_id])
-            key = f"{self.SHARED_SECRET_PREFIX}{users[0]}:{users[1]}:{room_id}"
-            
             await redis_client.setex(
-                key,
+                self._shared_secret_redis_key(user_a_id, user_b_id, room_id),
                 self.max_key_age,
-                base64.b64encode(secret).decode()
+                _b64(secret)
             )
             
+            self._shared_secrets.set(self._shared_secret_key(user_a_id, user_b_id, room_id), secret)
+            
         except Exception as e:
             logger.error(f"Failed to store shared secret: {e}", exc_info=True)
             raise
@@ -716,22 +838,27 @@ class E2EEManager:
         self,
         user_a_id: str,
         user_b_id: str,
-        room_id: str
+        room_id: str,
+        use_cache: bool = True
     ) -> Optional[bytes]:
         """Get shared secret."""
         try:
-            redis_client = await redis_manager.get_redis()
+            cache_key = self._shared_secret_key(user_a_id, user_b_id, room_id)
             
-            # Use consistent ordering for key
-            users = sorted([user_a_id, user_b_id])
-            key = f"{self.SHARED_SECRET_PREFIX}{users[0]}:{users[1]}:{room_id}"
+            if use_cache:
+                cached = self._shared_secrets.get(cache_key)
+                if cached is not None:
+                    return cached
             
-            secret_b64 = await redis_client.get(key)
+            redis_client = await redis_manager.get_redis()
+            secret_b64 = await redis_client.get(self._shared_secret_redis_key(user_a_id, user_b_id, room_id))
             
             if not secret_b64:
                 return None
             
-            return base64.b64decode(secret_b64)
+            secret = base64.b64decode(secret_b64)
+            self._shared_secrets.set(cache_key, secret)
+            return secret
             
         except Exception as e:
             logger.error(f"Failed to get shared secret: {e}", exc_info=True)
@@ -748,34 +875,17 @@ class E2EEManager:
             # Get signing key
             latest_key = await self._get_latest_user_key(user_id, room_id)
             
-            if not latest_key or "signature_public_key" not in latest_key:
+            if not latest_key or not latest_key.get("signature_public_key"):
                 return None
             
             # Get private signing key
-            redis_client = await redis_manager.get_redis()
-            key_pair_key = f"{self.KEY_PAIR_PREFIX}{latest_key['key_id']}"
-            key_pair_json = await redis_client.get(key_pair_key)
-            
-            if not key_pair_json:
-                return None
-            
-            key_pair = json.loads(key_pair_json)
+            key_pair = await self._get_key_pair(latest_key["key_id"])
             
-            if "signature_private_key" not in key_pair:
+            if not key_pair or "signature_private_key" not in key_pair:
                 return None
             
-            # Load signing key
-            sig_private_bytes = base64.b64decode(key_pair["signature_private_key"])
-            signing_key = Ed25519PrivateKey.from_private_bytes(sig_private_bytes)
-            
-            # Create message to sign (exclude signature field)
-            msg_copy = {k: v for k, v in message.items() if k != "signature"}
-            msg_bytes = json.dumps(msg_copy, sort_keys=True).encode()
-            
-            # Sign
-            signature = signing_key.sign(msg_bytes)
-            
-            return base64.b64encode(signature).decode()
+            # Sign (signature field excluded)
+            return await self._run_crypto(_sign, key_pair["signature_private_key"], message)
             
         except Exception as e:
             logger.error(f"Failed to sign message: {e}", exc_info=True)
@@ -795,61 +905,68 @@ class E2EEManager:
             # Get sender's public signing key
             sender_key = await self._get_latest_user_key(sender_id, room_id)
             
-            if not sender_key or "signature_public_key" not in sender_key:
+            if not sender_key or not sender_key.get("signature_public_key"):
                 return False
             
-            # Load verification key
-            sig_public_bytes = base64.b64decode(sender_key["signature_public_key"])
-            verify_key = Ed25519PublicKey.from_public_bytes(sig_public_bytes)
-            
-            # Recreate message bytes (exclude signature)
-            msg_copy = {k: v for k, v in message.items() if k != "signature"}
-            msg_bytes = json.dumps(msg_copy, sort_keys=True).encode()
-            
-            # Verify signature
-            signature = base64.b64decode(message["signature"])
-            verify_key.verify(signature, msg_bytes)
-            
-            return True
+            # Verify signature (signature field excluded)
+            return await self._run_crypto(_verify, sender_key["signature_public_key"], message)
             
         except Exception:
             return False
     
-    async def _store_nonce(
+    def _nonce_key(self, nonce: bytes, user_id: str, room_id: str) -> str:
+        """Redis key marking a nonce as used."""
+        return f"{self.NONCE_PREFIX}{user_id}:{room_id}:{_b64(nonce)}"
+    
+    async def _reserve_nonce(
         self,
         nonce: bytes,
-        user_id: str,
+        sender_id: str,
+        recipient_id: str,
         room_id: str
-    ) -> None:
-        """Store nonce to prevent replay."""
+    ) -> Tuple[bool, Optional[bytes]]:
+        """
+        Atomically claim a nonce and load the shared secret in one round trip.
+        
+        Returns:
+            (True if the nonce was unused, shared secret or None)
+        """
+        cache_key = self._shared_secret_key(sender_id, recipient_id, room_id)
+        shared_secret = self._shared_secrets.get(cache_key)
+        
         try:
             redis_client = await redis_manager.get_redis()
-            nonce_b64 = base64.b64encode(nonce).decode()
-            key = f"{self.NONCE_PREFIX}{user_id}:{room_id}:{nonce_b64}"
             
-            await redis_client.setex(key, self.nonce_ttl, "1")
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.set(self._nonce_key(nonce, sender_id, room_id), "1", nx=True, ex=self.nonce_ttl)
+            if shared_secret is None:
+                pipe.get(self._shared_secret_redis_key(sender_id, recipient_id, room_id))
+            results = await pipe.execute()
             
         except Exception as e:
-            logger.error(f"Failed to store nonce: {e}", exc_info=True)
+            logger.error(f"Failed to check nonce: {e}", exc_info=True)
+            # Fail open on the replay check, as before, but still need the secret
+            return True, shared_secret or await self._get_shared_secret(sender_id, recipient_id, room_id)
+        
+        if shared_secret is None and results[1]:
+            shared_secret = base64.b64decode(results[1])
+            self._shared_secrets.set(cache_key, shared_secret)
+        
+        return bool(results[0]), shared_secret
     
-    async def _check_nonce_used(
+    async def _release_nonce(
         self,
         nonce: bytes,
         user_id: str,
         room_id: str
-    ) -> bool:
-        """Check if nonce was already used."""
+    ) -> None:
+        """Release a nonce claimed for a message that failed to decrypt."""
         try:
             redis_client = await redis_manager.get_redis()
-            nonce_b64 = base64.b64encode(nonce).decode()
-            key = f"{self.NONCE_PREFIX}{user_id}:{room_id}:{nonce_b64}"
-            
-            exists = await redis_client.exists(key)
-            return exists > 0
+            await redis_client.delete(self._nonce_key(nonce, user_id, room_id))
             
         except Exception as e:
-            logger.error(f"Failed to check nonce: {e}", exc_info=True)
-            return False
+            logger.error(f"Failed to release nonce: {e}", exc_info=True)
 
 
 # Global singleton instance
@@ -7,16 +7,23 @@ Handles chunked file transfer over WebRTC data channels with support for:
 - Real-time progress tracking
 - Concurrent transfer management
 - Automatic cleanup and error handling
+
+Received chunks are written in place into a preallocated (sparse) output
+file with positioned writes off the event loop, and each chunk's SHA-256 is
+kept as a leaf of a hash tree, so completing a transfer needs no assembly
+pass and no re-read of the file.
 """
 
 import asyncio
 import hashlib
 import json
+import mmap
 import os
+import time
 import uuid
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, BinaryIO
+from typing import Dict, List, Optional, BinaryIO, Tuple
 from enum import Enum
 
 from second_brain_database.managers.logging_manager import get_logger
@@ -36,6 +43,34 @@ class TransferStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+def compute_merkle_root(leaf_digests: List[str]) -> str:
+    """
+    Compute the root of a binary SHA-256 hash tree over chunk digests.
+    
+    Leaves are the per-chunk SHA-256 hex digests in chunk order. Each parent
+    is SHA-256(left || right); an unpaired node is promoted unchanged.
+    
+    Args:
+        leaf_digests: Hex digests of each chunk, in order
+        
+    Returns:
+        Hex digest of the tree root
+    """
+    level = [bytes.fromhex(digest) for digest in leaf_digests]
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    
+    while len(level) > 1:
+        next_level = []
+        for i in range(0, len(level) - 1, 2):
+            next_level.append(hashlib.sha256(level[i] + level[i + 1]).digest())
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+    
+    return level[0].hex()
+
+
 class FileTransferManager:
     """
     Manages chunked file transfers between WebRTC participants.
@@ -46,7 +81,7 @@ class FileTransferManager:
     - Pause/resume support
     - Concurrent transfer limits
     - Automatic cleanup
-    - Checksum verification
+    - Checksum verification (per-chunk SHA-256 hash tree)
     """
     
     def __init__(
@@ -55,7 +90,8 @@ class FileTransferManager:
         max_file_size: int = 500 * 1024 * 1024,  # 500MB default
         max_concurrent_per_user: int = 5,
         transfer_timeout: int = 3600,  # 1 hour
-        temp_dir: Optional[str] = None
+        temp_dir: Optional[str] = None,
+        output_fd_idle_timeout: int = 60
     ):
         """
         Initialize file transfer manager.
@@ -66,11 +102,13 @@ class FileTransferManager:
             max_concurrent_per_user: Max concurrent transfers per user
             transfer_timeout: Transfer timeout in seconds (default 1 hour)
             temp_dir: Temporary directory for file chunks
+            output_fd_idle_timeout: Seconds after which an unused output file is closed
         """
         self.chunk_size = chunk_size
         self.max_file_size = max_file_size
         self.max_concurrent_per_user = max_concurrent_per_user
         self.transfer_timeout = transfer_timeout
+        self.output_fd_idle_timeout = output_fd_idle_timeout
         
         # Setup temp directory
         if temp_dir:
@@ -84,6 +122,13 @@ class FileTransferManager:
         self.TRANSFER_STATE_PREFIX = "webrtc:file_transfer:state:"
         self.TRANSFER_CHUNKS_PREFIX = "webrtc:file_transfer:chunks:"
         self.USER_TRANSFERS_PREFIX = "webrtc:file_transfer:user:"
+        self.TRANSFER_FINALIZED_PREFIX = "webrtc:file_transfer:finalized:"
+        
+        # Open output file descriptors per transfer (this worker only), with
+        # the monotonic time each was last used so idle ones can be closed
+        self._output_fds: Dict[str, int] = {}
+        self._output_fd_last_used: Dict[str, float] = {}
+        self._output_fd_reaper: Optional[asyncio.Task] = None
         
         logger.info(
             f"File transfer manager initialized "
@@ -234,9 +279,8 @@ class FileTransferManager:
             
             await self._update_transfer_state(transfer_id, transfer_state)
             
-            # Create temp directory for chunks
-            transfer_dir = self.temp_dir / transfer_id
-            transfer_dir.mkdir(parents=True, exist_ok=True)
+            # Preallocate the (sparse) output file chunks are written into
+            await self._get_output_fd(transfer_id, transfer_state)
             
             logger.info(
                 f"File transfer accepted: {transfer_id}",
@@ -300,10 +344,10 @@ class FileTransferManager:
     
     async def get_chunk(self, transfer_id: str, chunk_index: int) -> bytes:
         """
-        Get a specific chunk for sending.
+        Get a specific received chunk for sending.
         
-        This is a placeholder - in production, this would read from the
-        actual file being transferred.
+        The chunk is read through a read-only memory map of its region of the
+        output file, off the event loop.
         
         Args:
             transfer_id: Transfer ID
@@ -311,17 +355,44 @@ class FileTransferManager:
             
         Returns:
             Chunk data as bytes
+            
+        Raises:
+            ValueError: If transfer or chunk is not available
+        """
+        path, offset, length = await self.get_chunk_range(transfer_id, chunk_index)
+        
+        return await asyncio.to_thread(self._read_region, path, offset, length)
+    
+    async def get_chunk_range(self, transfer_id: str, chunk_index: int) -> Tuple[Path, int, int]:
+        """
+        Locate a received chunk inside the output file.
+        
+        Callers that own a socket can hand the range straight to
+        ``loop.sendfile`` / ``os.sendfile`` instead of copying it through Python.
+        
+        Args:
+            transfer_id: Transfer ID
+            chunk_index: Index of chunk to locate
+            
+        Returns:
+            Tuple of (output file path, byte offset, byte length)
+            
+        Raises:
+            ValueError: If transfer or chunk is not available
         """
         transfer_state = await self._get_transfer_state(transfer_id)
         
         if not transfer_state:
             raise ValueError(f"Transfer {transfer_id} not found")
         
-        # In production, read from actual file
-        # For now, return placeholder
-        chunk_data = b"placeholder_chunk_data"
+        offset, length = self._chunk_bounds(transfer_state, chunk_index)
         
-        return chunk_data
+        redis_client = await redis_manager.get_redis()
+        chunks_key = f"{self.TRANSFER_CHUNKS_PREFIX}{transfer_id}"
+        if not await redis_client.hexists(chunks_key, str(chunk_index)):
+            raise ValueError(f"Chunk {chunk_index} of transfer {transfer_id} has not been received")
+        
+        return self._output_path(transfer_id, transfer_state), offset, length
     
     async def receive_chunk(
         self,
@@ -348,37 +419,50 @@ class FileTransferManager:
             if not transfer_state:
                 raise ValueError(f"Transfer {transfer_id} not found")
             
-            # Verify checksum if provided
-            if checksum:
-                computed = hashlib.sha256(data).hexdigest()
-                if computed != checksum:
-                    raise ValueError(
-                        f"Checksum mismatch for chunk {chunk_index}"
-                    )
+            offset, length = self._chunk_bounds(transfer_state, chunk_index)
+            if len(data) != length:
+                raise ValueError(
+                    f"Chunk {chunk_index} has {len(data)} bytes, expected {length}"
+                )
             
-            # Store chunk to temp file
-            transfer_dir = self.temp_dir / transfer_id
-            transfer_dir.mkdir(parents=True, exist_ok=True)
+            # Hash, verify and write the chunk in place, off the event loop
+            fd = await self._get_output_fd(transfer_id, transfer_state)
+            digest = await asyncio.to_thread(self._write_chunk, fd, offset, data, checksum)
             
-            chunk_file = transfer_dir / f"chunk_{chunk_index:06d}"
-            chunk_file.write_bytes(data)
+            # Record the chunk's leaf hash; re-sent chunks are not counted twice
+            redis_client = await redis_manager.get_redis()
+            chunks_key = f"{self.TRANSFER_CHUNKS_PREFIX}{transfer_id}"
+            pipe = redis_client.pipeline()
+            pipe.hset(chunks_key, str(chunk_index), digest)
+            pipe.hlen(chunks_key)
+            pipe.expire(chunks_key, self.transfer_timeout)
+            is_new, chunks_received, _ = await pipe.execute()
             
             # Update state
-            transfer_state["chunks_received"] += 1
-            transfer_state["bytes_transferred"] += len(data)
+            transfer_state["chunks_received"] = chunks_received
+            if is_new:
+                transfer_state["bytes_transferred"] += len(data)
             transfer_state["progress_percent"] = (
                 transfer_state["chunks_received"] / transfer_state["total_chunks"] * 100
             )
             
             # Check if complete
-            if transfer_state["chunks_received"] == transfer_state["total_chunks"]:
+            finalized_elsewhere = False
+            if (
+                transfer_state["chunks_received"] == transfer_state["total_chunks"]
+                and transfer_state["status"] != TransferStatus.COMPLETED
+            ):
                 transfer_state["status"] = TransferStatus.COMPLETED
                 transfer_state["completed_at"] = datetime.now(timezone.utc).isoformat()
                 
-                # Assemble final file
-                await self._assemble_chunks(transfer_id, transfer_state)
+                # Chunks are already in place; only the root hash is left
+                finalized_elsewhere = not await self._finalize_transfer(transfer_id, transfer_state)
+                if finalized_elsewhere:
+                    self._close_output_fd(transfer_id)
             
-            await self._update_transfer_state(transfer_id, transfer_state)
+            # The finalizing request owns the completed state; don't overwrite it
+            if not finalized_elsewhere:
+                await self._update_transfer_state(transfer_id, transfer_state)
             
             logger.debug(
                 f"Received chunk {chunk_index}/{transfer_state['total_chunks']} "
@@ -607,44 +691,162 @@ class FileTransferManager:
             if t["status"] in [TransferStatus.PENDING, TransferStatus.ACTIVE, TransferStatus.PAUSED]
         ]
     
-    async def _assemble_chunks(self, transfer_id: str, transfer_state: Dict) -> None:
-        """Assemble chunks into final file."""
+    def _output_path(self, transfer_id: str, transfer_state: Dict) -> Path:
+        """Path of the output file a transfer's chunks are written into."""
+        # Only the base name is used so a crafted filename cannot escape the transfer dir
+        filename = Path(transfer_state["filename"]).name or transfer_id
+        return self.temp_dir / transfer_id / filename
+    
+    def _chunk_bounds(self, transfer_state: Dict, chunk_index: int) -> Tuple[int, int]:
+        """Byte offset and length of a chunk within the output file."""
+        if not 0 <= chunk_index < transfer_state["total_chunks"]:
+            raise ValueError(
+                f"Chunk index {chunk_index} out of range (0-{transfer_state['total_chunks'] - 1})"
+            )
+        
+        offset = chunk_index * transfer_state["chunk_size"]
+        length = min(transfer_state["chunk_size"], transfer_state["file_size"] - offset)
+        return offset, length
+    
+    async def _get_output_fd(self, transfer_id: str, transfer_state: Dict) -> int:
+        """Open (and preallocate on first use) the transfer's output file."""
+        fd = self._output_fds.get(transfer_id)
+        if fd is None:
+            path = self._output_path(transfer_id, transfer_state)
+            fd = await asyncio.to_thread(self._open_output, path, transfer_state["file_size"])
+            
+            # Another task may have opened it while we were off-loop
+            existing = self._output_fds.setdefault(transfer_id, fd)
+            if existing != fd:
+                os.close(fd)
+                fd = existing
+        
+        self._output_fd_last_used[transfer_id] = time.monotonic()
+        
+        # Finalize/cancel may run on another worker, so this worker closes
+        # descriptors it stops using on its own
+        if self._output_fd_reaper is None or self._output_fd_reaper.done():
+            self._output_fd_reaper = asyncio.create_task(self._reap_idle_output_fds())
+        
+        return fd
+    
+    async def _reap_idle_output_fds(self) -> None:
+        """Close output files left idle for output_fd_idle_timeout; exits once none are open."""
+        while self._output_fds:
+            await asyncio.sleep(self.output_fd_idle_timeout)
+            
+            cutoff = time.monotonic() - self.output_fd_idle_timeout
+            for transfer_id, last_used in list(self._output_fd_last_used.items()):
+                if last_used <= cutoff:
+                    logger.debug(f"Closing idle output file for transfer {transfer_id}")
+                    self._close_output_fd(transfer_id)
+    
+    def _pop_output_fd(self, transfer_id: str) -> Optional[int]:
+        """Stop tracking a transfer's output descriptor, returning it if open."""
+        self._output_fd_last_used.pop(transfer_id, None)
+        return self._output_fds.pop(transfer_id, None)
+    
+    def _close_output_fd(self, transfer_id: str) -> None:
+        """Close a transfer's output descriptor if this worker has it open."""
+        fd = self._pop_output_fd(transfer_id)
+        if fd is not None:
+            os.close(fd)
+    
+    @staticmethod
+    def _open_output(path: Path, file_size: int) -> int:
+        """Create the output file as a sparse file of its final size."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(fd).st_size != file_size:
+            os.ftruncate(fd, file_size)
+        return fd
+    
+    @staticmethod
+    def _write_chunk(fd: int, offset: int, data: bytes, checksum: Optional[str] = None) -> str:
+        """Verify and write a chunk at its offset, returning its SHA-256 hex digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        if checksum and digest != checksum:
+            raise ValueError(f"Checksum mismatch for chunk at offset {offset}")
+        
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+        
+        return digest
+    
+    @staticmethod
+    def _read_region(path: Path, offset: int, length: int) -> bytes:
+        """Read a byte range through a read-only memory map of just that region."""
+        if length == 0:
+            return b""
+        
+        # mmap offsets must be aligned to the allocation granularity
+        aligned = offset - (offset % mmap.ALLOCATIONGRANULARITY)
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), length + offset - aligned, access=mmap.ACCESS_READ, offset=aligned) as mapped:
+                return mapped[offset - aligned:]
+    
+    async def _finalize_transfer(self, transfer_id: str, transfer_state: Dict) -> bool:
+        """
+        Flush the output file and derive the transfer checksum from chunk hashes.
+        
+        Concurrent final chunks can both see the transfer complete, so the
+        first caller claims finalization with an atomic flag in Redis.
+        
+        Returns:
+            False if another request already finalized the transfer
+        """
         try:
-            transfer_dir = self.temp_dir / transfer_id
-            
-            if not transfer_dir.exists():
-                raise ValueError(f"Transfer directory not found: {transfer_dir}")
+            redis_client = await redis_manager.get_redis()
+            claimed = await redis_client.set(
+                f"{self.TRANSFER_FINALIZED_PREFIX}{transfer_id}", "1",
+                nx=True, ex=self.transfer_timeout
+            )
+            if not claimed:
+                logger.debug(f"Transfer {transfer_id} already finalized")
+                return False
             
-            # Assemble chunks in order
-            output_file = transfer_dir / transfer_state["filename"]
+            chunk_hashes = await redis_client.hgetall(f"{self.TRANSFER_CHUNKS_PREFIX}{transfer_id}")
             
-            with output_file.open("wb") as outfile:
-                for i in range(transfer_state["total_chunks"]):
-                    chunk_file = transfer_dir / f"chunk_{i:06d}"
-                    if chunk_file.exists():
-                        outfile.write(chunk_file.read_bytes())
-                        # Delete chunk after assembling
-                        chunk_file.unlink()
+            leaves = [chunk_hashes[str(i)] for i in range(transfer_state["total_chunks"])]
+            transfer_state["checksum"] = compute_merkle_root(leaves)
+            transfer_state["checksum_algorithm"] = "sha256-merkle"
             
-            # Calculate final checksum
-            with output_file.open("rb") as f:
-                file_hash = hashlib.sha256()
-                while chunk := f.read(8192):
-                    file_hash.update(chunk)
-                transfer_state["checksum"] = file_hash.hexdigest()
+            fd = self._pop_output_fd(transfer_id)
+            if fd is not None:
+                await asyncio.to_thread(self._sync_and_close, fd)
             
             logger.info(
-                f"Assembled file for transfer {transfer_id}: {output_file}",
+                f"Completed file for transfer {transfer_id}: {self._output_path(transfer_id, transfer_state)}",
                 extra={"transfer_id": transfer_id, "checksum": transfer_state["checksum"]}
             )
+            return True
             
         except Exception as e:
-            logger.error(f"Failed to assemble chunks: {e}", exc_info=True)
+            logger.error(f"Failed to finalize transfer: {e}", exc_info=True)
             raise
     
+    @staticmethod
+    def _sync_and_close(fd: int) -> None:
+        """Flush a file descriptor to disk and close it."""
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
     async def _cleanup_transfer(self, transfer_id: str) -> None:
         """Cleanup temp files for a transfer."""
         try:
+            self._close_output_fd(transfer_id)
+            
+            redis_client = await redis_manager.get_redis()
+            await redis_client.delete(
+                f"{self.TRANSFER_CHUNKS_PREFIX}{transfer_id}",
+                f"{self.TRANSFER_FINALIZED_PREFIX}{transfer_id}"
+            )
+            
             transfer_dir = self.temp_dir / transfer_id
             
             if transfer_dir.exists():
@@ -4,10 +4,16 @@ WebRTC Health Checks & Monitoring
 Comprehensive health checks, metrics, and observability for WebRTC service.
 Provides detailed system statistics and component health monitoring.
 
+Room and participant counts are maintained incrementally in Redis by the
+participant registry and periodically rebuilt from the participant hashes to
+correct drift; message, error and connection counters are kept per
+worker in memory. Nothing on the metrics path scans the keyspace.
+
 Note: Global Prometheus metrics are handled by the main FastAPI app at /metrics
 """
 
 import time
+from collections import defaultdict
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field
@@ -18,6 +24,13 @@ from second_brain_database.managers.logging_manager import get_logger
 
 logger = get_logger(prefix="[WebRTC-Health]")
 
+# Cluster-wide counters, updated atomically by the participant registry scripts
+ACTIVE_ROOMS_KEY = "webrtc:metrics:active_rooms"
+PARTICIPANTS_KEY = "webrtc:metrics:participants"
+ROOM_SIZES_KEY = "webrtc:metrics:room_sizes"  # Sorted set: room_id -> participant count
+
+ROOM_SIZE_BUCKETS = [("1-5", 1, 5), ("6-10", 6, 10), ("11-25", 11, 25), ("26-50", 26, 50), ("51+", 51, "+inf")]
+
 
 class ServiceStatus(str):
     """Service status values."""
@@ -145,6 +158,46 @@ class WebRtcStats(BaseModel):
     total_recordings_today: int = Field(0, description="Recordings started today")
 
 
+class SlidingWindowCounter:
+    """
+    Per-worker event counter with a per-second ring buffer for recent rates.
+    
+    Recording is O(1) and reading the windowed count is O(window_seconds),
+    independent of event volume.
+    """
+    
+    def __init__(self, window_seconds: int = 60):
+        """
+        Initialize the counter.
+        
+        Args:
+            window_seconds: Length of the sliding window in seconds
+        """
+        self.window_seconds = window_seconds
+        self.total = 0
+        self._counts = [0] * window_seconds
+        self._seconds = [0] * window_seconds
+    
+    def increment(self, amount: int = 1, now: Optional[float] = None) -> None:
+        """Record events at the current (or given) time."""
+        second = int(time.time() if now is None else now)
+        index = second % self.window_seconds
+        if self._seconds[index] != second:
+            self._seconds[index] = second
+            self._counts[index] = 0
+        self._counts[index] += amount
+        self.total += amount
+    
+    def count(self, now: Optional[float] = None) -> int:
+        """Number of events within the window."""
+        cutoff = int(time.time() if now is None else now) - self.window_seconds
+        return sum(count for count, second in zip(self._counts, self._seconds) if second > cutoff)
+    
+    def rate(self, now: Optional[float] = None) -> float:
+        """Average events per second over the window."""
+        return self.count(now) / self.window_seconds
+
+
 class WebRtcMonitoring:
     """
     Monitoring and observability for WebRTC service.
@@ -167,8 +220,35 @@ class WebRtcMonitoring:
         self.METRICS_PREFIX = "webrtc:metrics:"
         self.STATS_PREFIX = "webrtc:stats:"
         
+        # Per-worker counters
+        self.active_connections = 0
+        self.total_connections = 0
+        self.messages = SlidingWindowCounter()
+        self.errors = SlidingWindowCounter()
+        self.messages_by_type: Dict[str, int] = defaultdict(int)
+        self.errors_by_type: Dict[str, int] = defaultdict(int)
+        
         logger.info("WebRTC monitoring initialized")
     
+    def record_connection_opened(self) -> None:
+        """Record a WebSocket connection accepted by this worker."""
+        self.active_connections += 1
+        self.total_connections += 1
+    
+    def record_connection_closed(self) -> None:
+        """Record a WebSocket connection closed on this worker."""
+        self.active_connections = max(0, self.active_connections - 1)
+    
+    def record_message(self, message_type: str) -> None:
+        """Record a signaling message relayed by this worker."""
+        self.messages.increment()
+        self.messages_by_type[message_type] += 1
+    
+    def record_error(self, error_type: str) -> None:
+        """Record a signaling error on this worker."""
+        self.errors.increment()
+        self.errors_by_type[error_type] += 1
+    
     async def check_health(self) -> HealthCheckResponse:
         """
         Perform comprehensive health check.
@@ -277,46 +357,104 @@ class WebRtcMonitoring:
                 error=str(e)
             )
     
+    async def _get_cluster_counters(self, redis_client) -> tuple:
+        """Read the maintained room and participant counters in one round trip."""
+        active_rooms, total_participants = await redis_client.mget(ACTIVE_ROOMS_KEY, PARTICIPANTS_KEY)
+        return int(active_rooms or 0), int(total_participants or 0)
+    
     async def get_metrics(self) -> WebRtcMetrics:
         """
         Get current WebRTC metrics.
         
+        Room and participant counts are cluster-wide; connection, message and
+        error figures are for this worker.
+        
         Returns:
             WebRtcMetrics with current statistics
         """
+        messages_in_window = self.messages.count()
+        errors_in_window = self.errors.count()
+        metrics = WebRtcMetrics(
+            active_websocket_connections=self.active_connections,
+            messages_per_second=round(self.messages.rate(), 2),
+            errors_per_minute=round(errors_in_window * 60 / self.errors.window_seconds, 2),
+            error_rate_percentage=(
+                round(errors_in_window / messages_in_window * 100, 2) if messages_in_window else 0.0
+            ),
+        )
+        
         try:
             redis_client = await self.redis.get_redis()
             
-            # Count active rooms
-            room_keys = await redis_client.keys("webrtc:participants:*")
-            active_rooms = len(room_keys)
-            
-            # Count total participants
-            total_participants = 0
-            for key in room_keys:
-                count = await redis_client.scard(key)
-                total_participants += count
-            
-            # Calculate average participants per room
-            avg_participants = total_participants / active_rooms if active_rooms > 0 else 0.0
+            active_rooms, total_participants = await self._get_cluster_counters(redis_client)
+            metrics.active_rooms = active_rooms
+            metrics.total_participants = total_participants
+            metrics.average_participants_per_room = (
+                round(total_participants / active_rooms, 2) if active_rooms > 0 else 0.0
+            )
             
             # Get Redis memory info
             info = await redis_client.info("memory")
-            redis_memory_mb = info.get("used_memory", 0) / (1024 * 1024)
-            
-            # TODO: Implement connection tracking, message rate, error tracking
-            # These would require additional Redis structures to track metrics
-            
-            return WebRtcMetrics(
-                active_rooms=active_rooms,
-                total_participants=total_participants,
-                average_participants_per_room=round(avg_participants, 2),
-                redis_memory_used_mb=round(redis_memory_mb, 2)
-            )
+            metrics.redis_memory_used_mb = round(info.get("used_memory", 0) / (1024 * 1024), 2)
             
         except Exception as e:
             logger.error(f"Failed to get metrics: {e}")
-            return WebRtcMetrics()
+        
+        return metrics
+    
+    async def render_prometheus(self) -> str:
+        """
+        Render WebRTC metrics in the Prometheus text exposition format.
+        
+        Returns:
+            Metrics text (content type text/plain; version=0.0.4)
+        """
+        lines = [
+            "# HELP webrtc_connections_active WebSocket connections open on this worker",
+            "# TYPE webrtc_connections_active gauge",
+            f"webrtc_connections_active {self.active_connections}",
+            "# HELP webrtc_connections_total WebSocket connections accepted by this worker",
+            "# TYPE webrtc_connections_total counter",
+            f"webrtc_connections_total {self.total_connections}",
+            "# HELP webrtc_messages_total Signaling messages relayed by this worker",
+            "# TYPE webrtc_messages_total counter",
+        ]
+        lines.extend(
+            f'webrtc_messages_total{{type="{message_type}"}} {count}'
+            for message_type, count in sorted(self.messages_by_type.items())
+        )
+        lines.extend([
+            "# HELP webrtc_errors_total Signaling errors on this worker",
+            "# TYPE webrtc_errors_total counter",
+        ])
+        lines.extend(
+            f'webrtc_errors_total{{type="{error_type}"}} {count}'
+            for error_type, count in sorted(self.errors_by_type.items())
+        )
+        lines.extend([
+            f"# HELP webrtc_messages_per_second Message rate over the last {self.messages.window_seconds}s",
+            "# TYPE webrtc_messages_per_second gauge",
+            f"webrtc_messages_per_second {self.messages.rate():.4f}",
+            f"# HELP webrtc_errors_per_second Error rate over the last {self.errors.window_seconds}s",
+            "# TYPE webrtc_errors_per_second gauge",
+            f"webrtc_errors_per_second {self.errors.rate():.4f}",
+        ])
+        
+        try:
+            redis_client = await self.redis.get_redis()
+            active_rooms, total_participants = await self._get_cluster_counters(redis_client)
+            lines.extend([
+                "# HELP webrtc_rooms_active Rooms with at least one participant (cluster-wide)",
+                "# TYPE webrtc_rooms_active gauge",
+                f"webrtc_rooms_active {active_rooms}",
+                "# HELP webrtc_participants Participants across all rooms (cluster-wide)",
+                "# TYPE webrtc_participants gauge",
+                f"webrtc_participants {total_participants}",
+            ])
+        except Exception as e:
+            logger.error(f"Failed to read cluster counters: {e}")
+        
+        return "\n".join(lines) + "\n"
     
     async def get_stats(self) -> WebRtcStats:
         """
@@ -328,49 +466,24 @@ class WebRtcMonitoring:
         try:
             redis_client = await self.redis.get_redis()
             
-            # Get room size breakdown
-            room_keys = await redis_client.keys("webrtc:participants:*")
+            # Room size breakdown and top rooms from the maintained size index
+            pipe = redis_client.pipeline(transaction=False)
+            for _, low, high in ROOM_SIZE_BUCKETS:
+                pipe.zcount(ROOM_SIZES_KEY, low, high)
+            pipe.zrevrange(ROOM_SIZES_KEY, 0, 9, withscores=True)
+            results = await pipe.execute()
+            
             rooms_by_size = {
-                "1-5": 0,
-                "6-10": 0,
-                "11-25": 0,
-                "26-50": 0,
-                "51+": 0
+                label: count for (label, _, _), count in zip(ROOM_SIZE_BUCKETS, results)
             }
-            
-            top_rooms = []
-            
-            for key in room_keys:
-                count = await redis_client.scard(key)
-                room_id = key.decode() if isinstance(key, bytes) else key
-                room_id = room_id.replace("webrtc:participants:", "")
-                
-                # Categorize by size
-                if count <= 5:
-                    rooms_by_size["1-5"] += 1
-                elif count <= 10:
-                    rooms_by_size["6-10"] += 1
-                elif count <= 25:
-                    rooms_by_size["11-25"] += 1
-                elif count <= 50:
-                    rooms_by_size["26-50"] += 1
-                else:
-                    rooms_by_size["51+"] += 1
-                
-                # Add to top rooms list
-                top_rooms.append({
-                    "room_id": room_id,
-                    "participant_count": count
-                })
-            
-            # Sort and limit to top 10
-            top_rooms.sort(key=lambda x: x["participant_count"], reverse=True)
-            top_rooms = top_rooms[:10]
+            top_rooms = [
+                {"room_id": room_id, "participant_count": int(count)}
+                for room_id, count in results[-1]
+            ]
             
             # Count active recordings
-            recording_keys = await redis_client.keys("webrtc:recordings:*")
             active_recordings = 0
-            for key in recording_keys:
+            async for key in redis_client.scan_iter(match="webrtc:recordings:*", count=500):
                 status = await redis_client.hget(key, "status")
                 if status == b"active" or status == "active":
                     active_recordings += 1
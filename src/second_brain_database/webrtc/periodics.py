@@ -0,0 +1,64 @@
+"""
+WebRTC Background Tasks
+
+Periodic maintenance of the Redis state shared by the WebRTC workers. These
+loops are registered with the periodic job manager, so each runs on one
+worker in the cluster.
+"""
+
+import asyncio
+
+from second_brain_database.config import settings
+from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.webrtc.connection_manager import webrtc_manager
+
+logger = get_logger(prefix="[WebRTC-Periodics]")
+
+
+async def periodic_webrtc_metrics_reconcile():
+    """
+    Periodically rebuild the room and participant counters used by monitoring.
+
+    Runs once at startup and then every WEBRTC_METRICS_RECONCILE_INTERVAL
+    seconds, so counts left behind by a crashed worker are corrected instead
+    of being hidden by clamping.
+    """
+    interval = settings.WEBRTC_METRICS_RECONCILE_INTERVAL
+    logger.info(f"Starting WebRTC metrics reconciliation (interval={interval}s)")
+
+    while True:
+        try:
+            await webrtc_manager.reconcile_metrics()
+            await asyncio.sleep(interval)
+
+        except asyncio.CancelledError:
+            logger.info("WebRTC metrics reconciliation task cancelled")
+            break
+        except Exception as e:
+            logger.error(f"Error in WebRTC metrics reconciliation: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+
+async def periodic_webrtc_presence_sweep():
+    """
+    Periodically remove participants whose presence heartbeat has expired.
+
+    Runs every WEBRTC_PRESENCE_SWEEP_INTERVAL seconds so participants of a
+    crashed worker leave their rooms instead of being listed forever.
+    """
+    interval = settings.WEBRTC_PRESENCE_SWEEP_INTERVAL
+    logger.info(f"Starting WebRTC presence sweep (interval={interval}s)")
+
+    while True:
+        try:
+            removed = await webrtc_manager.sweep_stale_participants()
+            if removed:
+                logger.info(f"Removed {removed} stale WebRTC participants")
+            await asyncio.sleep(interval)
+
+        except asyncio.CancelledError:
+            logger.info("WebRTC presence sweep task cancelled")
+            break
+        except Exception as e:
+            logger.error(f"Error in WebRTC presence sweep: {e}", exc_info=True)
+            await asyncio.sleep(interval)
@@ -22,6 +22,7 @@ from pydantic import BaseModel, Field
 from second_brain_database.database import db_manager
 from second_brain_database.managers.redis_manager import redis_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.webrtc.write_buffer import webrtc_write_buffer
 
 logger = get_logger(prefix="[WebRTC-Persistence]")
 
@@ -173,6 +174,7 @@ class WebRtcPersistence:
         """Initialize persistence manager."""
         self.mongodb = db_manager
         self.redis = redis_manager
+        self.write_buffer = webrtc_write_buffer
         
         # Collection names
         self.ROOM_SESSIONS_COLLECTION = "webrtc_room_sessions"
@@ -184,8 +186,7 @@ class WebRtcPersistence:
     
     async def get_collection(self, collection_name: str) -> AsyncIOMotorCollection:
         """Get MongoDB collection."""
-        db = await self.mongodb.get_database()
-        return db[collection_name]
+        return self.mongodb.get_collection(collection_name)
     
     async def create_indexes(self):
         """Create MongoDB indexes for all collections."""
@@ -260,6 +261,9 @@ class WebRtcPersistence:
         """
         Save chat message to MongoDB.
         
+        The insert is queued on the write buffer and batched with other
+        messages; it is written directly if the buffer is not running.
+        
         Args:
             message: ChatMessage model
             
@@ -271,10 +275,10 @@ class WebRtcPersistence:
             
             message_dict = message.model_dump(exclude_none=True)
             
-            await collection.insert_one(message_dict)
+            await self.write_buffer.insert(collection, message_dict)
             
             logger.debug(
-                f"Chat message saved",
+                f"Chat message queued",
                 extra={"room_id": message.room_id, "sender": message.sender_username}
             )
             return True
@@ -290,6 +294,8 @@ class WebRtcPersistence:
         """
         Save analytics event to MongoDB.
         
+        Batched through the write buffer like chat messages.
+        
         Args:
             event: AnalyticsEvent model
             
@@ -301,7 +307,7 @@ class WebRtcPersistence:
             
             event_dict = event.model_dump(exclude_none=True)
             
-            await collection.insert_one(event_dict)
+            await self.write_buffer.insert(collection, event_dict)
             
             return True
             
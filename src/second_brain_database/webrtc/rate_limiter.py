@@ -3,6 +3,9 @@ WebRTC Rate Limiter
 
 Redis-based distributed rate limiting using sliding window algorithm.
 Prevents abuse and ensures fair resource usage across all server instances.
+
+Checks delegate to the shared RedisRateLimiter, which evaluates each limit
+in a single atomic Lua script call.
 """
 
 import time
@@ -11,6 +14,7 @@ from dataclasses import dataclass
 
 from second_brain_database.managers.redis_manager import redis_manager
 from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.rate_limit_manager import RedisRateLimiter
 
 logger = get_logger(prefix="[WebRTC-RateLimit]")
 
@@ -49,11 +53,14 @@ class WebRtcRateLimiter:
     - Member: Unique request ID (timestamp + random)
     - Score: Timestamp in milliseconds
     
-    The sliding window algorithm:
+    The sliding window algorithm runs atomically in one Lua script:
     1. Remove entries older than the window
     2. Count remaining entries
     3. If count < limit, allow and add new entry
     4. If count >= limit, reject and calculate retry_after
+    
+    With RATE_LIMIT_ALGORITHM="gcra" each key instead holds a single
+    theoretical arrival time.
     """
     
     # Rate limit configurations
@@ -71,9 +78,10 @@ class WebRtcRateLimiter:
     def __init__(self):
         """Initialize rate limiter."""
         self.redis = redis_manager
+        self.limiter = RedisRateLimiter(redis_manager)
         self.RATE_LIMIT_PREFIX = "webrtc:ratelimit:"
         
-        logger.info("Rate limiter initialized with sliding window algorithm")
+        logger.info(f"Rate limiter initialized with {self.limiter.algorithm} algorithm")
     
     def _get_rate_limit_key(self, limit_type: str, identifier: str) -> str:
         """
@@ -116,63 +124,7 @@ class WebRtcRateLimiter:
         key = self._get_rate_limit_key(limit_type, identifier)
         
         try:
-            redis_client = await self.redis.get_redis()
-            current_time_ms = int(time.time() * 1000)
-            window_start_ms = current_time_ms - config.window_ms
-            
-            # Start pipeline for atomic operations
-            pipe = redis_client.pipeline()
-            
-            # Remove entries older than the window
-            pipe.zremrangebyscore(key, 0, window_start_ms)
-            
-            # Count entries in current window
-            pipe.zcard(key)
-            
-            # Execute pipeline
-            results = await pipe.execute()
-            current_count = results[1]
-            
-            if current_count >= config.max_requests:
-                # Rate limit exceeded - calculate retry_after
-                oldest_entries = await redis_client.zrange(key, 0, 0, withscores=True)
-                if oldest_entries:
-                    oldest_timestamp_ms = int(oldest_entries[0][1])
-                    retry_after_ms = (oldest_timestamp_ms + config.window_ms) - current_time_ms
-                    retry_after = max(1, int(retry_after_ms / 1000))
-                else:
-                    retry_after = config.window_seconds
-                
-                logger.warning(
-                    f"Rate limit exceeded",
-                    extra={
-                        "limit_type": limit_type,
-                        "identifier": identifier,
-                        "current": current_count,
-                        "max": config.max_requests,
-                        "retry_after": retry_after
-                    }
-                )
-                
-                raise RateLimitExceeded(
-                    limit_type=limit_type,
-                    retry_after=retry_after,
-                    current=current_count,
-                    max_allowed=config.max_requests
-                )
-            
-            if increment:
-                # Add current request to the set
-                request_id = f"{current_time_ms}:{id(object())}"
-                await redis_client.zadd(key, {request_id: current_time_ms})
-                
-                # Set expiration to window size + buffer
-                await redis_client.expire(key, config.window_seconds + 60)
-            
-            return True
-            
-        except RateLimitExceeded:
-            raise
+            result = await self.limiter.hit(key, config.max_requests, config.window_seconds, increment=increment)
         except Exception as e:
             logger.error(
                 f"Rate limit check failed: {e}",
@@ -180,6 +132,27 @@ class WebRtcRateLimiter:
             )
             # On Redis errors, fail open (allow request) to maintain availability
             return True
+        
+        if not result.allowed:
+            logger.warning(
+                f"Rate limit exceeded",
+                extra={
+                    "limit_type": limit_type,
+                    "identifier": identifier,
+                    "current": result.used,
+                    "max": config.max_requests,
+                    "retry_after": result.retry_after
+                }
+            )
+            
+            raise RateLimitExceeded(
+                limit_type=limit_type,
+                retry_after=result.retry_after,
+                current=result.used,
+                max_allowed=config.max_requests
+            )
+        
+        return True
     
     async def get_rate_limit_status(
         self,
@@ -206,32 +179,16 @@ class WebRtcRateLimiter:
         key = self._get_rate_limit_key(limit_type, identifier)
         
         try:
-            redis_client = await self.redis.get_redis()
-            current_time_ms = int(time.time() * 1000)
-            window_start_ms = current_time_ms - config.window_ms
-            
-            # Remove stale entries and count
-            await redis_client.zremrangebyscore(key, 0, window_start_ms)
-            current_count = await redis_client.zcard(key)
-            
-            remaining = max(0, config.max_requests - current_count)
+            result = await self.limiter.peek(key, config.max_requests, config.window_seconds)
             
-            # Calculate reset time
-            if current_count > 0:
-                oldest_entries = await redis_client.zrange(key, 0, 0, withscores=True)
-                if oldest_entries:
-                    oldest_timestamp_ms = int(oldest_entries[0][1])
-                    reset_timestamp = (oldest_timestamp_ms + config.window_ms) / 1000
-                else:
-                    reset_timestamp = (current_time_ms + config.window_ms) / 1000
-            else:
-                reset_timestamp = (current_time_ms + config.window_ms) / 1000
+            reset_after_ms = result.reset_after_ms if result.used > 0 else config.window_ms
+            reset_timestamp = (time.time() * 1000 + reset_after_ms) / 1000
             
             return {
                 "limit_type": limit_type,
                 "limit": config.max_requests,
-                "remaining": remaining,
-                "used": current_count,
+                "remaining": result.remaining,
+                "used": result.used,
                 "reset_at": int(reset_timestamp),
                 "window_seconds": config.window_seconds
             }
@@ -264,8 +221,7 @@ class WebRtcRateLimiter:
         key = self._get_rate_limit_key(limit_type, identifier)
         
         try:
-            redis_client = await self.redis.get_redis()
-            await redis_client.delete(key)
+            await self.limiter.reset(key)
             
             logger.info(
                 f"Rate limit reset",
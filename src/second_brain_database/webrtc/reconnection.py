@@ -5,8 +5,8 @@ Handles automatic reconnection, message buffering, and state recovery
 for WebSocket connections that disconnect unexpectedly.
 
 Features:
-- Message buffering (last N messages per room)
-- Automatic message replay on reconnect
+- Message buffering (last N messages per room, in a Redis Stream)
+- Automatic message replay on reconnect (stream IDs are sequence numbers)
 - Connection quality tracking
 - Missed message detection
 """
@@ -14,13 +14,13 @@ Features:
 import asyncio
 import json
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Deque
+from typing import Any, Dict, List, Optional, Deque, Union
 from collections import deque
 from dataclasses import dataclass, field
 
 from second_brain_database.managers.redis_manager import redis_manager
 from second_brain_database.managers.logging_manager import get_logger
-from second_brain_database.webrtc.schemas import WebRtcMessage
+from second_brain_database.webrtc.schemas import MessageType, WebRtcMessage
 
 logger = get_logger(prefix="[WebRTC-Reconnection]")
 
@@ -43,8 +43,8 @@ class ReconnectionManager:
     
     Architecture:
     - Uses Redis for distributed state (works across multiple servers)
-    - Buffers last N messages per room for replay
-    - Tracks user connection state and sequence numbers
+    - Buffers last N messages per room in a capped Redis Stream for replay
+    - Tracks user connection state and sequence numbers (stream entry IDs)
     - Provides automatic recovery on reconnect
     """
     
@@ -63,85 +63,111 @@ class ReconnectionManager:
         # Redis key prefixes
         self.MESSAGE_BUFFER_PREFIX = "webrtc:reconnect:buffer:"
         self.USER_STATE_PREFIX = "webrtc:reconnect:state:"
-        self.SEQUENCE_PREFIX = "webrtc:reconnect:seq:"
+        
+        # Maximum size of one replay frame; missed messages are grouped up to it
+        self.REPLAY_FRAME_MAX_BYTES = 64 * 1024
         
         logger.info(f"Reconnection manager initialized (buffer_size={buffer_size}, ttl={buffer_ttl}s)")
     
-    async def buffer_message(self, room_id: str, message: WebRtcMessage) -> None:
+    async def buffer_message(self, room_id: str, message: WebRtcMessage) -> Optional[str]:
         """
         Buffer a message for potential replay on reconnect.
         
+        The message is appended to the room's stream (capped at buffer_size)
+        and the stream TTL refreshed in a single pipelined round trip.
+        
         Args:
             room_id: Room ID
             message: Message to buffer
+            
+        Returns:
+            Stream entry ID, used as the message sequence number (None on failure)
         """
         try:
             redis_client = await self.redis.get_redis()
-            
-            # Add sequence number to message
-            seq_key = f"{self.SEQUENCE_PREFIX}{room_id}"
-            sequence = await redis_client.incr(seq_key)
-            await redis_client.expire(seq_key, self.buffer_ttl)
-            
-            # Create buffered message with metadata
-            buffered = {
-                "sequence": sequence,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "message": message.model_dump(),
-            }
-            
-            # Add to buffer (Redis list, trimmed to buffer_size)
             buffer_key = f"{self.MESSAGE_BUFFER_PREFIX}{room_id}"
-            await redis_client.lpush(buffer_key, json.dumps(buffered))
-            await redis_client.ltrim(buffer_key, 0, self.buffer_size - 1)
-            await redis_client.expire(buffer_key, self.buffer_ttl)
+            
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.xadd(
+                buffer_key,
+                {
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "message": message.model_dump_json(),
+                },
+                maxlen=self.buffer_size,
+                approximate=False,
+            )
+            pipe.expire(buffer_key, self.buffer_ttl)
+            sequence, _ = await pipe.execute()
             
             logger.debug(f"Buffered message seq={sequence} for room {room_id}")
+            return sequence
             
         except Exception as e:
             logger.error(f"Failed to buffer message: {e}", exc_info=True)
             # Don't fail the message send if buffering fails
+            return None
+    
+    async def get_latest_sequence(self, room_id: str) -> str:
+        """
+        Get the sequence number of the newest buffered message.
+        
+        Args:
+            room_id: Room ID
+            
+        Returns:
+            Newest stream entry ID, or "0" if the buffer is empty
+        """
+        try:
+            redis_client = await self.redis.get_redis()
+            buffer_key = f"{self.MESSAGE_BUFFER_PREFIX}{room_id}"
+            
+            latest = await redis_client.xrevrange(buffer_key, count=1)
+            return latest[0][0] if latest else "0"
+            
+        except Exception as e:
+            logger.error(f"Failed to get latest sequence: {e}", exc_info=True)
+            return "0"
     
     async def get_missed_messages(
         self, 
         room_id: str, 
-        last_sequence: Optional[int] = None
+        last_sequence: Optional[Union[str, int]] = None
     ) -> List[Dict]:
         """
         Get messages missed since last_sequence.
         
         Args:
             room_id: Room ID
-            last_sequence: Last sequence number user received (None = get all buffered)
+            last_sequence: Last sequence number (stream entry ID) the user
+                received. None or 0 returns everything buffered.
             
         Returns:
-            List of missed messages
+            List of missed messages, oldest first. Each entry has "sequence",
+            "timestamp", "message" (dict) and "message_json" (serialized form).
         """
         try:
             redis_client = await self.redis.get_redis()
             buffer_key = f"{self.MESSAGE_BUFFER_PREFIX}{room_id}"
             
-            # Get all buffered messages (newest first)
-            buffered_msgs = await redis_client.lrange(buffer_key, 0, -1)
-            
-            if not buffered_msgs:
-                return []
+            start = str(last_sequence) if last_sequence else "-"
+            entries = await redis_client.xrange(buffer_key, min=start, max="+")
             
-            # Parse and filter messages
             missed = []
-            for msg_str in buffered_msgs:
+            for entry_id, fields in entries:
+                # XRANGE is inclusive; skip the entry the user already has
+                if entry_id == start:
+                    continue
                 try:
-                    msg_data = json.loads(msg_str)
-                    
-                    # If last_sequence provided, only include newer messages
-                    if last_sequence is None or msg_data["sequence"] > last_sequence:
-                        missed.append(msg_data)
+                    missed.append({
+                        "sequence": entry_id,
+                        "timestamp": fields.get("timestamp"),
+                        "message": json.loads(fields["message"]),
+                        "message_json": fields["message"],
+                    })
                 except Exception as parse_error:
                     logger.warning(f"Failed to parse buffered message: {parse_error}")
             
-            # Sort by sequence (oldest first)
-            missed.sort(key=lambda x: x["sequence"])
-            
             logger.info(f"Retrieved {len(missed)} missed messages for room {room_id}")
             return missed
             
@@ -149,12 +175,68 @@ class ReconnectionManager:
             logger.error(f"Failed to get missed messages: {e}", exc_info=True)
             return []
     
+    async def replay_missed_messages(self, websocket: Any, missed_messages: List[Dict]) -> int:
+        """
+        Send missed messages to a reconnected client.
+        
+        Consecutive messages are grouped into MESSAGE_BATCH frames of at most
+        REPLAY_FRAME_MAX_BYTES, built from their buffered JSON text without
+        re-serializing, with a yield to the event loop between frames. A group
+        of one (including a message larger than the limit) is sent as is.
+        
+        Args:
+            websocket: Client WebSocket connection
+            missed_messages: Entries from get_missed_messages
+            
+        Returns:
+            Number of messages sent
+        """
+        sent = 0
+        for group in self._group_replay_messages(missed_messages):
+            if len(group) == 1:
+                frame = group[0]
+            else:
+                frame = (
+                    f'{{"type": "{MessageType.MESSAGE_BATCH.value}", '
+                    f'"payload": {{"messages": [{", ".join(group)}]}}}}'
+                )
+            
+            try:
+                await websocket.send_text(frame)
+                sent += len(group)
+            except Exception as replay_error:
+                logger.warning(f"Failed to replay {len(group)} message(s): {replay_error}")
+            await asyncio.sleep(0)
+        
+        return sent
+    
+    def _group_replay_messages(self, missed_messages: List[Dict]) -> List[List[str]]:
+        """Split missed messages' JSON into in-order groups that fit one replay frame."""
+        # Room for the batch envelope and the separator after each message
+        overhead = len(f'{{"type": "{MessageType.MESSAGE_BATCH.value}", "payload": {{"messages": []}}}}')
+        
+        groups: List[List[str]] = []
+        group: List[str] = []
+        group_bytes = overhead
+        for missed in missed_messages:
+            message_json = missed["message_json"]
+            message_bytes = len(message_json.encode()) + 2
+            if group and group_bytes + message_bytes > self.REPLAY_FRAME_MAX_BYTES:
+                groups.append(group)
+                group, group_bytes = [], overhead
+            group.append(message_json)
+            group_bytes += message_bytes
+        if group:
+            groups.append(group)
+        
+        return groups
+    
     async def track_user_state(
         self, 
         room_id: str, 
         user_id: str, 
         is_connected: bool,
-        last_sequence: Optional[int] = None
+        last_sequence: Optional[Union[str, int]] = None
     ) -> None:
         """
         Track user connection state.
@@ -163,18 +245,23 @@ class ReconnectionManager:
             room_id: Room ID
             user_id: User ID
             is_connected: Whether user is currently connected
-            last_sequence: Last sequence number user received
+            last_sequence: Last sequence number user received. On disconnect
+                this defaults to the newest buffered message, so a later
+                reconnect replays only what arrived while the user was away.
         """
         try:
             redis_client = await self.redis.get_redis()
             state_key = f"{self.USER_STATE_PREFIX}{room_id}:{user_id}"
             
+            if last_sequence is None and not is_connected:
+                last_sequence = await self.get_latest_sequence(room_id)
+            
             state = {
                 "user_id": user_id,
                 "room_id": room_id,
                 "is_connected": is_connected,
                 "last_seen": datetime.now(timezone.utc).isoformat(),
-                "last_sequence": last_sequence or 0,
+                "last_sequence": str(last_sequence or 0),
             }
             
             # Store state with TTL
@@ -337,10 +424,6 @@ class ReconnectionManager:
             buffer_key = f"{self.MESSAGE_BUFFER_PREFIX}{room_id}"
             await redis_client.delete(buffer_key)
             
-            # Delete sequence counter
-            seq_key = f"{self.SEQUENCE_PREFIX}{room_id}"
-            await redis_client.delete(seq_key)
-            
             # Delete all user states for this room
             pattern = f"{self.USER_STATE_PREFIX}{room_id}:*"
             cursor = 0
@@ -0,0 +1,270 @@
+"""
+WebRTC Room Hub
+
+Per-process fan-out of room messages to local WebSocket connections.
+
+Each worker holds a single Redis pattern subscription for all room channels
+instead of one pubsub connection per WebSocket. Incoming messages are decoded
+once without re-validation (they were validated before publishing), routed in
+memory to the connections registered for that room, and forwarded as the
+original frame whenever its format matches the socket, so no socket
+re-serializes them. A frame is converted at most once per format.
+
+The hub also refreshes the presence heartbeat of every local connection, so
+participants stay present while their socket is open even if they are idle,
+and only participants whose worker went away go stale.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+import itertools
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+from second_brain_database.managers.logging_manager import get_logger
+from second_brain_database.managers.redis_manager import redis_manager
+from second_brain_database.webrtc.codec import (
+    Frame,
+    decode_frame,
+    encode_frame,
+    is_binary_frame,
+)
+
+logger = get_logger(prefix="[WebRTC-RoomHub]")
+
+
+class WebRtcRoomHub:
+    """
+    Multiplexes one Redis pattern subscription across all local connections.
+
+    Each connection gets a bounded queue fed by the hub's listener task, so a
+    slow socket can never stall delivery to the rest of the room. If a queue
+    overflows, its oldest message is dropped.
+    """
+
+    def __init__(
+        self,
+        channel_prefix: str = "webrtc:room:",
+        queue_size: int = 256,
+        presence_prefix: str = "webrtc:presence:",
+    ):
+        """
+        Initialize the room hub.
+
+        Args:
+            channel_prefix: Prefix of the Redis room channels
+            queue_size: Maximum undelivered messages buffered per connection
+            presence_prefix: Prefix of the per-room presence sorted sets
+        """
+        self.redis = redis_manager
+        self.channel_prefix = channel_prefix
+        self.queue_size = queue_size
+        self.presence_prefix = presence_prefix
+
+        # room_id -> {subscription id: (username, queue)}
+        self._rooms: Dict[str, Dict[int, Tuple[str, asyncio.Queue]]] = {}
+        # Subscription ids of connections that negotiated binary frames
+        self._binary: Set[int] = set()
+        self._ids = itertools.count()
+        self._listener: Optional[asyncio.Task] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._listener_lock = asyncio.Lock()
+
+        # Seconds to wait before re-subscribing after a Redis failure
+        self.RECONNECT_DELAY = 1.0
+        # Seconds between presence refreshes (a third of the presence TTL)
+        self.HEARTBEAT_INTERVAL = 10.0
+
+    @property
+    def local_connection_count(self) -> int:
+        """Number of connections currently registered on this worker."""
+        return sum(len(subscribers) for subscribers in self._rooms.values())
+
+    async def subscribe(self, room_id: str, username: str, binary: bool = False) -> AsyncIterator[Frame]:
+        """
+        Register a local connection and yield the room's messages.
+
+        Messages sent by ``username`` are not echoed back.
+
+        Args:
+            room_id: The room identifier
+            username: Username of the connection (used to suppress echoes)
+            binary: Yield MessagePack bytes instead of JSON text
+
+        Yields:
+            Serialized messages: JSON text for ``websocket.send_text``, or
+            MessagePack bytes for ``websocket.send_bytes`` when ``binary``
+        """
+        subscription_id = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._rooms.setdefault(room_id, {})[subscription_id] = (username, queue)
+        if binary:
+            self._binary.add(subscription_id)
+
+        try:
+            await self._ensure_listener()
+
+            logger.info(
+                f"Registered {username} for room {room_id}",
+                extra={"room_id": room_id, "username": username, "local_connections": self.local_connection_count},
+            )
+
+            while True:
+                yield await queue.get()
+
+        finally:
+            self._binary.discard(subscription_id)
+            subscribers = self._rooms.get(room_id)
+            if subscribers is not None:
+                subscribers.pop(subscription_id, None)
+                if not subscribers:
+                    del self._rooms[room_id]
+
+            logger.info(
+                f"Unregistered {username} from room {room_id}", extra={"room_id": room_id, "username": username}
+            )
+
+    async def close(self) -> None:
+        """Stop the listener and heartbeat tasks and drop the Redis subscription."""
+        for task in (self._listener, self._heartbeat):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener = None
+        self._heartbeat = None
+
+    async def _ensure_listener(self) -> None:
+        """Start the shared listener and heartbeat tasks if they are not already running."""
+        if (
+            self._listener is not None
+            and not self._listener.done()
+            and self._heartbeat is not None
+            and not self._heartbeat.done()
+        ):
+            return
+
+        async with self._listener_lock:
+            if self._listener is None or self._listener.done():
+                self._listener = asyncio.create_task(self._listen())
+            if self._heartbeat is None or self._heartbeat.done():
+                self._heartbeat = asyncio.create_task(self._refresh_presence())
+
+    async def _refresh_presence(self) -> None:
+        """Periodically mark every locally connected participant as present."""
+        while True:
+            await asyncio.sleep(self.HEARTBEAT_INTERVAL)
+
+            if not self._rooms:
+                continue
+
+            try:
+                now = datetime.now(timezone.utc).timestamp()
+                redis_client = await self.redis.get_redis()
+                pipe = redis_client.pipeline(transaction=False)
+                for room_id, subscribers in list(self._rooms.items()):
+                    # XX: never re-add a participant that has already left or been swept
+                    pipe.zadd(
+                        f"{self.presence_prefix}{room_id}",
+                        {username: now for username, _ in subscribers.values()},
+                        xx=True,
+                    )
+                await pipe.execute()
+
+            except Exception as e:
+                logger.warning(f"Failed to refresh presence of local connections: {e}", extra={"error": str(e)})
+
+    async def _listen(self) -> None:
+        """Receive all room messages and route them to local connections."""
+        pattern = f"{self.channel_prefix}*"
+
+        while True:
+            pubsub = None
+            try:
+                # Publishers may use either wire format and MessagePack frames are not
+                # valid UTF-8, so always read raw bytes and let decode_frame sniff them
+                redis_client = await self.redis.get_binary_redis()
+                pubsub = redis_client.pubsub()
+                await pubsub.psubscribe(pattern)
+
+                logger.info(f"Subscribed to {pattern}", extra={"pattern": pattern})
+
+                async for raw_message in pubsub.listen():
+                    if raw_message["type"] == "pmessage":
+                        self._dispatch(raw_message["channel"], raw_message["data"])
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.error(
+                    f"Room hub subscription failed, retrying in {self.RECONNECT_DELAY}s: {e}",
+                    extra={"pattern": pattern, "error": str(e)},
+                    exc_info=True,
+                )
+                await asyncio.sleep(self.RECONNECT_DELAY)
+
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.punsubscribe(pattern)
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+    def _dispatch(self, channel, data) -> None:
+        """Decode one published message and queue it for each local recipient."""
+        if isinstance(channel, bytes):
+            channel = channel.decode("utf-8")
+        room_id = channel[len(self.channel_prefix) :]
+
+        subscribers = self._rooms.get(room_id)
+        if not subscribers:
+            return
+
+        try:
+            fields = decode_frame(data)
+        except Exception as e:
+            logger.error(
+                f"Failed to parse message from room {room_id}: {e}", extra={"room_id": room_id, "error": str(e)}
+            )
+            return
+
+        sender_id = fields.get("sender_id")
+
+        # Encoded frame per format (binary flag), built at most once
+        frames: Dict[bool, Frame] = {}
+        if is_binary_frame(data):
+            frames[True] = data
+        else:
+            frames[False] = data.decode("utf-8") if isinstance(data, bytes) else data
+
+        delivered = 0
+        for subscription_id, (username, queue) in list(subscribers.items()):
+            # Don't send messages back to the sender
+            if username == sender_id:
+                continue
+
+            binary = subscription_id in self._binary
+            frame = frames.get(binary)
+            if frame is None:
+                frame = frames[binary] = encode_frame(fields, binary)
+
+            if queue.full():
+                queue.get_nowait()
+                logger.warning(
+                    f"Dropped oldest queued message for slow connection {username} in room {room_id}",
+                    extra={"room_id": room_id, "username": username},
+                )
+            queue.put_nowait(frame)
+            delivered += 1
+
+        logger.debug(
+            f"Routed {fields.get('type')} in room {room_id} to {delivered} local connections",
+            extra={"room_id": room_id, "message_type": fields.get("type"), "sender_id": sender_id},
+        )
+
+
+# Global room hub instance
+room_hub = WebRtcRoomHub()
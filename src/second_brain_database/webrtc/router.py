@@ -6,23 +6,25 @@ for WebRTC configuration.
 """
 
 import asyncio
+import uuid
 from datetime import datetime, timezone
 from typing import Optional, Dict
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status, Body, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status, Body, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 
 from second_brain_database.config import settings
 from second_brain_database.managers.logging_manager import get_logger
 from second_brain_database.webrtc.schemas import WebRtcMessage, WebRtcConfig, IceServerConfig, MessageType
 from second_brain_database.webrtc.dependencies import get_current_user_ws, validate_room_id
 from second_brain_database.webrtc.connection_manager import webrtc_manager
+from second_brain_database.webrtc.codec import MSGPACK_SUBPROTOCOL, negotiate_subprotocol, receive_client_frame
 from second_brain_database.routes.auth.dependencies import get_current_user_dep as get_current_user
 from second_brain_database.webrtc.monitoring import webrtc_monitoring
 from second_brain_database.webrtc.rate_limiter import rate_limiter, RateLimitExceeded
-from second_brain_database.webrtc.persistence import webrtc_persistence
+from second_brain_database.webrtc.persistence import webrtc_persistence, ChatMessage, AnalyticsEvent
 from second_brain_database.webrtc.reconnection import reconnection_manager
-from second_brain_database.webrtc.file_transfer import file_transfer_manager
+from second_brain_database.webrtc.file_transfer import file_transfer_manager, TransferStatus
 from second_brain_database.webrtc.recording import recording_manager, RecordingFormat, RecordingQuality
 from second_brain_database.webrtc.e2ee import e2ee_manager, KeyType
 from second_brain_database.webrtc.security import (
@@ -53,6 +55,9 @@ async def websocket_endpoint(
     
     **Authentication**: Token must be provided as query parameter: ?token=<jwt_token>
     
+    **Wire format**: Clients offering the ``webrtc.msgpack`` subprotocol receive room
+    traffic as binary MessagePack frames and may send binary frames; otherwise JSON text.
+    
     **Message Flow**:
     1. Client sends signaling message (offer, answer, ICE candidate) to server
     2. Server validates and publishes message to Redis room channel
@@ -66,8 +71,11 @@ async def websocket_endpoint(
     user = await get_current_user_ws(websocket)
     username = user.get("username") or user.get("email")  # Username-centric, consistent with codebase
     
-    # Accept the WebSocket connection
-    await websocket.accept()
+    # Accept the WebSocket connection, negotiating binary (MessagePack) room frames if offered
+    subprotocol = negotiate_subprotocol(websocket)
+    binary_frames = subprotocol == MSGPACK_SUBPROTOCOL
+    await websocket.accept(subprotocol=subprotocol)
+    webrtc_monitoring.record_connection_opened()
     
     logger.info(
         f"WebSocket connected: user {username} joined room {room_id}",
@@ -80,8 +88,8 @@ async def websocket_endpoint(
     
     try:
         # Check room capacity before adding participant (production capacity management)
-        current_participants = await webrtc_manager.get_participants(room_id)
-        if len(current_participants) >= settings.WEBRTC_MAX_PARTICIPANTS_PER_ROOM:
+        current_participant_count = await webrtc_manager.get_participant_count(room_id)
+        if current_participant_count >= settings.WEBRTC_MAX_PARTICIPANTS_PER_ROOM:
             # Room is full
             error_message = WebRtcMessage.create_error(
                 code="ROOM_FULL",
@@ -90,7 +98,7 @@ async def websocket_endpoint(
             await websocket.send_json(error_message.model_dump())
             await websocket.close(code=1008, reason="Room full")
             logger.warning(
-                f"User {username} denied entry to room {room_id} - room full ({len(current_participants)}/{settings.WEBRTC_MAX_PARTICIPANTS_PER_ROOM})",
+                f"User {username} denied entry to room {room_id} - room full ({current_participant_count}/{settings.WEBRTC_MAX_PARTICIPANTS_PER_ROOM})",
                 extra={"room_id": room_id, "username": username, "capacity": settings.WEBRTC_MAX_PARTICIPANTS_PER_ROOM}
             )
             return
@@ -98,21 +106,25 @@ async def websocket_endpoint(
         # Add user to room participants
         participant_count = await webrtc_manager.add_participant(room_id, username)
         
-        # Get current participants
-        participants = await webrtc_manager.get_participants(room_id)
-        
         # Create or update room session in MongoDB (production persistence)
-        try:
-            session_id = await webrtc_persistence.create_room_session(
-                room_id=room_id,
-                creator=username,
-                participants=[username],
-                metadata={"initial_participant_count": participant_count}
-            )
-            logger.debug(f"Room session created/updated: {session_id}", extra={"room_id": room_id})
-        except Exception as persist_error:
-            logger.error(f"Failed to persist room session: {persist_error}", exc_info=True)
-            # Continue anyway - persistence failure shouldn't block WebRTC
+        async def persist_room_session():
+            try:
+                session_id = await webrtc_persistence.create_room_session(
+                    room_id=room_id,
+                    creator=username,
+                    participants=[username],
+                    metadata={"initial_participant_count": participant_count}
+                )
+                logger.debug(f"Room session created/updated: {session_id}", extra={"room_id": room_id})
+            except Exception as persist_error:
+                logger.error(f"Failed to persist room session: {persist_error}", exc_info=True)
+                # Continue anyway - persistence failure shouldn't block WebRTC
+        
+        # Read the versioned room state snapshot while the session is persisted
+        snapshot, _ = await asyncio.gather(
+            webrtc_manager.get_room_snapshot(room_id),
+            persist_room_session()
+        )
         
         # Handle reconnection and state recovery (production feature)
         try:
@@ -138,40 +150,31 @@ async def websocket_endpoint(
                 await websocket.send_json(reconnect_msg.model_dump())
                 
                 # Replay missed messages
-                for missed_msg in reconnect_info.get("missed_messages", []):
-                    try:
-                        await websocket.send_json(missed_msg["message"])
-                        await asyncio.sleep(0.01)  # Small delay to avoid overwhelming client
-                    except Exception as replay_error:
-                        logger.warning(f"Failed to replay message: {replay_error}")
+                await reconnection_manager.replay_missed_messages(
+                    websocket, reconnect_info.get("missed_messages", [])
+                )
         except Exception as reconnect_error:
             logger.error(f"Reconnection handling failed: {reconnect_error}", exc_info=True)
             # Continue anyway - reconnection failure shouldn't block connection
         
-        # Send room state to the newly connected user first
+        # Send the full room state snapshot to the newly connected user first
         room_state_message = WebRtcMessage(
             type=MessageType.ROOM_STATE,
-            payload={
-                "room_id": room_id,
-                "participants": participants,
-                "participant_count": participant_count
-            },
+            payload=snapshot,
             room_id=room_id,
             timestamp=datetime.now(timezone.utc).isoformat()
         )
         await websocket.send_json(room_state_message.model_dump())
         
-        # Small delay to ensure room state is processed first
-        await asyncio.sleep(0.1)
-        
-        # Send updated room state to all existing participants (so they see the new user)
-        updated_participants = await webrtc_manager.get_participants(room_id)
+        # Send updated participants to all existing participants (so they see the new user);
+        # the version lets clients drop it if they already have newer state
         updated_room_state_message = WebRtcMessage(
             type=MessageType.ROOM_STATE,
             payload={
                 "room_id": room_id,
-                "participants": updated_participants,
-                "participant_count": len(updated_participants)
+                "participants": snapshot["participants"],
+                "participant_count": snapshot["participant_count"],
+                "version": snapshot["version"]
             },
             room_id=room_id,
             timestamp=datetime.now(timezone.utc).isoformat()
@@ -193,7 +196,7 @@ async def websocket_endpoint(
             try:
                 while True:
                     # Receive message from client
-                    data = await websocket.receive_json()
+                    data = await receive_client_frame(websocket)
                     
                     # Parse and validate message
                     message = WebRtcMessage.model_validate(data)
@@ -204,18 +207,19 @@ async def websocket_endpoint(
                     
                     # Apply rate limiting based on message type (production hardening)
                     try:
-                        if message.type == MessageType.CHAT:
+                        if message.type == MessageType.CHAT_MESSAGE:
                             await rate_limiter.check_rate_limit("chat_message", username)
                         elif message.type == MessageType.HAND_RAISE:
                             await rate_limiter.check_rate_limit("hand_raise", username)
                         elif message.type == MessageType.REACTION:
                             await rate_limiter.check_rate_limit("reaction", username)
-                        elif message.type == MessageType.FILE_SHARE:
+                        elif message.type == MessageType.FILE_SHARE_OFFER:
                             await rate_limiter.check_rate_limit("file_share", username)
                         else:
                             # Generic WebSocket message rate limit
                             await rate_limiter.check_rate_limit("websocket_message", username)
                     except RateLimitExceeded as rle:
+                        webrtc_monitoring.record_error("rate_limit_exceeded")
                         error_msg = WebRtcMessage.create_error(
                             code="RATE_LIMIT_EXCEEDED",
                             message=f"Rate limit exceeded for {message.type}. Retry after {rle.retry_after}s"
@@ -225,7 +229,7 @@ async def websocket_endpoint(
                     
                     # Content security validation (production hardening)
                     try:
-                        if message.type == MessageType.CHAT and message.payload:
+                        if message.type == MessageType.CHAT_MESSAGE and message.payload:
                             chat_text = message.payload.get("text", "")
                             if chat_text:
                                 # Sanitize the message (removes XSS/malicious content)
@@ -241,7 +245,7 @@ async def websocket_endpoint(
                                 # Update payload with sanitized text
                                 message.payload["text"] = sanitized_text
                         
-                        elif message.type == MessageType.FILE_SHARE and message.payload:
+                        elif message.type == MessageType.FILE_SHARE_OFFER and message.payload:
                             file_info = message.payload.get("file", {})
                             filename = file_info.get("name", "")
                             file_size = file_info.get("size", 0)
@@ -258,6 +262,7 @@ async def websocket_endpoint(
                                     continue
                     
                     except Exception as security_error:
+                        webrtc_monitoring.record_error("content_security")
                         logger.warning(f"Content security validation failed: {security_error}")
                         error_msg = WebRtcMessage.create_error(
                             code="CONTENT_SECURITY_ERROR",
@@ -266,29 +271,34 @@ async def websocket_endpoint(
                         await websocket.send_json(error_msg.model_dump())
                         continue
                     
-                    # Persist chat messages to MongoDB (production persistence)
-                    if message.type == MessageType.CHAT:
+                    # Persist chat messages to MongoDB (batched by the write buffer)
+                    if message.type == MessageType.CHAT_MESSAGE:
                         try:
                             await webrtc_persistence.save_chat_message(
-                                room_id=room_id,
-                                sender=username,
-                                message=message.payload.get("text", ""),
-                                metadata={
-                                    "message_id": message.payload.get("id"),
-                                    "timestamp": message.timestamp or datetime.now(timezone.utc).isoformat()
-                                }
+                                ChatMessage(
+                                    message_id=str(message.payload.get("id") or uuid.uuid4()),
+                                    room_id=room_id,
+                                    sender_username=username,
+                                    sender_name=username,
+                                    message=message.payload.get("text", ""),
+                                    timestamp=datetime.now(timezone.utc)
+                                )
                             )
                         except Exception as persist_error:
                             logger.error(f"Failed to persist chat message: {persist_error}", exc_info=True)
                     
-                    # Track analytics events (production monitoring)
+                    # Track analytics events (production monitoring, batched by the write buffer)
                     if message.type in [MessageType.OFFER, MessageType.ANSWER, MessageType.ICE_CANDIDATE]:
                         try:
                             await webrtc_persistence.save_analytics_event(
-                                room_id=room_id,
-                                event_type=f"webrtc_{message.type.value}",
-                                user=username,
-                                metadata={"message_type": message.type.value}
+                                AnalyticsEvent(
+                                    event_id=str(uuid.uuid4()),
+                                    room_id=room_id,
+                                    event_type=f"webrtc_{message.type.value}",
+                                    username=username,
+                                    timestamp=datetime.now(timezone.utc),
+                                    metadata={"message_type": message.type.value}
+                                )
                             )
                         except Exception as analytics_error:
                             logger.error(f"Failed to save analytics: {analytics_error}", exc_info=True)
@@ -311,6 +321,7 @@ async def websocket_endpoint(
                     
                     # Publish to Redis (will be received by all subscribed instances)
                     await webrtc_manager.publish_to_room(room_id, message)
+                    webrtc_monitoring.record_message(message.type.value)
                     
                     # Update user presence (heartbeat)
                     await webrtc_manager.update_presence(room_id, username)
@@ -318,6 +329,7 @@ async def websocket_endpoint(
             except WebSocketDisconnect:
                 logger.info(f"Client {username} disconnected from room {room_id}")
             except Exception as e:
+                webrtc_monitoring.record_error(type(e).__name__)
                 logger.error(
                     f"Error receiving from client {username}: {e}",
                     extra={"room_id": room_id, "username": username, "error": str(e)},
@@ -327,21 +339,13 @@ async def websocket_endpoint(
         async def receive_from_redis():
             """Subscribe to Redis and forward messages to client."""
             try:
-                async for message in webrtc_manager.subscribe_to_room(room_id):
-                    # Don't send messages back to the sender
-                    if message.sender_id != username:
-                        await websocket.send_json(message.model_dump())
-                        
-                        logger.debug(
-                            f"Forwarded {message.type} to user {username} in room {room_id}",
-                            extra={
-                                "room_id": room_id,
-                                "username": username,
-                                "message_type": message.type,
-                                "sender_id": message.sender_id
-                            }
-                        )
-                        
+                # Shared per-worker subscription; the sender's own messages are filtered out
+                async for frame in webrtc_manager.stream_room(room_id, username, binary=binary_frames):
+                    if isinstance(frame, bytes):
+                        await websocket.send_bytes(frame)
+                    else:
+                        await websocket.send_text(frame)
+                    
             except Exception as e:
                 logger.error(
                     f"Error receiving from Redis for user {username}: {e}",
@@ -374,6 +378,7 @@ async def websocket_endpoint(
         )
         
     except Exception as e:
+        webrtc_monitoring.record_error(type(e).__name__)
         logger.error(
             f"WebSocket error for user {username} in room {room_id}: {e}",
             extra={"room_id": room_id, "username": username, "error": str(e)},
@@ -391,6 +396,8 @@ async def websocket_endpoint(
             pass
         
     finally:
+        webrtc_monitoring.record_connection_closed()
+        
         # Track disconnection for reconnection support (production feature)
         try:
             await reconnection_manager.track_user_state(
@@ -425,13 +432,14 @@ async def websocket_endpoint(
                 logger.error(f"Failed to end room session: {persist_error}", exc_info=True)
             
             # Send updated room state to remaining participants
-            remaining_participants = await webrtc_manager.get_participants(room_id)
+            snapshot = await webrtc_manager.get_room_snapshot(room_id)
             updated_room_state_message = WebRtcMessage(
                 type=MessageType.ROOM_STATE,
                 payload={
                     "room_id": room_id,
-                    "participants": remaining_participants,
-                    "participant_count": len(remaining_participants)
+                    "participants": snapshot["participants"],
+                    "participant_count": snapshot["participant_count"],
+                    "version": snapshot["version"]
                 },
                 room_id=room_id,
                 timestamp=datetime.now(timezone.utc).isoformat()
@@ -1658,6 +1666,21 @@ async def get_webrtc_metrics():
     return metrics
 
 
+@router.get("/webrtc-metrics/prometheus", response_class=PlainTextResponse)
+async def get_webrtc_metrics_prometheus():
+    """
+    Get WebRTC metrics in the Prometheus text exposition format.
+    
+    Connection, message and error counters are per worker; room and
+    participant gauges are cluster-wide. Serving this endpoint reads two
+    counters from Redis and never scans the keyspace.
+    """
+    return PlainTextResponse(
+        await webrtc_monitoring.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @router.get("/stats")
 async def get_stats():
     """
@@ -2056,6 +2079,101 @@ async def get_file_transfer_progress(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.put("/rooms/{room_id}/file-transfer/{transfer_id}/chunks/{chunk_index}", tags=["WebRTC File Transfer"])
+async def upload_file_transfer_chunk(
+    room_id: str,
+    transfer_id: str,
+    chunk_index: int,
+    request: Request,
+    checksum: Optional[str] = Query(None, description="SHA-256 hex digest of the chunk"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Upload one chunk of an active file transfer (relayed through the server).
+    
+    The request body is the raw chunk data.
+    
+    Args:
+        room_id: Room ID
+        transfer_id: Transfer ID
+        chunk_index: Index of the chunk
+        checksum: Optional SHA-256 hex digest to verify the chunk against
+        
+    Returns:
+        Updated progress information
+    """
+    try:
+        sender_id = current_user.get("username")
+        
+        transfer_state = await file_transfer_manager.get_transfer_progress(transfer_id)
+        if transfer_state["sender_id"] != sender_id:
+            raise PermissionError("Only sender can upload chunks")
+        if transfer_state["status"] != TransferStatus.ACTIVE:
+            raise ValueError(f"Cannot upload chunks to transfer with status {transfer_state['status']}")
+        
+        progress = await file_transfer_manager.receive_chunk(
+            transfer_id=transfer_id,
+            chunk_index=chunk_index,
+            data=await request.body(),
+            checksum=checksum
+        )
+        
+        if progress["status"] == TransferStatus.COMPLETED:
+            complete_message = WebRtcMessage.create_file_share_complete(
+                transfer_id=transfer_id,
+                success=True,
+                room_id=room_id,
+                timestamp=datetime.now(timezone.utc).isoformat(),
+                sender_id=sender_id
+            )
+            
+            await webrtc_manager.publish_to_room(room_id, complete_message)
+        
+        return progress
+        
+    except (ValueError, PermissionError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to upload file transfer chunk: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/rooms/{room_id}/file-transfer/{transfer_id}/chunks/{chunk_index}", tags=["WebRTC File Transfer"])
+async def download_file_transfer_chunk(
+    room_id: str,
+    transfer_id: str,
+    chunk_index: int,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Download one received chunk of a file transfer.
+    
+    Args:
+        room_id: Room ID
+        transfer_id: Transfer ID
+        chunk_index: Index of the chunk
+        
+    Returns:
+        Raw chunk data
+    """
+    try:
+        user_id = current_user.get("username")
+        
+        transfer_state = await file_transfer_manager.get_transfer_progress(transfer_id)
+        if user_id not in [transfer_state["sender_id"], transfer_state["receiver_id"]]:
+            raise PermissionError("User not involved in this transfer")
+        
+        data = await file_transfer_manager.get_chunk(transfer_id, chunk_index)
+        
+        return Response(content=data, media_type="application/octet-stream")
+        
+    except (ValueError, PermissionError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to download file transfer chunk: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.delete("/rooms/{room_id}/file-transfer/{transfer_id}", tags=["WebRTC File Transfer"])
 async def cancel_file_transfer(
     room_id: str,
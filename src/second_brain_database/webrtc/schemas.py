@@ -20,6 +20,8 @@ class MessageType(str, Enum):
     USER_LEFT = "user-left"
     ERROR = "error"
     ROOM_STATE = "room-state"
+    ROOM_STATE_DELTA = "room-state-delta"
+    MESSAGE_BATCH = "message-batch"  # Several messages in one frame (reconnect replay)
     
     # Phase 1: Media Controls
     MEDIA_CONTROL = "media-control"
@@ -105,6 +107,20 @@ class RoomStatePayload(BaseModel):
     room_id: str = Field(..., description="Room identifier")
     participants: list[Dict[str, Any]] = Field(default_factory=list, description="List of current participants")
     participant_count: int = Field(..., description="Number of participants")
+    version: int = Field(default=0, description="Room state version this snapshot reflects")
+    roles: Dict[str, str] = Field(default_factory=dict, description="Non-default roles by username")
+    permissions: Dict[str, Dict[str, bool]] = Field(default_factory=dict, description="Custom permissions by username")
+    settings: Dict[str, Any] = Field(default_factory=dict, description="Room settings")
+    hand_raise_queue: list[Dict[str, Any]] = Field(default_factory=list, description="Ordered raised hands")
+    waiting_room: list[Dict[str, Any]] = Field(default_factory=list, description="Users in the waiting room")
+
+
+class RoomStateDeltaPayload(BaseModel):
+    """Single change to the room state, applied on top of a snapshot."""
+    version: int = Field(..., description="Room state version after this change")
+    section: str = Field(..., description="State section (roles, permissions, settings, hand_raise_queue, waiting_room)")
+    key: Optional[str] = Field(None, description="Username or setting the change applies to")
+    value: Any = Field(None, description="New value, or None if the entry was removed")
 
 
 class ErrorPayload(BaseModel):
@@ -620,6 +636,22 @@ class WebRtcMessage(BaseModel):
             room_id=room_id
         )
 
+    @classmethod
+    def create_room_state_delta(
+        cls,
+        room_id: str,
+        version: int,
+        section: str,
+        key: Optional[str],
+        value: Any
+    ) -> "WebRtcMessage":
+        """Create a versioned room state change message."""
+        return cls(
+            type=MessageType.ROOM_STATE_DELTA,
+            payload=RoomStateDeltaPayload(version=version, section=section, key=key, value=value).model_dump(),
+            room_id=room_id
+        )
+
     @classmethod
     def create_error(cls, code: str, message: str, details: Optional[Dict[str, Any]] = None) -> "WebRtcMessage":
         """Create an error message."""
@@ -0,0 +1,233 @@
+"""
+WebRTC Write Buffer
+
+Batches append-only WebRTC documents (chat messages, analytics events) into
+``insert_many`` calls.
+
+Busy rooms produce a steady stream of tiny inserts from every WebSocket
+loop. Documents are queued in memory per collection and flushed when a
+collection reaches the batch size or the flush interval elapses. When the
+buffer is full, producers wait for the next flush instead of growing memory
+without bound. Everything still queued is flushed on shutdown; if the buffer
+is not running, documents are inserted directly.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError
+
+from second_brain_database.config import settings
+from second_brain_database.managers.logging_manager import get_logger
+
+logger = get_logger(prefix="[WebRTC-WriteBuffer]")
+
+# MongoDB duplicate key error (a retried batch re-inserting a document)
+DUPLICATE_KEY_ERROR = 11000
+
+
+class WebRtcWriteBuffer:
+    """
+    Buffers inserts per collection and writes them with ``insert_many``.
+
+    Attributes:
+        flush_interval: Seconds between background flushes
+        max_batch_size: Queued documents in one collection that trigger an early flush
+        max_pending: Queued documents across collections before producers wait
+        max_retries: Flush attempts before a failing batch is dropped
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 1.0,
+        max_batch_size: int = 500,
+        max_pending: int = 10000,
+        max_retries: int = 3,
+        backpressure_timeout: float = 5.0,
+    ):
+        """
+        Initialize the write buffer.
+
+        Args:
+            flush_interval: Seconds between background flushes
+            max_batch_size: Queued documents in one collection that trigger an early flush
+            max_pending: Queued documents across collections before producers wait
+            max_retries: Flush attempts before a failing batch is dropped
+            backpressure_timeout: Seconds a producer waits for room before inserting directly
+        """
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.backpressure_timeout = backpressure_timeout
+
+        self._collections: Dict[str, AsyncIOMotorCollection] = {}
+        self._documents: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending = 0
+        self._failed_attempts: Dict[str, int] = {}
+
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background flusher is active."""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        """Number of documents waiting to be flushed."""
+        return self._pending
+
+    async def start(self) -> None:
+        """Start the background flush loop."""
+        if self.running:
+            return
+
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+        logger.info(
+            f"Write buffer started (interval: {self.flush_interval}s, "
+            f"max batch: {self.max_batch_size}, max pending: {self.max_pending})"
+        )
+
+    async def stop(self) -> None:
+        """Stop the flush loop and persist everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        flushed = await self.flush()
+
+        # Release any producer still waiting for room
+        if self._drained is not None:
+            self._drained.set()
+
+        logger.info(f"Write buffer stopped, flushed {flushed} pending documents")
+
+    async def insert(self, collection: AsyncIOMotorCollection, document: Dict[str, Any]) -> None:
+        """
+        Queue a document for insertion.
+
+        Waits for the next flush when the buffer is full. If no room frees up
+        within ``backpressure_timeout``, the document is inserted directly.
+
+        Args:
+            collection: Target collection
+            document: Document to insert
+        """
+        if not self.running:
+            await collection.insert_one(document)
+            return
+
+        if self._pending >= self.max_pending:
+            self._wakeup.set()
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), timeout=self.backpressure_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Write buffer still full after {self.backpressure_timeout}s, inserting directly",
+                    extra={"collection": collection.name, "pending": self._pending},
+                )
+                await collection.insert_one(document)
+                return
+
+        self._collections[collection.name] = collection
+        batch = self._documents.setdefault(collection.name, [])
+        batch.append(document)
+        self._pending += 1
+
+        if len(batch) >= self.max_batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """
+        Insert all buffered documents.
+
+        Returns:
+            Number of documents written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batches, self._documents = self._documents, {}
+            self._pending = 0
+
+            written = 0
+            for collection_name, documents in batches.items():
+                written += await self._write_batch(collection_name, documents)
+
+            if self._drained is not None and self._pending < self.max_pending:
+                self._drained.set()
+
+            return written
+
+    async def _write_batch(self, collection_name: str, documents: List[Dict[str, Any]]) -> int:
+        """Insert one collection's documents, requeueing on transient failure."""
+        collection = self._collections[collection_name]
+
+        try:
+            await collection.insert_many(documents, ordered=False)
+            self._failed_attempts.pop(collection_name, None)
+            return len(documents)
+
+        except BulkWriteError as e:
+            # Unordered inserts carry on past bad documents; only report real failures
+            write_errors = e.details.get("writeErrors", [])
+            failures = [err for err in write_errors if err.get("code") != DUPLICATE_KEY_ERROR]
+            if failures:
+                logger.error(
+                    f"Dropped {len(failures)} documents for {collection_name}: {failures[0].get('errmsg')}",
+                    extra={"collection": collection_name, "failed": len(failures)},
+                )
+            self._failed_attempts.pop(collection_name, None)
+            return e.details.get("nInserted", len(documents) - len(write_errors))
+
+        except Exception as e:
+            attempts = self._failed_attempts.get(collection_name, 0) + 1
+            if attempts >= self.max_retries:
+                logger.error(
+                    f"Dropping {len(documents)} documents for {collection_name} "
+                    f"after {attempts} failed flushes: {e}",
+                    exc_info=True,
+                )
+                self._failed_attempts.pop(collection_name, None)
+            else:
+                logger.warning(f"Flush to {collection_name} failed, will retry: {e}")
+                self._failed_attempts[collection_name] = attempts
+                self._documents[collection_name] = documents + self._documents.get(collection_name, [])
+                self._pending += len(documents)
+            return 0
+
+    async def _run(self) -> None:
+        """Background loop flushing on interval or when a batch fills."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Unexpected flush error: {e}", exc_info=True)
+
+
+# Global write buffer instance
+webrtc_write_buffer = WebRtcWriteBuffer(
+    flush_interval=settings.WEBRTC_PERSIST_FLUSH_INTERVAL,
+    max_batch_size=settings.WEBRTC_PERSIST_MAX_BATCH,
+    max_pending=settings.WEBRTC_PERSIST_MAX_PENDING,
+)
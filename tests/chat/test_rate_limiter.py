@@ -37,11 +37,7 @@ class TestChatRateLimiter:
         
         redis_manager = MagicMock()
         mock_redis = AsyncMock()
-        mock_pipeline = AsyncMock()
-        mock_pipeline.execute = AsyncMock(return_value=[None, 5])  # 5 requests in window
-        mock_redis.pipeline.return_value = mock_pipeline
-        mock_redis.zadd = AsyncMock()
-        mock_redis.expire = AsyncMock()
+        redis_manager.run_script = AsyncMock(return_value=[1, 6, 0, 60000])  # 5 requests in window before this one
         redis_manager.get_redis = AsyncMock(return_value=mock_redis)
         
         limiter = ChatRateLimiter(redis_manager)
@@ -59,15 +55,7 @@ class TestChatRateLimiter:
         
         redis_manager = MagicMock()
         mock_redis = MagicMock()
-        
-        # Create async mock pipeline
-        mock_pipeline = MagicMock()
-        mock_pipeline.zremrangebyscore = MagicMock(return_value=mock_pipeline)
-        mock_pipeline.zcard = MagicMock(return_value=mock_pipeline)
-        mock_pipeline.execute = AsyncMock(return_value=[None, 21])  # 21 requests in window
-        
-        mock_redis.pipeline = MagicMock(return_value=mock_pipeline)
-        mock_redis.zrange = AsyncMock(return_value=[(b"req", 1000000)])
+        redis_manager.run_script = AsyncMock(return_value=[0, 20, 30000, 30000])  # Window full
         redis_manager.get_redis = AsyncMock(return_value=mock_redis)
         
         limiter = ChatRateLimiter(redis_manager)
@@ -85,11 +73,7 @@ class TestChatRateLimiter:
         
         redis_manager = MagicMock()
         mock_redis = AsyncMock()
-        mock_pipeline = AsyncMock()
-        mock_pipeline.execute = AsyncMock(return_value=[None, 19])  # 19 requests, next will be 20th
-        mock_redis.pipeline.return_value = mock_pipeline
-        mock_redis.zadd = AsyncMock()
-        mock_redis.expire = AsyncMock()
+        redis_manager.run_script = AsyncMock(return_value=[1, 20, 0, 60000])  # 19 requests, next will be 20th
         redis_manager.get_redis = AsyncMock(return_value=mock_redis)
         
         limiter = ChatRateLimiter(redis_manager)
@@ -108,11 +92,7 @@ class TestChatRateLimiter:
         
         redis_manager = MagicMock()
         mock_redis = AsyncMock()
-        mock_pipeline = AsyncMock()
-        mock_pipeline.execute = AsyncMock(return_value=[None, 3])
-        mock_redis.pipeline.return_value = mock_pipeline
-        mock_redis.zadd = AsyncMock()
-        mock_redis.expire = AsyncMock()
+        redis_manager.run_script = AsyncMock(return_value=[1, 4, 0, 3600000])
         redis_manager.get_redis = AsyncMock(return_value=mock_redis)
         
         limiter = ChatRateLimiter(redis_manager)
@@ -130,15 +110,7 @@ class TestChatRateLimiter:
         
         redis_manager = MagicMock()
         mock_redis = MagicMock()
-        
-        # Create async mock pipeline
-        mock_pipeline = MagicMock()
-        mock_pipeline.zremrangebyscore = MagicMock(return_value=mock_pipeline)
-        mock_pipeline.zcard = MagicMock(return_value=mock_pipeline)
-        mock_pipeline.execute = AsyncMock(return_value=[None, 6])
-        
-        mock_redis.pipeline = MagicMock(return_value=mock_pipeline)
-        mock_redis.zrange = AsyncMock(return_value=[(b"req", 1000000)])
+        redis_manager.run_script = AsyncMock(return_value=[0, 5, 1000, 1000])  # Window full
         redis_manager.get_redis = AsyncMock(return_value=mock_redis)
         
         limiter = ChatRateLimiter(redis_manager)
@@ -156,9 +128,7 @@ class TestChatRateLimiter:
         
         redis_manager = MagicMock()
         mock_redis = AsyncMock()
-        mock_redis.zremrangebyscore = AsyncMock()
-        mock_redis.zcard = AsyncMock(return_value=15)
-        mock_redis.zrange = AsyncMock(return_value=[(b"req", 1000000)])
+        redis_manager.run_script = AsyncMock(return_value=[1, 15, 0, 30000])
         redis_manager.get_redis = AsyncMock(return_value=mock_redis)
         
         limiter = ChatRateLimiter(redis_manager)
@@ -178,9 +148,7 @@ class TestChatRateLimiter:
         
         redis_manager = MagicMock()
         mock_redis = AsyncMock()
-        mock_redis.zremrangebyscore = AsyncMock()
-        mock_redis.zcard = AsyncMock(return_value=2)
-        mock_redis.zrange = AsyncMock(return_value=[(b"req", 1000000)])
+        redis_manager.run_script = AsyncMock(return_value=[1, 2, 0, 1000000])
         redis_manager.get_redis = AsyncMock(return_value=mock_redis)
         
         limiter = ChatRateLimiter(redis_manager)
@@ -200,8 +168,7 @@ class TestChatRateLimiter:
         
         redis_manager = MagicMock()
         mock_redis = AsyncMock()
-        mock_redis.zremrangebyscore = AsyncMock()
-        mock_redis.zcard = AsyncMock(return_value=0)
+        redis_manager.run_script = AsyncMock(return_value=[1, 0, 0, 0])
         redis_manager.get_redis = AsyncMock(return_value=mock_redis)
         
         limiter = ChatRateLimiter(redis_manager)
@@ -249,20 +216,16 @@ class TestChatRateLimiter:
         
         redis_manager = MagicMock()
         mock_redis = AsyncMock()
-        mock_pipeline = AsyncMock()
         
         # User 1 at boundary
-        mock_pipeline.execute = AsyncMock(return_value=[None, 19])
-        mock_redis.pipeline.return_value = mock_pipeline
-        mock_redis.zadd = AsyncMock()
-        mock_redis.expire = AsyncMock()
+        redis_manager.run_script = AsyncMock(return_value=[1, 20, 0, 60000])
         redis_manager.get_redis = AsyncMock(return_value=mock_redis)
         
         limiter = ChatRateLimiter(redis_manager)
         result1 = await limiter.check_message_rate_limit("user_1")
         
         # User 2 under limit
-        mock_pipeline.execute = AsyncMock(return_value=[None, 5])
+        redis_manager.run_script = AsyncMock(return_value=[1, 6, 0, 60000])
         result2 = await limiter.check_message_rate_limit("user_2")
         
         assert result1 is True
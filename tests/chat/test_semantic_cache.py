@@ -0,0 +1,141 @@
+"""Unit tests for the semantic query cache."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from second_brain_database.chat.services.cache_manager import QueryCacheManager
+from second_brain_database.chat.services.semantic_cache import SemanticCacheIndex
+
+
+def _vector(*values):
+    return SemanticCacheIndex.normalize(list(values))
+
+
+class TestSemanticCacheIndex:
+    """Test SemanticCacheIndex functionality."""
+
+    def test_search_returns_match_above_threshold(self):
+        """Test that a near-duplicate vector matches its cache key."""
+        index = SemanticCacheIndex(similarity_threshold=0.9)
+        index.add("kb_1", "chat:cache:a", _vector(1.0, 0.0, 0.0))
+        index.add("kb_1", "chat:cache:b", _vector(0.0, 1.0, 0.0))
+
+        match = index.search("kb_1", _vector(0.99, 0.05, 0.0))
+
+        assert match is not None
+        assert match[0] == "chat:cache:a"
+        assert match[1] > 0.9
+
+    def test_search_below_threshold_misses(self):
+        """Test that dissimilar queries do not match."""
+        index = SemanticCacheIndex(similarity_threshold=0.95)
+        index.add("kb_1", "chat:cache:a", _vector(1.0, 0.0))
+
+        assert index.search("kb_1", _vector(0.6, 0.8)) is None
+
+    def test_search_is_scoped_per_knowledge_base(self):
+        """Test that entries from another knowledge base are never returned."""
+        index = SemanticCacheIndex(similarity_threshold=0.9)
+        index.add("kb_1", "chat:cache:a", _vector(1.0, 0.0))
+
+        assert index.search("kb_2", _vector(1.0, 0.0)) is None
+
+    def test_lru_eviction_per_knowledge_base(self):
+        """Test that the least recently used entry is evicted at capacity."""
+        index = SemanticCacheIndex(similarity_threshold=0.99, max_entries_per_kb=2)
+        index.add("kb_1", "chat:cache:a", _vector(1.0, 0.0, 0.0))
+        index.add("kb_1", "chat:cache:b", _vector(0.0, 1.0, 0.0))
+
+        # Touch "a" so "b" becomes least recently used
+        assert index.search("kb_1", _vector(1.0, 0.0, 0.0))[0] == "chat:cache:a"
+        index.add("kb_1", "chat:cache:c", _vector(0.0, 0.0, 1.0))
+
+        assert index.search("kb_1", _vector(0.0, 1.0, 0.0)) is None
+        assert index.search("kb_1", _vector(1.0, 0.0, 0.0))[0] == "chat:cache:a"
+
+    def test_invalidate_drops_knowledge_base(self):
+        """Test that invalidation removes every entry for a knowledge base."""
+        index = SemanticCacheIndex(similarity_threshold=0.9)
+        index.add("kb_1", "chat:cache:a", _vector(1.0, 0.0))
+
+        index.invalidate("kb_1")
+
+        assert index.search("kb_1", _vector(1.0, 0.0)) is None
+
+    def test_normalize_rejects_zero_vector(self):
+        """Test that zero vectors cannot be indexed."""
+        assert SemanticCacheIndex.normalize([0.0, 0.0]) is None
+
+
+class TestQueryCacheManagerSemantic:
+    """Test QueryCacheManager semantic lookups."""
+
+    def _make_manager(self, embeddings):
+        redis_manager = MagicMock()
+        store = {}
+
+        async def _get(key):
+            return store.get(key)
+
+        async def _set_json(key, value, expiry=None):
+            store[key] = value
+
+        redis_manager.get = AsyncMock(side_effect=_get)
+        redis_manager.set_json = AsyncMock(side_effect=_set_json)
+        mock_redis = MagicMock()
+        mock_pipeline = MagicMock()
+        mock_pipeline.execute = AsyncMock(return_value=[1, True])
+        mock_redis.pipeline.return_value = mock_pipeline
+        redis_manager.get_redis = AsyncMock(return_value=mock_redis)
+
+        embed_fn = AsyncMock(side_effect=lambda query: embeddings[query])
+        manager = QueryCacheManager(
+            redis_manager,
+            semantic_index=SemanticCacheIndex(similarity_threshold=0.9),
+            embed_fn=embed_fn,
+        )
+        return manager, store, embed_fn
+
+    @pytest.mark.asyncio
+    async def test_paraphrase_hits_cached_response(self):
+        """Test that a paraphrased query returns the cached answer."""
+        manager, _, _ = self._make_manager(
+            {
+                "What is the refund policy?": [1.0, 0.0, 0.1],
+                "what's your refund policy": [0.98, 0.02, 0.12],
+            }
+        )
+
+        assert await manager.get_cached_response("What is the refund policy?", "kb_1") is None
+        await manager.cache_response("What is the refund policy?", {"generation": "30 days"}, "kb_1")
+
+        cached = await manager.get_cached_response("what's your refund policy", "kb_1")
+
+        assert cached == {"generation": "30 days"}
+
+    @pytest.mark.asyncio
+    async def test_reuses_embedding_computed_on_miss(self):
+        """Test that caching after a miss does not embed the query twice."""
+        manager, _, embed_fn = self._make_manager({"hello": [1.0, 0.0]})
+
+        await manager.get_cached_response("hello", None)
+        await manager.cache_response("hello", {"generation": "hi"}, None)
+
+        assert embed_fn.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_response_is_pruned(self):
+        """Test that a semantic match whose Redis entry is gone is a miss."""
+        manager, store, _ = self._make_manager(
+            {
+                "q1": [1.0, 0.0],
+                "q2": [0.99, 0.01],
+            }
+        )
+
+        await manager.get_cached_response("q1", "kb_1")
+        await manager.cache_response("q1", {"generation": "a"}, "kb_1")
+        store.clear()
+
+        assert await manager.get_cached_response("q2", "kb_1") is None
+        assert manager.semantic_index.search("kb_1", _vector(1.0, 0.0)) is None
@@ -0,0 +1,335 @@
+"""Unit tests for SessionStatisticsManager incremental statistics."""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime, timedelta
+
+from pymongo import InsertOne
+
+from second_brain_database.chat.models.enums import MessageStatus
+from second_brain_database.chat.models.request_models import ChatMessageCreate
+from second_brain_database.chat.services.chat_service import ChatService
+from second_brain_database.chat.services.statistics_manager import SessionStatisticsManager
+
+
+def _make_manager():
+    db = MagicMock()
+    db.chat_sessions.update_one = AsyncMock()
+    db.chat_sessions.find_one = AsyncMock()
+    db.chat_messages.find = MagicMock()
+    return SessionStatisticsManager(db), db
+
+
+def _evaluate(expression, document):
+    """Evaluate the aggregation operators used by build_exchange_update."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return document.get(expression[1:])
+    if isinstance(expression, dict) and len(expression) == 1:
+        operator, operands = next(iter(expression.items()))
+        values = [_evaluate(operand, document) for operand in operands]
+        if operator == "$ifNull":
+            return values[0] if values[0] is not None else values[1]
+        if operator == "$add":
+            return sum(values)
+        if operator == "$subtract":
+            return values[0] - values[1]
+        if operator == "$divide":
+            return values[0] / values[1]
+        if operator in ("$min", "$max"):
+            present = [value for value in values if value is not None]
+            return (min if operator == "$min" else max)(present) if present else None
+    return expression
+
+
+class _FakeCursor:
+    def __init__(self, documents):
+        self._documents = documents
+
+    def sort(self, field, direction):
+        self._documents.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    async def to_list(self, length):
+        return self._documents
+
+
+class _FakeCollection:
+    """In-memory collection keyed by document id."""
+
+    def __init__(self):
+        self.documents = {}
+
+    async def insert_one(self, document):
+        self.documents[document["id"]] = dict(document)
+
+    def find(self, query):
+        field, condition = next(iter(query.items()))
+        if isinstance(condition, dict):
+            matches = [doc for doc in self.documents.values() if doc[field] in condition["$in"]]
+        else:
+            matches = [doc for doc in self.documents.values() if doc[field] == condition]
+        return _FakeCursor([dict(doc) for doc in matches])
+
+    async def find_one(self, query, projection=None):
+        document = self.documents.get(query["id"])
+        if document is None:
+            return None
+        return {key: value for key, value in document.items() if not projection or projection.get(key)}
+
+    async def update_one(self, query, update):
+        document = self.documents.get(query["id"])
+        if document is None:
+            return
+        for field, condition in query.items():
+            if field != "id" and condition.get("$exists") != (field in document):
+                return
+        for stage in update if isinstance(update, list) else [update]:
+            values = {key: _evaluate(value, document) for key, value in stage["$set"].items()}
+            document.update(values)
+
+
+class _DirectWriteBehind:
+    """Applies buffered writes immediately, like the buffer when it isn't running."""
+
+    async def put_document(self, collection, document):
+        collection.documents[document["id"]] = dict(document)
+
+    async def put_operation(self, collection, operation):
+        if isinstance(operation, InsertOne):
+            await collection.insert_one(operation._doc)
+        else:
+            await collection.update_one(operation._filter, operation._doc)
+
+
+def _make_chat_service():
+    db = SimpleNamespace(
+        chat_sessions=_FakeCollection(),
+        chat_messages=_FakeCollection(),
+        token_usage=_FakeCollection(),
+    )
+    service = ChatService.__new__(ChatService)
+    service.db = db
+    service.settings = SimpleNamespace(CHAT_STREAM_CHECKPOINT_INTERVAL=0, OLLAMA_HOST="http://ollama")
+    service.model_id = "test-model"
+    service.statistics_manager = SessionStatisticsManager(db)
+    service.write_behind = _DirectWriteBehind()
+    service.metrics_tracker = AsyncMock()
+    service.conversation_manager = AsyncMock()
+    service.ollama_manager = MagicMock()
+    service.ollama_manager.count_tokens.return_value = 5
+    service.ollama_manager.estimate_cost.return_value = 0.5
+    service.get_conversation_history = AsyncMock(return_value=[])
+    service.get_session = AsyncMock(return_value=None)
+
+    async def astream(**kwargs):
+        yield "Hello"
+        yield " there"
+
+    service.master_workflow_graph = MagicMock(astream=astream)
+    return service, db
+
+
+async def _exchange(service, session_id):
+    async for _ in service.stream_chat_response(session_id, "user_1", ChatMessageCreate(content="Hi")):
+        pass
+
+
+class TestSessionStatisticsManager:
+    """Test SessionStatisticsManager functionality."""
+
+    def test_build_exchange_update_is_single_pipeline(self):
+        """Test that an exchange is folded in with one pipeline update."""
+        manager, db = _make_manager()
+        user_at = datetime(2024, 1, 1, 12, 0, 0)
+        completed_at = user_at + timedelta(seconds=3)
+
+        query, pipeline = manager.build_exchange_update(
+            session_id="session_1",
+            user_message_at=user_at,
+            completed_at=completed_at,
+            total_tokens=120,
+            cost=0.01,
+            response_time=3.0,
+        )
+
+        assert query == {"id": "session_1", "user_messages": {"$exists": True}}
+        assert len(pipeline) == 2
+
+        counters = pipeline[0]["$set"]
+        assert counters["message_count"] == {"$add": [{"$ifNull": ["$message_count", 0]}, 2]}
+        assert counters["total_tokens"] == {"$add": [{"$ifNull": ["$total_tokens", 0]}, 120]}
+        assert counters["last_message_at"] == {"$max": ["$last_message_at", completed_at]}
+        assert counters["first_message_at"] == {"$min": ["$first_message_at", user_at]}
+        assert counters["response_count"] == {"$add": [{"$ifNull": ["$response_count", 0]}, 1]}
+        assert "average_response_time" in pipeline[1]["$set"]
+
+    def test_build_exchange_update_without_response_time_keeps_mean(self):
+        """Test that failed exchanges are counted without touching the mean."""
+        manager, db = _make_manager()
+        now = datetime(2024, 1, 1, 12, 0, 0)
+
+        _, pipeline = manager.build_exchange_update(
+            session_id="session_1",
+            user_message_at=now,
+            completed_at=now,
+        )
+
+        assert len(pipeline) == 1
+        assert "response_count" not in pipeline[0]["$set"]
+        assert "average_response_time" not in pipeline[0]["$set"]
+
+    @pytest.mark.asyncio
+    async def test_get_session_statistics_reads_counters(self):
+        """Test that maintained counters are returned without recomputation."""
+        manager, db = _make_manager()
+        first = datetime(2024, 1, 1, 12, 0, 0)
+        db.chat_sessions.find_one.return_value = {
+            "message_count": 4,
+            "total_tokens": 300,
+            "total_cost": 0.02,
+            "first_message_at": first,
+            "last_message_at": first + timedelta(minutes=2),
+            "user_messages": 2,
+            "assistant_messages": 2,
+            "response_count": 2,
+            "average_response_time": 2.5,
+        }
+
+        stats = await manager.get_session_statistics("session_1")
+
+        assert stats["message_count"] == 4
+        assert stats["average_response_time"] == 2.5
+        assert stats["conversation_duration"] == 120.0
+        db.chat_messages.find.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_session_statistics_missing_session(self):
+        """Test that a missing session returns None."""
+        manager, db = _make_manager()
+        db.chat_sessions.find_one.return_value = None
+
+        assert await manager.get_session_statistics("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_get_session_statistics_backfills_legacy_session(self):
+        """Test that a session without maintained counters is recomputed and stored once."""
+        manager, db = _make_manager()
+        created = datetime(2024, 1, 1, 12, 0, 0)
+        db.chat_sessions.find_one.return_value = {"message_count": 0, "total_tokens": 0}
+        messages = [
+            {"id": "m1", "role": "user", "created_at": created},
+            {"id": "m2", "role": "assistant", "created_at": created, "updated_at": created + timedelta(seconds=4)},
+        ]
+        db.chat_messages.find.return_value.sort.return_value.to_list = AsyncMock(return_value=messages)
+        db.token_usage.find.return_value.to_list = AsyncMock(
+            return_value=[{"message_id": "m2", "total_tokens": 50, "cost": 0.005}]
+        )
+
+        stats = await manager.get_session_statistics("session_1")
+
+        assert stats["message_count"] == 2
+        assert stats["total_tokens"] == 50
+        assert stats["average_response_time"] == 4.0
+        stored = db.chat_sessions.update_one.await_args.args[1]["$set"]
+        assert stored["user_messages"] == 1
+        assert stored["response_count"] == 1
+
+
+class TestExchangeStatistics:
+    """Test statistics produced by stream_chat_response exchanges."""
+
+    @pytest.mark.asyncio
+    async def test_two_exchanges_on_new_session(self):
+        """Test that each exchange is counted once on a session with counters."""
+        service, db = _make_chat_service()
+        await db.chat_sessions.insert_one(
+            {
+                "id": "s1",
+                "message_count": 0,
+                "total_tokens": 0,
+                "total_cost": 0.0,
+                "last_message_at": None,
+                **SessionStatisticsManager.initial_statistics(),
+            }
+        )
+
+        await _exchange(service, "s1")
+        await _exchange(service, "s1")
+
+        stats = await service.statistics_manager.get_session_statistics("s1")
+        assert stats["message_count"] == 4
+        assert stats["user_messages"] == 2
+        assert stats["assistant_messages"] == 2
+        assert stats["response_count"] == 2
+        assert stats["total_tokens"] == 20
+        assert stats["total_cost"] == 1.0
+        assert stats["first_message_at"] is not None
+
+    @pytest.mark.asyncio
+    async def test_two_exchanges_on_legacy_session(self):
+        """Test that a session without counters keeps its earlier messages in the statistics."""
+        service, db = _make_chat_service()
+        created = datetime(2024, 1, 1, 12, 0, 0)
+        await db.chat_sessions.insert_one(
+            {"id": "s1", "message_count": 2, "total_tokens": 30, "total_cost": 0.1, "last_message_at": created}
+        )
+        await db.chat_messages.insert_one({"id": "old_user", "session_id": "s1", "role": "USER", "created_at": created})
+        await db.chat_messages.insert_one(
+            {
+                "id": "old_reply",
+                "session_id": "s1",
+                "role": "ASSISTANT",
+                "created_at": created,
+                "updated_at": created + timedelta(seconds=2),
+            }
+        )
+        await db.token_usage.insert_one(
+            {"id": "t0", "message_id": "old_reply", "session_id": "s1", "total_tokens": 30, "cost": 0.1}
+        )
+
+        await _exchange(service, "s1")
+        await _exchange(service, "s1")
+
+        stats = await service.statistics_manager.get_session_statistics("s1")
+        assert stats["message_count"] == 6
+        assert stats["user_messages"] == 3
+        assert stats["assistant_messages"] == 3
+        assert stats["response_count"] == 3
+        assert stats["total_tokens"] == 50
+        assert stats["first_message_at"] == created
+
+        # Counters are now stored, so a further exchange is folded in incrementally
+        await _exchange(service, "s1")
+        stats = await service.statistics_manager.get_session_statistics("s1")
+        assert stats["message_count"] == 8
+        assert stats["user_messages"] == 4
+
+    @pytest.mark.asyncio
+    async def test_failure_after_completion_counts_once(self):
+        """Test that a failing follow-up step keeps the completed reply and counts it once."""
+        service, db = _make_chat_service()
+        await db.chat_sessions.insert_one(
+            {
+                "id": "s1",
+                "message_count": 0,
+                "total_tokens": 0,
+                "total_cost": 0.0,
+                "last_message_at": None,
+                **SessionStatisticsManager.initial_statistics(),
+            }
+        )
+        service.conversation_manager.append_message.side_effect = [None, RuntimeError("redis down")]
+
+        with pytest.raises(RuntimeError):
+            await _exchange(service, "s1")
+
+        replies = [doc for doc in db.chat_messages.documents.values() if doc["role"] == "ASSISTANT"]
+        assert len(replies) == 1
+        assert replies[0]["status"] == MessageStatus.COMPLETED
+        assert replies[0]["content"] == "Hello there"
+
+        stats = await service.statistics_manager.get_session_statistics("s1")
+        assert stats["message_count"] == 2
+        assert stats["response_count"] == 1
+        assert stats["total_tokens"] == 10
@@ -0,0 +1,110 @@
+"""Unit tests for the chat write-behind buffer."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from pymongo import InsertOne, ReplaceOne
+
+from second_brain_database.chat.services.write_behind import ChatWriteBehindBuffer
+
+
+def _collection(name):
+    collection = MagicMock()
+    collection.name = name
+    collection.bulk_write = AsyncMock()
+    collection.replace_one = AsyncMock()
+    return collection
+
+
+class TestChatWriteBehindBuffer:
+    """Test ChatWriteBehindBuffer functionality."""
+
+    @pytest.mark.asyncio
+    async def test_writes_directly_when_not_running(self):
+        """Test that a stopped buffer writes straight through."""
+        buffer = ChatWriteBehindBuffer()
+        messages = _collection("chat_messages")
+
+        await buffer.put_document(messages, {"id": "m1", "content": "hi"})
+
+        messages.replace_one.assert_awaited_once_with({"id": "m1"}, {"id": "m1", "content": "hi"}, upsert=True)
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_coalesces_document_versions(self):
+        """Test that repeated versions of a message become one upsert."""
+        buffer = ChatWriteBehindBuffer(flush_interval=60)
+        messages = _collection("chat_messages")
+        await buffer.start()
+
+        try:
+            await buffer.put_document(messages, {"id": "m1", "status": "pending"})
+            await buffer.put_document(messages, {"id": "m1", "status": "completed"})
+            assert buffer.pending == 1
+
+            assert await buffer.flush() == 1
+        finally:
+            await buffer.stop()
+
+        ops = messages.bulk_write.await_args.args[0]
+        assert ops == [ReplaceOne({"id": "m1"}, {"id": "m1", "status": "completed"}, upsert=True)]
+        messages.replace_one.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_batches_operations_per_collection(self):
+        """Test that queued operations are bulk written per collection."""
+        buffer = ChatWriteBehindBuffer(flush_interval=60)
+        usage = _collection("token_usage")
+        await buffer.start()
+
+        await buffer.put_operation(usage, InsertOne({"id": "u1"}))
+        await buffer.put_operation(usage, InsertOne({"id": "u2"}))
+        await buffer.stop()
+
+        usage.bulk_write.assert_awaited_once()
+        assert len(usage.bulk_write.await_args.args[0]) == 2
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_requeued(self):
+        """Test that a transient failure keeps the writes for the next flush."""
+        buffer = ChatWriteBehindBuffer(flush_interval=60)
+        usage = _collection("token_usage")
+        usage.bulk_write.side_effect = [Exception("connection reset"), None]
+        await buffer.start()
+
+        try:
+            await buffer.put_operation(usage, InsertOne({"id": "u1"}))
+            assert await buffer.flush() == 0
+            assert buffer.pending == 1
+
+            assert await buffer.flush() == 1
+        finally:
+            await buffer.stop()
+
+        assert usage.bulk_write.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_requeued_document_does_not_overwrite_newer_version(self):
+        """Test that a failed upsert is dropped once a newer version is buffered."""
+        buffer = ChatWriteBehindBuffer(flush_interval=60)
+        messages = _collection("chat_messages")
+        messages.bulk_write.side_effect = [Exception("connection reset"), None]
+        await buffer.start()
+
+        try:
+            await buffer.put_document(messages, {"id": "m1", "status": "pending"})
+            await buffer.put_operation(messages, InsertOne({"id": "m2"}))
+            assert await buffer.flush() == 0
+
+            await buffer.put_document(messages, {"id": "m1", "status": "completed"})
+            assert buffer.pending == 2
+            assert await buffer.flush() == 2
+        finally:
+            await buffer.stop()
+
+        ops = messages.bulk_write.await_args.args[0]
+        assert ops == [
+            ReplaceOne({"id": "m1"}, {"id": "m1", "status": "completed"}, upsert=True),
+            InsertOne({"id": "m2"}),
+        ]
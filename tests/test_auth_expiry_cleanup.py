@@ -0,0 +1,65 @@
+"""Unit tests for the server-side expiry cleanups in auth periodics."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from second_brain_database.routes.auth.periodics import cleanup
+from second_brain_database.routes.auth.periodics.cleanup import clear_expired_rentals, pull_expired_entries
+
+NOW = "2026-01-01T00:00:00+00:00"
+
+
+@pytest.fixture
+def users():
+    collection = MagicMock()
+    collection.update_many = AsyncMock(return_value=MagicMock(modified_count=3))
+    collection.find = MagicMock(side_effect=AssertionError("cleanup must not stream user documents"))
+    return collection
+
+
+class TestExpiryCleanupQueries:
+    """Test that expired entries are removed with one update per array."""
+
+    @pytest.mark.asyncio
+    async def test_pull_expired_entries_uses_expiry_range(self, users):
+        """Test that only users with an expired entry are matched and entries are pulled in place."""
+        assert await pull_expired_entries(users, "sessions", NOW) == 3
+
+        users.update_many.assert_awaited_once_with(
+            {"sessions.expires_at": {"$lte": NOW}},
+            {"$pull": {"sessions": {"expires_at": {"$lte": NOW}}}},
+        )
+
+    @pytest.mark.asyncio
+    async def test_clear_expired_rentals_keeps_owned_items_selected(self, users):
+        """Test that the rental pipeline excludes owned avatars from the ids it unsets."""
+        assert await clear_expired_rentals(users, "avatars_rented", "avatars", "avatar_id", NOW, "avatars_owned") == 3
+
+        query, pipeline = users.update_many.await_args.args
+        assert query == {"avatars_rented.valid_till": {"$lte": NOW}}
+        expired_ids = pipeline[0]["$set"]["_expired_rental_ids"]["$setDifference"]
+        assert expired_ids[1]["$map"]["input"] == {"$ifNull": ["$avatars_owned", []]}
+        assert set(pipeline[1]["$set"]) == {"avatars_rented", "avatars"}
+        assert pipeline[-1] == {"$unset": "_expired_rental_ids"}
+
+    @pytest.mark.asyncio
+    async def test_periodic_temporary_access_cleanup_pulls_each_array(self, users):
+        """Test that a cleanup pass issues one update per token array and records the run."""
+        with (
+            patch.object(cleanup.db_manager, "get_collection", return_value=users),
+            patch.object(cleanup, "get_last_temporary_access_tokens_cleanup_time", AsyncMock(return_value=None)),
+            patch.object(cleanup, "set_last_temporary_access_tokens_cleanup_time", AsyncMock()) as set_last,
+            patch.object(cleanup.asyncio, "sleep", AsyncMock(side_effect=asyncio.CancelledError)),
+        ):
+            with pytest.raises(asyncio.CancelledError):
+                await cleanup.periodic_temporary_access_tokens_cleanup()
+
+        pulled = [call.args[1]["$pull"] for call in users.update_many.await_args_list]
+        assert [next(iter(p)) for p in pulled] == [
+            "temporary_ip_access_tokens",
+            "temporary_user_agent_access_tokens",
+            "temporary_ip_bypasses",
+        ]
+        set_last.assert_awaited_once()
@@ -1,6 +1,7 @@
 """Tests for ConversationHistoryManager."""
 
 import asyncio
+import json
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -20,15 +21,26 @@ async def test_conversation_history_manager_init():
     assert manager.cache_ttl == 3600
 
 
+def _mock_redis_client(cached_entries=None):
+    """Build a mock Redis client with list and pipeline support."""
+    redis_client = MagicMock()
+    redis_client.lrange = AsyncMock(return_value=cached_entries or [])
+    pipeline = MagicMock()
+    pipeline.execute = AsyncMock(return_value=[])
+    redis_client.pipeline = MagicMock(return_value=pipeline)
+    return redis_client, pipeline
+
+
 @pytest.mark.asyncio
 async def test_get_history_from_cache():
-    """Test retrieving conversation history from Redis cache."""
+    """Test retrieving conversation history from the Redis list."""
     redis_manager = MagicMock()
     cached_history = [
         {"role": "user", "content": "Hello"},
         {"role": "assistant", "content": "Hi there!"}
     ]
-    redis_manager.get = AsyncMock(return_value=cached_history)
+    redis_client, _ = _mock_redis_client([json.dumps(entry) for entry in cached_history])
+    redis_manager.get_redis = AsyncMock(return_value=redis_client)
     
     manager = ConversationHistoryManager(redis_manager)
     db = MagicMock()
@@ -36,15 +48,16 @@ async def test_get_history_from_cache():
     result = await manager.get_history("session_123", db)
     
     assert result == cached_history
-    redis_manager.get.assert_called_once_with("chat:history:session_123")
+    redis_client.lrange.assert_called_once_with("chat:history:session_123", -20, -1)
+    db.chat_messages.find.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_get_history_from_database():
-    """Test retrieving conversation history from MongoDB when cache misses."""
+    """Test rebuilding conversation history from MongoDB when the list is missing."""
     redis_manager = MagicMock()
-    redis_manager.get = AsyncMock(return_value=None)
-    redis_manager.set_json = AsyncMock()
+    redis_client, pipeline = _mock_redis_client()
+    redis_manager.get_redis = AsyncMock(return_value=redis_client)
     
     # Mock MongoDB
     db = MagicMock()
@@ -68,8 +81,64 @@ async def test_get_history_from_database():
     ]
     assert result == expected
     
-    # Should cache the result
-    redis_manager.set_json.assert_called_once()
+    # Should rebuild the cached list, oldest first
+    pipeline.rpush.assert_called_once()
+    pushed = [json.loads(entry) for entry in pipeline.rpush.call_args.args[1:]]
+    assert [entry["content"] for entry in pushed] == ["Hello", "Hi there!"]
+    pipeline.ltrim.assert_called_once_with("chat:history:session_123", -20, -1)
+    pipeline.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_append_message_only_extends_existing_list():
+    """Test that appends use RPUSHX and cap the list in one round trip."""
+    redis_manager = MagicMock()
+    redis_client, pipeline = _mock_redis_client()
+    redis_manager.get_redis = AsyncMock(return_value=redis_client)
+    
+    manager = ConversationHistoryManager(redis_manager, max_history=50)
+    await manager.append_message("session_123", "USER", "Hello")
+    
+    pipeline.rpushx.assert_called_once()
+    assert pipeline.rpushx.call_args.args[0] == "chat:history:session_123"
+    assert json.loads(pipeline.rpushx.call_args.args[1])["content"] == "Hello"
+    pipeline.ltrim.assert_called_once_with("chat:history:session_123", -50, -1)
+    pipeline.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_history_applies_token_budget():
+    """Test that the window keeps the newest messages within the token budget."""
+    redis_manager = MagicMock()
+    cached = [
+        {"role": "user", "content": "old question", "tokens": 50},
+        {"role": "assistant", "content": "old answer", "tokens": 50},
+        {"role": "user", "content": "new question", "tokens": 30},
+    ]
+    redis_client, _ = _mock_redis_client([json.dumps(entry) for entry in cached])
+    redis_manager.get_redis = AsyncMock(return_value=redis_client)
+    
+    manager = ConversationHistoryManager(redis_manager, max_history=20, token_budget=90)
+    result = await manager.get_history("session_123", MagicMock())
+    
+    assert result == [
+        {"role": "assistant", "content": "old answer"},
+        {"role": "user", "content": "new question"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_token_budget_always_keeps_newest_message():
+    """Test that an oversized newest message is still returned."""
+    redis_manager = MagicMock()
+    cached = [{"role": "user", "content": "huge question", "tokens": 500}]
+    redis_client, _ = _mock_redis_client([json.dumps(entry) for entry in cached])
+    redis_manager.get_redis = AsyncMock(return_value=redis_client)
+    
+    manager = ConversationHistoryManager(redis_manager, token_budget=100)
+    result = await manager.get_history("session_123", MagicMock())
+    
+    assert result == [{"role": "user", "content": "huge question"}]
 
 
 @pytest.mark.asyncio
@@ -108,7 +177,8 @@ async def test_format_for_llm():
 async def test_get_history_database_error():
     """Test handling database errors gracefully."""
     redis_manager = MagicMock()
-    redis_manager.get = AsyncMock(return_value=None)
+    redis_client, _ = _mock_redis_client()
+    redis_manager.get_redis = AsyncMock(return_value=redis_client)
     
     # Mock MongoDB to raise an error
     db = MagicMock()
@@ -0,0 +1,134 @@
+"""Unit tests for the batched IPAM capacity monitoring pass."""
+
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from second_brain_database.routes.ipam.periodics import capacity_monitoring
+from second_brain_database.routes.ipam.periodics.capacity_monitoring import run_capacity_check
+
+
+class FakeCursor:
+    """Motor-like cursor supporting both to_list and async iteration."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+REGION_A = ObjectId()
+REGION_B = ObjectId()
+
+
+@pytest.fixture
+def collections():
+    regions = MagicMock()
+    regions.aggregate = MagicMock(
+        return_value=FakeCursor(
+            [
+                {"_id": {"user_id": "alice", "country": "Atlantis"}, "allocated": 240, "active": 2},
+                {"_id": {"user_id": "bob", "country": "Atlantis"}, "allocated": 10, "active": 1},
+                {"_id": {"user_id": "bob", "country": "Lemuria"}, "allocated": 3, "active": 0},
+            ]
+        )
+    )
+    regions.find = MagicMock(
+        return_value=FakeCursor(
+            [
+                {"_id": REGION_A, "user_id": "alice", "region_name": "edge", "cidr": "10.0.1.0/24"},
+                {"_id": REGION_B, "user_id": "bob", "region_name": "lab", "cidr": "10.0.2.0/24"},
+            ]
+        )
+    )
+    hosts = MagicMock()
+    hosts.aggregate = MagicMock(return_value=FakeCursor([{"_id": REGION_A, "allocated": 250}]))
+    mappings = MagicMock()
+    mappings.find = MagicMock(
+        return_value=FakeCursor([{"country": "Atlantis", "continent": "Ocean", "x_start": 0, "x_end": 0}])
+    )
+    users = MagicMock()
+    users.find = MagicMock(
+        return_value=FakeCursor([{"user_id": "alice", "email": "alice@example.com", "username": "alice"}])
+    )
+    users.find_one = AsyncMock(side_effect=AssertionError("users must be loaded in one batch"))
+    events = MagicMock()
+    events.insert_many = AsyncMock()
+    events.insert_one = AsyncMock(side_effect=AssertionError("events must be inserted in one batch"))
+
+    by_name = {
+        "ipam_regions": regions,
+        "ipam_hosts": hosts,
+        "continent_country_mapping": mappings,
+        "users": users,
+        "ipam_capacity_events": events,
+    }
+    with (
+        patch.object(capacity_monitoring.db_manager, "get_collection", side_effect=by_name.__getitem__),
+        patch.object(capacity_monitoring, "_notified_countries", set()),
+        patch.object(capacity_monitoring, "_notified_regions", set()),
+        patch.object(capacity_monitoring, "track_capacity_warning_event", AsyncMock()),
+        patch.object(capacity_monitoring.email_manager, "send_html_email", AsyncMock(return_value=True)) as send,
+    ):
+        yield by_name, send
+
+
+async def check():
+    return await run_capacity_check(80, 100, {}, 90, {})
+
+
+class TestCapacityMonitoringPass:
+    """Test utilization batching, threshold evaluation and notification dedupe."""
+
+    @pytest.mark.asyncio
+    async def test_one_query_per_collection_and_batched_events(self, collections):
+        """Test that a pass over several users issues a fixed number of queries."""
+        by_name, send = collections
+
+        assert await check() == 2
+
+        by_name["ipam_regions"].aggregate.assert_called_once()
+        by_name["ipam_hosts"].aggregate.assert_called_once()
+        by_name["users"].find.assert_called_once()
+        events = by_name["ipam_capacity_events"].insert_many.await_args.args[0]
+        assert sorted((e["resource_type"], e["resource_identifier"]) for e in events) == [
+            ("country", "Atlantis"),
+            ("region", str(REGION_A)),
+        ]
+        assert send.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_utilization_matches_thresholds(self, collections):
+        """Test that country and region percentages drive the warning levels."""
+        by_name, send = collections
+
+        await check()
+
+        events = {e["resource_type"]: e for e in by_name["ipam_capacity_events"].insert_many.await_args.args[0]}
+        assert events["country"]["user_id"] == "alice"
+        assert events["country"]["threshold_type"] == "warning"
+        assert events["country"]["utilization_percentage"] == 93.75
+        assert events["region"]["capacity_stats"]["allocated_hosts"] == 250
+        assert "240 / 256" in send.await_args_list[0].args[2]
+
+    @pytest.mark.asyncio
+    async def test_notifications_are_not_repeated(self, collections):
+        """Test that a second pass does not notify again while utilization stays high."""
+        by_name, send = collections
+
+        await check()
+        assert await check() == 0
+
+        assert send.await_count == 2
+        by_name["ipam_capacity_events"].insert_many.assert_awaited_once()
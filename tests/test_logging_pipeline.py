@@ -0,0 +1,157 @@
+"""Unit tests for the queue-backed logging pipeline."""
+
+import logging
+import queue
+import threading
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from second_brain_database.managers import logging_manager
+from second_brain_database.managers.logging_manager import (
+    _LogQueueHandler,
+    _LogQueueListener,
+    _LokiBatchHandler,
+    _SamplingFilter,
+)
+
+
+def make_record(msg="hello", level=logging.INFO, name="Second_Brain_Database", created=1000.0):
+    record = logging.LogRecord(name, level, "/app/ipam_manager.py", 1, msg, None, None)
+    record.created = created
+    return record
+
+
+@pytest.fixture
+def buffer_file(tmp_path):
+    path = str(tmp_path / "loki_buffer.log")
+    with patch.object(logging_manager, "BUFFER_FILE", path):
+        yield path
+
+
+class TestSamplingFilter:
+    """Test per-logger sampling and rate limits."""
+
+    def test_rate_limit_and_sampling_spare_warnings(self):
+        """Test that hot-path INFO records are capped or sampled while warnings always pass."""
+        sampling_filter = _SamplingFilter({"Second_Brain_Database_Requests": 0.0}, {"ipam_manager": 3})
+
+        passed = [sampling_filter.filter(make_record()) for _ in range(10)]
+        assert passed.count(True) == 3
+        assert sampling_filter.filter(make_record(created=1001.0))
+        assert sampling_filter.filter(make_record(level=logging.WARNING))
+
+        assert not sampling_filter.filter(make_record(name="Second_Brain_Database_Requests"))
+        assert sampling_filter.filter(make_record(name="Second_Brain_Database_Requests", level=logging.ERROR))
+
+
+class TestLokiBatchHandler:
+    """Test batched Loki pushes and the buffer file overflow."""
+
+    def test_pushes_full_batches_and_spools_while_loki_is_down(self, buffer_file):
+        """Test that records are sent per batch and failed batches land in the buffer file."""
+        handler = _LokiBatchHandler("http://loki/push", {"app": "test"}, batch_size=3, batch_interval=60)
+        handler._send = MagicMock()
+
+        for i in range(7):
+            handler.handle(make_record(f"ok {i}"))
+        assert handler._send.call_count == 2
+        assert len(handler._batch) == 1
+
+        handler._send.side_effect = OSError("connection refused")
+        handler.flush()
+        handler.handle(make_record("while down"))
+        handler.flush()
+
+        assert handler._send.call_count == 3
+        assert not handler.available
+        with open(buffer_file, encoding="utf-8") as f:
+            buffered = f.read()
+        assert '"ok 6"' in buffered and '"while down"' in buffered
+
+    def test_buffer_replay_resends_and_removes_file(self, buffer_file):
+        """Test that buffered JSON and legacy lines are pushed once Loki is back."""
+        logging_manager._write_to_buffer(make_record("buffered json"))
+        with open(buffer_file, "a", encoding="utf-8") as f:
+            f.write("1000.0|INFO|Second_Brain_Database|legacy line\n")
+
+        handler = _LokiBatchHandler("http://loki/push", {"app": "test"}, batch_size=100, batch_interval=60)
+        handler._down_until = float("inf")
+        handler._send = MagicMock()
+
+        with patch.object(logging_manager, "archive_worker_logs"):
+            logging_manager._flush_buffer_to_loki(handler, MagicMock())
+
+        handler._send.assert_called_once()
+        payload = handler._send.call_args.args[0]
+        assert "buffered json" in payload and "legacy line" in payload
+        assert not logging_manager.os.path.exists(buffer_file)
+
+
+class TestLogQueue:
+    """Test the non-blocking queue handler and writer thread."""
+
+    def test_full_queue_drops_and_listener_reports(self):
+        """Test that emitting never blocks and the writer logs how many records were lost."""
+        log_queue = queue.Queue(maxsize=2)
+        queue_handler = _LogQueueHandler(log_queue)
+        sink = MagicMock(level=logging.NOTSET)
+
+        with patch.object(logging_manager, "_dropped_records", 0):
+            for i in range(5):
+                queue_handler.handle(make_record(f"record {i}"))
+            assert logging_manager._dropped_records == 3
+
+            listener = _LogQueueListener(log_queue, sink, respect_handler_level=True)
+            listener.start()
+            listener.stop()
+
+        messages = [call.args[0].getMessage() for call in sink.handle.call_args_list]
+        assert messages[0] == "[LoggingManager] Log queue full, dropped 3 records"
+        assert messages[1:] == ["record 0", "record 1"]
+
+    def test_failing_idle_flush_keeps_writer_alive(self):
+        """Test that an exception from an idle handler flush does not stop the writer thread."""
+        log_queue = queue.Queue()
+        sink = MagicMock(level=logging.NOTSET)
+        flushed = threading.Event()
+
+        def failing_flush():
+            flushed.set()
+            raise OSError("disk full")
+
+        sink.flush.side_effect = failing_flush
+
+        with patch.object(logging_manager, "LOKI_BATCH_INTERVAL", 0.01):
+            listener = _LogQueueListener(log_queue, sink, respect_handler_level=True)
+            listener.start()
+            assert flushed.wait(1)
+            log_queue.put_nowait(make_record("after flush failure"))
+            listener.stop()
+
+        assert [call.args[0].getMessage() for call in sink.handle.call_args_list] == ["after flush failure"]
+
+    def test_idle_flush_failure_reported_once_to_other_handlers(self):
+        """Test that a broken handler is reported through the remaining handlers, not stderr."""
+        log_queue = queue.Queue()
+        broken = MagicMock(level=logging.NOTSET)
+        broken.flush.side_effect = ValueError("I/O operation on closed file")
+        healthy = MagicMock(level=logging.NOTSET)
+        flushes = threading.Semaphore(0)
+        healthy.flush.side_effect = flushes.release
+
+        with patch.object(logging_manager, "LOKI_BATCH_INTERVAL", 0.01), patch.object(
+            logging_manager.sys, "stderr"
+        ) as stderr:
+            listener = _LogQueueListener(log_queue, broken, healthy, respect_handler_level=True)
+            listener.start()
+            for _ in range(3):
+                assert flushes.acquire(timeout=1)
+            listener.stop()
+
+        stderr.write.assert_not_called()
+        broken.handle.assert_not_called()
+        messages = [call.args[0].getMessage() for call in healthy.handle.call_args_list]
+        assert len(messages) == 1
+        assert messages[0].startswith("[LoggingManager] Idle flush of")
+        assert "I/O operation on closed file" in messages[0]
@@ -0,0 +1,150 @@
+"""Unit tests for lease-based scheduling of periodic jobs."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from second_brain_database.managers.periodic_job_manager import (
+    LEASE_KEY_PREFIX,
+    RELEASE_LEASE_SCRIPT,
+    RENEW_LEASE_SCRIPT,
+    PeriodicJobManager,
+)
+
+
+class FakeLeaseRedis:
+    """Just enough of Redis for SET NX and the two lease scripts (expiry is driven by the test)."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def run_script(self, script, keys, args):
+        key, owner = keys[0], args[0]
+        if self.data.get(key) != owner:
+            return 0
+        if script == RELEASE_LEASE_SCRIPT:
+            del self.data[key]
+        assert script in (RELEASE_LEASE_SCRIPT, RENEW_LEASE_SCRIPT)
+        return 1
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeLeaseRedis()
+
+
+def make_manager(fake_redis):
+    redis_manager = MagicMock()
+    redis_manager.get_redis = AsyncMock(return_value=fake_redis)
+    redis_manager.run_script = fake_redis.run_script
+    return PeriodicJobManager(redis_manager, lease_ttl=0.3, acquire_interval=0.05, start_jitter=0, leader_election=True)
+
+
+class TestPeriodicJobManager:
+    """Test that each job runs on one worker and moves on lease loss or crashes."""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_on_one_worker_only(self, fake_redis):
+        """Test that two workers sharing Redis run a job once, and the standby takes over on shutdown."""
+        runs = []
+
+        async def job():
+            runs.append(asyncio.current_task())
+            await asyncio.Event().wait()
+
+        first, second = make_manager(fake_redis), make_manager(fake_redis)
+        first.register("cleanup", job)
+        second.register("cleanup", job)
+        await first.start()
+        await asyncio.sleep(0.02)
+        await second.start()
+        await asyncio.sleep(0.3)
+
+        assert len(runs) == 1
+        assert first.get_status()["cleanup"]["running_here"]
+        assert not second.get_status()["cleanup"]["running_here"]
+        assert fake_redis.data[LEASE_KEY_PREFIX + "cleanup"] == first.owner
+
+        await first.stop()
+        await asyncio.sleep(0.15)
+
+        assert len(runs) == 2
+        assert second.get_status()["cleanup"]["running_here"]
+        await second.stop()
+        assert LEASE_KEY_PREFIX + "cleanup" not in fake_redis.data
+
+    @pytest.mark.asyncio
+    async def test_lost_lease_stops_the_job(self, fake_redis):
+        """Test that a job is cancelled once another owner holds its lease."""
+        cancelled = asyncio.Event()
+
+        async def job():
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        manager = make_manager(fake_redis)
+        manager.register("cleanup", job)
+        await manager.start()
+        await asyncio.sleep(0.02)
+
+        # Simulate the lease expiring and another worker acquiring it
+        fake_redis.data[LEASE_KEY_PREFIX + "cleanup"] = "other-worker"
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+        status = manager.get_status()["cleanup"]
+        assert status["lease_losses"] == 1
+        assert not status["running_here"]
+        await manager.stop()
+        assert fake_redis.data[LEASE_KEY_PREFIX + "cleanup"] == "other-worker"
+
+    @pytest.mark.asyncio
+    async def test_crashed_job_releases_lease_and_restarts(self, fake_redis):
+        """Test that a failing job gives up its lease and is retried."""
+        attempts = []
+
+        async def job():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("boom")
+            await asyncio.Event().wait()
+
+        manager = make_manager(fake_redis)
+        manager.register("cleanup", job)
+        await manager.start()
+        await asyncio.sleep(0.3)
+
+        status = manager.get_status()["cleanup"]
+        assert len(attempts) == 2
+        assert status["restarts"] == 1
+        assert status["acquisitions"] == 2
+        assert status["last_error"] == "boom"
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_redis_outage_keeps_jobs_paused(self):
+        """Test that no job starts while leases cannot be taken."""
+        redis_manager = MagicMock()
+        redis_manager.get_redis = AsyncMock(side_effect=ConnectionError("redis down"))
+        redis_manager.run_script = AsyncMock(side_effect=ConnectionError("redis down"))
+        job = AsyncMock()
+
+        manager = PeriodicJobManager(
+            redis_manager, lease_ttl=0.3, acquire_interval=0.05, start_jitter=0, leader_election=True
+        )
+        manager.register("cleanup", job)
+        await manager.start()
+        await asyncio.sleep(0.15)
+
+        job.assert_not_called()
+        assert manager.get_status()["cleanup"]["last_error"] == "redis down"
+        await manager.stop()
@@ -0,0 +1,87 @@
+"""Unit tests for write-coalesced permanent token last_used_at tracking."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from second_brain_database.routes.auth.services.permanent_tokens import usage_tracker
+from second_brain_database.routes.auth.services.permanent_tokens.usage_tracker import LastUsedTracker
+
+
+@pytest.fixture
+def collection():
+    collection = MagicMock()
+    collection.bulk_write = AsyncMock()
+    with patch.object(usage_tracker.db_manager, "get_collection", return_value=collection):
+        yield collection
+
+
+class TestLastUsedTracker:
+    """Test LastUsedTracker batching and merging."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_uses_flush_as_one_bulk_write(self, collection):
+        """Test that many validations of the same token become one $max update."""
+        tracker = LastUsedTracker(flush_interval=3600)
+        await tracker.start()
+        try:
+            for _ in range(100):
+                await tracker.record("hash-a")
+            await tracker.record("hash-b")
+
+            assert await tracker.flush() == 2
+        finally:
+            await tracker.stop()
+
+        operations = collection.bulk_write.await_args.args[0]
+        assert len(operations) == 2
+        assert all("$max" in operation._doc for operation in operations)
+        assert tracker.pending_last_used("hash-a") is None
+
+    @pytest.mark.asyncio
+    async def test_writes_through_when_not_running(self, collection):
+        """Test that the tracker falls back to a direct update outside the app."""
+        tracker = LastUsedTracker(flush_interval=3600)
+        with patch.object(usage_tracker, "update_last_used", AsyncMock(return_value=True)) as update_last_used:
+            await tracker.record("hash-a")
+
+        update_last_used.assert_awaited_once_with("hash-a")
+        assert tracker.pending_last_used("hash-a") is None
+
+    @pytest.mark.asyncio
+    async def test_merge_and_requeue_on_failure(self, collection):
+        """Test that readers see pending timestamps, which survive a failed flush."""
+        tracker = LastUsedTracker(flush_interval=3600)
+        tracker._task = MagicMock(done=MagicMock(return_value=False))
+        await tracker.record("hash-a")
+        pending = tracker.pending_last_used("hash-a")
+
+        stored = datetime.now(timezone.utc) - timedelta(days=1)
+        assert tracker.merge_last_used("hash-a", stored) == pending
+        assert tracker.merge_last_used("hash-b", stored) == stored.replace(tzinfo=None)
+
+        collection.bulk_write.side_effect = RuntimeError("mongo down")
+        assert await tracker.flush() == 0
+        assert tracker.pending_last_used("hash-a") == pending
+
+
+class TestUpdateTokenUsage:
+    """Test the analytics entry point that records token usage."""
+
+    @pytest.mark.asyncio
+    async def test_update_token_usage_succeeds(self):
+        """Test that recording usage reports success and defers last_used_at to the tracker."""
+        from second_brain_database.routes.auth.services.permanent_tokens import analytics
+
+        analytics_collection = MagicMock()
+        analytics_collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id="abc"))
+        with (
+            patch.object(analytics.db_manager, "get_collection", return_value=analytics_collection),
+            patch.object(analytics.last_used_tracker, "record", AsyncMock()) as record,
+        ):
+            service = analytics.PermanentTokenAnalytics()
+            assert await service.update_token_usage("a" * 64, "user-1", "203.0.113.7", "pytest") is True
+
+        record.assert_awaited_once_with("a" * 64)
+        analytics_collection.insert_one.assert_awaited_once()
@@ -0,0 +1,95 @@
+"""Unit tests for the authenticated principal cache."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from jose import jwt
+
+from second_brain_database.managers.principal_cache_manager import PrincipalCache
+from second_brain_database.middleware.tenant_context import clear_tenant_context
+from second_brain_database.routes.auth import dependencies
+
+
+@pytest.fixture
+def redis_client():
+    client = MagicMock()
+    client.get = AsyncMock(return_value=None)
+    client.mget = AsyncMock(return_value=[None, None])
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[1, True])
+    client.pipeline = MagicMock(return_value=pipe)
+    return client
+
+
+@pytest.fixture
+def cache(redis_client):
+    redis = MagicMock()
+    redis.get_redis = AsyncMock(return_value=redis_client)
+    return PrincipalCache(redis, ttl=30, max_entries=100)
+
+
+class TestPrincipalCache:
+    """Test PrincipalCache lookups and invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_hit_returns_copy_after_one_round_trip(self, cache, redis_client):
+        """Test that a current entry is served with a single MGET and callers get a copy."""
+        version = await cache.get_version("alice")
+        cache.set("tok", None, "alice", version, {"username": "alice", "workspaces": []})
+
+        user = await cache.get("tok")
+        user["workspaces"].append("mutated")
+
+        assert version == "0"
+        assert (await cache.get("tok"))["workspaces"] == []
+        assert await cache.get("tok", "other-tenant") is None
+        redis_client.mget.assert_awaited_with("blacklist:token:tok", "principal:version:alice")
+
+    @pytest.mark.asyncio
+    async def test_version_bump_and_blacklist_miss(self, cache, redis_client):
+        """Test that a version change or a blacklisted token drops the entry."""
+        cache.set("tok", None, "alice", "0", {"username": "alice"})
+        redis_client.mget.return_value = [None, "1"]
+        assert await cache.get("tok") is None
+
+        cache.set("tok", None, "alice", "1", {"username": "alice"})
+        redis_client.mget.return_value = ["1", "1"]
+        assert await cache.get("tok") is None
+        assert not cache._entries
+
+    @pytest.mark.asyncio
+    async def test_invalidate_bumps_version_and_drops_local_entries(self, cache, redis_client):
+        """Test that invalidation clears this worker and bumps the shared version."""
+        cache.set("tok", None, "alice", "0", {"username": "alice"})
+        cache.set("tok2", None, "bob", "0", {"username": "bob"})
+
+        await cache.invalidate("alice")
+
+        pipe = redis_client.pipeline.return_value
+        pipe.incr.assert_called_once_with("principal:version:alice")
+        assert [entry.username for entry in cache._entries.values()] == ["bob"]
+
+
+class TestCurrentUserDependency:
+    """Test get_current_user_dep with the principal cache."""
+
+    @pytest.mark.asyncio
+    async def test_second_request_skips_authentication(self, cache):
+        """Test that a cached principal bypasses user, tenant and workspace lookups."""
+        clear_tenant_context()
+        token = jwt.encode({"sub": "alice", "primary_tenant_id": "t1"}, "secret", algorithm="HS256")
+        get_current_user = AsyncMock(side_effect=lambda _: {"_id": "u1", "username": "alice"})
+        get_workspaces = AsyncMock(return_value=[{"workspace_id": "ws_1"}])
+
+        with patch.object(dependencies, "principal_cache", cache), patch(
+            "second_brain_database.routes.auth.services.auth.login.get_current_user", get_current_user
+        ), patch.object(dependencies.workspace_manager, "get_workspaces_for_user", get_workspaces):
+            first = await dependencies.get_current_user_dep(token)
+            clear_tenant_context()
+            second = await dependencies.get_current_user_dep(token)
+
+        assert first == second
+        assert second["current_tenant_id"] == "t1"
+        assert second["workspaces"] == [{"workspace_id": "ws_1"}]
+        get_current_user.assert_awaited_once()
+        get_workspaces.assert_awaited_once()
@@ -0,0 +1,151 @@
+"""Unit tests for the RAG result cache access indexes and eviction."""
+
+from datetime import datetime
+import importlib.util
+from pathlib import Path
+import sys
+import types
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from second_brain_database.managers.redis_manager import redis_manager
+
+RAG_DIR = Path(__file__).resolve().parents[1] / "src" / "second_brain_database" / "rag"
+
+
+def _load_result_caching():
+    """Load result_caching.py without running the RAG package __init__ (which needs docling)."""
+    stubs = {
+        "second_brain_database.rag": RAG_DIR,
+        "second_brain_database.rag.core": RAG_DIR / "core",
+    }
+    added = []
+    for name, path in stubs.items():
+        if name not in sys.modules:
+            package = types.ModuleType(name)
+            package.__path__ = [str(path)]
+            sys.modules[name] = package
+            added.append(name)
+    try:
+        spec = importlib.util.spec_from_file_location("rag_result_caching", RAG_DIR / "advanced" / "result_caching.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        for name in list(sys.modules):
+            if any(name == stub or name.startswith(f"{stub}.") for stub in added):
+                del sys.modules[name]
+    return module
+
+
+result_caching = _load_result_caching()
+CacheLevel = result_caching.CacheLevel
+CacheStrategy = result_caching.CacheStrategy
+
+
+@pytest.fixture
+def redis_client():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    with patch.object(redis_manager, "get_redis", AsyncMock(return_value=client)):
+        yield client
+
+
+def make_cache(**kwargs):
+    return result_caching.IntelligentCacheManager(compression_enabled=False, **kwargs)
+
+
+class TestResultCacheIndexes:
+    """Test access indexes, eviction and invalidation against Redis."""
+
+    @pytest.mark.asyncio
+    async def test_set_indexes_entry(self, redis_client):
+        """Test that a cached entry is recorded in every per-level index."""
+        cache = make_cache()
+
+        assert await cache.set("q1", {"answer": 42}, CacheLevel.QUERY_RESULT)
+
+        full_key = cache._generate_cache_key("q1", CacheLevel.QUERY_RESULT)
+        lru_key, lfu_key, size_key = cache._index_keys(CacheLevel.QUERY_RESULT)
+        assert await redis_client.zscore(lru_key, full_key) is not None
+        assert await redis_client.zscore(lfu_key, full_key) == 0
+        assert int(await redis_client.hget(size_key, full_key)) > 0
+        expires_at = await redis_client.zscore(cache._expiry_key(CacheLevel.QUERY_RESULT), full_key)
+        assert expires_at == pytest.approx(datetime.utcnow().timestamp() + 3600, abs=5)
+
+    @pytest.mark.asyncio
+    async def test_lfu_eviction_removes_least_accessed(self, redis_client):
+        """Test that LFU eviction drops the entry with the fewest hits."""
+        cache = make_cache(eviction_strategy=CacheStrategy.LFU)
+        for key in ("a", "b", "c"):
+            await cache.set(key, key * 100, CacheLevel.QUERY_RESULT)
+        keys = {key: cache._generate_cache_key(key, CacheLevel.QUERY_RESULT) for key in ("a", "b", "c")}
+        for _ in range(3):
+            await cache._update_access_metadata(keys["a"])
+        await cache._update_access_metadata(keys["c"])
+
+        sizes = await cache._get_entry_sizes(list(keys.values()))
+        await cache._evict_cache_entries(target_size=cache.stats["cache_size"] - 1)
+
+        assert await cache._get_existing_keys(list(keys.values())) == {keys["a"], keys["c"]}
+        assert cache.stats["evictions"] == 1
+        assert cache.stats["cache_size"] == sizes[keys["a"]] + sizes[keys["c"]]
+        lru_key, lfu_key, size_key = cache._index_keys(CacheLevel.QUERY_RESULT)
+        assert await redis_client.zscore(lfu_key, keys["b"]) is None
+        assert await redis_client.hget(size_key, keys["b"]) is None
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_removes_least_recent(self, redis_client):
+        """Test that LRU eviction drops the entry accessed longest ago."""
+        cache = make_cache()
+        for key in ("a", "b"):
+            await cache.set(key, key * 100, CacheLevel.QUERY_RESULT)
+        keys = {key: cache._generate_cache_key(key, CacheLevel.QUERY_RESULT) for key in ("a", "b")}
+        lru_key = cache._index_keys(CacheLevel.QUERY_RESULT)[0]
+        await redis_client.zadd(lru_key, {keys["a"]: 1.0})
+
+        await cache._evict_cache_entries(target_size=cache.stats["cache_size"] - 1)
+
+        assert await cache._get_existing_keys(list(keys.values())) == {keys["b"]}
+
+    @pytest.mark.asyncio
+    async def test_pattern_invalidation_scans_and_clears_indexes(self, redis_client):
+        """Test that level invalidation deletes entries, metadata and index members."""
+        cache = make_cache()
+        for key in ("a", "b", "c"):
+            await cache.set(key, key, CacheLevel.QUERY_PLAN)
+        await cache.set("kept", "kept", CacheLevel.QUERY_RESULT)
+
+        assert await cache.invalidate(cache_level=CacheLevel.QUERY_PLAN) == 3
+
+        assert await redis_client.keys("rag:plan:*") == []
+        lru_key, lfu_key, size_key = cache._index_keys(CacheLevel.QUERY_PLAN)
+        assert await redis_client.exists(lru_key, lfu_key, size_key) == 0
+        kept = cache._generate_cache_key("kept", CacheLevel.QUERY_RESULT)
+        assert await redis_client.exists(kept, f"{kept}:meta") == 2
+
+    @pytest.mark.asyncio
+    async def test_stats_exclude_expired_entries(self, redis_client):
+        """Test that entries Redis already expired are pruned before they are counted."""
+        cache = make_cache()
+        await cache.set("live", "live", CacheLevel.QUERY_RESULT)
+        await cache.set("gone", "gone" * 50, CacheLevel.QUERY_RESULT, ttl_seconds=1)
+        gone = cache._generate_cache_key("gone", CacheLevel.QUERY_RESULT)
+        live_size = int(
+            await redis_client.hget(
+                cache._index_keys(CacheLevel.QUERY_RESULT)[2],
+                cache._generate_cache_key("live", CacheLevel.QUERY_RESULT),
+            )
+        )
+        # Simulate Redis expiring the entry
+        await redis_client.delete(gone, f"{gone}:meta")
+        await redis_client.zadd(cache._expiry_key(CacheLevel.QUERY_RESULT), {gone: 1.0})
+
+        stats = await cache.get_stats()
+
+        assert stats.cache_levels[CacheLevel.QUERY_RESULT.value] == 1
+        assert stats.total_entries == 1
+        assert stats.total_size_bytes == live_size
+        lru_key, lfu_key, _ = cache._index_keys(CacheLevel.QUERY_RESULT)
+        assert await redis_client.zscore(lru_key, gone) is None
+        assert await redis_client.zscore(lfu_key, gone) is None
@@ -0,0 +1,83 @@
+"""Unit tests for the shared single-round-trip Redis rate limiter."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from second_brain_database.managers.rate_limit_manager import (
+    GCRA_SCRIPT,
+    SLIDING_WINDOW_SCRIPT,
+    RedisRateLimiter,
+)
+
+
+def _limiter(reply, **kwargs):
+    redis_manager = MagicMock()
+    redis_manager.run_script = AsyncMock(return_value=reply)
+    kwargs.setdefault("local_lease_ratio", 0)
+    return RedisRateLimiter(redis_manager, **kwargs), redis_manager.run_script
+
+
+class TestRedisRateLimiter:
+    """Test RedisRateLimiter decisions and local pre-check cache."""
+
+    @pytest.mark.asyncio
+    async def test_sliding_window_single_eval(self):
+        """Test that a check is one script call carrying the window and limit."""
+        limiter, run_script = _limiter([1, 3, 0, 60000], algorithm="sliding_window")
+
+        result = await limiter.hit("rl:key", max_requests=10, window_seconds=60)
+
+        assert result.allowed is True
+        assert result.remaining == 7
+        run_script.assert_awaited_once()
+        script, keys, args = run_script.await_args.args
+        assert script == SLIDING_WINDOW_SCRIPT
+        assert keys == ("rl:key",)
+        assert args[1:5] == (60000, 10, 1, 0)
+
+    @pytest.mark.asyncio
+    async def test_gcra_mode_uses_gcra_script(self):
+        """Test that the GCRA algorithm runs its own O(1) script."""
+        limiter, run_script = _limiter([0, 10, 2500, 60000], algorithm="gcra")
+
+        result = await limiter.hit("rl:key", max_requests=10, window_seconds=60)
+
+        assert result.allowed is False
+        assert result.retry_after == 3
+        assert run_script.await_args.args[0] == GCRA_SCRIPT
+
+    @pytest.mark.asyncio
+    async def test_denied_callers_rejected_locally(self):
+        """Test that a rejection is served from the local cache until retry-after."""
+        limiter, run_script = _limiter([0, 10, 30000, 30000])
+
+        first = await limiter.hit("rl:key", max_requests=10, window_seconds=60)
+        second = await limiter.hit("rl:key", max_requests=10, window_seconds=60)
+
+        assert first.allowed is False and second.allowed is False
+        assert 0 < second.retry_after_ms <= 30000
+        run_script.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_local_lease_recorded_on_next_round_trip(self):
+        """Test that leased requests skip Redis and are flushed as pending next time."""
+        limiter, run_script = _limiter([1, 1, 0, 60000], local_lease_ratio=0.05)
+
+        results = [await limiter.hit("rl:key", max_requests=100, window_seconds=60) for _ in range(6)]
+
+        assert all(result.allowed for result in results)
+        # 100 - 1 used leaves 99 remaining; 5% of that (4) is admitted locally
+        assert run_script.await_count == 2
+        assert run_script.await_args.args[2][4] == 4
+
+    @pytest.mark.asyncio
+    async def test_local_lease_capped_by_limit_share(self):
+        """Test that a generous lease ratio is capped to a small share of the limit."""
+        limiter, run_script = _limiter([1, 1, 0, 60000], local_lease_ratio=0.5)
+
+        results = [await limiter.hit("rl:key", max_requests=20, window_seconds=60) for _ in range(4)]
+
+        assert all(result.allowed for result in results)
+        # Half of the 19 remaining would be 9, but one worker may only lease 10% of 20
+        assert run_script.await_count == 2
+        assert run_script.await_args.args[2][4] == 2
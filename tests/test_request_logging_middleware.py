@@ -0,0 +1,108 @@
+"""Unit tests for the ASGI request logging middleware."""
+
+import pytest
+from unittest.mock import MagicMock
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry
+from prometheus_fastapi_instrumentator import Instrumentator
+
+from second_brain_database.utils.logging_utils import RequestLoggingMiddleware, request_id_context, response_first_byte
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    seen = {}
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        seen["request_id"] = request_id_context.get("")
+        return {"item_id": item_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"data: {i}\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(RequestLoggingMiddleware)
+    app.state.seen = seen
+    return app
+
+
+@pytest.fixture
+def request_logger(app):
+    # Build the middleware stack, then swap in a mock logger
+    TestClient(app).get("/items/warmup")
+    middleware = app.middleware_stack.app
+    while not isinstance(middleware, RequestLoggingMiddleware):
+        middleware = middleware.app
+    middleware.logger = MagicMock()
+    return middleware.logger
+
+
+class TestRequestLoggingMiddleware:
+    """Test request ID handling, logging and streaming pass-through."""
+
+    def test_one_record_per_request_with_request_id(self, app, request_logger):
+        """Test that the client's request ID is used in context, the response and the log record."""
+        response = TestClient(app).get("/items/42", headers={"X-Request-ID": "abc123"})
+
+        assert response.json() == {"item_id": "42"}
+        assert response.headers["x-request-id"] == "abc123"
+        assert app.state.seen["request_id"] == "abc123"
+        request_logger.info.assert_called_once()
+        extra = request_logger.info.call_args.kwargs["extra"]
+        assert extra["request_id"] == "abc123"
+        assert extra["status_code"] == 200
+        assert extra["path"] == "/items/42"
+
+    def test_streaming_response_is_passed_through(self, app, request_logger):
+        """Test that streamed chunks arrive intact and their size is counted."""
+        response = TestClient(app).get("/stream")
+
+        assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+        assert len(response.headers["x-request-id"]) == 8
+        extra = request_logger.info.call_args.kwargs["extra"]
+        assert extra["response_size"] == len(response.content)
+
+    def test_errors_are_logged_and_reraised(self, app, request_logger):
+        """Test that an unhandled exception is logged once and still propagates."""
+        client = TestClient(app, raise_server_exceptions=False)
+
+        assert client.get("/boom").status_code == 500
+        request_logger.error.assert_called_once()
+        assert request_logger.error.call_args.kwargs["extra"]["status_code"] == 500
+        request_logger.info.assert_not_called()
+
+
+class TestResponseFirstByteMetric:
+    """Test the time-to-first-byte instrumentation."""
+
+    def test_streaming_request_observed_by_handler(self, app):
+        """Test that the instrumentator records time to headers per route template."""
+        registry = CollectorRegistry()
+        Instrumentator(registry=registry).add(response_first_byte(registry=registry)).instrument(app)
+
+        TestClient(app).get("/stream")
+        TestClient(app).get("/items/1")
+
+        assert (
+            registry.get_sample_value("http_response_first_byte_seconds_count", {"handler": "/stream", "method": "GET"})
+            == 1
+        )
+        assert (
+            registry.get_sample_value(
+                "http_response_first_byte_seconds_count", {"handler": "/items/{item_id}", "method": "GET"}
+            )
+            == 1
+        )
@@ -0,0 +1,85 @@
+"""Unit tests for SecurityManager rate limiting and cached Lua scripts."""
+
+from fastapi import HTTPException
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.exceptions import NoScriptError
+
+from second_brain_database.managers.redis_manager import redis_manager
+from second_brain_database.managers.security_manager import RATE_LIMIT_SCRIPT, SecurityManager
+
+
+@pytest.fixture
+def redis_client():
+    client = MagicMock()
+    client.evalsha = AsyncMock()
+    client.script_load = AsyncMock()
+    client.exists = AsyncMock(side_effect=AssertionError("blacklist must be checked inside the script"))
+    with (
+        patch.object(redis_manager, "get_redis", AsyncMock(return_value=client)),
+        patch.object(redis_manager, "_script_shas", {}),
+    ):
+        yield client
+
+
+def make_request(ip="203.0.113.7"):
+    request = MagicMock()
+    request.headers = {"x-forwarded-for": ip, "user-agent": "pytest"}
+    request.method = "POST"
+    request.url.path = "/auth/login"
+    return request
+
+
+class TestRunScript:
+    """Test EVALSHA calls with NOSCRIPT recovery."""
+
+    @pytest.mark.asyncio
+    async def test_script_is_loaded_once_and_called_by_sha(self, redis_client):
+        """Test that the source is only sent after NOSCRIPT and later calls use the digest."""
+        redis_client.evalsha.side_effect = [NoScriptError("NOSCRIPT"), "first", "second"]
+
+        assert await redis_manager.run_script("return 1", ("k",), (1,)) == "first"
+        assert await redis_manager.run_script("return 1", ("k",), (1,)) == "second"
+
+        redis_client.script_load.assert_awaited_once_with("return 1")
+        sha = redis_client.evalsha.await_args.args[0]
+        assert len(sha) == 40
+        assert redis_client.evalsha.await_args.args[1:] == (1, "k", 1)
+
+
+class TestCheckRateLimit:
+    """Test that a rate limit check is a single script call."""
+
+    @pytest.mark.asyncio
+    async def test_allowed_request_is_one_round_trip(self, redis_client):
+        """Test that an allowed request runs the combined script exactly once."""
+        redis_client.evalsha.return_value = [1, 0, "OK"]
+        manager = SecurityManager()
+
+        await manager.check_rate_limit(make_request(), action="login", rate_limit_requests=5, rate_limit_period=60)
+
+        redis_client.evalsha.assert_awaited_once()
+        keys = redis_client.evalsha.await_args.args[2:5]
+        assert keys == (
+            f"{manager.env_prefix}:ratelimit:login:203.0.113.7",
+            f"{manager.env_prefix}:abuse:203.0.113.7",
+            f"{manager.env_prefix}:blacklist:203.0.113.7",
+        )
+        assert redis_client.evalsha.await_args.args[5:7] == (5, 60)
+        assert "EXISTS" in RATE_LIMIT_SCRIPT
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "reply, status_code",
+        [([0, 0, "BLOCKED"], 403), ([11, 1, "RATE_LIMITED"], 429), ([11, 5, "BLACKLISTED"], 403)],
+    )
+    async def test_rejections_map_to_http_errors(self, redis_client, reply, status_code):
+        """Test that blacklisted and rate-limited replies raise the matching HTTP error."""
+        redis_client.evalsha.return_value = reply
+
+        with pytest.raises(HTTPException) as exc_info:
+            await SecurityManager().check_rate_limit(make_request())
+
+        assert exc_info.value.status_code == status_code
+        redis_client.evalsha.assert_awaited_once()
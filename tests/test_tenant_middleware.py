@@ -0,0 +1,93 @@
+"""Unit tests for cached tenant resolution in TenantMiddleware."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from second_brain_database.config import settings
+from second_brain_database.middleware import tenant_middleware
+from second_brain_database.middleware.tenant_context import get_current_tenant_id
+from second_brain_database.middleware.tenant_middleware import TenantDomainCache, TenantMiddleware
+
+
+@pytest.fixture
+def tenants_collection():
+    collection = MagicMock()
+    collection.find_one = AsyncMock(return_value={"tenant_id": "tenant_acme"})
+    return collection
+
+
+@pytest.fixture
+def domain_cache(tenants_collection):
+    cache = TenantDomainCache(ttl=300, negative_ttl=60, max_entries=100)
+    # Keep the Redis listener out of unit tests
+    cache._ensure_listener = lambda: None
+    with patch.object(tenant_middleware.db_manager, "get_collection", return_value=tenants_collection):
+        yield cache
+
+
+def http_scope(host):
+    return {"type": "http", "path": "/", "headers": [(b"host", host.encode())]}
+
+
+class TestTenantDomainCache:
+    """Test TenantDomainCache lookups and invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_query(self, domain_cache, tenants_collection):
+        """Test that a domain is looked up once and then served from memory."""
+        results = await asyncio.gather(*(domain_cache.get("acme.example.org") for _ in range(5)))
+        assert await domain_cache.get("acme.example.org") == "tenant_acme"
+
+        assert results == ["tenant_acme"] * 5
+        tenants_collection.find_one.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_negative_results_are_cached_but_failures_are_not(self, domain_cache, tenants_collection):
+        """Test that unknown domains are cached and lookup errors are retried."""
+        tenants_collection.find_one.return_value = None
+        assert await domain_cache.get("unknown.example.org") is None
+        assert await domain_cache.get("unknown.example.org") is None
+        assert tenants_collection.find_one.await_count == 1
+
+        tenants_collection.find_one.side_effect = RuntimeError("mongo down")
+        assert await domain_cache.get("broken.example.org") is None
+        assert "broken.example.org" not in domain_cache._entries
+
+    @pytest.mark.asyncio
+    async def test_tenant_change_drops_its_domains_and_negative_entries(self, domain_cache, tenants_collection):
+        """Test that a tenant change event evicts the affected entries only."""
+        await domain_cache.get("acme.example.org")
+        tenants_collection.find_one.return_value = {"tenant_id": "tenant_other"}
+        await domain_cache.get("other.example.org")
+        tenants_collection.find_one.return_value = None
+        await domain_cache.get("unknown.example.org")
+
+        domain_cache.invalidate_tenant("tenant_acme")
+
+        assert list(domain_cache._entries) == ["other.example.org"]
+
+
+class TestTenantMiddleware:
+    """Test the ASGI tenant middleware."""
+
+    @pytest.mark.asyncio
+    async def test_sets_tenant_for_request_and_clears_after(self, domain_cache):
+        """Test that the app runs once with the resolved tenant in context and scope state."""
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append((get_current_tenant_id(), scope["state"]["tenant_id"]))
+
+        middleware = TenantMiddleware(app, domain_cache=domain_cache)
+        await middleware(http_scope("acme.example.org:443"), AsyncMock(), AsyncMock())
+
+        domain_cache.get = AsyncMock(side_effect=RuntimeError("boom"))
+        await middleware(http_scope("acme.example.org"), AsyncMock(), AsyncMock())
+
+        assert seen == [
+            ("tenant_acme", "tenant_acme"),
+            (settings.DEFAULT_TENANT_ID, settings.DEFAULT_TENANT_ID),
+        ]
+        assert get_current_tenant_id() is None
@@ -0,0 +1,74 @@
+"""Unit tests for the local token blacklist filter."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from second_brain_database.routes.auth.services.security import tokens
+from second_brain_database.routes.auth.services.security.blacklist_filter import (
+    TokenBlacklistFilter,
+    token_member,
+    user_member,
+)
+
+
+def scan_iter(keys):
+    async def _scan_iter(match, count):
+        prefix = match.rstrip("*")
+        for key in keys:
+            if key.startswith(prefix):
+                yield key
+
+    return _scan_iter
+
+
+class TestTokenBlacklistFilter:
+    """Test TokenBlacklistFilter membership and bootstrap."""
+
+    def test_switches_to_bloom_filter_without_losing_members(self):
+        """Test that growing past the exact limit keeps every member."""
+        blacklist_filter = TokenBlacklistFilter(MagicMock(), exact_max=10, error_rate=0.001, rebuild_interval=60)
+        blacklist_filter._ready = True
+        for i in range(25):
+            blacklist_filter.add(token_member(f"token-{i}"))
+
+        assert blacklist_filter._bloom is not None
+        assert all(blacklist_filter.might_contain(token_member(f"token-{i}")) for i in range(25))
+        assert blacklist_filter.might_contain(token_member("never-blacklisted")) is False
+
+    @pytest.mark.asyncio
+    async def test_bootstrap_loads_token_and_user_keys(self):
+        """Test that the filter is rebuilt from the blacklist keys in Redis."""
+        blacklist_filter = TokenBlacklistFilter(MagicMock(), exact_max=10, error_rate=0.001, rebuild_interval=60)
+        redis_client = MagicMock()
+        redis_client.scan_iter = scan_iter(["blacklist:token:abc", "blacklist:user:u1"])
+
+        assert blacklist_filter.might_contain(token_member("abc")) is None
+
+        await blacklist_filter._bootstrap(redis_client)
+        blacklist_filter._ready = True
+
+        assert blacklist_filter.might_contain(token_member("abc")) is True
+        assert blacklist_filter.might_contain(user_member("u1")) is True
+        assert blacklist_filter.might_contain(token_member("xyz"), user_member("u2")) is False
+
+
+class TestIsTokenBlacklisted:
+    """Test is_token_blacklisted with the filter in front of Redis."""
+
+    @pytest.mark.asyncio
+    async def test_only_filter_hits_reach_redis(self):
+        """Test that filter misses skip Redis and hits are confirmed there."""
+        blacklist_filter = TokenBlacklistFilter(MagicMock(), exact_max=10, error_rate=0.001, rebuild_interval=60)
+        blacklist_filter._ready = True
+        blacklist_filter.add(token_member("revoked"))
+        redis_client = MagicMock()
+        redis_client.get = AsyncMock(return_value="1")
+
+        with patch.object(tokens, "token_blacklist_filter", blacklist_filter), patch.object(
+            tokens.redis_manager, "get_redis", AsyncMock(return_value=redis_client)
+        ):
+            assert await tokens.is_token_blacklisted("fresh") is False
+            redis_client.get.assert_not_awaited()
+
+            assert await tokens.is_token_blacklisted("revoked") is True
+            redis_client.get.assert_awaited_once_with("blacklist:token:revoked")
@@ -0,0 +1,80 @@
+"""Unit tests for the WebRTC signaling codec."""
+
+import asyncio
+import json
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from second_brain_database.webrtc.codec import (
+    JSON_SUBPROTOCOL,
+    MSGPACK_SUBPROTOCOL,
+    WIRE_JSON,
+    WIRE_MSGPACK,
+    decode_frame,
+    encode_message,
+    negotiate_subprotocol,
+)
+from second_brain_database.webrtc.room_hub import WebRtcRoomHub
+from second_brain_database.webrtc.schemas import MessageType, WebRtcMessage
+
+
+def _ice_candidate():
+    return WebRtcMessage(
+        type=MessageType.ICE_CANDIDATE,
+        payload={"candidate": "candidate:1 1 UDP 2122252543 10.0.0.1 54321 typ host"},
+        sender_id="alice",
+        room_id="room1",
+        timestamp="2024-01-01T00:00:00+00:00",
+    )
+
+
+class TestSignalingCodec:
+    """Test wire encoding, decoding and negotiation."""
+
+    def test_json_round_trip_without_validation(self):
+        """Test that JSON frames decode to the same fields pydantic would produce."""
+        message = _ice_candidate()
+
+        frame = encode_message(message, WIRE_JSON)
+
+        assert isinstance(frame, str)
+        assert decode_frame(frame) == json.loads(message.model_dump_json())
+        assert decode_frame(frame.encode("utf-8")) == decode_frame(frame)
+
+    def test_msgpack_round_trip(self):
+        """Test that MessagePack frames are smaller and decode to the same fields."""
+        pytest.importorskip("msgpack")
+        message = _ice_candidate()
+
+        frame = encode_message(message, WIRE_MSGPACK)
+
+        assert isinstance(frame, bytes)
+        assert len(frame) < len(encode_message(message, WIRE_JSON))
+        assert WebRtcMessage.model_validate(decode_frame(frame)) == message
+
+    def test_negotiation_falls_back_to_json(self):
+        """Test that msgpack is only chosen when offered and installed."""
+        websocket = MagicMock()
+        websocket.scope = {"subprotocols": [MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL]}
+
+        with patch("second_brain_database.webrtc.codec._msgpack_available", False):
+            assert negotiate_subprotocol(websocket) == JSON_SUBPROTOCOL
+
+        websocket.scope = {"subprotocols": []}
+        assert negotiate_subprotocol(websocket) is None
+
+    @pytest.mark.asyncio
+    async def test_hub_encodes_each_format_once(self):
+        """Test that JSON traffic is forwarded as-is to text sockets and packed for binary ones."""
+        msgpack = pytest.importorskip("msgpack")
+        hub = WebRtcRoomHub()
+        text_queue, binary_queue = asyncio.Queue(), asyncio.Queue()
+        hub._rooms["room1"] = {0: ("bob", text_queue), 1: ("carol", binary_queue)}
+        hub._binary.add(1)
+        data = encode_message(_ice_candidate(), WIRE_JSON)
+
+        hub._dispatch("webrtc:room:room1", data)
+
+        assert text_queue.get_nowait() == data
+        assert msgpack.unpackb(binary_queue.get_nowait()) == json.loads(data)
@@ -0,0 +1,108 @@
+"""Unit tests for off-loop WebRTC E2EE crypto and key caching."""
+
+import base64
+import threading
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from second_brain_database.webrtc import e2ee
+from second_brain_database.webrtc.e2ee import E2EEManager, _KeyCache
+
+
+@pytest.fixture
+def redis_client():
+    client = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[True])
+    client.pipeline = MagicMock(return_value=pipe)
+    client.delete = AsyncMock()
+    with patch.object(e2ee.redis_manager, "get_redis", AsyncMock(return_value=client)):
+        yield client
+
+
+class TestKeyCache:
+    """Test the in-process key cache."""
+
+    def test_evicts_least_recently_used_and_expired(self):
+        """Test that the cache is bounded and entries expire."""
+        cache = _KeyCache(max_entries=2, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+        with patch.object(e2ee.time, "monotonic", return_value=e2ee.time.monotonic() + 31):
+            assert cache.get("a") is None
+
+
+class TestE2EECryptoOffload:
+    """Test E2EEManager crypto offloading."""
+
+    @pytest.mark.asyncio
+    async def test_key_exchange_derives_on_crypto_pool(self):
+        """Test that ECDH runs on the crypto thread pool and the secret is cached."""
+        manager = E2EEManager(crypto_workers=2)
+        alice = {"key_id": "a1", **e2ee._generate_key_material(False)}
+        bob = {"key_id": "b1", **e2ee._generate_key_material(False)}
+        manager._get_latest_user_key = AsyncMock(side_effect=[alice, bob])
+        manager._key_pairs.set("b1", bob)
+        manager._store_shared_secret = AsyncMock()
+
+        threads = []
+        derive = e2ee._derive_secret
+
+        def recording_derive(*args):
+            threads.append(threading.current_thread().name)
+            return derive(*args)
+
+        with patch.object(e2ee, "_derive_secret", recording_derive):
+            assert await manager.exchange_keys("alice", "bob", "room1") is True
+
+        assert threads and threads[0].startswith("webrtc-e2ee")
+        secret = manager._store_shared_secret.await_args.args[3]
+        assert secret == derive(alice["private_key"], bob["public_key"], b"room1:bob:alice")
+
+    @pytest.mark.asyncio
+    async def test_failed_decrypt_releases_nonce(self, redis_client):
+        """Test that a forged message does not burn the nonce of the real one."""
+        manager = E2EEManager(enable_signatures=False)
+        manager._shared_secrets.set(manager._shared_secret_key("alice", "bob", "room1"), b"k" * 32)
+        manager._get_shared_secret = AsyncMock(return_value=b"k" * 32)
+        nonce = b"n" * 12
+        envelope = {
+            "sender_id": "alice",
+            "recipient_id": "bob",
+            "room_id": "room1",
+            "nonce": base64.b64encode(nonce).decode(),
+            "ciphertext": base64.b64encode(b"forged ciphertext bytes").decode(),
+        }
+
+        with pytest.raises(Exception):
+            await manager.decrypt_message(envelope, "bob")
+
+        redis_client.delete.assert_awaited_once_with(manager._nonce_key(nonce, "alice", "room1"))
+
+    @pytest.mark.asyncio
+    async def test_replayed_nonce_rejected_in_one_round_trip(self, redis_client):
+        """Test that the replay check is a single SET NX pipelined with the secret lookup."""
+        manager = E2EEManager(enable_signatures=False)
+        redis_client.pipeline.return_value.execute.return_value = [None, base64.b64encode(b"k" * 32).decode()]
+        envelope = {
+            "sender_id": "alice",
+            "recipient_id": "bob",
+            "room_id": "room1",
+            "nonce": base64.b64encode(b"n" * 12).decode(),
+            "ciphertext": "",
+        }
+
+        with pytest.raises(ValueError, match="Replay attack"):
+            await manager.decrypt_message(envelope, "bob")
+
+        pipe = redis_client.pipeline.return_value
+        pipe.execute.assert_awaited_once()
+        assert pipe.set.call_args.kwargs == {"nx": True, "ex": manager.nonce_ttl}
+        redis_client.delete.assert_not_awaited()
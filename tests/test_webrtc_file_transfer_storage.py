@@ -0,0 +1,167 @@
+"""Unit tests for in-place WebRTC file transfer storage."""
+
+import asyncio
+import hashlib
+import os
+
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from second_brain_database.webrtc.file_transfer import FileTransferManager, compute_merkle_root
+
+
+def _state(file_size, chunk_size=4):
+    return {
+        "transfer_id": "t1",
+        "filename": "../notes.txt",
+        "file_size": file_size,
+        "chunk_size": chunk_size,
+        "total_chunks": (file_size + chunk_size - 1) // chunk_size,
+        "chunks_received": 0,
+        "bytes_transferred": 0,
+        "status": "active",
+        "checksum": None,
+    }
+
+
+@pytest_asyncio.fixture
+async def manager(tmp_path):
+    manager = FileTransferManager(chunk_size=4, temp_dir=str(tmp_path))
+    manager._update_transfer_state = AsyncMock()
+
+    redis_client = MagicMock()
+    hashes = {}
+
+    def hset(key, field, value):
+        is_new = field not in hashes
+        hashes[field] = value
+        pipeline.results.append(int(is_new))
+
+    pipeline = MagicMock()
+    pipeline.results = []
+    pipeline.hset.side_effect = hset
+    pipeline.hlen.side_effect = lambda key: pipeline.results.append(len(hashes))
+    pipeline.expire.side_effect = lambda key, ttl: pipeline.results.append(True)
+
+    async def execute():
+        results, pipeline.results = pipeline.results, []
+        return results
+
+    pipeline.execute = execute
+    redis_client.pipeline.return_value = pipeline
+    redis_client.hgetall = AsyncMock(side_effect=lambda key: dict(hashes))
+    redis_client.hexists = AsyncMock(side_effect=lambda key, field: field in hashes)
+    flags = set()
+
+    def set_flag(key, value, nx=False, ex=None):
+        if nx and key in flags:
+            return None
+        flags.add(key)
+        return True
+
+    redis_client.set = AsyncMock(side_effect=set_flag)
+
+    with patch("second_brain_database.webrtc.file_transfer.redis_manager") as redis_manager:
+        redis_manager.get_redis = AsyncMock(return_value=redis_client)
+        yield manager
+
+    if manager._output_fd_reaper:
+        manager._output_fd_reaper.cancel()
+    for transfer_id in list(manager._output_fds):
+        manager._close_output_fd(transfer_id)
+
+
+class TestFileTransferStorage:
+    """Test positioned chunk writes, hash tree and chunk reads."""
+
+    def test_merkle_root_pairs_and_promotes(self):
+        """Test that the root hashes pairs and promotes an unpaired node."""
+        leaves = [hashlib.sha256(c).digest() for c in (b"a", b"b", b"c")]
+        expected = hashlib.sha256(hashlib.sha256(leaves[0] + leaves[1]).digest() + leaves[2]).hexdigest()
+
+        assert compute_merkle_root([leaf.hex() for leaf in leaves]) == expected
+
+    @pytest.mark.asyncio
+    async def test_out_of_order_chunks_written_in_place(self, manager):
+        """Test that chunks land at their offsets and completion needs no assembly."""
+        data = b"hello world!!"
+        state = _state(len(data))
+        manager._get_transfer_state = AsyncMock(return_value=state)
+        chunks = [data[i : i + 4] for i in range(0, len(data), 4)]
+
+        for index in (3, 1, 0, 1, 2):
+            progress = await manager.receive_chunk("t1", index, chunks[index])
+
+        output = manager._output_path("t1", state)
+        assert output.parent == manager.temp_dir / "t1"
+        assert output.read_bytes() == data
+        assert list(output.parent.iterdir()) == [output]
+        assert progress["status"] == "completed"
+        assert state["bytes_transferred"] == len(data)
+        assert state["checksum"] == compute_merkle_root([hashlib.sha256(c).hexdigest() for c in chunks])
+
+    @pytest.mark.asyncio
+    async def test_get_chunk_reads_received_region(self, manager):
+        """Test that received chunks are served from the output file and others rejected."""
+        state = _state(8000, chunk_size=5000)
+        manager._get_transfer_state = AsyncMock(return_value=state)
+        await manager.receive_chunk("t1", 1, b"z" * 3000)
+
+        assert await manager.get_chunk("t1", 1) == b"z" * 3000
+        with pytest.raises(ValueError):
+            await manager.get_chunk("t1", 0)
+        with pytest.raises(ValueError):
+            await manager.receive_chunk("t1", 0, b"short")
+
+    @pytest.mark.asyncio
+    async def test_checksum_mismatch_is_not_written(self, manager):
+        """Test that a corrupt chunk is rejected before it reaches the output file."""
+        state = _state(8)
+        manager._get_transfer_state = AsyncMock(return_value=state)
+        await manager.receive_chunk("t1", 0, b"good", checksum=hashlib.sha256(b"good").hexdigest())
+
+        with pytest.raises(ValueError):
+            await manager.receive_chunk("t1", 0, b"evil", checksum=hashlib.sha256(b"good").hexdigest())
+
+        assert manager._output_path("t1", state).read_bytes()[:4] == b"good"
+        assert state["chunks_received"] == 1
+
+    @pytest.mark.asyncio
+    async def test_transfer_is_finalized_once(self, manager):
+        """Test that a second completing request does not finalize or overwrite state again."""
+        state = _state(4)
+        manager._get_transfer_state = AsyncMock(side_effect=lambda transfer_id: dict(state))
+
+        first = await manager.receive_chunk("t1", 0, b"abcd")
+        second = await manager.receive_chunk("t1", 0, b"abcd")
+
+        assert first["status"] == second["status"] == "completed"
+        manager._update_transfer_state.assert_awaited_once()
+        assert manager._update_transfer_state.await_args.args[1]["checksum"] is not None
+
+    @pytest.mark.asyncio
+    async def test_idle_output_fd_is_closed(self, manager):
+        """Test that a worker closes an output file it stops writing to."""
+        manager.output_fd_idle_timeout = 0.01
+        manager._get_transfer_state = AsyncMock(return_value=_state(8))
+        await manager.receive_chunk("t1", 0, b"abcd")
+        fd = manager._output_fds["t1"]
+
+        await asyncio.wait_for(manager._output_fd_reaper, timeout=1)
+
+        assert manager._output_fds == {}
+        assert manager._output_fd_last_used == {}
+        with pytest.raises(OSError):
+            os.fstat(fd)
+
+    @pytest.mark.asyncio
+    async def test_output_fd_closed_when_finalized_elsewhere(self, manager):
+        """Test that a worker losing the finalization claim still closes its output file."""
+        state = _state(4)
+        manager._get_transfer_state = AsyncMock(side_effect=lambda transfer_id: dict(state))
+        manager._finalize_transfer = AsyncMock(return_value=False)
+
+        await manager.receive_chunk("t1", 0, b"abcd")
+
+        assert manager._output_fds == {}
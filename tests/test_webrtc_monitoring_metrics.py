@@ -0,0 +1,78 @@
+"""Unit tests for counter-based WebRTC monitoring metrics."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from second_brain_database.webrtc.monitoring import SlidingWindowCounter, WebRtcMonitoring
+
+
+@pytest.fixture
+def monitoring():
+    monitoring = WebRtcMonitoring()
+    redis_client = MagicMock()
+    redis_client.mget = AsyncMock(return_value=["4", "10"])
+    redis_client.info = AsyncMock(return_value={"used_memory": 1024 * 1024})
+    redis_client.keys = AsyncMock()
+    monitoring.redis = MagicMock()
+    monitoring.redis.get_redis = AsyncMock(return_value=redis_client)
+    return monitoring, redis_client
+
+
+class TestSlidingWindowCounter:
+    """Test SlidingWindowCounter functionality."""
+
+    def test_counts_only_recent_events(self):
+        """Test that events older than the window are excluded from the rate."""
+        counter = SlidingWindowCounter(window_seconds=10)
+        counter.increment(now=100)
+        counter.increment(3, now=105)
+
+        assert counter.count(now=109) == 4
+        assert counter.count(now=112) == 3
+        assert counter.rate(now=112) == 0.3
+        assert counter.total == 4
+
+    def test_reused_bucket_is_reset(self):
+        """Test that a ring slot from a previous lap does not leak into the count."""
+        counter = SlidingWindowCounter(window_seconds=10)
+        counter.increment(5, now=100)
+        counter.increment(now=110)
+
+        assert counter.count(now=110) == 1
+
+
+class TestWebRtcMonitoringMetrics:
+    """Test WebRtcMonitoring counter-based metrics."""
+
+    @pytest.mark.asyncio
+    async def test_get_metrics_reads_counters_without_keys(self, monitoring):
+        """Test that room and participant totals come from maintained counters."""
+        monitoring, redis_client = monitoring
+        monitoring.record_connection_opened()
+        monitoring.record_message("offer")
+
+        metrics = await monitoring.get_metrics()
+
+        assert metrics.active_rooms == 4
+        assert metrics.total_participants == 10
+        assert metrics.average_participants_per_room == 2.5
+        assert metrics.active_websocket_connections == 1
+        redis_client.mget.assert_awaited_once()
+        redis_client.keys.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_render_prometheus(self, monitoring):
+        """Test that metrics are exposed in Prometheus text format."""
+        monitoring, _ = monitoring
+        monitoring.record_message("offer")
+        monitoring.record_message("offer")
+        monitoring.record_error("rate_limit_exceeded")
+
+        text = await monitoring.render_prometheus()
+
+        assert "# TYPE webrtc_messages_total counter" in text
+        assert 'webrtc_messages_total{type="offer"} 2' in text
+        assert 'webrtc_errors_total{type="rate_limit_exceeded"} 1' in text
+        assert "webrtc_rooms_active 4" in text
+        assert "webrtc_participants 10" in text
+        assert text.endswith("\n")
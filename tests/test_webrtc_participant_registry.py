@@ -0,0 +1,168 @@
+"""Unit tests for the hash-based WebRTC participant registry."""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from second_brain_database.managers.redis_manager import redis_manager
+from second_brain_database.webrtc.connection_manager import (
+    ADD_PARTICIPANT_SCRIPT,
+    REMOVE_PARTICIPANT_SCRIPT,
+    WebRtcManager,
+)
+from second_brain_database.webrtc.schemas import MessageType
+
+
+@pytest.fixture
+def manager():
+    manager = WebRtcManager()
+    redis_client = MagicMock()
+    redis_client.hvals = AsyncMock()
+    redis_client.zadd = AsyncMock()
+    manager.redis = MagicMock()
+    manager.redis.get_redis = AsyncMock(return_value=redis_client)
+    manager.redis.run_script = AsyncMock()
+    return manager, redis_client
+
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    with (
+        patch.object(redis_manager, "get_redis", AsyncMock(return_value=redis_client)),
+        patch.object(redis_manager, "_script_shas", {}),
+    ):
+        yield WebRtcManager(), redis_client
+
+
+class TestParticipantRegistry:
+    """Test participant registry round trips."""
+
+    @pytest.mark.asyncio
+    async def test_add_participant_single_round_trip(self, manager):
+        """Test that joining registers, heartbeats, counts and assigns host in one call."""
+        manager, _ = manager
+        manager.redis.run_script.return_value = [1, 1]
+
+        count = await manager.add_participant("room1", "alice")
+
+        assert count == 1
+        manager.redis.run_script.assert_awaited_once()
+        script, keys, args = manager.redis.run_script.await_args.args
+        assert script == ADD_PARTICIPANT_SCRIPT
+        assert keys[:3] == ("webrtc:participants:room1", "webrtc:presence:room1", "webrtc:room-state:room1")
+        assert args[0] == "alice"
+        assert json.loads(args[1])["username"] == "alice"
+
+    @pytest.mark.asyncio
+    async def test_remove_participant_by_field(self, manager):
+        """Test that leaving removes the user by key without scanning the room."""
+        manager, redis_client = manager
+        manager.redis.run_script.return_value = 4
+
+        remaining = await manager.remove_participant("room1", "alice")
+
+        assert remaining == 4
+        script, keys, args = manager.redis.run_script.await_args.args
+        assert script == REMOVE_PARTICIPANT_SCRIPT
+        assert keys[:3] == ("webrtc:participants:room1", "webrtc:presence:room1", "webrtc:room-state:room1")
+        assert args == ("alice", "room1")
+        redis_client.hvals.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_get_participants_decodes_hash_values(self, manager):
+        """Test that participants are read from the hash values."""
+        manager, redis_client = manager
+        redis_client.hvals.return_value = [
+            json.dumps({"username": "alice", "joined_at": "2024-01-01T00:00:00+00:00"}),
+            "not json",
+        ]
+
+        participants = await manager.get_participants("room1")
+
+        assert participants == [{"username": "alice", "joined_at": "2024-01-01T00:00:00+00:00"}]
+
+    @pytest.mark.asyncio
+    async def test_update_presence_only_touches_members(self, manager):
+        """Test that heartbeats never re-add a participant who already left."""
+        manager, redis_client = manager
+
+        await manager.update_presence("room1", "alice")
+
+        key, mapping = redis_client.zadd.await_args.args
+        assert key == "webrtc:presence:room1"
+        assert list(mapping) == ["alice"]
+        assert redis_client.zadd.await_args.kwargs == {"xx": True}
+
+    @pytest.mark.asyncio
+    async def test_reconcile_metrics_rebuilds_counters_from_hashes(self, fake_redis):
+        """Test that drifted room and participant counters are replaced by the registry's real counts."""
+        manager, redis_client = fake_redis
+        await redis_client.hset("webrtc:participants:room1", mapping={"alice": "{}", "bob": "{}"})
+        await redis_client.hset("webrtc:participants:room2", mapping={"carol": "{}"})
+        await redis_client.mset({"webrtc:metrics:participants": -2, "webrtc:metrics:active_rooms": 7})
+        await redis_client.zadd("webrtc:metrics:room_sizes", {"gone": 5})
+
+        assert await manager.reconcile_metrics() == {"active_rooms": 2, "participants": 3}
+
+        assert await redis_client.mget("webrtc:metrics:active_rooms", "webrtc:metrics:participants") == ["2", "3"]
+        assert await redis_client.zrange("webrtc:metrics:room_sizes", 0, -1, withscores=True) == [
+            ("room2", 1.0),
+            ("room1", 2.0),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_reconcile_metrics_runs_in_batches(self, fake_redis):
+        """Test that rooms are reconciled in bounded script calls."""
+        manager, redis_client = fake_redis
+        manager.RECONCILE_BATCH_SIZE = 2
+        for index in range(5):
+            await redis_client.hset(f"webrtc:participants:room{index}", mapping={"alice": "{}"})
+        await redis_client.zadd("webrtc:metrics:room_sizes", {"gone1": 3, "gone2": 1, "room0": 9})
+
+        with patch.object(redis_manager, "run_script", wraps=redis_manager.run_script) as run_script:
+            assert await manager.reconcile_metrics() == {"active_rooms": 5, "participants": 5}
+
+        assert max(len(call.args[1]) for call in run_script.await_args_list) <= 3
+        assert await redis_client.zscore("webrtc:metrics:room_sizes", "room0") == 1.0
+        assert await redis_client.zscore("webrtc:metrics:room_sizes", "gone1") is None
+
+    @pytest.mark.asyncio
+    async def test_emptied_room_clears_room_state(self, fake_redis):
+        """Test that roles and other room state are dropped when the last participant leaves."""
+        manager, redis_client = fake_redis
+        await manager.add_participant("room1", "alice")
+        await manager.add_participant("room1", "bob")
+        await redis_client.hset("webrtc:room-state:room1", mapping={"role:bob": "moderator", "hand:bob": "1"})
+
+        assert await manager.remove_participant("room1", "alice") == 1
+        assert await redis_client.hget("webrtc:room-state:room1", "role:bob") == "moderator"
+
+        assert await manager.remove_participant("room1", "bob") == 0
+        assert not await redis_client.exists(
+            "webrtc:participants:room1", "webrtc:presence:room1", "webrtc:room-state:room1"
+        )
+
+        await manager.add_participant("room1", "carol")
+        assert await redis_client.hkeys("webrtc:room-state:room1") == ["role:carol", "version"]
+        assert await redis_client.hget("webrtc:room-state:room1", "version") == "1"
+
+    @pytest.mark.asyncio
+    async def test_sweep_removes_only_expired_participants(self, fake_redis):
+        """Test that participants with an expired heartbeat are removed and announced."""
+        manager, redis_client = fake_redis
+        manager.publish_to_room = AsyncMock()
+        await manager.add_participant("room1", "alice")
+        await manager.add_participant("room1", "bob")
+        await redis_client.zadd("webrtc:presence:room1", {"bob": 0}, xx=True)
+
+        assert await manager.sweep_stale_participants() == 1
+
+        assert await redis_client.hkeys("webrtc:participants:room1") == ["alice"]
+        room_id, message = manager.publish_to_room.await_args.args
+        assert room_id == "room1"
+        assert message.type == MessageType.USER_LEFT
+        assert message.payload["username"] == "bob"
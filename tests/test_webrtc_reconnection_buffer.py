@@ -0,0 +1,100 @@
+"""Unit tests for the stream-based WebRTC reconnection buffer."""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from second_brain_database.webrtc.reconnection import ReconnectionManager
+from second_brain_database.webrtc.schemas import MessageType, WebRtcMessage
+
+
+@pytest.fixture
+def manager():
+    manager = ReconnectionManager(buffer_size=50, buffer_ttl=300)
+    redis_client = MagicMock()
+    pipeline = MagicMock()
+    pipeline.execute = AsyncMock(return_value=["1700000000000-0", True])
+    redis_client.pipeline.return_value = pipeline
+    redis_client.xrange = AsyncMock()
+    manager.redis = MagicMock()
+    manager.redis.get_redis = AsyncMock(return_value=redis_client)
+    return manager, redis_client, pipeline
+
+
+def _entry(entry_id, text):
+    message = WebRtcMessage(type=MessageType.CHAT_MESSAGE, payload={"text": text})
+    return entry_id, {"timestamp": "2024-01-01T00:00:00+00:00", "message": message.model_dump_json()}
+
+
+class TestReconnectionBuffer:
+    """Test ReconnectionManager stream buffering and replay."""
+
+    @pytest.mark.asyncio
+    async def test_buffer_message_single_round_trip(self, manager):
+        """Test that buffering is one pipelined XADD + EXPIRE returning the stream ID."""
+        manager, redis_client, pipeline = manager
+        message = WebRtcMessage(type=MessageType.CHAT_MESSAGE, payload={"text": "hi"})
+
+        sequence = await manager.buffer_message("room1", message)
+
+        assert sequence == "1700000000000-0"
+        pipeline.execute.assert_awaited_once()
+        key, fields = pipeline.xadd.call_args.args
+        assert key == "webrtc:reconnect:buffer:room1"
+        assert json.loads(fields["message"])["payload"] == {"text": "hi"}
+        assert pipeline.xadd.call_args.kwargs["maxlen"] == 50
+        pipeline.expire.assert_called_once_with("webrtc:reconnect:buffer:room1", 300)
+
+    @pytest.mark.asyncio
+    async def test_get_missed_messages_reads_after_sequence(self, manager):
+        """Test that replay starts after the last received stream ID."""
+        manager, redis_client, _ = manager
+        redis_client.xrange.return_value = [_entry("5-0", "seen"), _entry("6-0", "missed")]
+
+        missed = await manager.get_missed_messages("room1", last_sequence="5-0")
+
+        redis_client.xrange.assert_awaited_once_with("webrtc:reconnect:buffer:room1", min="5-0", max="+")
+        assert [m["sequence"] for m in missed] == ["6-0"]
+        assert missed[0]["message"]["payload"] == {"text": "missed"}
+
+    @pytest.mark.asyncio
+    async def test_replay_batches_buffered_json(self, manager):
+        """Test that replay groups the stored JSON into one batch frame in order."""
+        manager, redis_client, _ = manager
+        redis_client.xrange.return_value = [_entry(f"{i}-0", str(i)) for i in range(1, 46)]
+        missed = await manager.get_missed_messages("room1")
+        websocket = MagicMock()
+        websocket.send_text = AsyncMock()
+
+        sent = await manager.replay_missed_messages(websocket, missed)
+
+        assert sent == 45
+        websocket.send_text.assert_awaited_once()
+        frame = json.loads(websocket.send_text.await_args.args[0])
+        assert frame["type"] == MessageType.MESSAGE_BATCH.value
+        assert frame["payload"]["messages"] == [m["message"] for m in missed]
+
+    @pytest.mark.asyncio
+    async def test_replay_frames_respect_size_limit(self, manager):
+        """Test that replay frames stay under the size limit and a lone message is sent as is."""
+        manager, redis_client, _ = manager
+        manager.REPLAY_FRAME_MAX_BYTES = 400
+        redis_client.xrange.return_value = [_entry(f"{i}-0", str(i) * 40) for i in range(1, 10)]
+        missed = await manager.get_missed_messages("room1")
+        big = {"message_json": json.dumps({"type": "chat-message", "payload": {"text": "x" * 500}})}
+        websocket = MagicMock()
+        websocket.send_text = AsyncMock()
+
+        sent = await manager.replay_missed_messages(websocket, missed + [big])
+
+        assert sent == 10
+        frames = [call.args[0] for call in websocket.send_text.await_args_list]
+        assert frames[-1] == big["message_json"]
+        assert len(frames) > 2
+        replayed = []
+        for frame in frames[:-1]:
+            assert len(frame.encode()) <= 400
+            decoded = json.loads(frame)
+            replayed.extend(decoded["payload"]["messages"] if decoded["type"] == "message-batch" else [decoded])
+        assert replayed == [m["message"] for m in missed]
@@ -0,0 +1,156 @@
+"""Unit tests for the per-worker WebRTC room hub."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from second_brain_database.webrtc.codec import WIRE_JSON, WIRE_MSGPACK, decode_frame, encode_message
+from second_brain_database.webrtc.room_hub import WebRtcRoomHub
+from second_brain_database.webrtc.schemas import MessageType, WebRtcMessage
+
+
+def _message_json(sender_id, room_id="room1"):
+    return WebRtcMessage(
+        type=MessageType.CHAT_MESSAGE,
+        payload={"text": "hello"},
+        sender_id=sender_id,
+        room_id=room_id,
+    ).model_dump_json()
+
+
+async def _register(hub, room_id, username):
+    stream = hub.subscribe(room_id, username)
+    receive = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0)
+    return stream, receive
+
+
+async def _close(stream, receive):
+    receive.cancel()
+    try:
+        await receive
+    except asyncio.CancelledError:
+        pass
+    await stream.aclose()
+
+
+@pytest.fixture
+def hub():
+    hub = WebRtcRoomHub(queue_size=2)
+    hub._ensure_listener = AsyncMock()
+    return hub
+
+
+class TestWebRtcRoomHub:
+    """Test WebRtcRoomHub routing."""
+
+    @pytest.mark.asyncio
+    async def test_routes_raw_json_to_other_participants(self, hub):
+        """Test that messages reach other local sockets unchanged and skip the sender."""
+        alice, alice_next = await _register(hub, "room1", "alice")
+        bob, bob_next = await _register(hub, "room1", "bob")
+        data = _message_json("alice")
+
+        hub._dispatch("webrtc:room:room1", data)
+
+        assert await asyncio.wait_for(bob_next, 1) == data
+        await asyncio.sleep(0)
+        assert not alice_next.done()
+
+        await _close(alice, alice_next)
+        await bob.aclose()
+
+    @pytest.mark.asyncio
+    async def test_ignores_rooms_without_local_connections(self, hub):
+        """Test that other rooms' messages are skipped before parsing."""
+        stream, receive = await _register(hub, "room1", "bob")
+
+        hub._dispatch("webrtc:room:room2", "not json")
+
+        await asyncio.sleep(0)
+        assert not receive.done()
+
+        await _close(stream, receive)
+
+    @pytest.mark.asyncio
+    async def test_unregisters_on_close(self, hub):
+        """Test that closing a stream removes the connection and empty room."""
+        stream, receive = await _register(hub, "room1", "bob")
+        assert hub.local_connection_count == 1
+
+        await _close(stream, receive)
+
+        assert hub.local_connection_count == 0
+        assert "room1" not in hub._rooms
+
+    @pytest.mark.asyncio
+    async def test_slow_connection_drops_oldest(self, hub):
+        """Test that a full queue drops its oldest message instead of blocking."""
+        hub._rooms["room1"] = {0: ("bob", asyncio.Queue(maxsize=2))}
+        first, second, third = (_message_json(f"user{i}") for i in range(3))
+
+        for data in (first, second, third):
+            hub._dispatch("webrtc:room:room1", data)
+
+        queue = hub._rooms["room1"][0][1]
+        assert [queue.get_nowait(), queue.get_nowait()] == [second, third]
+
+    @pytest.mark.asyncio
+    async def test_json_worker_receives_msgpack_frames(self, hub):
+        """Test that a JSON worker reads raw bytes and re-encodes MessagePack frames for JSON sockets."""
+        pytest.importorskip("msgpack")
+        message = WebRtcMessage(
+            type=MessageType.CHAT_MESSAGE, payload={"text": "hello"}, sender_id="alice", room_id="room1"
+        )
+        published = asyncio.Event()
+
+        async def listen():
+            yield {"type": "pmessage", "channel": b"webrtc:room:room1", "data": encode_message(message, WIRE_MSGPACK)}
+            published.set()
+            await asyncio.Event().wait()
+
+        pubsub = MagicMock()
+        pubsub.psubscribe = AsyncMock()
+        pubsub.punsubscribe = AsyncMock()
+        pubsub.close = AsyncMock()
+        pubsub.listen = listen
+        hub.redis = MagicMock()
+        hub.redis.get_binary_redis = AsyncMock(return_value=MagicMock(pubsub=MagicMock(return_value=pubsub)))
+        hub.redis.get_redis = AsyncMock(side_effect=AssertionError("room channels must be read as bytes"))
+
+        bob, bob_next = await _register(hub, "room1", "bob")
+        with patch("second_brain_database.webrtc.codec.settings.WEBRTC_REDIS_WIRE_FORMAT", WIRE_JSON):
+            listener = asyncio.create_task(hub._listen())
+            await asyncio.wait_for(published.wait(), 1)
+
+        frame = await asyncio.wait_for(bob_next, 1)
+        assert isinstance(frame, str)
+        assert WebRtcMessage.model_validate(decode_frame(frame)) == message
+
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        await bob.aclose()
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_refreshes_local_presence(self, hub):
+        """Test that open local connections keep their presence fresh without re-adding departed users."""
+        pipeline = MagicMock()
+        pipeline.execute = AsyncMock()
+        hub.redis = MagicMock()
+        hub.redis.get_redis = AsyncMock(return_value=MagicMock(pipeline=MagicMock(return_value=pipeline)))
+        hub.HEARTBEAT_INTERVAL = 0
+        bob, bob_next = await _register(hub, "room1", "bob")
+
+        heartbeat = asyncio.create_task(hub._refresh_presence())
+        while not pipeline.execute.await_count:
+            await asyncio.sleep(0)
+        heartbeat.cancel()
+        await asyncio.gather(heartbeat, return_exceptions=True)
+
+        key, members = pipeline.zadd.call_args.args
+        assert key == "webrtc:presence:room1"
+        assert list(members) == ["bob"]
+        assert pipeline.zadd.call_args.kwargs == {"xx": True}
+
+        await _close(bob, bob_next)
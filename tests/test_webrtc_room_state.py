@@ -0,0 +1,82 @@
+"""Unit tests for the versioned WebRTC room state snapshot."""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from second_brain_database.webrtc.connection_manager import WebRtcManager
+from second_brain_database.webrtc.schemas import MessageType
+
+
+@pytest.fixture
+def manager():
+    manager = WebRtcManager()
+    redis_client = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    redis_client.pipeline = MagicMock(return_value=pipe)
+    manager.redis = MagicMock()
+    manager.redis.get_redis = AsyncMock(return_value=redis_client)
+    manager.redis.run_script = AsyncMock()
+    manager.publish_to_room = AsyncMock()
+    return manager, redis_client, pipe
+
+
+class TestRoomStateSnapshot:
+    """Test room state snapshots and versioned deltas."""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_single_round_trip(self, manager):
+        """Test that participants and every state section come from one transaction."""
+        manager, redis_client, pipe = manager
+        pipe.execute.return_value = [
+            [json.dumps({"username": "alice", "joined_at": "2024-01-01T00:00:00+00:00"})],
+            {
+                "version": "12",
+                "role:alice": "host",
+                "permissions:bob": json.dumps({"can_speak": False}),
+                "setting:lock_room": "true",
+                "hand:bob": json.dumps({"username": "bob", "raised_at": "2024-01-01T00:00:05Z"}),
+                "hand:carol": json.dumps({"username": "carol", "raised_at": "2024-01-01T00:00:01+00:00"}),
+                "waiting:dave": json.dumps({"username": "dave", "joined_at": "2024-01-01T00:00:02+00:00"}),
+            },
+        ]
+
+        snapshot = await manager.get_room_snapshot("room1")
+
+        redis_client.pipeline.assert_called_once_with(transaction=True)
+        assert snapshot["version"] == 12
+        assert snapshot["participant_count"] == 1
+        assert snapshot["roles"] == {"alice": "host"}
+        assert snapshot["permissions"] == {"bob": {"can_speak": False}}
+        assert snapshot["settings"]["lock_room"] is True
+        assert snapshot["settings"]["enable_chat"] is True
+        assert [(e["username"], e["position"]) for e in snapshot["hand_raise_queue"]] == [("carol", 1), ("bob", 2)]
+        assert snapshot["waiting_room"] == [{"username": "dave", "joined_at": "2024-01-01T00:00:02+00:00"}]
+
+    @pytest.mark.asyncio
+    async def test_update_broadcasts_versioned_delta(self, manager):
+        """Test that a change is applied atomically and broadcast with its version."""
+        manager, _, _ = manager
+        manager.redis.run_script.return_value = [7, 1]
+
+        await manager.set_user_role("room1", "bob", "moderator")
+
+        _, keys, args = manager.redis.run_script.await_args.args
+        assert keys == ("webrtc:room-state:room1",)
+        assert args == [manager.ROOM_STATE_TTL, 1, "role:bob", "moderator"]
+        room_id, message = manager.publish_to_room.await_args.args
+        assert message.type == MessageType.ROOM_STATE_DELTA
+        assert message.payload == {"version": 7, "section": "roles", "key": "bob", "value": "moderator"}
+
+    @pytest.mark.asyncio
+    async def test_noop_removal_is_not_broadcast(self, manager):
+        """Test that removing an absent entry does not publish a delta."""
+        manager, _, _ = manager
+        manager.redis.run_script.return_value = [7, 0]
+
+        await manager.remove_from_waiting_room("room1", "erin")
+
+        assert manager.redis.run_script.await_args.args[2] == [manager.ROOM_STATE_TTL, 0, "waiting:erin"]
+        manager.publish_to_room.assert_not_awaited()
@@ -0,0 +1,90 @@
+"""Unit tests for the batched WebRTC write buffer."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from second_brain_database.webrtc.write_buffer import WebRtcWriteBuffer
+
+
+def _collection(name):
+    collection = MagicMock()
+    collection.name = name
+    collection.insert_one = AsyncMock()
+    collection.insert_many = AsyncMock()
+    return collection
+
+
+class TestWebRtcWriteBuffer:
+    """Test WebRtcWriteBuffer batching and backpressure."""
+
+    @pytest.mark.asyncio
+    async def test_inserts_directly_when_not_running(self):
+        """Test that documents bypass the buffer before it is started."""
+        buffer = WebRtcWriteBuffer()
+        collection = _collection("webrtc_chat_messages")
+
+        await buffer.insert(collection, {"message_id": "m1"})
+
+        collection.insert_one.assert_awaited_once_with({"message_id": "m1"})
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_batches_per_collection(self):
+        """Test that queued documents become one insert_many per collection on shutdown."""
+        buffer = WebRtcWriteBuffer(flush_interval=60)
+        chat = _collection("webrtc_chat_messages")
+        analytics = _collection("webrtc_analytics_events")
+        await buffer.start()
+
+        for i in range(3):
+            await buffer.insert(chat, {"message_id": f"m{i}"})
+        await buffer.insert(analytics, {"event_id": "e1"})
+        assert buffer.pending == 4
+
+        await buffer.stop()
+
+        chat.insert_one.assert_not_awaited()
+        chat.insert_many.assert_awaited_once_with(
+            [{"message_id": "m0"}, {"message_id": "m1"}, {"message_id": "m2"}], ordered=False
+        )
+        analytics.insert_many.assert_awaited_once_with([{"event_id": "e1"}], ordered=False)
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_waits_for_flush(self):
+        """Test that producers block until a flush makes room."""
+        buffer = WebRtcWriteBuffer(flush_interval=60, max_batch_size=100, max_pending=2)
+        chat = _collection("webrtc_chat_messages")
+        await buffer.start()
+
+        await buffer.insert(chat, {"message_id": "m0"})
+        await buffer.insert(chat, {"message_id": "m1"})
+        blocked = asyncio.ensure_future(buffer.insert(chat, {"message_id": "m2"}))
+
+        await asyncio.wait_for(blocked, 1)
+
+        chat.insert_many.assert_awaited_once_with([{"message_id": "m0"}, {"message_id": "m1"}], ordered=False)
+        assert buffer.pending == 1
+        await buffer.stop()
+
+    @pytest.mark.asyncio
+    async def test_retries_counted_per_collection(self):
+        """Test that a healthy collection does not reset another collection's retry count."""
+        buffer = WebRtcWriteBuffer(flush_interval=60, max_retries=2)
+        chat = _collection("webrtc_chat_messages")
+        chat.insert_many.side_effect = ConnectionError("primary stepped down")
+        analytics = _collection("webrtc_analytics_events")
+        await buffer.start()
+
+        await buffer.insert(chat, {"message_id": "m0"})
+        for i in range(2):
+            await buffer.insert(analytics, {"event_id": f"e{i}"})
+            await buffer.flush()
+
+        assert chat.insert_many.await_count == 2
+        assert analytics.insert_many.await_count == 2
+        assert buffer.pending == 0
+        await buffer.stop()
+        assert chat.insert_many.await_count == 2